@@ -19,8 +19,11 @@ Contains the PCBO class. See ``help(qubovert.PCBO)``.
 """
 
 from . import PUBO
-from .utils import QUBOVertWarning, num_bits, approximate_pubo_extrema
+from .utils import (
+    QUBOVertWarning, num_bits, approximate_pubo_extrema, hash_function
+)
 from .sat import OR, XOR, BUFFER, NOT, AND
+import numpy as np
 
 
 __all__ = 'PCBO', 'boolean_var', 'integer_var'
@@ -125,7 +128,8 @@ def _special_constraints_le_zero(pcbo, P, lam, log_trick, bounds):
             ancillas[(pcbo._next_ancilla,)] += 1
 
         diff = P_wo_offset - ancillas
-        pcbo += lam * diff * diff
+        if not _add_linear_square(pcbo, diff, lam):
+            pcbo += lam * diff * diff
 
         return True
 
@@ -149,6 +153,84 @@ def _special_constraints_le_zero(pcbo, P, lam, log_trick, bounds):
 
 # helpers
 
+def _add_linear_square(pcbo, P, lam, spin=False):
+    """_add_linear_square.
+
+    If ``P`` is linear, ie ``P = c + sum_i a_i x_i``, then add
+    ``lam * P**2`` to ``pcbo`` in closed form. Since ``x_i**2 == x_i``,
+
+    ``P**2 = c**2 + sum_i (a_i**2 + 2 c a_i) x_i
+    + sum_{i<j} 2 a_i a_j x_i x_j``,
+
+    and for spins, since ``z_i**2 == 1``,
+
+    ``P**2 = c**2 + sum_i a_i**2 + sum_i 2 c a_i z_i
+    + sum_{i<j} 2 a_i a_j z_i z_j``.
+
+    The coefficients are computed with vectorized numpy operations and the
+    terms are added to ``pcbo`` in one pass, instead of multiplying the models
+    term by term. The variables of ``P`` that are not yet in the mapping of
+    ``pcbo`` are added to it in the order that they appear in ``P``.
+
+    Parameters
+    ----------
+    pcbo : PCBO or PCSO object.
+        The model to add the penalty to.
+    P : PUBO or PUSO object.
+    lam : float > 0 or sympy.Symbol.
+        Langrange multiplier to penalize violations of the constraint.
+    spin : bool (optional, defaults to False).
+        Whether ``P`` and ``pcbo`` are spin models.
+
+    Return
+    ------
+    success : bool.
+        True if ``P`` is linear with numeric coefficients, so the penalty was
+        added to ``pcbo``, else False.
+
+    """
+    if P.degree > 1:
+        return False
+    keys = [k for k in P if k]
+    a = np.array([P[k] for k in keys])
+    if (
+        a.dtype.kind not in "if" or not isinstance(P.offset, (int, float)) or
+        # don't let the products of integers overflow
+        (a.dtype.kind == "i" and len(a) and np.abs(a).max() >= 1 << 31)
+    ):
+        return False
+    c, n = P.offset, len(keys)
+
+    labels = np.empty(n, dtype=object)
+    labels[:] = [k[0] for k in keys]
+    pcbo._add_to_mapping(labels.tolist())
+
+    # put each pair of variables in the order that keys are sorted in.
+    rank = np.empty(n, dtype=int)
+    rank[sorted(range(n), key=lambda i: hash_function(labels[i]))] = (
+        np.arange(n)
+    )
+    i, j = np.triu_indices(n, 1)
+    swap = rank[i] > rank[j]
+    i, j = np.where(swap, j, i), np.where(swap, i, j)
+
+    if spin:
+        items = {(): c * c + (a * a).sum().item()}
+        items.update(zip(keys, (2 * c * a).tolist()))
+    else:
+        items = {(): c * c}
+        items.update(zip(keys, (a * a + 2 * c * a).tolist()))
+    items.update(zip(
+        zip(labels[i].tolist(), labels[j].tolist()),
+        (2 * a[i] * a[j]).tolist()
+    ))
+
+    if lam != 1:
+        items = {k: lam * v for k, v in items.items()}
+    pcbo._add_items(items)
+    return True
+
+
 def _get_bounds(P, bounds):
     """_get_bounds.
 
@@ -441,11 +523,44 @@ class PCBO(PUBO):
         # use self.__class__ here because PCSO uses this code as well.
         super(self.__class__, self).__init__(*args, **kwargs)
         if len(args) == 1 and isinstance(args[0], self.__class__):
-            self._constraints = args[0].constraints
-            self._ancilla = args[0].num_ancillas
+            self._share_constraints(args[0])
         else:
             self._ancilla, self._constraints = 0, {}
 
+    def _share_constraints(self, other):
+        """_share_constraints.
+
+        Internal method to give ``self`` the constraints of ``other``. The
+        constraint models are never modified after they are added, so the
+        models themselves are shared and only the lists that hold them are
+        copied.
+
+        Parameters
+        ----------
+        other : PCBO object.
+
+        """
+        self._constraints = {
+            k: list(v) for k, v in other._constraints.items()
+        }
+        self._ancilla = other._ancilla
+
+    def _copy_attributes(self, other):
+        """_copy_attributes.
+
+        Internal method to set the attributes of a copy of ``other``. See
+        ``help(qubovert.utils.DictArithmetic._copy_attributes)``. The
+        constraints are shared with ``other``, see ``_share_constraints``.
+
+        Parameters
+        ----------
+        other : PCBO object.
+
+        """
+        # use self.__class__ here because PCSO uses this code as well.
+        super(self.__class__, self)._copy_attributes(other)
+        self._share_constraints(other)
+
     def update(self, *args, **kwargs):
         """update.
 
@@ -486,6 +601,40 @@ class PCBO(PUBO):
         """
         return {k: [x.copy() for x in v] for k, v in self._constraints.items()}
 
+    @property
+    def one_hot_groups(self):
+        """one_hot_groups.
+
+        Return the groups of variables that are constrained to be one-hot, ie
+        the groups of variables for which an equality constraint enforces
+        that exactly one of them is 1. These are the equality constraints
+        ``P == 0`` where ``P`` is a multiple of ``sum(x) - 1``. The groups
+        can be given to the ``one_hot_groups`` argument of
+        ``qubovert.sim.anneal_pubo`` and ``qubovert.sim.anneal_qubo``.
+
+        Return
+        ------
+        res : list of tuples.
+            Each tuple contains the labels of the variables in a group.
+
+        Example
+        -------
+        >>> from qubovert import PCBO, boolean_var
+        >>> x = [boolean_var(i) for i in range(3)]
+        >>> H = PCBO().add_constraint_eq_zero(x[0] + x[1] + x[2] - 1)
+        >>> H.one_hot_groups
+        [(0, 1, 2)]
+
+        """
+        groups = []
+        for P in self._constraints.get('eq', []):
+            c = -P.offset
+            if c and P.degree == 1 and all(
+                len(k) == 1 and v == c for k, v in P.items() if k
+            ):
+                groups.append(tuple(k[0] for k in P if k))
+        return groups
+
     def _append_constraint(self, key, constraint):
         """_append_constraint.
 
@@ -753,7 +902,7 @@ class PCBO(PUBO):
             self += lam * P
         elif max_val == 0:
             self -= lam * P
-        else:
+        elif not _add_linear_square(self, P, lam):
             self += lam * P * P
 
         return self
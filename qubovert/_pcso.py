@@ -19,6 +19,7 @@ Contains the PCSO class. See ``help(qubovert.PCSO)``.
 """
 
 from . import PUSO, PCBO
+from ._pcbo import _add_linear_square, _get_bounds
 from .utils import puso_to_pubo, pubo_to_puso
 
 
@@ -196,6 +197,32 @@ class PCSO(PUSO):
         """
         PCBO.__init__(self, *args, **kwargs)
 
+    def _copy_attributes(self, other):
+        """_copy_attributes.
+
+        Internal method to set the attributes of a copy of ``other``. See
+        ``help(qubovert.PCBO._copy_attributes)``.
+
+        Parameters
+        ----------
+        other : PCSO object.
+
+        """
+        PCBO._copy_attributes(self, other)
+
+    def _share_constraints(self, other):
+        """_share_constraints.
+
+        Internal method to give ``self`` the constraints of ``other``. See
+        ``help(qubovert.PCBO._share_constraints)``.
+
+        Parameters
+        ----------
+        other : PCSO object.
+
+        """
+        PCBO._share_constraints(self, other)
+
     def update(self, *args, **kwargs):
         """update.
 
@@ -231,6 +258,42 @@ class PCSO(PUSO):
         """
         return {k: [x.copy() for x in v] for k, v in self._constraints.items()}
 
+    @property
+    def one_hot_groups(self):
+        """one_hot_groups.
+
+        Return the groups of spins that are constrained to be one-hot, ie the
+        groups of spins for which an equality constraint enforces that
+        exactly one of them is -1. These are the equality constraints
+        ``P == 0`` where ``P`` is a multiple of ``sum(z) - (len(z) - 2)``,
+        which is the spin version of ``sum(x) - 1``. The groups can be given
+        to the ``one_hot_groups`` argument of ``qubovert.sim.anneal_puso``
+        and ``qubovert.sim.anneal_quso``.
+
+        Return
+        ------
+        res : list of tuples.
+            Each tuple contains the labels of the spins in a group.
+
+        Example
+        -------
+        >>> from qubovert import PCSO, spin_var
+        >>> z = [spin_var(i) for i in range(3)]
+        >>> H = PCSO().add_constraint_eq_zero(z[0] + z[1] + z[2] - 1)
+        >>> H.one_hot_groups
+        [(0, 1, 2)]
+
+        """
+        groups = []
+        for P in self._constraints.get('eq', []):
+            group = tuple(k[0] for k in P if k)
+            c = P[(group[0],)] if group else 0
+            if c and P.degree == 1 and all(
+                len(k) == 1 and v == c for k, v in P.items() if k
+            ) and P.offset == -c * (len(group) - 2):
+                groups.append(group)
+        return groups
+
     def _append_constraint(self, key, constraint):
         """_append_constraint.
 
@@ -402,11 +465,21 @@ class PCSO(PUSO):
         if not lam:
             return self
 
+        # the same penalty as the PCBO would add, but without converting the
+        # square of a linear constraint from boolean to spin term by term.
+        if H.degree <= 1:
+            min_val, max_val = _get_bounds(puso_to_pubo(H), bounds)
+            if min_val < 0 < max_val and _add_linear_square(
+                self, H, lam, spin=True
+            ):
+                return self
+
         h = _empty_pcbo(self).add_constraint_eq_zero(
             puso_to_pubo(H), lam=lam,
             bounds=bounds, suppress_warnings=suppress_warnings
         )
         self._ancilla = h._ancilla
+        self._add_to_mapping(h.mapping)
         self += pubo_to_puso(h)
         return self
 
@@ -472,6 +545,7 @@ class PCSO(PUSO):
             bounds=bounds, suppress_warnings=suppress_warnings
         )
         self._ancilla = h._ancilla
+        self._add_to_mapping(h.mapping)
         self += pubo_to_puso(h)
         return self
 
@@ -551,6 +625,7 @@ class PCSO(PUSO):
             bounds=bounds, suppress_warnings=suppress_warnings
         )
         self._ancilla = h._ancilla
+        self._add_to_mapping(h.mapping)
         self += pubo_to_puso(h)
         return self
 
@@ -633,6 +708,7 @@ class PCSO(PUSO):
             bounds=bounds, suppress_warnings=suppress_warnings
         )
         self._ancilla = h._ancilla
+        self._add_to_mapping(h.mapping)
         self += pubo_to_puso(h)
         return self
 
@@ -711,6 +787,7 @@ class PCSO(PUSO):
             bounds=bounds, suppress_warnings=suppress_warnings
         )
         self._ancilla = h._ancilla
+        self._add_to_mapping(h.mapping)
         self += pubo_to_puso(h)
         return self
 
@@ -792,5 +869,6 @@ class PCSO(PUSO):
             bounds=bounds, suppress_warnings=suppress_warnings
         )
         self._ancilla = h._ancilla
+        self._add_to_mapping(h.mapping)
         self += pubo_to_puso(h)
         return self
@@ -19,17 +19,266 @@ Contains the PUBO class. See ``help(qubovert.PUBO)``.
 """
 
 from collections import defaultdict
+from bisect import insort
+import numpy as np
 from .utils import BO, PUBOMatrix, QUBOMatrix
 from . import QUBO
-# in PUBO._reduce_degree, we use PCBO.add_constraint_AND. But PCBO inherits
-# from PUBO, so can't say `from . import PCBO` here. Instead, just import
-# qubovert
-import qubovert as qv
 
 
 __all__ = 'PUBO',
 
 
+def _reduce_pairs(terms, deg, pairs, ancilla):
+    """_reduce_pairs.
+
+    Choose the variable pairs to replace with ancillas so that every term has
+    at most ``deg`` variables.
+
+    If ``pairs`` is given, then first each term is reduced with the pairs in
+    ``pairs`` and the pairs that have already been reduced, taking the first
+    one that it contains at each step, which is how the user's pairs are
+    meant to be followed. Then the rest of the pairs are kept in a priority
+    queue keyed by the number of terms above degree ``deg`` that they appear
+    in. The frequencies are small integers, so the queue is a list of
+    buckets, one for each frequency. The most frequent pair ``(x, y)`` is
+    popped, a new ancilla ``z`` is created, and ``(x, y)`` is replaced by
+    ``z`` in every term that contains both of them, so each reduction is
+    found once and used everywhere. The frequencies of the pairs in the
+    modified terms are updated incrementally, and pairs whose frequency
+    dropped since they were pushed are moved to the right bucket when they
+    are popped.
+
+    This greedy choice is a heuristic. It usually needs fewer ancillas than
+    reducing the terms one after the other, but for some models it needs
+    more ancillas or gives more terms.
+
+    Parameters
+    ----------
+    terms : list of tuples of ints.
+        The sorted variables of each term with more than ``deg`` variables.
+        The list is modified in place to hold the reduced terms. The terms
+        are tuples rather than lists because the garbage collector stops
+        tracking tuples of ints, and there can be millions of them.
+    deg : int >= 2.
+        The degree to reduce to.
+    pairs : set of tuples.
+        Sorted variable pairs to reduce before any others.
+    ancilla : int.
+        The label of the first ancilla. It must be larger than every
+        variable in ``terms``.
+
+    Returns
+    -------
+    reductions : list of tuples (x, y, z, uses).
+        Ancilla ``z`` replaces the pair ``(x, y)``, and ``uses`` is the list
+        of the indices of the terms that it was substituted into.
+
+    """
+    reductions, reduced = [], {}
+
+    def reduce(pair, t):
+        if pair not in reduced:
+            reduced[pair] = len(reductions)
+            reductions.append(pair + (ancilla + len(reductions), []))
+        x, y, z, uses = reductions[reduced[pair]]
+        uses.append(t)
+        term = [w for w in terms[t] if w != x and w != y]
+        insort(term, z)
+        terms[t] = tuple(term)
+
+    # the second pass picks up the reductions that were found after a term
+    # was passed over.
+    for _ in range(2 if pairs else 0):
+        for t in range(len(terms)):
+            while len(terms[t]) > deg:
+                term = terms[t]
+                pair = next((
+                    (x, y) for i, x in enumerate(term) for y in term[i+1:]
+                    if (x, y) in reduced or (x, y) in pairs
+                ), None)
+                if pair is None:
+                    break
+                reduce(pair, t)
+
+    # the pairs are encoded as the ints x * M + y, which are much faster to
+    # hash than tuples. The ancillas that are still to come are at most the
+    # total number of variables above degree deg.
+    active = [t for t, term in enumerate(terms) if len(term) > deg]
+    first_new = ancilla + len(reductions)
+    M = first_new + sum(len(terms[t]) - deg for t in active)
+
+    # index the terms that each pair is in. The terms only lose the pairs
+    # that they start with, so that index is built once with numpy, in the
+    # compressed sparse row style, and the terms that the ancillas are
+    # substituted into are kept in ``terms_with``.
+    by_length = defaultdict(list)
+    for t in active:
+        by_length[len(terms[t])].append(t)
+    codes, occurrences = [np.zeros(0, dtype=np.int64)], [np.zeros(0, int)]
+    for length, ts in by_length.items():
+        array = np.array([terms[t] for t in ts], dtype=np.int64)
+        i, j = np.triu_indices(length, 1)
+        codes.append((array[:, i] * M + array[:, j]).ravel())
+        occurrences.append(np.repeat(ts, len(i)))
+    codes, occurrences = np.concatenate(codes), np.concatenate(occurrences)
+    order = np.argsort(codes, kind='stable')
+    codes, starts, counts = np.unique(
+        codes[order], return_index=True, return_counts=True
+    )
+    occurrences = occurrences[order]
+    del order
+    # the buckets share the int objects of the keys of ``frequency``.
+    code_list = codes.tolist()
+    frequency = defaultdict(int, zip(code_list, counts.tolist()))
+    terms_with = defaultdict(list)
+
+    # buckets[f] holds the pairs that had frequency f when they were pushed.
+    # The pairs are popped from the end, so ties are broken by the smallest
+    # labels first.
+    buckets = [[] for _ in range(counts.max() + 1 if len(counts) else 1)]
+    for f in np.unique(counts).tolist():
+        buckets[f] = [
+            code_list[i] for i in np.flatnonzero(counts == f)[::-1].tolist()
+        ]
+    del code_list
+
+    f = len(buckets) - 1
+    while f:
+        if not buckets[f]:
+            f -= 1
+            continue
+        p = buckets[f].pop()
+        if frequency[p] != f:
+            if frequency[p]:
+                buckets[frequency[p]].append(p)
+            continue
+
+        x, y = divmod(p, M)
+        if y < first_new:
+            i = np.searchsorted(codes, p)
+            candidates = occurrences[starts[i]:starts[i]+counts[i]].tolist()
+        else:
+            candidates = terms_with[y]
+
+        # z is a new ancilla, so it is larger than every other label and can
+        # be appended to the terms.
+        z, uses, neighbors = ancilla + len(reductions), [], set()
+        reductions.append((x, y, z, uses))
+        for t in candidates:
+            term = terms[t]
+            if len(term) <= deg or x not in term or y not in term:
+                continue
+            others = [w for w in term if w != x and w != y]
+            frequency[p] -= 1
+            for w in others:
+                frequency[x * M + w if x < w else w * M + x] -= 1
+                frequency[y * M + w if y < w else w * M + y] -= 1
+            uses.append(t)
+            terms[t] = (*others, z)
+            if len(others) >= deg:
+                terms_with[z].append(t)
+                neighbors.update(others)
+                for w in others:
+                    frequency[w * M + z] += 1
+            else:
+                # the term is reduced, so its pairs are no longer counted.
+                for i, a in enumerate(others):
+                    for b in others[i+1:]:
+                        frequency[a * M + b] -= 1
+
+        # only the pairs with z became more frequent.
+        for w in neighbors:
+            g = frequency[w * M + z]
+            while len(buckets) <= g:
+                buckets.append([])
+            buckets[g].append(w * M + z)
+            f = max(f, g)
+
+    return reductions
+
+
+def _sign(v):
+    """_sign.
+
+    The sign of a coefficient, or 0 if it is not known, ie if ``v`` is a
+    ``sympy`` expression with free symbols.
+
+    Parameters
+    ----------
+    v : number or sympy expression.
+
+    Returns
+    -------
+    sign : int in ``(-1, 0, 1)``.
+
+    """
+    try:
+        return 1 if v > 0 else -1 if v < 0 else 0
+    except TypeError:
+        return 0
+
+
+def _freedman(term, v, w):
+    """_freedman.
+
+    Reduce the negative term ``v x_1 ... x_d`` to a quadratic with the single
+    ancilla ``w``, with the reduction of Freedman, Kolmogorov and Zabih,
+    ``v x_1 ... x_d = min_w v w (x_1 + ... + x_d - (d - 1))``.
+
+    Parameters
+    ----------
+    term : tuple of ints.
+        The variables ``x_1, ..., x_d``.
+    v : number < 0.
+        The coefficient of the term.
+    w : int.
+        The label of the ancilla.
+
+    Returns
+    -------
+    items : list of tuples (key, value).
+        The terms of the quadratic.
+
+    """
+    return [((w,), -v * (len(term) - 1))] + [((x, w), v) for x in term]
+
+
+def _ishikawa(term, v, w):
+    """_ishikawa.
+
+    Reduce the positive term ``v x_1 ... x_d`` to a quadratic with the
+    ``floor((d - 1) / 2)`` ancillas ``w, w + 1, ...``, with the reduction of
+    Ishikawa, ``v x_1 ... x_d = min_w v (S_2 + sum_i w_i (c_i (2 i - S_1) -
+    1))``, where ``S_1`` is the sum of the variables, ``S_2`` is the sum of
+    their pairwise products, and ``c_i`` is 1 for the last ancilla if ``d`` is
+    odd and 2 otherwise. See https://doi.org/10.1109/TPAMI.2010.91.
+
+    Parameters
+    ----------
+    term : tuple of ints.
+        The variables ``x_1, ..., x_d``.
+    v : number > 0.
+        The coefficient of the term.
+    w : int.
+        The label of the first ancilla.
+
+    Returns
+    -------
+    items : list of tuples (key, value).
+        The terms of the quadratic.
+
+    """
+    d, items = len(term), []
+    n = (d - 1) // 2
+    for i, x in enumerate(term):
+        items.extend(((x, y), v) for y in term[i+1:])
+    for i in range(1, n + 1):
+        c = 1 if d % 2 and i == n else 2
+        items.append(((w + i - 1,), v * (2 * c * i - 1)))
+        items.extend(((x, w + i - 1), -v * c) for x in term)
+    return items
+
+
 class PUBO(BO, PUBOMatrix):
     """PUBO.
 
@@ -178,7 +427,7 @@ class PUBO(BO, PUBOMatrix):
         """
         return 1 + abs(v)
 
-    def _reduce_degree(self, D, deg, lam, pairs):
+    def _reduce_degree(self, D, deg, lam, pairs, reduction='substitution'):
         """_reduce_degree.
 
         Reduce the degree of the higher order model to a degree ``deg`` model.
@@ -224,18 +473,94 @@ class PUBO(BO, PUBOMatrix):
             is None, then it will be the empty set ``set()``. In other words,
             no variable pairs will be prioritized, and instead variable pairs
             will be chosen to reduce to an ancilla bases solely on frequency
-            of occurrance.
+            of occurrance. The most frequent pair is reduced first, which is
+            a heuristic, so the number of ancillas and terms is not
+            guaranteed to be the smallest possible.
+        reduction : str.
+            How the terms with more than ``deg`` variables are reduced. With
+            ``'substitution'``, pairs of variables are replaced by ancillas as
+            described above. With ``'freedman'``, negative terms are instead
+            reduced to quadratics with one ancilla each, and with
+            ``'ishikawa'``, positive terms are also reduced to quadratics,
+            with ``floor((d - 1) / 2)`` ancillas for a term of degree ``d``.
+            These reductions need no penalties, so ``lam`` is not used for
+            them, but they only hold at the minimum over the ancillas. Terms
+            whose sign is not known (ie ``sympy`` expressions) are always
+            reduced by substitution.
+
+        Return
+        ------
+        None. ``D`` will be updated in place!
+
+        Raises
+        ------
+        ValueError if ``deg < 2`` or ``reduction`` is not one of
+        ``'substitution'``, ``'freedman'``, or ``'ishikawa'``.
+
+        """
+        # map the pair variables
+        pairs = {
+            tuple(sorted(self._mapping[i] for i in p))
+            if all(i in self._mapping for i in p) else ()
+            for p in pairs or {}
+        }
+
+        # the ancillas are labeled from the next available label. Variables
+        # that only appear in terms with zero coefficients are still mapped,
+        # so they are counted too.
+        PUBO._reduce_terms(
+            D, (
+                (tuple(sorted(self._mapping[i] for i in k)), v)
+                for k, v in self.items()
+            ),
+            deg, lam, pairs, reduction,
+            max(self._mapping.values(), default=-1) + 1
+        )
+
+    @staticmethod
+    def _reduce_terms(D, items, deg, lam, pairs, reduction, ancilla):
+        """_reduce_terms.
+
+        Reduce the degree of the terms in ``items``, whose variables are
+        already integers, and add them to ``D``. This is the part of
+        ``_reduce_degree`` that does not depend on the labels of the model, so
+        that ``qubovert.utils.CompactPUBOMatrix`` can reduce its terms without
+        building a PUBO.
+
+        Parameters
+        ----------
+        D : ``qubovert.utils.QUBOMatrix`` or ``qubovert.utils.QUSOMatrix``.
+            The dictionary to fill. See ``_reduce_degree``.
+        items : iterable of tuples (key, value).
+            The terms to reduce. Each key is a sorted tuple of integers.
+        deg : int >= 2.
+            The degree to reduce to. If ``deg`` is None, then the degree will
+            not be reduced.
+        lam, reduction : see ``_reduce_degree``.
+        pairs : set.
+            The pairs of integer variables to prioritize. See
+            ``_reduce_degree``.
+        ancilla : int.
+            The label of the first ancilla. It must be larger than every
+            variable in ``items``.
 
         Return
         ------
         None. ``D`` will be updated in place!
 
+        Raises
+        ------
+        ValueError if ``deg < 2`` or ``reduction`` is not one of
+        ``'substitution'``, ``'freedman'``, or ``'ishikawa'``.
+
         """
         if deg is not None and deg < 2:
             raise ValueError("deg must be >= 2")
-        if deg is None:
-            deg = self.degree
-
+        if reduction not in ('substitution', 'freedman', 'ishikawa'):
+            raise ValueError(
+                "reduction must be one of 'substitution', 'freedman', and "
+                "'ishikawa'"
+            )
         if lam is None:
             func_lam = PUBO.default_lam
         elif callable(lam):
@@ -243,95 +568,57 @@ class PUBO(BO, PUBOMatrix):
         else:
             def func_lam(v): return lam
 
-        # map the pair variables
-        pairs = {
-            tuple(sorted(self._mapping[i] for i in p))
-            if all(i in self._mapping for i in p) else ()
-            for p in pairs or {}
-        }
-
-        # determine the most common pairs
-        pair_frequencies, mapped_self = defaultdict(int), {}
-        for k, v in self.items():
-            key = tuple(sorted(self._mapping[i] for i in k))
-            mapped_self[key] = mapped_self.get(key, 0) + v
-            len_key = len(key)
-            for i in range(len_key):
-                for j in range(i + 1, len_key):
-                    pair = key[i], key[j]
-                    pair_frequencies[pair] += 1
-
-        # next available label
-        ancilla = self.num_binary_variables
-
-        # do the reductions
-        reductions = {}
-        for key, v in mapped_self.items():
-            # find a reduction if len(key) > deg
-            while len(key) > deg:
-                # find a variable pair in k that has already been reduced.
-                in_pairs, previously_used = False, False
-                best_pair = None, None
-                for i, x in enumerate(key[:-1]):
-                    for y in key[i+1:]:
-                        pair = x, y
-                        if pair in reductions:
-                            previously_used = True
-                            break
-                        # prioritize the pairs that the user picked.
-                        elif pair in pairs:
-                            in_pairs = True
-                            best_pair = None, pair
-                            break
-                        elif (best_pair[0] is None or
-                              pair_frequencies[pair] > best_pair[0]):
-                            best_pair = pair_frequencies[pair], pair
-                    if previously_used or in_pairs:
-                        break
-
-                if previously_used:
-                    # z is the ancilla variable for this reduction
-                    z = reductions[(x, y)]
+        # the terms that are already small enough go straight into D, and the
+        # terms that are reduced to quadratics without substitution are kept
+        # in ``quadratics``.
+        signs = {'substitution': (), 'freedman': (-1,), 'ishikawa': (-1, 1)}
+        signs = signs[reduction]
+        terms, values, quadratics = [], [], []
+
+        def small_items():
+            for key, v in items:
+                if deg is None or len(key) <= deg:
+                    yield key, v
+                elif signs and _sign(v) in signs:
+                    quadratics.append((key, v))
+                else:
+                    terms.append(key)
+                    values.append(v)
+
+        # the terms are summed straight into D in this order, so that a large
+        # model is never held twice.
+        D._sum_items(small_items())
+        reductions = _reduce_pairs(terms, deg, pairs, ancilla)
+
+        def reduced_items():
+            a = ancilla + len(reductions)
+            for key, v in quadratics:
+                if v < 0:
+                    yield from _freedman(key, v, a)
+                    a += 1
                 else:
-                    # we haven't already reduced the
-                    # variable pair (x, y), so take the pair that has the
-                    # greatest frequency or that is in pairs.
-                    x, y = best_pair[1]
-                    z = ancilla
-                    reductions[(x, y)] = z
-                    ancilla += 1
-                    pair_frequencies[(x, z)] += 1
-                    pair_frequencies[(y, z)] += 1
-
-                # note we add the constraint even if we've already added
-                # it before (if found is True). This is because if we use
-                # the reduction multiple times, we need to enforce it
-                # multiple times.
-
-                # enforce that z == x y
-                D += qv.PCBO().add_constraint_eq_AND(
-                    z, x, y, lam=func_lam(v)
-                )
-
-                # key is sorted, but it is not necessarily the case that
-                # z > all of the other elements in key. So let's efficiently
-                # figure out where to put z (without calling sorted)
-
-                old_key, key, z_inserted = key, (), False
-                for i in old_key:
-                    if i in (x, y):
-                        continue
-                    elif not z_inserted and z < i:
-                        key += (z, i)
-                        z_inserted = True
-                    else:
-                        key += (i,)
-                if not z_inserted:
-                    key += (z,)
-
-            D[key] += v
-
-    def to_pubo(self, deg=None, lam=None, pairs=None):
+                    yield from _ishikawa(key, v, a)
+                    a += (len(key) - 1) // 2
+
+            # enforce that z == x y with the penalty
+            # ``lam * (3 z + x y - 2 x z - 2 y z)``, see
+            # ``qubovert.PCBO.add_constraint_eq_AND``. The penalty is added
+            # once for every term that the reduction is used in, with the
+            # ``lam`` of that term, so the weights are summed and each
+            # penalty is emitted once.
+            for x, y, z, uses in reductions:
+                weight = sum(func_lam(values[t]) for t in uses)
+                yield (z,), 3 * weight
+                yield (x, y), weight
+                yield (x, z), -2 * weight
+                yield (y, z), -2 * weight
+
+            yield from zip(terms, values)
+
+        D._sum_items(reduced_items())
+
+    def to_pubo(self, deg=None, lam=None, pairs=None,
+                reduction='substitution'):
         """to_pubo.
 
         Create and return upper triangular degree ``deg`` PUBO representing the
@@ -366,7 +653,20 @@ class PUBO(BO, PUBOMatrix):
             is None, then it will be the empty set ``set()``. In other words,
             no variable pairs will be prioritized, and instead variable pairs
             will be chosen to reduce to an ancilla bases solely on frequency
-            of occurrance.
+            of occurrance. The most frequent pair is reduced first, which is
+            a heuristic, so the number of ancillas and terms is not
+            guaranteed to be the smallest possible.
+        reduction : str (optional, defaults to ``'substitution'``).
+            How the terms are reduced, one of ``'substitution'``,
+            ``'freedman'``, and ``'ishikawa'``. With ``'substitution'``, pairs
+            of variables are replaced by ancillas as described above. With
+            ``'freedman'``, each negative term is instead reduced to a
+            quadratic with one ancilla, and with ``'ishikawa'``, each positive
+            term is also reduced to a quadratic, with ``floor((d - 1) / 2)``
+            ancillas for a term of degree ``d``. These reductions need no
+            penalties, but they only hold at the minimum over the ancillas,
+            so they give fewer ancillas and terms when the terms do not share
+            many pairs of variables.
 
         Return
         ------
@@ -390,10 +690,10 @@ class PUBO(BO, PUBOMatrix):
 
         """
         P = PUBOMatrix()
-        self._reduce_degree(P, deg, lam, pairs)
+        self._reduce_degree(P, deg, lam, pairs, reduction)
         return P
 
-    def to_qubo(self, lam=None, pairs=None):
+    def to_qubo(self, lam=None, pairs=None, reduction='substitution'):
         """to_qubo.
 
         Create and return upper triangular QUBO representing the problem.
@@ -424,7 +724,20 @@ class PUBO(BO, PUBOMatrix):
             is None, then it will be the empty set ``set()``. In other words,
             no variable pairs will be prioritized, and instead variable pairs
             will be chosen to reduce to an ancilla bases solely on frequency
-            of occurrance.
+            of occurrance. The most frequent pair is reduced first, which is
+            a heuristic, so the number of ancillas and terms is not
+            guaranteed to be the smallest possible.
+        reduction : str (optional, defaults to ``'substitution'``).
+            How the terms are reduced, one of ``'substitution'``,
+            ``'freedman'``, and ``'ishikawa'``. With ``'substitution'``, pairs
+            of variables are replaced by ancillas as described above. With
+            ``'freedman'``, each negative term is instead reduced to a
+            quadratic with one ancilla, and with ``'ishikawa'``, each positive
+            term is also reduced to a quadratic, with ``floor((d - 1) / 2)``
+            ancillas for a term of degree ``d``. These reductions need no
+            penalties, but they only hold at the minimum over the ancillas,
+            so they give fewer ancillas and terms when the terms do not share
+            many pairs of variables.
 
         Return
         ------
@@ -436,7 +749,7 @@ class PUBO(BO, PUBOMatrix):
 
         """
         Q = QUBOMatrix()
-        self._reduce_degree(Q, 2, lam, pairs)
+        self._reduce_degree(Q, 2, lam, pairs, reduction)
         return Q
 
     def convert_solution(self, solution, spin=False):
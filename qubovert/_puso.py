@@ -192,7 +192,8 @@ class PUSO(BO, PUSOMatrix):
         P._reverse_mapping = self.reverse_mapping
         return P
 
-    def to_pubo(self, deg=None, lam=None, pairs=None):
+    def to_pubo(self, deg=None, lam=None, pairs=None,
+                reduction='substitution'):
         """to_pubo.
 
         Create and return upper triangular degree ``deg`` PUBO representing the
@@ -227,7 +228,20 @@ class PUSO(BO, PUSOMatrix):
             is None, then it will be the empty set ``set()``. In other words,
             no variable pairs will be prioritized, and instead variable pairs
             will be chosen to reduce to an ancilla bases solely on frequency
-            of occurrance.
+            of occurrance. The most frequent pair is reduced first, which is
+            a heuristic, so the number of ancillas and terms is not
+            guaranteed to be the smallest possible.
+        reduction : str (optional, defaults to ``'substitution'``).
+            How the terms are reduced, one of ``'substitution'``,
+            ``'freedman'``, and ``'ishikawa'``. With ``'substitution'``, pairs
+            of variables are replaced by ancillas as described above. With
+            ``'freedman'``, each negative term is instead reduced to a
+            quadratic with one ancilla, and with ``'ishikawa'``, each positive
+            term is also reduced to a quadratic, with ``floor((d - 1) / 2)``
+            ancillas for a term of degree ``d``. These reductions need no
+            penalties, but they only hold at the minimum over the ancillas,
+            so they give fewer ancillas and terms when the terms do not share
+            many pairs of variables.
 
         Return
         ------
@@ -250,9 +264,10 @@ class PUSO(BO, PUSOMatrix):
         See https://arxiv.org/pdf/1307.8041.pdf equation 6.
 
         """
-        return self._create_pubo().to_pubo(deg, lam, pairs)
+        return self._create_pubo().to_pubo(deg, lam, pairs, reduction)
 
-    def to_puso(self, deg=None, lam=None, pairs=None):
+    def to_puso(self, deg=None, lam=None, pairs=None,
+                reduction='substitution'):
         """to_puso.
 
         Create and return upper triangular degree ``deg`` PUSO representing
@@ -287,7 +302,20 @@ class PUSO(BO, PUSOMatrix):
             is None, then it will be the empty set ``set()``. In other words,
             no variable pairs will be prioritized, and instead variable pairs
             will be chosen to reduce to an ancilla bases solely on frequency
-            of occurrance.
+            of occurrance. The most frequent pair is reduced first, which is
+            a heuristic, so the number of ancillas and terms is not
+            guaranteed to be the smallest possible.
+        reduction : str (optional, defaults to ``'substitution'``).
+            How the terms are reduced, one of ``'substitution'``,
+            ``'freedman'``, and ``'ishikawa'``. With ``'substitution'``, pairs
+            of variables are replaced by ancillas as described above. With
+            ``'freedman'``, each negative term is instead reduced to a
+            quadratic with one ancilla, and with ``'ishikawa'``, each positive
+            term is also reduced to a quadratic, with ``floor((d - 1) / 2)``
+            ancillas for a term of degree ``d``. These reductions need no
+            penalties, but they only hold at the minimum over the ancillas,
+            so they give fewer ancillas and terms when the terms do not share
+            many pairs of variables.
 
         Return
         ------
@@ -305,9 +333,9 @@ class PUSO(BO, PUSOMatrix):
         """
         if deg is None or deg >= self.degree:
             return self._to_puso()
-        return self._create_pubo().to_puso(deg, lam, pairs)
+        return self._create_pubo().to_puso(deg, lam, pairs, reduction)
 
-    def to_qubo(self, lam=None, pairs=None):
+    def to_qubo(self, lam=None, pairs=None, reduction='substitution'):
         """to_qubo.
 
         Create and return upper triangular QUBO representing the problem.
@@ -338,7 +366,20 @@ class PUSO(BO, PUSOMatrix):
             is None, then it will be the empty set ``set()``. In other words,
             no variable pairs will be prioritized, and instead variable pairs
             will be chosen to reduce to an ancilla bases solely on frequency
-            of occurrance.
+            of occurrance. The most frequent pair is reduced first, which is
+            a heuristic, so the number of ancillas and terms is not
+            guaranteed to be the smallest possible.
+        reduction : str (optional, defaults to ``'substitution'``).
+            How the terms are reduced, one of ``'substitution'``,
+            ``'freedman'``, and ``'ishikawa'``. With ``'substitution'``, pairs
+            of variables are replaced by ancillas as described above. With
+            ``'freedman'``, each negative term is instead reduced to a
+            quadratic with one ancilla, and with ``'ishikawa'``, each positive
+            term is also reduced to a quadratic, with ``floor((d - 1) / 2)``
+            ancillas for a term of degree ``d``. These reductions need no
+            penalties, but they only hold at the minimum over the ancillas,
+            so they give fewer ancillas and terms when the terms do not share
+            many pairs of variables.
 
         Return
         ------
@@ -349,9 +390,9 @@ class PUSO(BO, PUSOMatrix):
             see ``help(qubovert.utils.QUBOMatrix)``.
 
         """
-        return self._create_pubo().to_qubo(lam, pairs)
+        return self._create_pubo().to_qubo(lam, pairs, reduction)
 
-    def to_quso(self, lam=None, pairs=None):
+    def to_quso(self, lam=None, pairs=None, reduction='substitution'):
         """to_quso.
 
         Create and return upper triangular QUSO representing the problem.
@@ -382,7 +423,20 @@ class PUSO(BO, PUSOMatrix):
             is None, then it will be the empty set ``set()``. In other words,
             no variable pairs will be prioritized, and instead variable pairs
             will be chosen to reduce to an ancilla bases solely on frequency
-            of occurrance.
+            of occurrance. The most frequent pair is reduced first, which is
+            a heuristic, so the number of ancillas and terms is not
+            guaranteed to be the smallest possible.
+        reduction : str (optional, defaults to ``'substitution'``).
+            How the terms are reduced, one of ``'substitution'``,
+            ``'freedman'``, and ``'ishikawa'``. With ``'substitution'``, pairs
+            of variables are replaced by ancillas as described above. With
+            ``'freedman'``, each negative term is instead reduced to a
+            quadratic with one ancilla, and with ``'ishikawa'``, each positive
+            term is also reduced to a quadratic, with ``floor((d - 1) / 2)``
+            ancillas for a term of degree ``d``. These reductions need no
+            penalties, but they only hold at the minimum over the ancillas,
+            so they give fewer ancillas and terms when the terms do not share
+            many pairs of variables.
 
         Return
         ------
@@ -395,7 +449,7 @@ class PUSO(BO, PUSOMatrix):
         """
         if self.degree <= 2:
             return QUSOMatrix(self._to_puso())
-        return super().to_quso(lam, pairs)
+        return super().to_quso(lam, pairs, reduction)
 
     def convert_solution(self, solution, spin=True):
         """convert_solution.
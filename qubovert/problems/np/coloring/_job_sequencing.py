@@ -183,6 +183,28 @@ class JobSequencing(Problem):
         """
         return self._M
 
+    @property
+    def one_hot_groups(self):
+        """one_hot_groups.
+
+        Each job must be covered by exactly one worker, so for each job,
+        exactly one of the QUBO variables that assign the job to a worker is
+        1. These groups can be given to the ``one_hot_groups`` argument of
+        ``qubovert.sim.anneal_qubo``, which then never leaves the space of
+        solutions where each job is covered exactly once.
+
+        Return
+        ------
+        res : list of tuples.
+            Each tuple contains the QUBO variables that assign a job to each
+            of the workers.
+
+        """
+        return [
+            tuple(self._x(job, worker) for worker in range(self._m))
+            for job in self._lengths
+        ]
+
     @property
     def num_binary_variables(self):
         """num_binary_variables.
@@ -286,54 +308,55 @@ class JobSequencing(Problem):
 
         Q += self._N * A  # offset comes from the first constraint
 
-        # encode H_B (equation 55)
-        # minimize worker 0's length
-        for job, length in self._lengths.items():
-            ind = self._x(job, 0)  # worker zero
-            Q[(ind,)] += B * length
-
-        # encode H_A (equation 54)
-
-        # enforce that each job is covered exactly once.
-        for job in self._lengths:
-            for worker in range(self._m):
-                ind = self._x(job, worker)
-                Q[(ind,)] -= 2 * A
-                for workerp in range(self._m):
-                    indp = self._x(job, workerp)
-                    Q[(ind, indp)] += A
-
-        # enforce worker 0's length is larger than all the other workers'
-        # lengths
-        max_M = self._log_M if self._log_trick else self._M
-        for worker in range(1, self._m):  # exclude worker 0
-
-            for n in range(max_M):
-                ind = self._y(n, worker)
-                for np in range(max_M):
-                    indp = self._y(np, worker)
-                    if self._log_trick:
-                        Q[(ind, indp)] += A * pow(2, n + np)
-                    else:
-                        Q[(ind, indp)] += A * (n + 1) * (np + 1)
+        with Q.bulk() as staged:
+            # encode H_B (equation 55)
+            # minimize worker 0's length
+            for job, length in self._lengths.items():
+                ind = self._x(job, 0)  # worker zero
+                staged[(ind,)] += B * length
+
+            # encode H_A (equation 54)
+
+            # enforce that each job is covered exactly once.
+            for job in self._lengths:
+                for worker in range(self._m):
+                    ind = self._x(job, worker)
+                    staged[(ind,)] -= 2 * A
+                    for workerp in range(self._m):
+                        indp = self._x(job, workerp)
+                        staged[(ind, indp)] += A
+
+            # enforce worker 0's length is larger than all the other workers'
+            # lengths
+            max_M = self._log_M if self._log_trick else self._M
+            for worker in range(1, self._m):  # exclude worker 0
+
+                for n in range(max_M):
+                    ind = self._y(n, worker)
+                    for np in range(max_M):
+                        indp = self._y(np, worker)
+                        if self._log_trick:
+                            staged[(ind, indp)] += A * pow(2, n + np)
+                        else:
+                            staged[(ind, indp)] += A * (n + 1) * (np + 1)
+
+                    for job, length in self._lengths.items():
+                        ind1, ind2 = self._x(job, worker), self._x(job, 0)
+                        val = 2 * A * length * (
+                            pow(2, n) if self._log_trick else n + 1
+                        )
+                        staged[(ind, ind1)] += val
+                        staged[(ind, ind2)] -= val
 
                 for job, length in self._lengths.items():
                     ind1, ind2 = self._x(job, worker), self._x(job, 0)
-                    val = 2 * A * length * (
-                        pow(2, n) if self._log_trick else n + 1
-                    )
-                    Q[(ind, ind1)] += val
-                    Q[(ind, ind2)] -= val
-
-            for job, length in self._lengths.items():
-                ind1, ind2 = self._x(job, worker), self._x(job, 0)
-                for jobp, lengthp in self._lengths.items():
-                    ind1p, ind2p = self._x(jobp, worker), self._x(jobp, 0)
-                    val = A * length * lengthp
-                    Q[(ind1, ind1p)] += val
-                    Q[(ind2, ind2p)] += val
-                    Q[(ind2, ind1p)] -= val
-                    Q[(ind1, ind2p)] -= val
+                    for jobp, lengthp in self._lengths.items():
+                        ind1p, ind2p = self._x(jobp, worker), self._x(jobp, 0)
+                        val = A * length * lengthp
+                        staged[(ind1, ind1p)] += val
+                        staged[(ind2, ind2p)] += val
+                        staged[(ind2, ind1p)] -= val
+                        staged[(ind1, ind2p)] -= val
 
         return Q
 
@@ -319,51 +319,53 @@ class SetCover(Problem):
 
         Q += self._n * A  # constant comes from the constraints
 
-        # encode H_B (equation 46)
-        for i in range(self._N):
-            Q[(i,)] += self._weights[i] * B
-
-        # encode H_A
-
-        for alpha in self._U:
-
-            if not self._log_trick:  # (Equation 45)
-
-                # first constraint
-                for m in range(1, self._M+1):
-                    i = self._x(alpha, m)
-                    Q[(i, i)] -= A
-                    for mp in range(m+1, self._M+1):
-                        ip = self._x(alpha, mp)
-                        Q[(i, ip)] += 2*A
-
-                # second constraint
-                for m in range(1, self._M+1):
-                    i = self._x(alpha, m)
-                    Q[(i, i)] += A*m*m
-                    for mp in range(m+1, self._M+1):
-                        ip = self._x(alpha, mp)
-                        Q[(i, ip)] += 2*A*m*mp
-
-                    for j in self._filtered_range(alpha):
-                        Q[(j, i)] -= 2*A*m
-
-            else:  # using the log_trick
-
-                # no first constraint now, but modify the second constraint.
-                for m in range(self._log_M+1):
-                    i = self._x(alpha, m)
-                    Q[(i, i)] += A * (pow(2, 2*m) + 2 * pow(2, m))
-                    for mp in range(m+1, self._log_M+1):
-                        ip = self._x(alpha, mp)
-                        Q[(i, ip)] += 2*A*pow(2, m+mp)
-                    for j in self._filtered_range(alpha):
-                        Q[(j, i)] -= 2*A*pow(2, m)
-
-            for i in self._filtered_range(alpha):
-                Q[(i,)] += A if not self._log_trick else -A
-                for j in self._filtered_range(alpha, i+1):
-                    Q[(i, j)] += 2 * A
+        with Q.bulk() as staged:
+            # encode H_B (equation 46)
+            for i in range(self._N):
+                staged[(i,)] += self._weights[i] * B
+
+            # encode H_A
+
+            for alpha in self._U:
+
+                if not self._log_trick:  # (Equation 45)
+
+                    # first constraint
+                    for m in range(1, self._M+1):
+                        i = self._x(alpha, m)
+                        staged[(i, i)] -= A
+                        for mp in range(m+1, self._M+1):
+                            ip = self._x(alpha, mp)
+                            staged[(i, ip)] += 2*A
+
+                    # second constraint
+                    for m in range(1, self._M+1):
+                        i = self._x(alpha, m)
+                        staged[(i, i)] += A*m*m
+                        for mp in range(m+1, self._M+1):
+                            ip = self._x(alpha, mp)
+                            staged[(i, ip)] += 2*A*m*mp
+
+                        for j in self._filtered_range(alpha):
+                            staged[(j, i)] -= 2*A*m
+
+                else:  # using the log_trick
+
+                    # no first constraint now, but modify the second
+                    # constraint.
+                    for m in range(self._log_M+1):
+                        i = self._x(alpha, m)
+                        staged[(i, i)] += A * (pow(2, 2*m) + 2 * pow(2, m))
+                        for mp in range(m+1, self._log_M+1):
+                            ip = self._x(alpha, mp)
+                            staged[(i, ip)] += 2*A*pow(2, m+mp)
+                        for j in self._filtered_range(alpha):
+                            staged[(j, i)] -= 2*A*pow(2, m)
+
+                for i in self._filtered_range(alpha):
+                    staged[(i,)] += A if not self._log_trick else -A
+                    for j in self._filtered_range(alpha, i+1):
+                        staged[(i, j)] += 2 * A
 
         return Q
 
@@ -244,9 +244,10 @@ class GraphPartitioning(Problem):
 
         # encode H_B (equation 9)
         L += B * sum(self._edges.values()) / 2
-        for (u, v), w in self._edges.items():
-            L[(self._vertex_to_index[u],
-              self._vertex_to_index[v])] -= w * B / 2
+        with L.bulk() as staged:
+            for (u, v), w in self._edges.items():
+                staged[(self._vertex_to_index[u],
+                        self._vertex_to_index[v])] -= w * B / 2
 
         return L
 
@@ -22,15 +22,25 @@ See ``__all__`` for a list of uses.
 from ._anneal_temperature_range import *
 from ._anneal_results import *
 from ._anneal import *
+from ._anneal_pool import *
+from ._tune_lam import *
+from ._flip_evaluator import *
 
 from ._anneal_temperature_range import __all__ as __all_tr__
 from ._anneal_results import __all__ as __all_results__
 from ._anneal import __all__ as __all_anneal__
+from ._anneal_pool import __all__ as __all_pool__
+from ._tune_lam import __all__ as __all_tune__
+from ._flip_evaluator import __all__ as __all_flip__
 
 
-__all__ = __all_tr__ + __all_results__ + __all_anneal__
+__all__ = (
+    __all_tr__ + __all_results__ + __all_anneal__ + __all_pool__ +
+    __all_tune__ + __all_flip__
+)
 
-del __all_tr__, __all_results__, __all_anneal__
+del __all_tr__, __all_results__, __all_anneal__, __all_pool__, __all_tune__
+del __all_flip__
 
 
 name = "sim"
@@ -21,21 +21,32 @@ algorithm for both boolean and spin models.
 
 from qubovert.utils import (
     pubo_to_puso, qubo_to_quso, QUBOVertWarning, boolean_to_spin,
-    QUSOMatrix, PUSOMatrix
+    QUSOMatrix, PUSOMatrix, CompactPUBOMatrix, CompactPUSOMatrix
 )
 from qubovert import QUSO, PUSO, PCSO
-from . import anneal_temperature_range, AnnealResults, AnnealResult
+from . import anneal_temperature_range, AnnealResults
 import numpy as np
 from itertools import chain
-from ._canneal import c_anneal_quso, c_anneal_puso
+from collections import deque
+from concurrent.futures import as_completed
+import pickle
+import hashlib
+import random
+import os
+from ._numpy_anneal import np_anneal_quso, np_anneal_puso, _top_states
+try:
+    from ._canneal import c_anneal_quso, c_anneal_puso
+except ImportError:  # the C extension was not built
+    c_anneal_quso = c_anneal_puso = None
 
 
 __all__ = (
     'anneal_qubo', 'anneal_quso', 'anneal_pubo', 'anneal_puso',
-    'SCHEDULES'
+    'SCHEDULES', 'BACKENDS'
 )
 
 SCHEDULES = 'linear', 'geometric'
+BACKENDS = 'c', 'numpy'
 
 
 # helpers
@@ -122,7 +133,47 @@ def _create_spin_schedule(spin_model, anneal_duration,
     )
 
 
-def _package_spin_results(states, values, offset, reverse_mapping):
+def _get_backend(backend, c_func, np_func):
+    """_get_backend.
+
+    Get the function that implements the annealing algorithm for the
+    requested backend.
+
+    Parameters
+    ----------
+    backend : str or None.
+        One of ``BACKENDS``. If ``backend`` is None, then the C backend is
+        used if it is available, and the NumPy backend otherwise.
+    c_func : function or None.
+        The C implementation, or None if the C extension was not built.
+    np_func : function.
+        The NumPy implementation.
+
+    Returns
+    -------
+    func : function.
+
+    Raises
+    ------
+    ValueError
+        If ``backend`` is not one of ``BACKENDS``, or if it is ``'c'`` but the
+        C extension was not built.
+
+    """
+    if backend is None:
+        backend = 'numpy' if c_func is None else 'c'
+    if backend not in BACKENDS:
+        raise ValueError("backend must be one of %s" % str(BACKENDS))
+    elif backend == 'c' and c_func is None:
+        raise ValueError(
+            "The C extension qubovert.sim._canneal is not available; use "
+            "backend='numpy'"
+        )
+    return c_func if backend == 'c' else np_func
+
+
+def _package_spin_results(states, values, counts, offset, reverse_mapping,
+                          values_only):
     """_package_spin_results.
 
     Package the results of the C functions into the desired result form
@@ -130,34 +181,788 @@ def _package_spin_results(states, values, offset, reverse_mapping):
 
     Parameters
     ----------
-    states : list of lists.
+    states : list of lists, or None.
         ``states`` has dimension ``state[num_anneals][len_state]``.
     values : list of floats.
         The value of the objective function that each state gives,
         minus the offset.
+    counts : list of ints, or None.
+        The number of anneals that ended in each state. If ``counts`` is
+        None, then each state occurred once.
     offset : float.
         The part of the objective function that does not depend on any
         variables.
     reverse_mapping : dict.
         Maps the integer spin labels to the original model variables.
+    values_only : bool.
+        Whether to only return the values.
 
     Returns
     -------
-    res : qubovert.sim.AnnealResults object.
+    res : qubovert.sim.AnnealResults object, or NumPy array.
+        If ``values_only``, then ``res`` is a NumPy array of the values.
 
     """
+    if values_only:
+        return np.array(values, dtype=float) + offset
+
     res = AnnealResults()
     for i in range(len(states)):
         state = {reverse_mapping[k]: v for k, v in enumerate(states[i])}
-        res.add_state(state, values[i] + offset, True)  # spin is True
+        res.add_state(  # spin is True
+            state, values[i] + offset, True,
+            counts[i] if counts is not None else 1
+        )
+    return res
+
+
+def _create_one_hot_groups(one_hot_groups, reverse_mapping):
+    """_create_one_hot_groups.
+
+    Map the one-hot groups to the integer labels of the model and flatten
+    them into the form that the C functions expect. Variables in a group that
+    are not in the model are given new integer labels.
+
+    Parameters
+    ----------
+    one_hot_groups : iterable of iterables, or None.
+        Each element is a group of variable labels of which exactly one is
+        hot (ie one spin is -1, equivalently one boolean variable is 1).
+    reverse_mapping : dict.
+        Maps the integer spin labels to the original model variables.
+
+    Returns
+    -------
+    res : tuple (group_sizes, groups, group_of, reverse_mapping).
+        ``group_sizes`` is a list of the number of variables in each group.
+        ``groups`` is a list of the integer labels of the variables in each
+        group, one group after the other. ``group_of`` is a dict that maps
+        each integer label in a group to the index of its group.
+        ``reverse_mapping`` is the input ``reverse_mapping`` updated with the
+        variables that are not in the model.
+
+    Raises
+    ------
+    ValueError
+        If a group is empty or if a variable is in more than one group.
+
+    """
+    reverse_mapping = reverse_mapping.copy()
+    mapping = {v: k for k, v in reverse_mapping.items()}
+    group_sizes, groups, group_of = [], [], {}
+    for g, group in enumerate(one_hot_groups or ()):
+        group = tuple(group)
+        if not group:
+            raise ValueError("One-hot groups cannot be empty")
+        for v in group:
+            if v not in mapping:
+                mapping[v] = len(reverse_mapping)
+                reverse_mapping[mapping[v]] = v
+            elif mapping[v] in group_of:
+                raise ValueError(
+                    "Variable %s is in more than one one-hot group" % (v,)
+                )
+            group_of[mapping[v]] = g
+            groups.append(mapping[v])
+        group_sizes.append(len(group))
+    return group_sizes, groups, group_of, reverse_mapping
+
+
+def _reduce_one_hot(model, group_of):
+    """_reduce_one_hot.
+
+    Every state that the one-hot annealer visits has exactly one spin equal to
+    -1 in each one-hot group. For a set ``S`` of spins of the same group, the
+    product of the spins in ``S`` is therefore always equal to
+    ``sum(z[i] for i in S) - (len(S) - 1)``. We use this to remove all of the
+    couplings between spins of the same group, such as the penalty terms that
+    enforce the one-hot constraint. Similarly, ``sum(z[i] for i in G)`` is
+    always equal to ``len(G) - 2`` for a group ``G``, so we shift the fields of
+    each group by a constant, which removes the fields that the penalty terms
+    add to every spin of the group. The resulting model has the same value as
+    ``model`` on every state that satisfies the one-hot groups.
+
+    Parameters
+    ----------
+    model : qubovert.utils.QUSOMatrix or qubovert.utils.PUSOMatrix object.
+        The integer labeled spin model.
+    group_of : dict.
+        Maps each integer label in a one-hot group to the index of its group.
+
+    Returns
+    -------
+    res : same type as ``model``.
+
+    """
+    if not group_of:
+        return model
+
+    res, terms = model.__class__(), list(model.items())
+    while terms:
+        k, v = terms.pop()
+        in_groups = {}
+        for i in k:
+            if i in group_of:
+                in_groups.setdefault(group_of[i], []).append(i)
+        S = next((x for x in in_groups.values() if len(x) > 1), None)
+        if S is None:
+            res[k] += v
+        else:
+            R = tuple(i for i in k if i not in S)
+            terms.append((R, -(len(S) - 1) * v))
+            terms.extend((R + (i,), v) for i in S)
+
+    groups = {}
+    for i, g in group_of.items():
+        groups.setdefault(g, []).append(i)
+    for G in groups.values():
+        fields = [res.get((i,), 0) for i in G]
+        c = (min(fields) + max(fields)) / 2
+        if c:
+            for i in G:
+                res[(i,)] -= c
+            res[()] += c * (len(G) - 2)
     return res
 
 
+def _check_one_hot_initial_state(init_state, group_sizes, groups):
+    """_check_one_hot_initial_state.
+
+    Make sure that the initial state satisfies the one-hot groups.
+
+    Parameters
+    ----------
+    init_state : list of ints.
+        The integer labeled initial spin state.
+    group_sizes : list of ints.
+        The number of variables in each group.
+    groups : list of ints.
+        The integer labels of the variables in each group, one group after
+        the other.
+
+    Raises
+    ------
+    ValueError
+        If some group does not have exactly one spin equal to -1.
+
+    """
+    start = 0
+    for size in group_sizes:
+        if [init_state[i] for i in groups[start:start+size]].count(-1) != 1:
+            raise ValueError(
+                "The initial state does not satisfy the one-hot groups"
+            )
+        start += size
+
+
+def _reorder(model, N, reverse_mapping, groups):
+    """_reorder.
+
+    Relabel the spins of ``model`` with a reverse Cuthill-McKee ordering of
+    its interaction graph, so that spins that interact have nearby labels.
+    This reduces the bandwidth of the model and therefore improves the memory
+    locality of the anneal.
+
+    Parameters
+    ----------
+    model : qubovert.utils.QUSOMatrix or qubovert.utils.PUSOMatrix object.
+        The integer labeled spin model.
+    N : int.
+        The number of spins, ie the labels of ``model`` are in
+        ``range(N)``.
+    reverse_mapping : dict.
+        Maps the integer spin labels to the original model variables.
+    groups : list of ints.
+        The integer labels of the variables in each one-hot group.
+
+    Returns
+    -------
+    res : tuple (model, reverse_mapping, groups).
+        The relabeled inputs.
+
+    """
+    neighbors = [set() for _ in range(N)]
+    for k in model:
+        for i in k:
+            neighbors[i].update(k)
+    for i in range(N):
+        neighbors[i].discard(i)
+
+    order, visited = [], [False] * N
+    for start in sorted(range(N), key=lambda i: len(neighbors[i])):
+        if visited[start]:
+            continue
+        visited[start] = True
+        queue = deque((start,))
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for j in sorted(neighbors[i], key=lambda j: len(neighbors[j])):
+                if not visited[j]:
+                    visited[j] = True
+                    queue.append(j)
+    order.reverse()
+
+    label = [0] * N
+    for new, old in enumerate(order):
+        label[old] = new
+
+    res = model.__class__()
+    for k, v in model.items():
+        res[tuple(label[i] for i in k)] = v
+    return (
+        res,
+        {label[k]: v for k, v in reverse_mapping.items()},
+        [label[i] for i in groups]
+    )
+
+
+def _prepare_model(model, reverse_mapping, one_hot_groups, reorder):
+    """_prepare_model.
+
+    Apply the one-hot groups and the reordering to the integer labeled spin
+    model. See ``_create_one_hot_groups``, ``_reduce_one_hot``, and
+    ``_reorder``.
+
+    Parameters
+    ----------
+    model : qubovert.utils.QUSOMatrix or qubovert.utils.PUSOMatrix object.
+        The integer labeled spin model.
+    reverse_mapping : dict.
+        Maps the integer spin labels to the original model variables.
+    one_hot_groups : iterable of iterables, or None.
+        The one-hot groups in terms of the original model variables.
+    reorder : bool.
+        Whether to relabel the spins with ``_reorder``.
+
+    Returns
+    -------
+    res : tuple (model, N, reverse_mapping, group_sizes, groups).
+        ``N`` is the number of spins to anneal. See ``_create_one_hot_groups``
+        for the rest.
+
+    Raises
+    ------
+    ValueError
+        If the one-hot groups are invalid.
+
+    """
+    group_sizes, groups, group_of, reverse_mapping = _create_one_hot_groups(
+        one_hot_groups, reverse_mapping
+    )
+    N, model = len(reverse_mapping), _reduce_one_hot(model, group_of)
+    if reorder:
+        model, reverse_mapping, groups = _reorder(
+            model, N, reverse_mapping, groups
+        )
+    return model, N, reverse_mapping, group_sizes, groups
+
+
+def _create_initial_state(initial_state, N, reverse_mapping,
+                          group_sizes, groups):
+    """_create_initial_state.
+
+    Create the integer labeled initial state for the C functions.
+
+    Parameters
+    ----------
+    initial_state : dict or None.
+        Maps the original model variables to their spin values.
+    N : int.
+        The number of spins.
+    reverse_mapping : dict.
+        Maps the integer spin labels to the original model variables.
+    group_sizes : list of ints.
+        The number of variables in each one-hot group.
+    groups : list of ints.
+        The integer labels of the variables in each group, one group after
+        the other.
+
+    Returns
+    -------
+    init_state : list of ints.
+        The initial state, or an empty list if ``initial_state`` is None.
+
+    Raises
+    ------
+    ValueError
+        If ``initial_state`` does not satisfy the one-hot groups.
+
+    """
+    if initial_state is None:
+        return []
+
+    init_state = [1] * N
+    for k, v in reverse_mapping.items():
+        init_state[k] = initial_state[v]
+    _check_one_hot_initial_state(init_state, group_sizes, groups)
+    return init_state
+
+
+def _quso_arrays(model, N):
+    """_quso_arrays.
+
+    Create the arrays that describe a QUSO to the C function.
+
+    Parameters
+    ----------
+    model : qubovert.utils.QUSOMatrix object.
+        The integer labeled model.
+    N : int.
+        The number of spins.
+
+    Returns
+    -------
+    res : tuple of lists (h, num_neighbors, neighbors, J).
+        ``h[i]`` is the field on spin ``i``, ``num_neighbors[i]`` is the
+        number of spins that spin ``i`` is coupled to, and ``neighbors`` and
+        ``J`` are the neighbors of each spin and their couplings, one spin
+        after the other.
+
+    """
+    h, num_neighbors = [0.] * N, [0] * N
+    neighbors, J = [[] for _ in range(N)], [[] for _ in range(N)]
+
+    for k, v in model.items():
+        val = float(v)
+        if len(k) == 1:
+            h[k[0]] = val
+        elif len(k) == 2:
+            i, j = k
+            neighbors[i].append(j)
+            neighbors[j].append(i)
+            num_neighbors[i] += 1
+            num_neighbors[j] += 1
+            J[i].append(val)
+            J[j].append(val)
+
+    # flatten the arrays.
+    return h, num_neighbors, list(chain(*neighbors)), list(chain(*J))
+
+
+def _puso_arrays(model):
+    """_puso_arrays.
+
+    Create the arrays that describe a PUSO to the C function.
+
+    Parameters
+    ----------
+    model : qubovert.utils.PUSOMatrix or qubovert.utils.CompactPUSOMatrix
+        object.
+        The integer labeled model.
+
+    Returns
+    -------
+    res : tuple (num_couplings, terms, couplings).
+        ``num_couplings[k]`` is the number of spins in the ``k`` th term,
+        ``terms`` are the spins in each term, one term after the other, and
+        ``couplings[k]`` is the coefficient of the ``k`` th term. They are
+        lists, or NumPy arrays if ``model`` is a CompactPUSOMatrix.
+
+    """
+    if isinstance(model, CompactPUSOMatrix):
+        _, term_ptr, terms, couplings = model.to_arrays()
+        return np.diff(term_ptr), terms, couplings
+
+    terms, couplings, num_couplings = [], [], []
+    for term, coupling in model.items():
+        if term:
+            couplings.append(float(coupling))
+            terms.extend(term)
+            num_couplings.append(len(term))
+    return num_couplings, terms, couplings
+
+
+# the model of the job that is being run, as a tuple (digest, model), so that
+# each worker process deserializes it once. See ``_anneal_chunk``.
+_model = None
+
+
+def _load_model(digest, data):
+    """_load_model.
+
+    Deserialize the model of a job that was serialized by ``_run_anneals``.
+    The model is cached by the digest of ``data``, so each process only
+    deserializes it once.
+
+    Parameters
+    ----------
+    digest : str.
+        The SHA-256 hex digest of ``data``.
+    data : bytes.
+        The pickled model.
+
+    Returns
+    -------
+    model : tuple.
+        See ``_anneal_chunk``.
+
+    """
+    global _model
+    # the tuple is rebound in one step, so threads never see a digest paired
+    # with the wrong model.
+    cached = _model
+    if cached is None or cached[0] != digest:
+        cached = digest, pickle.loads(data)
+        _model = cached
+    return cached[1]
+
+
+def _anneal_chunk(digest, data, start, num_anneals):
+    """_anneal_chunk.
+
+    Run a chunk of the anneals of a call to one of the anneal functions. This
+    is the function that is submitted to the ``executor``, so it must be
+    defined at the module level. The model is serialized once and the same
+    bytes are sent with each chunk, so the workers do not need to share
+    anything with the process that submits the chunks, and each worker
+    deserializes the model once.
+
+    Parameters
+    ----------
+    digest : str.
+        The SHA-256 hex digest of ``data``.
+    data : bytes.
+        The pickled ``(func, arrays, Ts, in_order, init_state, seed,
+        group_sizes, groups, top_k, values_only)`` tuple, where ``func`` is
+        the annealing function and ``arrays`` are the NumPy arrays that
+        describe the model.
+    start : int.
+        The index of the first anneal of the chunk, which selects the random
+        number streams of the anneals.
+    num_anneals : int.
+        The number of anneals in the chunk.
+
+    Returns
+    -------
+    res : tuple (start, num_anneals, states, values, counts).
+        ``states`` is a 2D NumPy array of the states (or None if
+        ``values_only``), ``values`` is a NumPy array of the values of the
+        states (not including the offset), and ``counts`` is a NumPy array of
+        the number of anneals that ended in each state (or None if
+        ``top_k`` is 0).
+
+    """
+    (func, arrays, Ts, in_order, init_state, seed,
+     group_sizes, groups, top_k, values_only) = _load_model(digest, data)
+    states, values, counts = func(
+        *(a if isinstance(a, int) else a.tolist() for a in arrays),
+        Ts, num_anneals, in_order, init_state, seed, start,
+        group_sizes, groups, top_k, values_only
+    )
+    return (
+        start, num_anneals,
+        np.array(states, dtype=np.int8) if states is not None else None,
+        np.array(values), np.array(counts) if counts is not None else None
+    )
+
+
+def _load_checkpoint(checkpoint, key, N):
+    """_load_checkpoint.
+
+    Load the anneals that were completed before a job was interrupted. See
+    ``_save_checkpoint``. A record that was cut off by an interruption while
+    it was being written is ignored.
+
+    Parameters
+    ----------
+    checkpoint : str.
+        The path of the checkpoint file.
+    key : str.
+        The fingerprint of the job.
+    N : int.
+        The number of spins in each saved state.
+
+    Returns
+    -------
+    res : tuple (seed, chunks, end) or None.
+        ``seed`` is the seed of the job, ``chunks`` is a list of the
+        ``(start, num_anneals, states, values, counts)`` tuples of the saved
+        chunks, in the form returned by ``_anneal_chunk``, and ``end`` is the
+        position in the file after the last complete record. If the file does
+        not exist, None is returned.
+
+    Raises
+    ------
+    ValueError
+        If the checkpoint was written by a different job.
+
+    """
+    if not os.path.exists(checkpoint):
+        return None
+
+    with open(checkpoint, 'rb') as f:
+        try:
+            saved_key, seed = pickle.load(f)
+        except Exception:
+            saved_key = None
+        if saved_key != key:
+            raise ValueError(
+                "The checkpoint %s was written by a different job" % checkpoint
+            )
+
+        chunks, end = [], f.tell()
+        while True:
+            try:
+                start, num, states, values, counts = pickle.load(f)
+            except Exception:  # the end of the file, or a cut off record
+                break
+            if states is not None:
+                states = np.unpackbits(states, axis=1, count=N)
+                states = 1 - 2 * states.astype(np.int8)
+            chunks.append((start, num, states, values, counts))
+            end = f.tell()
+
+    return seed, chunks, end
+
+
+def _save_checkpoint(f, start, num_anneals, states, values, counts):
+    """_save_checkpoint.
+
+    Append a completed chunk of a job to its checkpoint file, so that the
+    job can be resumed after an interruption. Since each anneal uses the
+    random number stream that is selected by its index, the anneals that are
+    not done are all that is needed to continue the job. The file starts with
+    the ``(key, seed)`` of the job, and then holds one record per chunk, so
+    each chunk is written once and the cost of checkpointing grows linearly
+    with the number of anneals. The spins are packed into bits.
+
+    Parameters
+    ----------
+    f : file object.
+        The checkpoint file, opened for writing at its end.
+    start : int.
+        The index of the first anneal of the chunk.
+    num_anneals : int.
+        The number of anneals in the chunk.
+    states : 2D NumPy array or None.
+        The states of the chunk, or None if they are not kept.
+    values : NumPy array.
+        ``values[i]`` is the value of ``states[i]``.
+    counts : NumPy array or None.
+        ``counts[i]`` is the number of anneals that ended in ``states[i]``,
+        or None if every state is kept.
+
+    """
+    if states is not None:
+        states = np.packbits(states == -1, axis=1)
+    pickle.dump(
+        (start, num_anneals, states, values, counts), f,
+        protocol=pickle.HIGHEST_PROTOCOL
+    )
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _run_anneals(func, arrays, Ts, num_anneals, in_order, init_state, seed,
+                 group_sizes, groups, executor, num_chunks, checkpoint,
+                 checkpoint_interval, top_k, values_only):
+    """_run_anneals.
+
+    Run the anneals with the annealing function ``func``, either directly or
+    in chunks.
+
+    When an ``executor`` is given, the model is serialized once into a
+    compact form with the arrays as NumPy arrays, and the anneals are split
+    into ``num_chunks`` chunks that are submitted to ``executor``. The
+    serialized model is sent with each chunk along with its digest, and each
+    worker deserializes it once. The results are merged as the chunks
+    complete. Each anneal uses the random
+    number stream that is selected by its index, so the results do not
+    depend on how the anneals are chunked. When only the ``top_k`` states are
+    kept, each chunk returns its own ``top_k`` states and counts, which are
+    merged into the ``top_k`` states of the whole job.
+
+    When a ``checkpoint`` is given, each completed chunk is appended to the
+    checkpoint file, and if the file already exists, then only the anneals
+    that it does not contain are run. The chunks then have at most
+    ``checkpoint_interval`` anneals, so how often the job is checkpointed
+    does not depend on ``num_chunks`` or on the number of CPUs.
+
+    Parameters
+    ----------
+    func : function.
+        The annealing function, ie one of the C functions or their NumPy
+        equivalents.
+    arrays : tuple.
+        The arguments of ``func`` that describe the problem.
+    Ts : list of floats.
+        The temperature schedule.
+    num_anneals : int.
+        The number of anneals to run.
+    in_order : bool.
+        Whether to iterate through the spins in order.
+    init_state : list of ints.
+        The initial state, or an empty list.
+    seed : int or None.
+        The seed. If ``seed`` is None and the anneals are chunked, then a
+        random seed is drawn so that the chunks use different streams of the
+        same seed.
+    group_sizes : list of ints.
+    groups : list of ints.
+    executor : concurrent.futures.Executor object or None.
+    num_chunks : int or None.
+        The number of chunks to split the anneals into. If ``num_chunks`` is
+        None, then ``os.cpu_count()`` chunks are used.
+    checkpoint : str or None.
+        The path of the checkpoint file.
+    checkpoint_interval : int or None.
+        The largest number of anneals between checkpoints. If
+        ``checkpoint_interval`` is None, then the job is checkpointed after
+        each of the ``num_chunks`` chunks.
+    top_k : int or None.
+        The number of distinct states to keep, or None to keep every state.
+    values_only : bool.
+        Whether to only return the values.
+
+    Returns
+    -------
+    res : tuple (states, values, counts).
+        The states (or None if ``values_only``), the values, and the counts
+        (or None if ``top_k`` is None) of the anneals, as lists.
+
+    Raises
+    ------
+    ValueError
+        If ``checkpoint`` was written by a different job, or with a different
+        seed.
+
+    """
+    global _model
+    top_k = top_k or 0
+    if executor is None and checkpoint is None:
+        return func(
+            *arrays, Ts, num_anneals, int(in_order), init_state,
+            seed if seed is not None else -1, 0, group_sizes, groups,
+            top_k, int(values_only)
+        )
+
+    N = len(arrays[0]) if isinstance(arrays[0], list) else arrays[0]
+    arrays = tuple(a if isinstance(a, int) else np.array(a) for a in arrays)
+    # the states of the chunks are needed to merge their top_k states, so
+    # values_only only drops them at the end.
+    keep_states = top_k or not values_only
+    done, counts = np.zeros(num_anneals, dtype=bool), np.zeros(0, np.int64)
+    if top_k:
+        states, values = np.ones((0, N), dtype=np.int8), np.zeros(0)
+    else:
+        states, values = (
+            np.ones((num_anneals, N if keep_states else 0), dtype=np.int8),
+            np.zeros(num_anneals)
+        )
+
+    if checkpoint is not None:
+        key = hashlib.sha256(pickle.dumps((
+            getattr(func, '__name__', str(func)), arrays, Ts, int(in_order),
+            init_state, group_sizes, groups, num_anneals, top_k,
+            bool(values_only)
+        ))).hexdigest()
+        saved = _load_checkpoint(checkpoint, key, states.shape[1])
+        if saved is not None:
+            if seed is not None and seed != saved[0]:
+                raise ValueError(
+                    "The checkpoint %s was written with a different seed"
+                    % checkpoint
+                )
+            seed = saved[0]
+
+    if seed is None:
+        seed = random.randrange(2 ** 31 - 1)
+    model = (
+        func, arrays, Ts, int(in_order), init_state, seed, group_sizes,
+        groups, top_k, int(not keep_states)
+    )
+
+    def merge(start, num, chunk_states, chunk_values, chunk_counts):
+        nonlocal states, values, counts
+        if top_k:
+            states, values, counts = _top_states(
+                np.concatenate((states, chunk_states)),
+                np.concatenate((values, chunk_values)),
+                np.concatenate((counts, chunk_counts)), top_k
+            )
+        else:
+            values[start:start+num] = chunk_values
+            if keep_states:
+                states[start:start+num] = chunk_states
+        done[start:start+num] = True
+
+    if checkpoint is not None and saved is not None:
+        for c in saved[1]:
+            merge(*c)
+
+    # split the anneals that are not done into runs of at most `size`
+    size = -(-num_anneals // max(1, num_chunks or os.cpu_count() or 1))
+    if checkpoint is not None and checkpoint_interval:
+        size = min(size, checkpoint_interval)
+    chunks = []
+    for i in np.flatnonzero(~done).tolist():
+        if chunks and sum(chunks[-1]) == i and chunks[-1][1] < size:
+            chunks[-1][1] += 1
+        else:
+            chunks.append([i, 1])
+
+    # the model is serialized once, and is cached in this process so that
+    # the chunks that run here, for example in threads, do not deserialize it.
+    data = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    digest = hashlib.sha256(data).hexdigest()
+    file = None
+    try:
+        _model = digest, model
+
+        # the chunks are appended to the checkpoint. A record that was cut
+        # off by an interruption is overwritten.
+        if checkpoint is not None:
+            if saved is None:
+                file = open(checkpoint, 'wb')
+                pickle.dump((key, seed), file)
+            else:
+                file = open(checkpoint, 'r+b')
+                file.truncate(saved[2])
+                file.seek(saved[2])
+
+        def finish(c):
+            merge(*c)
+            if file is not None:
+                _save_checkpoint(file, *c)
+
+        if executor is None:
+            for c in chunks:
+                finish(_anneal_chunk(digest, data, *c))
+        else:
+            # keep merging the chunks that succeed so that they are
+            # checkpointed
+            error = None
+            for future in as_completed([
+                executor.submit(_anneal_chunk, digest, data, *c)
+                for c in chunks
+            ]):
+                try:
+                    finish(future.result())
+                except Exception as e:
+                    error = error or e
+            if error is not None:
+                raise error
+    finally:
+        if file is not None:
+            file.close()
+        if _model is not None and _model[0] == digest:
+            _model = None
+
+    return (
+        None if values_only else states.tolist(), values.tolist(),
+        counts.tolist() if top_k else None
+    )
+
+
 # spin annealing functions
 
 def anneal_puso(H, num_anneals=1, anneal_duration=1000, initial_state=None,
                 temperature_range=None, schedule='geometric',
-                in_order=True, seed=None):
+                in_order=True, seed=None, one_hot_groups=None,
+                reorder=False, backend=None, executor=None, num_chunks=None,
+                checkpoint=None, top_k=None, values_only=False,
+                checkpoint_interval=None):
     """anneal_puso.
 
     Run a simulated annealing algorithm to try to find the minimum of the PUSO
@@ -174,6 +979,8 @@ def anneal_puso(H, num_anneals=1, anneal_duration=1000, initial_state=None,
         Maps spin labels to their values in the Hamiltonian.
         Please see the docstrings of any of the objects in
         ``qubovert.SPIN_MODELS`` to see how ``H`` should be formatted.
+        ``H`` can also be a ``qubovert.utils.CompactPUSOMatrix``, whose
+        arrays are handed to the annealer without building a dict.
     num_anneals : int >= 1 (optional, defaults to 1).
         The number of times to run the simulated annealing algorithm.
     anneal_duration : int >= 1 (optional, defaults to 1000).
@@ -210,15 +1017,96 @@ def anneal_puso(H, num_anneals=1, anneal_duration=1000, initial_state=None,
         is more physically realistic, but when using the simulation for
         annealing, often it is better to have ``in_order = True``.
     seed : number (optional, defaults to None).
-        The number to seed Python's builtin ``random`` module with. If
-        ``seed is None``, then ``random.seed`` will not be called.
+        The number to seed the random number generator with. Each anneal
+        draws its random numbers from its own stream, selected by the index
+        of the anneal, so the results of a seeded run are reproducible
+        regardless of how the anneals are split up. If ``seed is None``, then
+        the random number generator is seeded with the internal clock.
+    one_hot_groups : iterable of iterables (optional, defaults to None).
+        Each element is a group of spin labels of which exactly one spin must
+        be -1 (for example, the spin version of a one-hot constraint of a
+        ``qubovert.PCSO``, see ``qubovert.PCSO.one_hot_groups``). Instead of
+        flipping single spins in a group, the anneal proposes swap moves that
+        move the -1 to another spin of the group, so that every state that
+        is visited satisfies the groups. The couplings between the spins of a
+        group, such as the penalties that enforce the one-hot constraint, are
+        constant on these states and are removed before annealing. If
+        ``initial_state`` is provided, then it must satisfy the groups.
+    reorder : bool (optional, defaults to False).
+        Whether to relabel the spins before annealing with a reverse
+        Cuthill-McKee ordering of the interaction graph, so that spins that
+        interact are stored close together. This improves the memory locality
+        of the anneal for large sparse models. The original labels are
+        restored in the results. Note that seeded anneals give different
+        results with and without reordering.
+    backend : str (optional, defaults to None).
+        Which implementation of the annealing algorithm to use, one of
+        ``qubovert.sim.BACKENDS``. The ``'c'`` backend runs the anneals one
+        after the other in the compiled C extension. The ``'numpy'`` backend
+        runs all of the anneals at once as the columns of an
+        ``(N, num_anneals)`` array, updating all of the spins in a color
+        class of the interaction graph together (``in_order`` then refers to
+        the order of the color classes). It does not need the C extension
+        and can be faster for a large ``num_anneals``, but its seeded results
+        differ from those of the ``'c'`` backend. If ``backend`` is None, then
+        ``'c'`` is used if the C extension is available and ``'numpy'``
+        otherwise.
+    executor : concurrent.futures.Executor object (optional, defaults to
+               None).
+        If ``executor`` is given, then the anneals are split into
+        ``num_chunks`` chunks that are run on ``executor``, for example a
+        ``concurrent.futures.ProcessPoolExecutor`` or an executor that
+        distributes work across the nodes of a cluster. The model is
+        serialized once into a compact form that is sent with each chunk, so
+        the workers do not need to share a file system, and each worker
+        deserializes it once. The results are merged as the chunks
+        complete. Since each anneal
+        draws its random numbers from the stream selected by its index, a
+        seeded run with the ``'c'`` backend gives the same results with and
+        without an ``executor``.
+    num_chunks : int >= 1 (optional, defaults to None).
+        The number of chunks to split the anneals into when an ``executor`` or
+        a ``checkpoint`` is given. If ``num_chunks`` is None, then
+        ``os.cpu_count()`` chunks are used.
+    checkpoint : str (optional, defaults to None).
+        The path of a checkpoint file. If ``checkpoint`` is given, then the
+        anneals are run in ``num_chunks`` chunks (or smaller, see
+        ``checkpoint_interval``), and after each chunk its states and values
+        are appended to the file, with the spins packed into bits. If the
+        job is interrupted, then calling the function again with the same
+        arguments resumes the job, ie only the anneals that are missing from
+        the file are run. Since each anneal
+        draws its random numbers from the stream selected by its index, a
+        resumed seeded job gives the same results as an uninterrupted one.
+        If ``seed`` is None, then a random seed is drawn and stored in the
+        file. The file is kept after the job completes.
+    top_k : int >= 1 (optional, defaults to None).
+        If ``top_k`` is given, then only the ``top_k`` distinct states with
+        the lowest values are returned, sorted from the lowest to the
+        highest value, and the ``count`` attribute of each result is the
+        number of anneals that ended in that state. The states are packed
+        into bits and hashed as the anneals finish, so the memory used is
+        proportional to ``top_k`` instead of ``num_anneals``. Ties at the
+        cutoff are broken arbitrarily.
+    values_only : bool (optional, defaults to False).
+        If ``values_only`` is True, then only the values of the final states
+        are returned, as a NumPy array, and the states are never built. If
+        ``top_k`` is also given, then the array contains the values of the
+        ``top_k`` distinct states.
+    checkpoint_interval : int >= 1 (optional, defaults to None).
+        If ``checkpoint`` is given, then the chunks have at most
+        ``checkpoint_interval`` anneals, so at most that many anneals are
+        lost if the job is interrupted. If ``checkpoint_interval`` is None,
+        then the job is checkpointed once per chunk.
 
     Returns
     -------
-    res : qubovert.sim.AnnealResults object.
+    res : qubovert.sim.AnnealResults object, or NumPy array.
         ``res`` contains information on the final states of the simulations.
         See Examples below for an example of how to read from ``res``.
-        See ``help(qubovert.sim.AnnealResults)`` for more info.
+        See ``help(qubovert.sim.AnnealResults)`` for more info. If
+        ``values_only`` is True, then ``res`` is a NumPy array of the values
+        of the final states.
 
     Raises
     ------
@@ -227,6 +1115,15 @@ def anneal_puso(H, num_anneals=1, anneal_duration=1000, initial_state=None,
         Parameters section.
     ValueError
         If the initial temperature is less than the final temperature.
+    ValueError
+        If the one-hot groups are invalid, or if ``initial_state`` does not
+        satisfy them.
+    ValueError
+        If ``backend`` is not one of ``qubovert.sim.BACKENDS``, or if it is
+        ``'c'`` and the C extension is not available.
+    ValueError
+        If ``checkpoint`` was written by a different job, or with a
+        different ``seed``.
 
     Warns
     -----
@@ -263,14 +1160,17 @@ def anneal_puso(H, num_anneals=1, anneal_duration=1000, initial_state=None,
 
     """
     if num_anneals <= 0:
-        return AnnealResults()
+        return np.zeros(0) if values_only else AnnealResults()
 
-    Ts = _create_spin_schedule(
-        H, anneal_duration, temperature_range, schedule
-    )
+    anneal = _get_backend(backend, c_anneal_puso, np_anneal_puso)
 
     # must use type since we don't want errors from inheritance
-    if type(H) in (QUSOMatrix, PUSOMatrix):
+    if type(H) is CompactPUSOMatrix:
+        N = H.max_index + 1 if H.max_index is not None else 0
+        # the one-hot groups and the reordering need the dict based model.
+        model = H.to_puso() if one_hot_groups or reorder else H
+        reverse_mapping = dict(enumerate(range(N)))
+    elif type(H) in (QUSOMatrix, PUSOMatrix):
         N = H.max_index + 1
         model = H
         reverse_mapping = dict(enumerate(range(N)))
@@ -292,40 +1192,48 @@ def anneal_puso(H, num_anneals=1, anneal_duration=1000, initial_state=None,
 
     # solve `model`, convert solutions back to `H`
 
+    model, N, reverse_mapping, group_sizes, groups = _prepare_model(
+        model, reverse_mapping, one_hot_groups, reorder
+    )
+    # the default temperature range must come from the model without the
+    # one-hot penalty terms, since the anneal never leaves the groups.
+    Ts = _create_spin_schedule(
+        model, anneal_duration, temperature_range, schedule
+    )
+
     if not N:
-        return AnnealResults(
-            AnnealResult({}, model.offset, True) for _ in range(num_anneals)
+        num, counts = (1, [num_anneals]) if top_k else (num_anneals, None)
+        return _package_spin_results(
+            [[]] * num, [0.] * num, counts,
+            model.offset, reverse_mapping, values_only
         )
 
-    if initial_state is not None:
-        init_state = [1] * N
-        for k, v in reverse_mapping.items():
-            init_state[k] = initial_state[v]
-    else:
-        init_state = []
+    init_state = _create_initial_state(
+        initial_state, N, reverse_mapping, group_sizes, groups
+    )
 
     # create arguments for the C function
-    # create terms and couplings
-    terms, couplings, num_couplings = [], [], []
-    for term, coupling in model.items():
-        if term:
-            couplings.append(float(coupling))
-            terms.extend(term)
-            num_couplings.append(len(term))
-
-    states, values = c_anneal_puso(
-        N, num_couplings, terms, couplings,  # describe the problem
-        Ts, num_anneals, int(in_order), init_state,  # describe the algorithm
-        seed if seed is not None else -1
+    num_couplings, terms, couplings = _puso_arrays(model)
+
+    states, values, counts = _run_anneals(
+        anneal, (N, num_couplings, terms, couplings),  # describe the problem
+        Ts, num_anneals, in_order, init_state, seed,  # describe the algorithm
+        group_sizes, groups,  # describe the one-hot groups
+        executor, num_chunks,  # describe how to run the anneals
+        checkpoint, checkpoint_interval,  # describe how to checkpoint them
+        top_k, values_only  # describe what to return
     )
     return _package_spin_results(
-        states, values, model.offset, reverse_mapping
+        states, values, counts, model.offset, reverse_mapping, values_only
     )
 
 
 def anneal_quso(L, num_anneals=1, anneal_duration=1000, initial_state=None,
                 temperature_range=None, schedule='geometric',
-                in_order=True, seed=None):
+                in_order=True, seed=None, one_hot_groups=None,
+                reorder=False, backend=None, executor=None, num_chunks=None,
+                checkpoint=None, top_k=None, values_only=False,
+                checkpoint_interval=None):
     """anneal_quso.
 
     Run a simulated annealing algorithm to try to find the minimum of the QUSO
@@ -371,15 +1279,96 @@ def anneal_quso(L, num_anneals=1, anneal_duration=1000, initial_state=None,
         is more physically realistic, but when using the simulation for
         annealing, often it is better to have ``in_order = True``.
     seed : number (optional, defaults to None).
-        The number to seed Python's builtin ``random`` module with. If
-        ``seed is None``, then ``random.seed`` will not be called.
+        The number to seed the random number generator with. Each anneal
+        draws its random numbers from its own stream, selected by the index
+        of the anneal, so the results of a seeded run are reproducible
+        regardless of how the anneals are split up. If ``seed is None``, then
+        the random number generator is seeded with the internal clock.
+    one_hot_groups : iterable of iterables (optional, defaults to None).
+        Each element is a group of spin labels of which exactly one spin must
+        be -1 (for example, the spin version of a one-hot constraint of a
+        ``qubovert.PCSO``, see ``qubovert.PCSO.one_hot_groups``). Instead of
+        flipping single spins in a group, the anneal proposes swap moves that
+        move the -1 to another spin of the group, so that every state that
+        is visited satisfies the groups. The couplings between the spins of a
+        group, such as the penalties that enforce the one-hot constraint, are
+        constant on these states and are removed before annealing. If
+        ``initial_state`` is provided, then it must satisfy the groups.
+    reorder : bool (optional, defaults to False).
+        Whether to relabel the spins before annealing with a reverse
+        Cuthill-McKee ordering of the interaction graph, so that spins that
+        interact are stored close together. This improves the memory locality
+        of the anneal for large sparse models. The original labels are
+        restored in the results. Note that seeded anneals give different
+        results with and without reordering.
+    backend : str (optional, defaults to None).
+        Which implementation of the annealing algorithm to use, one of
+        ``qubovert.sim.BACKENDS``. The ``'c'`` backend runs the anneals one
+        after the other in the compiled C extension. The ``'numpy'`` backend
+        runs all of the anneals at once as the columns of an
+        ``(N, num_anneals)`` array, updating all of the spins in a color
+        class of the interaction graph together (``in_order`` then refers to
+        the order of the color classes). It does not need the C extension
+        and can be faster for a large ``num_anneals``, but its seeded results
+        differ from those of the ``'c'`` backend. If ``backend`` is None, then
+        ``'c'`` is used if the C extension is available and ``'numpy'``
+        otherwise.
+    executor : concurrent.futures.Executor object (optional, defaults to
+               None).
+        If ``executor`` is given, then the anneals are split into
+        ``num_chunks`` chunks that are run on ``executor``, for example a
+        ``concurrent.futures.ProcessPoolExecutor`` or an executor that
+        distributes work across the nodes of a cluster. The model is
+        serialized once into a compact form that is sent with each chunk, so
+        the workers do not need to share a file system, and each worker
+        deserializes it once. The results are merged as the chunks
+        complete. Since each anneal
+        draws its random numbers from the stream selected by its index, a
+        seeded run with the ``'c'`` backend gives the same results with and
+        without an ``executor``.
+    num_chunks : int >= 1 (optional, defaults to None).
+        The number of chunks to split the anneals into when an ``executor`` or
+        a ``checkpoint`` is given. If ``num_chunks`` is None, then
+        ``os.cpu_count()`` chunks are used.
+    checkpoint : str (optional, defaults to None).
+        The path of a checkpoint file. If ``checkpoint`` is given, then the
+        anneals are run in ``num_chunks`` chunks (or smaller, see
+        ``checkpoint_interval``), and after each chunk its states and values
+        are appended to the file, with the spins packed into bits. If the
+        job is interrupted, then calling the function again with the same
+        arguments resumes the job, ie only the anneals that are missing from
+        the file are run. Since each anneal
+        draws its random numbers from the stream selected by its index, a
+        resumed seeded job gives the same results as an uninterrupted one.
+        If ``seed`` is None, then a random seed is drawn and stored in the
+        file. The file is kept after the job completes.
+    top_k : int >= 1 (optional, defaults to None).
+        If ``top_k`` is given, then only the ``top_k`` distinct states with
+        the lowest values are returned, sorted from the lowest to the
+        highest value, and the ``count`` attribute of each result is the
+        number of anneals that ended in that state. The states are packed
+        into bits and hashed as the anneals finish, so the memory used is
+        proportional to ``top_k`` instead of ``num_anneals``. Ties at the
+        cutoff are broken arbitrarily.
+    values_only : bool (optional, defaults to False).
+        If ``values_only`` is True, then only the values of the final states
+        are returned, as a NumPy array, and the states are never built. If
+        ``top_k`` is also given, then the array contains the values of the
+        ``top_k`` distinct states.
+    checkpoint_interval : int >= 1 (optional, defaults to None).
+        If ``checkpoint`` is given, then the chunks have at most
+        ``checkpoint_interval`` anneals, so at most that many anneals are
+        lost if the job is interrupted. If ``checkpoint_interval`` is None,
+        then the job is checkpointed once per chunk.
 
     Returns
     -------
-    res : qubovert.sim.AnnealResults object.
+    res : qubovert.sim.AnnealResults object, or NumPy array.
         ``res`` contains information on the final states of the simulations.
         See Examples below for an example of how to read from ``res``.
-        See ``help(qubovert.sim.AnnealResults)`` for more info.
+        See ``help(qubovert.sim.AnnealResults)`` for more info. If
+        ``values_only`` is True, then ``res`` is a NumPy array of the values
+        of the final states.
 
     Raises
     ------
@@ -388,6 +1377,15 @@ def anneal_quso(L, num_anneals=1, anneal_duration=1000, initial_state=None,
         Parameters section.
     ValueError
         If the initial temperature is less than the final temperature.
+    ValueError
+        If the one-hot groups are invalid, or if ``initial_state`` does not
+        satisfy them.
+    ValueError
+        If ``backend`` is not one of ``qubovert.sim.BACKENDS``, or if it is
+        ``'c'`` and the C extension is not available.
+    ValueError
+        If ``checkpoint`` was written by a different job, or with a
+        different ``seed``.
     ValueError
         If ``L`` is not degree 2 or less.
 
@@ -423,22 +1421,20 @@ def anneal_quso(L, num_anneals=1, anneal_duration=1000, initial_state=None,
 
     """
     if num_anneals <= 0:
-        return AnnealResults()
+        return np.zeros(0) if values_only else AnnealResults()
 
-    Ts = _create_spin_schedule(
-        L, anneal_duration, temperature_range, schedule
-    )
+    anneal = _get_backend(backend, c_anneal_quso, np_anneal_quso)
 
     # must use type since we don't want errors from inheritance
-    if type(L) == QUSOMatrix:
+    if type(L) is QUSOMatrix:
         N = L.max_index + 1
         model = L
         reverse_mapping = dict(enumerate(range(N)))
         # mapping = reverse_mapping
-    elif type(L) != QUSO:
+    elif type(L) is not QUSO:
         L = QUSO(L)
 
-    if type(L) == QUSO:
+    if type(L) is QUSO:
         N = L.num_binary_variables
         model = L.to_quso()
         # mapping = L.mapping
@@ -446,45 +1442,39 @@ def anneal_quso(L, num_anneals=1, anneal_duration=1000, initial_state=None,
 
     # solve `model`, convert solutions back to `L`
 
+    model, N, reverse_mapping, group_sizes, groups = _prepare_model(
+        model, reverse_mapping, one_hot_groups, reorder
+    )
+    # the default temperature range must come from the model without the
+    # one-hot penalty terms, since the anneal never leaves the groups.
+    Ts = _create_spin_schedule(
+        model, anneal_duration, temperature_range, schedule
+    )
+
     if not N:
-        return AnnealResults(
-            AnnealResult({}, model.offset, True) for _ in range(num_anneals)
+        num, counts = (1, [num_anneals]) if top_k else (num_anneals, None)
+        return _package_spin_results(
+            [[]] * num, [0.] * num, counts,
+            model.offset, reverse_mapping, values_only
         )
 
-    if initial_state is not None:
-        init_state = [1] * N
-        for k, v in reverse_mapping.items():
-            init_state[k] = initial_state[v]
-    else:
-        init_state = []
+    init_state = _create_initial_state(
+        initial_state, N, reverse_mapping, group_sizes, groups
+    )
 
     # create arguments for the C function
-    h, num_neighbors = [0.] * N, [0] * N
-    neighbors, J = [[] for _ in range(N)], [[] for _ in range(N)]
-
-    for k, v in model.items():
-        val = float(v)
-        if len(k) == 1:
-            h[k[0]] = val
-        elif len(k) == 2:
-            i, j = k
-            neighbors[i].append(j)
-            neighbors[j].append(i)
-            num_neighbors[i] += 1
-            num_neighbors[j] += 1
-            J[i].append(val)
-            J[j].append(val)
-
-    # flatten the arrays.
-    J, neighbors = list(chain(*J)), list(chain(*neighbors))
-
-    states, values = c_anneal_quso(
-        h, num_neighbors, neighbors, J,  # describe the problem
-        Ts, num_anneals, int(in_order), init_state,  # describe the algorithm
-        seed if seed is not None else -1
+    h, num_neighbors, neighbors, J = _quso_arrays(model, N)
+
+    states, values, counts = _run_anneals(
+        anneal, (h, num_neighbors, neighbors, J),  # describe the problem
+        Ts, num_anneals, in_order, init_state, seed,  # describe the algorithm
+        group_sizes, groups,  # describe the one-hot groups
+        executor, num_chunks,  # describe how to run the anneals
+        checkpoint, checkpoint_interval,  # describe how to checkpoint them
+        top_k, values_only  # describe what to return
     )
     return _package_spin_results(
-        states, values, model.offset, reverse_mapping
+        states, values, counts, model.offset, reverse_mapping, values_only
     )
 
 
@@ -492,7 +1482,10 @@ def anneal_quso(L, num_anneals=1, anneal_duration=1000, initial_state=None,
 
 def anneal_pubo(P, num_anneals=1, anneal_duration=1000, initial_state=None,
                 temperature_range=None, schedule='geometric',
-                in_order=True, seed=None):
+                in_order=True, seed=None, one_hot_groups=None,
+                reorder=False, backend=None, executor=None, num_chunks=None,
+                checkpoint=None, top_k=None, values_only=False,
+                checkpoint_interval=None):
     """anneal_pubo.
 
     Run a simulated annealing algorithm to try to find the minimum of the PUBO
@@ -509,6 +1502,9 @@ def anneal_pubo(P, num_anneals=1, anneal_duration=1000, initial_state=None,
         Maps boolean labels to their values in the objective function.
         Please see the docstrings of any of the objects in
         ``qubovert.BOOLEAN_MODELS`` to see how ``P`` should be formatted.
+        ``P`` can also be a ``qubovert.utils.CompactPUBOMatrix``, which is
+        converted to a ``qubovert.utils.CompactPUSOMatrix`` without building
+        a dict.
     num_anneals : int >= 1 (optional, defaults to 1).
         The number of times to run the simulated annealing algorithm.
     anneal_duration : int >= 1 (optional, defaults to 1000).
@@ -547,15 +1543,97 @@ def anneal_pubo(P, num_anneals=1, anneal_duration=1000, initial_state=None,
         is more physically realistic, but when using the simulation for
         annealing, often it is better to have ``in_order = True``.
     seed : number (optional, defaults to None).
-        The number to seed Python's builtin ``random`` module with. If
-        ``seed is None``, then ``random.seed`` will not be called.
+        The number to seed the random number generator with. Each anneal
+        draws its random numbers from its own stream, selected by the index
+        of the anneal, so the results of a seeded run are reproducible
+        regardless of how the anneals are split up. If ``seed is None``, then
+        the random number generator is seeded with the internal clock.
+    one_hot_groups : iterable of iterables (optional, defaults to None).
+        Each element is a group of variable labels of which exactly one
+        variable must be 1 (for example, the one-hot constraints of a
+        ``qubovert.PCBO``, see ``qubovert.PCBO.one_hot_groups``). Instead of
+        flipping single variables in a group, the anneal proposes swap moves
+        that move the 1 to another variable of the group, so that every state
+        that is visited satisfies the groups. The couplings between the
+        variables of a group, such as the penalties that enforce the one-hot
+        constraint, are constant on these states and are removed before
+        annealing. If ``initial_state`` is provided, then it must satisfy the
+        groups.
+    reorder : bool (optional, defaults to False).
+        Whether to relabel the variables before annealing with a reverse
+        Cuthill-McKee ordering of the interaction graph, so that variables that
+        interact are stored close together. This improves the memory locality
+        of the anneal for large sparse models. The original labels are
+        restored in the results. Note that seeded anneals give different
+        results with and without reordering.
+    backend : str (optional, defaults to None).
+        Which implementation of the annealing algorithm to use, one of
+        ``qubovert.sim.BACKENDS``. The ``'c'`` backend runs the anneals one
+        after the other in the compiled C extension. The ``'numpy'`` backend
+        runs all of the anneals at once as the columns of an
+        ``(N, num_anneals)`` array, updating all of the variables in a color
+        class of the interaction graph together (``in_order`` then refers to
+        the order of the color classes). It does not need the C extension
+        and can be faster for a large ``num_anneals``, but its seeded results
+        differ from those of the ``'c'`` backend. If ``backend`` is None, then
+        ``'c'`` is used if the C extension is available and ``'numpy'``
+        otherwise.
+    executor : concurrent.futures.Executor object (optional, defaults to
+               None).
+        If ``executor`` is given, then the anneals are split into
+        ``num_chunks`` chunks that are run on ``executor``, for example a
+        ``concurrent.futures.ProcessPoolExecutor`` or an executor that
+        distributes work across the nodes of a cluster. The model is
+        serialized once into a compact form that is sent with each chunk, so
+        the workers do not need to share a file system, and each worker
+        deserializes it once. The results are merged as the chunks
+        complete. Since each anneal
+        draws its random numbers from the stream selected by its index, a
+        seeded run with the ``'c'`` backend gives the same results with and
+        without an ``executor``.
+    num_chunks : int >= 1 (optional, defaults to None).
+        The number of chunks to split the anneals into when an ``executor`` or
+        a ``checkpoint`` is given. If ``num_chunks`` is None, then
+        ``os.cpu_count()`` chunks are used.
+    checkpoint : str (optional, defaults to None).
+        The path of a checkpoint file. If ``checkpoint`` is given, then the
+        anneals are run in ``num_chunks`` chunks (or smaller, see
+        ``checkpoint_interval``), and after each chunk its states and values
+        are appended to the file, with the spins packed into bits. If the
+        job is interrupted, then calling the function again with the same
+        arguments resumes the job, ie only the anneals that are missing from
+        the file are run. Since each anneal
+        draws its random numbers from the stream selected by its index, a
+        resumed seeded job gives the same results as an uninterrupted one.
+        If ``seed`` is None, then a random seed is drawn and stored in the
+        file. The file is kept after the job completes.
+    top_k : int >= 1 (optional, defaults to None).
+        If ``top_k`` is given, then only the ``top_k`` distinct states with
+        the lowest values are returned, sorted from the lowest to the
+        highest value, and the ``count`` attribute of each result is the
+        number of anneals that ended in that state. The states are packed
+        into bits and hashed as the anneals finish, so the memory used is
+        proportional to ``top_k`` instead of ``num_anneals``. Ties at the
+        cutoff are broken arbitrarily.
+    values_only : bool (optional, defaults to False).
+        If ``values_only`` is True, then only the values of the final states
+        are returned, as a NumPy array, and the states are never built. If
+        ``top_k`` is also given, then the array contains the values of the
+        ``top_k`` distinct states.
+    checkpoint_interval : int >= 1 (optional, defaults to None).
+        If ``checkpoint`` is given, then the chunks have at most
+        ``checkpoint_interval`` anneals, so at most that many anneals are
+        lost if the job is interrupted. If ``checkpoint_interval`` is None,
+        then the job is checkpointed once per chunk.
 
     Returns
     -------
-    res : qubovert.sim.AnnealResults object.
+    res : qubovert.sim.AnnealResults object, or NumPy array.
         ``res`` contains information on the final states of the simulations.
         See Examples below for an example of how to read from ``res``.
-        See ``help(qubovert.sim.AnnealResults)`` for more info.
+        See ``help(qubovert.sim.AnnealResults)`` for more info. If
+        ``values_only`` is True, then ``res`` is a NumPy array of the values
+        of the final states.
 
     Raises
     ------
@@ -564,6 +1642,15 @@ def anneal_pubo(P, num_anneals=1, anneal_duration=1000, initial_state=None,
         Parameters section.
     ValueError
         If the initial temperature is less than the final temperature.
+    ValueError
+        If the one-hot groups are invalid, or if ``initial_state`` does not
+        satisfy them.
+    ValueError
+        If ``backend`` is not one of ``qubovert.sim.BACKENDS``, or if it is
+        ``'c'`` and the C extension is not available.
+    ValueError
+        If ``checkpoint`` was written by a different job, or with a
+        different ``seed``.
 
     Warns
     -----
@@ -600,16 +1687,26 @@ def anneal_pubo(P, num_anneals=1, anneal_duration=1000, initial_state=None,
     -4, {0: 0, 1: 1, 2: 0, 3: 1, 4: 0}
 
     """
-    return anneal_puso(
-        pubo_to_puso(P), num_anneals, anneal_duration,
+    H = (
+        P.to_compact_puso() if isinstance(P, CompactPUBOMatrix) else
+        pubo_to_puso(P)
+    )
+    res = anneal_puso(
+        H, num_anneals, anneal_duration,
         boolean_to_spin(initial_state) if initial_state is not None else None,
-        temperature_range, schedule, in_order, seed
-    ).to_boolean()
+        temperature_range, schedule, in_order, seed, one_hot_groups, reorder,
+        backend, executor, num_chunks, checkpoint, top_k, values_only,
+        checkpoint_interval
+    )
+    return res if values_only else res.to_boolean()
 
 
 def anneal_qubo(Q, num_anneals=1, anneal_duration=1000, initial_state=None,
                 temperature_range=None, schedule='geometric',
-                in_order=True, seed=None):
+                in_order=True, seed=None, one_hot_groups=None,
+                reorder=False, backend=None, executor=None, num_chunks=None,
+                checkpoint=None, top_k=None, values_only=False,
+                checkpoint_interval=None):
     """anneal_qubo.
 
     Run a simulated annealing algorithm to try to find the minimum of the QUBO
@@ -661,15 +1758,97 @@ def anneal_qubo(Q, num_anneals=1, anneal_duration=1000, initial_state=None,
         is more physically realistic, but when using the simulation for
         annealing, often it is better to have ``in_order = True``.
     seed : number (optional, defaults to None).
-        The number to seed Python's builtin ``random`` module with. If
-        ``seed is None``, then ``random.seed`` will not be called.
+        The number to seed the random number generator with. Each anneal
+        draws its random numbers from its own stream, selected by the index
+        of the anneal, so the results of a seeded run are reproducible
+        regardless of how the anneals are split up. If ``seed is None``, then
+        the random number generator is seeded with the internal clock.
+    one_hot_groups : iterable of iterables (optional, defaults to None).
+        Each element is a group of variable labels of which exactly one
+        variable must be 1 (for example, the one-hot constraints of a
+        ``qubovert.PCBO``, see ``qubovert.PCBO.one_hot_groups``). Instead of
+        flipping single variables in a group, the anneal proposes swap moves
+        that move the 1 to another variable of the group, so that every state
+        that is visited satisfies the groups. The couplings between the
+        variables of a group, such as the penalties that enforce the one-hot
+        constraint, are constant on these states and are removed before
+        annealing. If ``initial_state`` is provided, then it must satisfy the
+        groups.
+    reorder : bool (optional, defaults to False).
+        Whether to relabel the variables before annealing with a reverse
+        Cuthill-McKee ordering of the interaction graph, so that variables that
+        interact are stored close together. This improves the memory locality
+        of the anneal for large sparse models. The original labels are
+        restored in the results. Note that seeded anneals give different
+        results with and without reordering.
+    backend : str (optional, defaults to None).
+        Which implementation of the annealing algorithm to use, one of
+        ``qubovert.sim.BACKENDS``. The ``'c'`` backend runs the anneals one
+        after the other in the compiled C extension. The ``'numpy'`` backend
+        runs all of the anneals at once as the columns of an
+        ``(N, num_anneals)`` array, updating all of the variables in a color
+        class of the interaction graph together (``in_order`` then refers to
+        the order of the color classes). It does not need the C extension
+        and can be faster for a large ``num_anneals``, but its seeded results
+        differ from those of the ``'c'`` backend. If ``backend`` is None, then
+        ``'c'`` is used if the C extension is available and ``'numpy'``
+        otherwise.
+    executor : concurrent.futures.Executor object (optional, defaults to
+               None).
+        If ``executor`` is given, then the anneals are split into
+        ``num_chunks`` chunks that are run on ``executor``, for example a
+        ``concurrent.futures.ProcessPoolExecutor`` or an executor that
+        distributes work across the nodes of a cluster. The model is
+        serialized once into a compact form that is sent with each chunk, so
+        the workers do not need to share a file system, and each worker
+        deserializes it once. The results are merged as the chunks
+        complete. Since each anneal
+        draws its random numbers from the stream selected by its index, a
+        seeded run with the ``'c'`` backend gives the same results with and
+        without an ``executor``.
+    num_chunks : int >= 1 (optional, defaults to None).
+        The number of chunks to split the anneals into when an ``executor`` or
+        a ``checkpoint`` is given. If ``num_chunks`` is None, then
+        ``os.cpu_count()`` chunks are used.
+    checkpoint : str (optional, defaults to None).
+        The path of a checkpoint file. If ``checkpoint`` is given, then the
+        anneals are run in ``num_chunks`` chunks (or smaller, see
+        ``checkpoint_interval``), and after each chunk its states and values
+        are appended to the file, with the spins packed into bits. If the
+        job is interrupted, then calling the function again with the same
+        arguments resumes the job, ie only the anneals that are missing from
+        the file are run. Since each anneal
+        draws its random numbers from the stream selected by its index, a
+        resumed seeded job gives the same results as an uninterrupted one.
+        If ``seed`` is None, then a random seed is drawn and stored in the
+        file. The file is kept after the job completes.
+    top_k : int >= 1 (optional, defaults to None).
+        If ``top_k`` is given, then only the ``top_k`` distinct states with
+        the lowest values are returned, sorted from the lowest to the
+        highest value, and the ``count`` attribute of each result is the
+        number of anneals that ended in that state. The states are packed
+        into bits and hashed as the anneals finish, so the memory used is
+        proportional to ``top_k`` instead of ``num_anneals``. Ties at the
+        cutoff are broken arbitrarily.
+    values_only : bool (optional, defaults to False).
+        If ``values_only`` is True, then only the values of the final states
+        are returned, as a NumPy array, and the states are never built. If
+        ``top_k`` is also given, then the array contains the values of the
+        ``top_k`` distinct states.
+    checkpoint_interval : int >= 1 (optional, defaults to None).
+        If ``checkpoint`` is given, then the chunks have at most
+        ``checkpoint_interval`` anneals, so at most that many anneals are
+        lost if the job is interrupted. If ``checkpoint_interval`` is None,
+        then the job is checkpointed once per chunk.
 
     Returns
     -------
-    res : qubovert.sim.AnnealResults object.
+    res : qubovert.sim.AnnealResults object, or NumPy array.
         ``res`` contains information on the final states of the simulations.
         See Examples below for an example of how to read from ``res``.
-        See ``help(qubovert.sim.AnnealResults)`` for more info.
+        See ``help(qubovert.sim.AnnealResults)`` for more info. If
+        ``values_only`` is True, then ``res`` is a NumPy array of the values
+        of the final states.
 
     Raises
     ------
@@ -678,6 +1857,15 @@ def anneal_qubo(Q, num_anneals=1, anneal_duration=1000, initial_state=None,
         Parameters section.
     ValueError
         If the initial temperature is less than the final temperature.
+    ValueError
+        If the one-hot groups are invalid, or if ``initial_state`` does not
+        satisfy them.
+    ValueError
+        If ``backend`` is not one of ``qubovert.sim.BACKENDS``, or if it is
+        ``'c'`` and the C extension is not available.
+    ValueError
+        If ``checkpoint`` was written by a different job, or with a
+        different ``seed``.
 
     Warns
     -----
@@ -711,8 +1899,11 @@ def anneal_qubo(Q, num_anneals=1, anneal_duration=1000, initial_state=None,
     -4, {0: 0, 1: 1, 2: 0, 3: 1, 4: 0}
 
     """
-    return anneal_quso(
+    res = anneal_quso(
         qubo_to_quso(Q), num_anneals, anneal_duration,
         boolean_to_spin(initial_state) if initial_state is not None else None,
-        temperature_range, schedule, in_order, seed
-    ).to_boolean()
+        temperature_range, schedule, in_order, seed, one_hot_groups, reorder,
+        backend, executor, num_chunks, checkpoint, top_k, values_only,
+        checkpoint_interval
+    )
+    return res if values_only else res.to_boolean()
@@ -0,0 +1,480 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""_anneal_pool.py.
+
+This file contains the AnnealPool object, which runs anneals of one model in
+long-lived worker processes that share the compiled model through shared
+memory.
+
+"""
+
+from qubovert.utils import (
+    QUSOMatrix, PUSOMatrix, pubo_to_puso, boolean_to_spin
+)
+from qubovert import QUSO, PUSO, PCSO
+from ._anneal import (
+    _create_spin_schedule, _package_spin_results, _prepare_model,
+    _create_initial_state, _quso_arrays, _puso_arrays, _get_backend,
+    c_anneal_quso, c_anneal_puso, np_anneal_quso, np_anneal_puso
+)
+from . import AnnealResults, AnnealResult
+import multiprocessing as mp
+import numpy as np
+import random
+import queue
+import os
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+
+__all__ = 'AnnealPool',
+
+
+# helpers
+
+def _to_shared(array):
+    """_to_shared.
+
+    Copy ``array`` into a new block of shared memory.
+
+    Parameters
+    ----------
+    array : numpy array.
+
+    Returns
+    -------
+    res : tuple (shm, spec).
+        ``shm`` is the ``multiprocessing.shared_memory.SharedMemory`` object
+        and ``spec`` is the ``(name, dtype, shape)`` tuple that ``_attach``
+        uses to read the array.
+
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[:] = array
+    return shm, (shm.name, array.dtype.str, array.shape)
+
+
+def _attach(spec):
+    """_attach.
+
+    Read an array that was put into shared memory with ``_to_shared``.
+
+    Parameters
+    ----------
+    spec : tuple (name, dtype, shape).
+
+    Returns
+    -------
+    res : tuple (shm, array).
+        ``array`` is a view of the shared memory ``shm``, so the model is not
+        copied into each worker. The annealing functions read it directly.
+        ``shm`` must be closed once ``array`` is no longer used.
+
+    """
+    name, dtype, shape = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype, buffer=shm.buf)
+
+
+def _worker(func, specs, N, group_sizes, groups, tasks, done):
+    """_worker.
+
+    The loop that each worker process of an ``AnnealPool`` runs. The model is
+    read from shared memory once, and then each task is annealed and its
+    results are written into the shared result buffer of the task.
+
+    Parameters
+    ----------
+    func : function.
+        The annealing function, ie one of the C functions or their NumPy
+        equivalents.
+    specs : list of tuples.
+        The shared memory specs of the arrays that describe the model. See
+        ``_to_shared``.
+    N : int.
+        The number of spins in the model.
+    group_sizes : list of ints.
+    groups : list of ints.
+    tasks : multiprocessing.Queue object.
+        Each task is a tuple ``(name, num_total, start, num_anneals, Ts,
+        in_order, init_state, seed)``, where ``name`` is the name of the
+        shared result buffer, ``num_total`` is the number of anneals that the
+        buffer holds, and ``start`` is the index of the first anneal of this
+        task. ``None`` stops the worker.
+    done : multiprocessing.Queue object.
+        For each task, the worker puts ``(start, error)`` on ``done``, where
+        ``error`` is None if the task succeeded.
+
+    """
+    shms, arrays = [], []
+    for spec in specs:
+        if isinstance(spec, int):
+            arrays.append(spec)
+        else:
+            shm, array = _attach(spec)
+            shms.append(shm)
+            arrays.append(array)
+
+    for task in iter(tasks.get, None):
+        name, num_total, start, num_anneals, Ts, in_order, init, seed = task
+        try:
+            states, values, _ = func(
+                *arrays, Ts, num_anneals, in_order, init, seed, start,
+                group_sizes, groups, 0, 0
+            )
+            shm = shared_memory.SharedMemory(name=name)
+            res_values, res_states = _result_arrays(shm, num_total, N)
+            res_values[start:start+num_anneals] = values
+            res_states[start:start+num_anneals] = states
+            del res_values, res_states
+            shm.close()
+            done.put((start, None))
+        except Exception as e:
+            done.put((start, e))
+
+    # the views must be released before the shared memory can be closed.
+    del arrays
+    for shm in shms:
+        shm.close()
+
+
+def _result_arrays(shm, num_anneals, N):
+    """_result_arrays.
+
+    View the shared result buffer of a call to ``AnnealPool.anneal`` as
+    arrays. The buffer holds the value of each anneal followed by the state
+    of each anneal.
+
+    Parameters
+    ----------
+    shm : multiprocessing.shared_memory.SharedMemory object.
+    num_anneals : int.
+    N : int.
+        The number of spins in each state. It cannot be read from the size of
+        ``shm``, since that may be rounded up to a whole page.
+
+    Returns
+    -------
+    res : tuple of numpy arrays (values, states).
+        ``values`` has shape ``(num_anneals,)`` and ``states`` has shape
+        ``(num_anneals, N)``.
+
+    """
+    values = np.ndarray((num_anneals,), np.float64, buffer=shm.buf)
+    states = np.ndarray(
+        (num_anneals, N), np.int8, buffer=shm.buf, offset=values.nbytes
+    )
+    return values, states
+
+
+# AnnealPool object
+
+class AnnealPool:
+    """AnnealPool.
+
+    Run anneals of one model in a pool of long-lived worker processes. The
+    model is compiled into the arrays that the annealing functions use and
+    put into shared memory once, when the pool is created. Each call to
+    ``anneal`` then only sends small work items, ie the seed, the number of
+    anneals, and the temperature schedule, to the workers, and the workers
+    write the resulting states and values into a shared buffer. Separate
+    processes avoid the contention of the GIL and of the memory allocator,
+    and the cost of a call does not grow with the size of the model.
+
+    Each worker runs a contiguous chunk of the anneals of a call, and each
+    anneal draws its random numbers from the stream that is selected by its
+    index, so a seeded call to ``anneal`` gives the same results as the
+    corresponding call to ``qubovert.sim.anneal_quso`` (or
+    ``anneal_puso``, ``anneal_qubo``, ``anneal_pubo``) with the C backend.
+
+    The pool should be closed with ``close`` when it is no longer needed,
+    which stops the workers and frees the shared memory. The pool can also
+    be used as a context manager, which closes it on exit.
+
+    Example
+    -------
+    >>> import qubovert as qv
+    >>>
+    >>> H = sum(qv.spin_var(i) * qv.spin_var(i+1) for i in range(1000))
+    >>> with qv.sim.AnnealPool(H, spin=True, processes=4) as pool:
+    >>>     res = pool.anneal(num_anneals=100, seed=0)
+    >>>     res2 = pool.anneal(num_anneals=100, anneal_duration=5000)
+    >>> res.best.value
+    -1000
+
+    """
+
+    def __init__(self, H, spin=False, processes=None, one_hot_groups=None,
+                 reorder=False, backend=None):
+        """__init__.
+
+        Compile ``H``, put it into shared memory, and start the workers.
+
+        Parameters
+        ----------
+        H : dict, or any type in ``qubovert.BOOLEAN_MODELS`` or
+            ``qubovert.SPIN_MODELS``.
+            The model to anneal.
+        spin : bool (optional, defaults to False).
+            Whether ``H`` is a spin model or a boolean model. The states in
+            the results of ``anneal`` are of the same kind as ``H``.
+        processes : int >= 1 (optional, defaults to None).
+            The number of worker processes. If ``processes`` is None, then
+            ``os.cpu_count()`` workers are started.
+        one_hot_groups : iterable of iterables (optional, defaults to None).
+            See ``qubovert.sim.anneal_puso`` or ``qubovert.sim.anneal_pubo``.
+        reorder : bool (optional, defaults to False).
+            See ``qubovert.sim.anneal_puso``.
+        backend : str (optional, defaults to None).
+            See ``qubovert.sim.anneal_puso``.
+
+        Raises
+        ------
+        ValueError
+            If the one-hot groups are invalid, or if ``backend`` is not valid.
+        RuntimeError
+            If ``multiprocessing.shared_memory`` is not available, ie before
+            Python 3.8.
+
+        """
+        if shared_memory is None:
+            raise RuntimeError("AnnealPool requires Python 3.8 or later")
+
+        self._spin = spin
+        if not spin:
+            H = pubo_to_puso(H)
+
+        # must use type since we don't want errors from inheritance
+        if type(H) in (QUSOMatrix, PUSOMatrix):
+            model = H
+            reverse_mapping = dict(enumerate(range(H.max_index + 1)))
+        else:
+            if type(H) not in (QUSO, PUSO, PCSO):
+                H = PUSO(H)
+            model = H.to_puso()
+            reverse_mapping = H.reverse_mapping
+
+        model, self._N, self._reverse_mapping, group_sizes, groups = (
+            _prepare_model(model, reverse_mapping, one_hot_groups, reorder)
+        )
+        self._offset, self._group_sizes, self._groups = (
+            model.offset, group_sizes, groups
+        )
+        # the default temperature range comes from the model without the
+        # one-hot penalty terms.
+        self._model = model
+
+        if model.degree <= 2:
+            func = _get_backend(backend, c_anneal_quso, np_anneal_quso)
+            h, num_neighbors, neighbors, J = _quso_arrays(
+                QUSOMatrix(model), self._N
+            )
+            arrays = [
+                np.array(h, dtype=np.float64),
+                np.array(num_neighbors, dtype=np.int64),
+                np.array(neighbors, dtype=np.int64),
+                np.array(J, dtype=np.float64)
+            ]
+        else:
+            func = _get_backend(backend, c_anneal_puso, np_anneal_puso)
+            num_couplings, terms, couplings = _puso_arrays(model)
+            arrays = [
+                self._N,
+                np.array(num_couplings, dtype=np.int64),
+                np.array(terms, dtype=np.int64),
+                np.array(couplings, dtype=np.float64)
+            ]
+
+        self._shms, specs = [], []
+        for a in arrays:
+            if isinstance(a, int):
+                specs.append(a)
+            else:
+                shm, spec = _to_shared(a)
+                self._shms.append(shm)
+                specs.append(spec)
+
+        self._tasks, self._done = mp.Queue(), mp.Queue()
+        self._workers = [
+            mp.Process(
+                target=_worker, daemon=True,
+                args=(func, specs, self._N, group_sizes, groups,
+                      self._tasks, self._done)
+            ) for _ in range(processes or os.cpu_count() or 1)
+        ]
+        for w in self._workers:
+            w.start()
+
+    @property
+    def processes(self):
+        """processes.
+
+        Return the number of worker processes.
+
+        Return
+        ------
+        res : int.
+
+        """
+        return len(self._workers)
+
+    def anneal(self, num_anneals=1, anneal_duration=1000, initial_state=None,
+               temperature_range=None, schedule='geometric', in_order=True,
+               seed=None):
+        """anneal.
+
+        Run ``num_anneals`` anneals of the model, split evenly among the
+        workers. See ``qubovert.sim.anneal_puso`` or
+        ``qubovert.sim.anneal_pubo`` for details on the parameters.
+
+        Parameters
+        ----------
+        num_anneals : int >= 1 (optional, defaults to 1).
+            The number of times to run the simulated annealing algorithm.
+        anneal_duration : int >= 1 (optional, defaults to 1000).
+            The total number of updates to the simulation during the anneal.
+        initial_state : dict (optional, defaults to None).
+            The initial state to start the anneals in.
+        temperature_range : tuple (optional, defaults to None).
+            The temperature to start and end the anneal at.
+        schedule : str, or list of floats (optional, defaults to
+                   ``'geometric'``).
+            What type of cooling schedule to use.
+        in_order : bool (optional, defaults to True).
+            Whether to iterate through the variables in order or randomly
+            during an update step.
+        seed : number (optional, defaults to None).
+            The number to seed the random number generator with. If
+            ``seed is None``, then a random seed is drawn for the call.
+
+        Returns
+        -------
+        res : qubovert.sim.AnnealResults object.
+
+        Raises
+        ------
+        ValueError
+            If the ``schedule`` argument provided is formatted incorrectly,
+            if the initial temperature is less than the final temperature, or
+            if ``initial_state`` does not satisfy the one-hot groups.
+        RuntimeError
+            If the pool is closed, or if a worker died during the call, in
+            which case the pool is closed.
+
+        """
+        if not self._workers:
+            raise RuntimeError("The AnnealPool is closed")
+        if num_anneals <= 0:
+            return AnnealResults()
+
+        Ts = _create_spin_schedule(
+            self._model, anneal_duration, temperature_range, schedule
+        )
+
+        if not self._N:
+            res = AnnealResults(
+                AnnealResult({}, self._offset, True)
+                for _ in range(num_anneals)
+            )
+            return res if self._spin else res.to_boolean()
+
+        if initial_state is not None and not self._spin:
+            initial_state = boolean_to_spin(initial_state)
+        init_state = _create_initial_state(
+            initial_state, self._N, self._reverse_mapping,
+            self._group_sizes, self._groups
+        )
+        if seed is None:
+            seed = random.randrange(2 ** 31 - 1)
+
+        shm = shared_memory.SharedMemory(
+            create=True, size=num_anneals * (8 + self._N)
+        )
+        try:
+            chunk = -(-num_anneals // self.processes)
+            starts = range(0, num_anneals, chunk)
+            for start in starts:
+                self._tasks.put((
+                    shm.name, num_anneals, start,
+                    min(chunk, num_anneals - start),
+                    Ts, int(in_order), init_state, seed
+                ))
+
+            errors = []
+            while len(errors) < len(starts):
+                try:
+                    errors.append(self._done.get(timeout=1)[1])
+                except queue.Empty:
+                    if not all(w.is_alive() for w in self._workers):
+                        for w in self._workers:
+                            w.terminate()
+                        self.close()
+                        raise RuntimeError(
+                            "A worker of the AnnealPool died, so the pool "
+                            "was closed"
+                        )
+            error = next((e for e in errors if e is not None), None)
+            if error is not None:
+                raise error
+
+            values, states = _result_arrays(shm, num_anneals, self._N)
+            res = _package_spin_results(
+                states.tolist(), values.tolist(), None,
+                self._offset, self._reverse_mapping, False
+            )
+            del values, states
+        finally:
+            shm.close()
+            shm.unlink()
+
+        return res if self._spin else res.to_boolean()
+
+    def close(self):
+        """close.
+
+        Stop the workers and free the shared memory of the model. The pool
+        cannot be used after it is closed.
+
+        """
+        for _ in self._workers:
+            self._tasks.put(None)
+        for w in self._workers:
+            w.join()
+        self._workers = []
+
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+
+    def __enter__(self):
+        """__enter__.
+
+        Returns
+        -------
+        self : AnnealPool object.
+
+        """
+        return self
+
+    def __exit__(self, *args):
+        """__exit__.
+
+        Close the pool.
+
+        """
+        self.close()
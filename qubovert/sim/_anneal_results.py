@@ -19,9 +19,95 @@ This file contains the objects to deal with anneal results.
 """
 
 from qubovert.utils import spin_to_boolean, boolean_to_spin
+from itertools import chain
+from operator import attrgetter
+import heapq
+import numpy as np
+import pickle
+import struct
 
 
-__all__ = 'AnnealResult', 'AnnealResults'
+__all__ = 'AnnealResult', 'AnnealResults', 'AnnealResultsFile'
+
+
+# the first bytes of a file written by ``AnnealResults.save``
+_MAGIC = b'QUBOVERT-RESULTS'
+# the arrays are aligned to this many bytes in the file
+_ALIGN = 64
+
+
+def _state_arrays(results):
+    """_state_arrays.
+
+    Convert the states of ``results`` to arrays. When every state has the
+    same labels in the same order, which is the case for the output of the
+    anneal functions, the values are read straight out of the dicts.
+
+    Parameters
+    ----------
+    results : list of ``qubovert.sim.AnnealResult`` objects.
+
+    Returns
+    -------
+    res : tuple (labels, states, spins, present).
+        ``labels`` is a list of every label in the states. ``states`` is an
+        int8 NumPy array where ``states[r, i]`` is the value of
+        ``labels[i]`` in the ``r`` th state, or 0 if it does not have that
+        label. ``spins`` is a boolean NumPy array of the ``spin`` attributes.
+        ``present`` is None if every state has every label, otherwise it is
+        a boolean NumPy array that is True where ``states`` has a label.
+
+    """
+    n = len(results)
+    labels = list(results[0].state) if n else []
+    present = None
+    if all(list(r.state) == labels for r in results):
+        states = np.fromiter(
+            chain.from_iterable(r.state.values() for r in results),
+            dtype=np.int8, count=n * len(labels)
+        )
+    else:
+        labels = list(dict.fromkeys(chain.from_iterable(
+            r.state for r in results
+        )))
+        states = np.array(
+            [[r.state.get(v, 0) for v in labels] for r in results],
+            dtype=np.int8
+        )
+        present = np.array(
+            [[v in r.state for v in labels] for r in results], dtype=bool
+        )
+
+    spins = np.fromiter((r.spin for r in results), dtype=bool, count=n)
+    return labels, states.reshape(n, len(labels)), spins, present
+
+
+def _pack_bits(states, spins, present):
+    """_pack_bits.
+
+    Pack the output of ``_state_arrays`` into bits, so that two rows of the
+    result are equal if and only if the corresponding results have the same
+    state and the same ``spin`` attribute.
+
+    Parameters
+    ----------
+    states : 2D NumPy array.
+    spins : NumPy array.
+    present : 2D NumPy array or None.
+
+    Returns
+    -------
+    packed : 2D uint8 NumPy array.
+        A bit is set for each spin that is -1 in a spin state, and for each
+        variable that is 1 in a boolean state.
+
+    """
+    bits = [
+        np.where(spins[:, None], states == -1, states == 1), spins[:, None]
+    ]
+    if present is not None:
+        bits.append(present)
+    return np.packbits(np.hstack(bits), axis=1)
 
 
 class AnnealResult:
@@ -44,6 +130,8 @@ class AnnealResult:
     -2
     >>> print(res.spin)
     True
+    >>> print(res.count)
+    1
 
     We can convert it to a boolean state with
 
@@ -57,7 +145,7 @@ class AnnealResult:
 
     """
 
-    def __init__(self, state, value, spin):
+    def __init__(self, state, value, spin, count=1):
         """__init__.
 
         Parameters
@@ -68,9 +156,13 @@ class AnnealResult:
             The value of the model with ``state``.
         spin : bool.
             Indicates whether ``state`` came from a boolean or spin model.
+        count : int (optional, defaults to 1).
+            The number of anneals that ended in ``state``. This is more than
+            1 when the anneal functions are called with ``top_k``.
 
         """
         self.state, self.value, self.spin = state, value, spin
+        self.count = count
 
     def __eq__(self, other):
         """__eq__.
@@ -89,7 +181,8 @@ class AnnealResult:
         return all((
             self.state == other.state,
             self.value == other.value,
-            self.spin == other.spin
+            self.spin == other.spin,
+            self.count == other.count
         ))
 
     def __lt__(self, other):
@@ -134,7 +227,9 @@ class AnnealResult:
         res : AnnealResult.
 
         """
-        return AnnealResult(self.state.copy(), self.value, self.spin)
+        return AnnealResult(
+            self.state.copy(), self.value, self.spin, self.count
+        )
 
     def to_boolean(self):
         """to_boolean.
@@ -150,7 +245,9 @@ class AnnealResult:
         """
         if not self.spin:
             return self.copy()
-        return AnnealResult(spin_to_boolean(self.state), self.value, False)
+        return AnnealResult(
+            spin_to_boolean(self.state), self.value, False, self.count
+        )
 
     def to_spin(self):
         """to_spin.
@@ -166,7 +263,9 @@ class AnnealResult:
         """
         if self.spin:
             return self.copy()
-        return AnnealResult(boolean_to_spin(self.state), self.value, True)
+        return AnnealResult(
+            boolean_to_spin(self.state), self.value, True, self.count
+        )
 
     def __str__(self):
         """__str__.
@@ -178,9 +277,12 @@ class AnnealResult:
         s : str.
 
         """
-        return "  state: %s\n  value: %g\n   spin: %s" % (
+        s = "  state: %s\n  value: %g\n   spin: %s" % (
             self.state, self.value, self.spin
         )
+        if self.count != 1:
+            s += "\n  count: %d" % self.count
+        return s
 
     def __repr__(self):
         """__repr__.
@@ -192,6 +294,10 @@ class AnnealResult:
         r : str.
 
         """
+        if self.count != 1:
+            return "AnnealResult(state=%s, value=%g, spin=%s, count=%d)" % (
+                self.state, self.value, self.spin, self.count
+            )
         return "AnnealResult(state=%s, value=%g, spin=%s)" % (
             self.state, self.value, self.spin
         )
@@ -231,10 +337,10 @@ class AnnealResults(list):
             objects.
 
         """
-        super().__init__()
-        self.best = None
-        for x in iterable:
-            self.append(x)
+        # build the list in one go and find the best with one reduction,
+        # instead of appending and comparing one result at a time.
+        super().__init__(iterable)
+        self.best = min(self, key=attrgetter('value')) if self else None
 
     def copy(self):
         """copy.
@@ -247,7 +353,7 @@ class AnnealResults(list):
         """
         return AnnealResults(self)
 
-    def add_state(self, state, value, spin):
+    def add_state(self, state, value, spin, count=1):
         """add_state.
 
         Add the state to the record.
@@ -260,13 +366,29 @@ class AnnealResults(list):
             The value of the model with ``state``.
         spin : bool.
             Whether it is from a spin or boolean model.
+        count : int (optional, defaults to 1).
+            The number of anneals that ended in ``state``.
 
         Returns
         -------
         None.
 
         """
-        self.append(AnnealResult(state, value, spin))
+        self.append(AnnealResult(state, value, spin, count))
+
+    def _update_best(self, best):
+        """_update_best.
+
+        Update ``self.best`` after results were added to ``self``.
+
+        Parameters
+        ----------
+        best : AnnealResult object or None.
+            The best of the results that were added.
+
+        """
+        if best is not None and (self.best is None or best < self.best):
+            self.best = best
 
     def append(self, result):
         """append.
@@ -509,7 +631,7 @@ class AnnealResults(list):
 
         """
         return self.apply_function(
-            lambda x: AnnealResult(func(x.state), x.value, x.spin)
+            lambda x: AnnealResult(func(x.state), x.value, x.spin, x.count)
         )
 
     def __add__(self, other):
@@ -526,7 +648,10 @@ class AnnealResults(list):
         res : qubovert.sim.AnnealResults object.
 
         """
-        return AnnealResults(super().__add__(other))
+        res = AnnealResults()
+        res.extend(self)
+        res.extend(other)
+        return res
 
     def __iadd__(self, other):
         """__iadd__.
@@ -542,11 +667,6 @@ class AnnealResults(list):
         self : qubovert.sim.AnnealResults object.
 
         """
-        if isinstance(other, AnnealResults):
-            if other.best < self.best:
-                self.best = other.best
-            return super().__iadd__(other)
-
         self.extend(other)
         return self
 
@@ -561,13 +681,314 @@ class AnnealResults(list):
         other : qubovert.sim.AnnealResults object or iterable.
 
         """
-        if isinstance(other, AnnealResults):
-            if other.best < self.best:
-                self.best = other.best
-            super().extend(other)
+        if not isinstance(other, AnnealResults):
+            other = AnnealResults(other)
+        super().extend(other)
+        self._update_best(other.best)
+
+    @staticmethod
+    def merge(*results):
+        """merge.
+
+        Concatenate many ``qubovert.sim.AnnealResults`` objects at once, for
+        example the results of many parallel workers. The underlying lists
+        are concatenated in one go and the best result is found from the
+        ``best`` attributes of the inputs, so no result is compared or
+        appended individually.
+
+        Parameters
+        ----------
+        *results : qubovert.sim.AnnealResults objects or iterables.
+            Iterables that are not ``qubovert.sim.AnnealResults`` objects
+            must contain ``qubovert.sim.AnnealResult`` objects.
+
+        Returns
+        -------
+        res : qubovert.sim.AnnealResults object.
+            The results of each input, one input after the other.
+
+        Example
+        -------
+        >>> import qubovert as qv
+        >>>
+        >>> H = sum(qv.spin_var(i) * qv.spin_var(i+1) for i in range(4))
+        >>> res = qv.sim.AnnealResults.merge(*(
+        >>>     qv.sim.anneal_quso(H, num_anneals=100) for _ in range(64)
+        >>> ))
+        >>> len(res)
+        6400
+
+        """
+        res = AnnealResults()
+        for r in results:
+            res.extend(r)
+        return res
+
+    @staticmethod
+    def merge_sorted(*results):
+        """merge_sorted.
+
+        Merge results that are each sorted by value into one
+        ``qubovert.sim.AnnealResults`` object that is sorted by value. This
+        is a k-way merge that takes ``O(n log k)`` time for ``n`` results in
+        ``k`` inputs. If every input is a list, for example a
+        ``qubovert.sim.AnnealResults`` object, then the merge is done on a
+        NumPy array of the values. Otherwise the inputs are streamed through
+        a heap, so they can be any iterables, for example
+        ``qubovert.sim.AnnealResultsFile`` objects. Results with equal values
+        keep the order of the inputs.
+
+        Parameters
+        ----------
+        *results : iterables of qubovert.sim.AnnealResult objects.
+            Each must be sorted from the lowest to the highest value, for
+            example with ``res.sort()``.
+
+        Returns
+        -------
+        res : qubovert.sim.AnnealResults object.
+            All of the results, sorted from the lowest to the highest value.
+
+        Example
+        -------
+        >>> import qubovert as qv
+        >>>
+        >>> H = sum(qv.spin_var(i) * qv.spin_var(i+1) for i in range(4))
+        >>> results = [qv.sim.anneal_quso(H, num_anneals=3) for _ in range(4)]
+        >>> for res in results:
+        >>>     res.sort()
+        >>> merged = qv.sim.AnnealResults.merge_sorted(*results)
+        >>> merged.best is merged[0]
+        True
+
+        """
+        if all(isinstance(r, list) for r in results):
+            # the stable sort finds and merges the sorted runs, which is a
+            # k-way merge that runs in NumPy instead of Python.
+            combined = list(chain.from_iterable(results))
+            order = np.argsort(np.fromiter(
+                (r.value for r in combined), float, len(combined)
+            ), kind='stable')
+            merged = map(combined.__getitem__, order.tolist())
         else:
-            for x in other:
-                self.append(x)
+            merged = heapq.merge(*results, key=attrgetter('value'))
+
+        res = AnnealResults()
+        list.extend(res, merged)
+        res.best = res[0] if res else None
+        return res
+
+    def _unique_indices(self):
+        """_unique_indices.
+
+        Find the distinct states by hashing their bit-packed rows.
+
+        Returns
+        -------
+        res : tuple of NumPy arrays (first, counts).
+            ``first[j]`` is the index of the first result with the ``j`` th
+            distinct state, in the order that they first appear, and
+            ``counts[j]`` is the total ``count`` of the results with that
+            state.
+
+        """
+        if not self:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        _, states, spins, present = _state_arrays(self)
+        packed = _pack_bits(states, spins, present)
+        # view each row as a single bytes object so that np.unique hashes
+        # rows with a one dimensional sort
+        rows = packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+        _, first, inverse = np.unique(
+            rows, return_index=True, return_inverse=True
+        )
+        counts = np.bincount(
+            inverse.ravel(),
+            np.fromiter((r.count for r in self), float, len(self)),
+            len(first)
+        )
+        order = np.argsort(first)
+        return first[order], counts[order].astype(int)
+
+    def unique(self):
+        """unique.
+
+        Return the distinct results of ``self``. The states are compared by
+        packing them into bits, so this scales to millions of results.
+
+        Returns
+        -------
+        res : qubovert.sim.AnnealResults object.
+            Contains one result for each distinct state in ``self``, in the
+            order that they first appear. The ``count`` attribute of each
+            result is the total ``count`` of the results in ``self`` with
+            that state, ie the number of anneals that ended in that state.
+
+        Example
+        -------
+        >>> import qubovert as qv
+        >>>
+        >>> model = qv.boolean_var(0) * qv.boolean_var(1)
+        >>> anneal_res = qv.sim.anneal_qubo(model, num_anneals=4)
+        >>>
+        >>> anneal_res
+        [AnnealResult(state={0: 0, 1: 1}, value=0, spin=False),
+         AnnealResult(state={0: 1, 1: 0}, value=0, spin=False),
+         AnnealResult(state={0: 0, 1: 1}, value=0, spin=False),
+         AnnealResult(state={0: 0, 1: 0}, value=0, spin=False)]
+        >>> anneal_res.unique()
+        [AnnealResult(state={0: 0, 1: 1}, value=0, spin=False, count=2),
+         AnnealResult(state={0: 1, 1: 0}, value=0, spin=False),
+         AnnealResult(state={0: 0, 1: 0}, value=0, spin=False)]
+
+        """
+        first, counts = self._unique_indices()
+        return AnnealResults(
+            AnnealResult(self[i].state.copy(), self[i].value, self[i].spin, c)
+            for i, c in zip(first.tolist(), counts.tolist())
+        )
+
+    def counts(self):
+        """counts.
+
+        Return the multiplicities and the empirical frequencies of the
+        distinct states of ``self``, in the order of ``self.unique()``. The
+        frequency of a state is the fraction of the anneals that ended in
+        it. If the anneals equilibrate at their final temperature ``T``,
+        then the frequencies approximate the Boltzmann distribution
+        ``exp(-value / T) / Z``.
+
+        Returns
+        -------
+        res : tuple of NumPy arrays (counts, frequencies).
+            ``counts[j]`` is the number of anneals that ended in the ``j`` th
+            distinct state, and ``frequencies[j]`` is
+            ``counts[j] / counts.sum()``.
+
+        Example
+        -------
+        >>> import qubovert as qv
+        >>>
+        >>> model = qv.boolean_var(0) * qv.boolean_var(1)
+        >>> anneal_res = qv.sim.anneal_qubo(model, num_anneals=4)
+        >>> counts, frequencies = anneal_res.counts()
+        >>> counts
+        array([2, 1, 1])
+        >>> frequencies
+        array([0.5 , 0.25, 0.25])
+
+        """
+        counts = self._unique_indices()[1]
+        return counts, counts / max(1, counts.sum())
+
+    def save(self, path, metadata=None):
+        """save.
+
+        Save ``self`` to the file ``path`` in a compact binary format that
+        can be memory-mapped. The states are packed into bits, one row per
+        result, and stored with the values as float64, the counts as int64,
+        and the ``spin`` attributes, along with a table of the variable
+        labels and ``metadata``. See ``qubovert.sim.AnnealResults.load``.
+
+        Parameters
+        ----------
+        path : str.
+            The path of the file to write.
+        metadata : dict (optional, defaults to None).
+            Any information to store with the results, for example the
+            schedule, the seed, and the timing of the anneals. It must be
+            picklable.
+
+        Example
+        -------
+        >>> import qubovert as qv
+        >>>
+        >>> H = sum(qv.spin_var(i) * qv.spin_var(i+1) for i in range(4))
+        >>> res = qv.sim.anneal_quso(H, num_anneals=1000, seed=0)
+        >>> res.save('results.qvr', metadata={'seed': 0})
+        >>> res == qv.sim.AnnealResults.load('results.qvr')
+        True
+
+        """
+        labels, states, spins, present = _state_arrays(self)
+        arrays = dict(
+            states=np.packbits(
+                np.where(spins[:, None], states == -1, states == 1), axis=1
+            ),
+            values=np.fromiter((r.value for r in self), np.float64, len(self)),
+            counts=np.fromiter((r.count for r in self), np.int64, len(self)),
+            spins=spins
+        )
+        if present is not None:
+            arrays['present'] = np.packbits(present, axis=1)
+
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = array.dtype.str, array.shape, offset
+            offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+        header = pickle.dumps(dict(
+            labels=labels, metadata=metadata or {}, layout=layout
+        ), protocol=pickle.HIGHEST_PROTOCOL)
+        start = len(_MAGIC) + 8 + len(header)
+        start = -(-start // _ALIGN) * _ALIGN
+
+        with open(path, 'wb') as f:
+            f.write(_MAGIC + struct.pack('<Q', len(header)) + header)
+            for name, array in arrays.items():
+                f.seek(start + layout[name][2])
+                f.write(np.ascontiguousarray(array).tobytes())
+
+    @staticmethod
+    def load(path, mmap=False):
+        """load.
+
+        Load results that were saved with ``qubovert.sim.AnnealResults.save``.
+        Only load files that you trust, since the label table and the
+        metadata are pickled.
+
+        Parameters
+        ----------
+        path : str.
+            The path of the file.
+        mmap : bool (optional, defaults to False).
+            If ``mmap`` is True, then the data is memory-mapped instead of
+            read, and a ``qubovert.sim.AnnealResultsFile`` object is returned
+            that decodes the results lazily. This allows files with very many
+            results to be queried without loading them.
+
+        Returns
+        -------
+        res : qubovert.sim.AnnealResults or qubovert.sim.AnnealResultsFile.
+            ``res`` is a ``qubovert.sim.AnnealResultsFile`` object if
+            ``mmap`` is True. The metadata is available as the ``metadata``
+            attribute of a ``qubovert.sim.AnnealResultsFile`` object.
+
+        Raises
+        ------
+        ValueError
+            If ``path`` was not written by
+            ``qubovert.sim.AnnealResults.save``.
+
+        Example
+        -------
+        >>> import qubovert as qv
+        >>>
+        >>> H = sum(qv.spin_var(i) * qv.spin_var(i+1) for i in range(4))
+        >>> qv.sim.anneal_quso(H, num_anneals=10 ** 6).save('results.qvr')
+        >>>
+        >>> f = qv.sim.AnnealResults.load('results.qvr', mmap=True)
+        >>> len(f)
+        1000000
+        >>> f.values.min()
+        -4.0
+        >>> f.best.state
+        {0: 1, 1: -1, 2: 1, 3: -1, 4: 1}
+
+        """
+        res = AnnealResultsFile(path, mmap)
+        return res if mmap else res.to_results()
 
     def __mul__(self, other):
         """__mul__.
@@ -584,3 +1005,199 @@ class AnnealResults(list):
 
         """
         return AnnealResults(super().__mul__(other))
+
+
+class AnnealResultsFile:
+    """AnnealResultsFile.
+
+    A read-only view of results that were saved with
+    ``qubovert.sim.AnnealResults.save``. The arrays in the file are
+    memory-mapped or read into memory, and individual results are only
+    decoded into ``qubovert.sim.AnnealResult`` objects when they are
+    accessed. The values, counts, and ``spin`` attributes of the results are
+    available as NumPy arrays, so results with very many rows can be
+    queried with NumPy, for example
+
+    >>> import numpy as np
+    >>> import qubovert as qv
+    >>>
+    >>> f = qv.sim.AnnealResults.load('results.qvr', mmap=True)
+    >>> low = f[np.flatnonzero(f.values < -3)]
+
+    Indexing with an int gives a ``qubovert.sim.AnnealResult`` object, and
+    indexing with a slice or an array of indices gives a
+    ``qubovert.sim.AnnealResults`` object.
+
+    """
+
+    def __init__(self, path, mmap=True):
+        """__init__.
+
+        Parameters
+        ----------
+        path : str.
+            The path of the file.
+        mmap : bool (optional, defaults to True).
+            Whether to memory-map the arrays instead of reading them.
+
+        Raises
+        ------
+        ValueError
+            If ``path`` was not written by
+            ``qubovert.sim.AnnealResults.save``.
+
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(
+                    "%s was not written by AnnealResults.save" % path
+                )
+            header = pickle.loads(f.read(struct.unpack('<Q', f.read(8))[0]))
+            start = -(-f.tell() // _ALIGN) * _ALIGN
+
+            arrays = {}
+            for name, (dtype, shape, offset) in header['layout'].items():
+                dtype = np.dtype(dtype)
+                if not np.prod(shape):  # empty arrays cannot be mapped
+                    arrays[name] = np.zeros(shape, dtype)
+                elif mmap:
+                    arrays[name] = np.memmap(
+                        path, dtype, 'r', start + offset, shape
+                    )
+                else:
+                    f.seek(start + offset)
+                    arrays[name] = np.fromfile(
+                        f, dtype, int(np.prod(shape))
+                    ).reshape(shape)
+
+        self.labels, self.metadata = header['labels'], header['metadata']
+        self.values, self.counts = arrays['values'], arrays['counts']
+        self.spins = arrays['spins']
+        self._states, self._present = arrays['states'], arrays.get('present')
+
+    def __len__(self):
+        """__len__.
+
+        Returns
+        -------
+        n : int.
+            The number of results in the file.
+
+        """
+        return len(self.values)
+
+    def state_array(self, index):
+        """state_array.
+
+        Decode the states of the results ``index`` into an array.
+
+        Parameters
+        ----------
+        index : int, slice, or array of ints.
+
+        Returns
+        -------
+        states : NumPy array of int8.
+            The values of the variables in ``self.labels`` in each state.
+            If a state does not have a label, then its value is 0.
+
+        """
+        bits = np.unpackbits(
+            self._states[index], axis=-1, count=len(self.labels)
+        ).astype(np.int8)
+        states = np.where(self.spins[index][..., None], 1 - 2 * bits, bits)
+        if self._present is not None:
+            states *= np.unpackbits(
+                self._present[index], axis=-1, count=len(self.labels)
+            ).astype(np.int8)
+        return states
+
+    def _result(self, state, present, i):
+        """_result.
+
+        Create the ``i`` th result from its decoded ``state`` row.
+
+        """
+        if present is None:
+            state = dict(zip(self.labels, state))
+        else:
+            state = {
+                v: x for v, x, p in zip(self.labels, state, present) if p
+            }
+        return AnnealResult(
+            state, float(self.values[i]), bool(self.spins[i]),
+            int(self.counts[i])
+        )
+
+    def __getitem__(self, index):
+        """__getitem__.
+
+        Decode the results ``index``.
+
+        Parameters
+        ----------
+        index : int, slice, or array of ints.
+
+        Returns
+        -------
+        res : qubovert.sim.AnnealResult or qubovert.sim.AnnealResults object.
+            If ``index`` is an int, then ``res`` is a
+            ``qubovert.sim.AnnealResult`` object, otherwise it is a
+            ``qubovert.sim.AnnealResults`` object.
+
+        """
+        if isinstance(index, (int, np.integer)):
+            index = range(len(self))[index]
+            return self[[index]][0]
+
+        indices = np.arange(len(self))[index]
+        states = self.state_array(indices).tolist()
+        present = (
+            np.unpackbits(
+                self._present[indices], axis=-1, count=len(self.labels)
+            ).astype(bool).tolist() if self._present is not None
+            else [None] * len(indices)
+        )
+        return AnnealResults(
+            self._result(*x) for x in zip(states, present, indices.tolist())
+        )
+
+    def __iter__(self):
+        """__iter__.
+
+        Iterate through the results, decoding them in blocks.
+
+        Yields
+        ------
+        res : qubovert.sim.AnnealResult object.
+
+        """
+        for start in range(0, len(self), 4096):
+            yield from self[start:start+4096]
+
+    @property
+    def best(self):
+        """best.
+
+        Find the result with the lowest value with one pass over the
+        values.
+
+        Returns
+        -------
+        res : qubovert.sim.AnnealResult object, or None if there are no
+              results.
+
+        """
+        return self[int(np.argmin(self.values))] if len(self) else None
+
+    def to_results(self):
+        """to_results.
+
+        Decode every result.
+
+        Returns
+        -------
+        res : qubovert.sim.AnnealResults object.
+
+        """
+        return self[:]
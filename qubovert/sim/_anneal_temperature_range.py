@@ -19,8 +19,9 @@ annealing a spin model.
 
 """
 
-from qubovert.utils import pubo_to_puso
+from qubovert.utils import pubo_to_puso, CompactPUBOMatrix
 from math import log
+import numpy as np
 
 __all__ = "anneal_temperature_range",
 
@@ -42,7 +43,9 @@ def anneal_temperature_range(model, start_flip_prob=0.5,
     model : dict, or any type in ``qubovert.SPIN_MODELS`` or ``BOOLEAN_MODELS``
         Dictionary mapping tuples of binary labels to their values. See any of
         the docstrings of a type in ``qubovert.SPIN_MODELS`` or
-        ``BOOLEAN_MODELS`` for more info.
+        ``BOOLEAN_MODELS`` for more info. ``model`` can also be a
+        ``qubovert.utils.CompactPUBOMatrix`` or
+        ``qubovert.utils.CompactPUSOMatrix`` object.
     start_flip_prob : float in [0, 1) (optional, defaults to 0.5).
         The desired probability that a bit flips despite it being energetically
         unfavorable at the start of the anneal. ``start_flip_prob`` must be
@@ -78,6 +81,12 @@ def anneal_temperature_range(model, start_flip_prob=0.5,
         raise ValueError("The starting flip probability must be greater than "
                          "the ending flip probability.")
 
+    if isinstance(model, CompactPUBOMatrix):
+        return _compact_temperature_range(
+            model if spin else model.to_compact_puso(),
+            start_flip_prob, end_flip_prob
+        )
+
     if not spin:
         model = pubo_to_puso(model)
 
@@ -105,6 +114,65 @@ def anneal_temperature_range(model, start_flip_prob=0.5,
         for v in variables
     )
 
+    return _temperatures(
+        min_del_energy, max_del_energy, start_flip_prob, end_flip_prob
+    )
+
+
+def _compact_temperature_range(model, start_flip_prob, end_flip_prob):
+    """_compact_temperature_range.
+
+    Calculate the temperature range of a compact spin model with vectorized
+    numpy operations. See ``anneal_temperature_range``.
+
+    Parameters
+    ----------
+    model : qubovert.utils.CompactPUSOMatrix object.
+    start_flip_prob : float in [0, 1).
+    end_flip_prob : float in [0, 1).
+
+    Returns
+    -------
+    temp_range : tuple (hot, cold).
+
+    """
+    _, term_ptr, variables, coefficients = model.to_arrays()
+    if not len(coefficients):
+        return 0, 0
+
+    factor = 2
+    coefficients = np.abs(coefficients)
+    min_del_energy = factor * coefficients.min()
+    max_del_energy = factor * np.bincount(
+        variables, np.repeat(coefficients, np.diff(term_ptr))
+    ).max()
+    return _temperatures(
+        float(min_del_energy), float(max_del_energy),
+        start_flip_prob, end_flip_prob
+    )
+
+
+def _temperatures(min_del_energy, max_del_energy, start_flip_prob,
+                  end_flip_prob):
+    """_temperatures.
+
+    Find the temperatures at which the Boltzmann weights of the energy
+    changes are the flip probabilities. See ``anneal_temperature_range``.
+
+    Parameters
+    ----------
+    min_del_energy : float.
+        The approximate minimum change in energy from flipping a bit.
+    max_del_energy : float.
+        The approximate maximum change in energy from flipping a bit.
+    start_flip_prob : float in [0, 1).
+    end_flip_prob : float in [0, 1).
+
+    Returns
+    -------
+    temp_range : tuple (hot, cold).
+
+    """
     # now ensure that the bolzmann weight satisfy the desired probabilities.
     # ie exp(-del_energy / T) = prob
     T0 = -max_del_energy / log(start_flip_prob) if start_flip_prob else 0.
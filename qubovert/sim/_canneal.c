@@ -1,6 +1,8 @@
 #include "Python.h"
+#include <string.h>
 #include "anneal_quso.h"
 #include "anneal_puso.h"
+#include "top_states.h"
 
 
 /*
@@ -17,44 +19,192 @@ static char _canneal_docstring[] =
 
 
 // helper code for the module functions below.
-PyObject *build_py_states_values(
-    int num_anneals, int len_state, int *states, double *values
+PyObject *build_py_results(
+    int num_anneals, int len_state, int *states, double *values,
+    top_states_t *top, int values_only
 ) {
     /*
-    Build a Python tuple of ``py_states, py_values``, where ``py_states`` is
-    a list of lists, where each list represents a state, and ``py_values`` is
-    a list of floats, where each float is the energy of that state. We build
-    these from the states in values in ``states``, and ``values``. ``states``
-    is an array of length ``len_state * num_anneals``. So
+    Build a Python tuple of ``py_states, py_values, py_counts``. If ``top``
+    is NULL, then ``py_states`` is a list of lists, where each list
+    represents a state, ``py_values`` is a list of floats, where each float
+    is the energy of that state, and ``py_counts`` is None. We build these
+    from the states and values in ``states`` and ``values``. ``states`` is
+    an array of length ``len_state * num_anneals``. So
     ``states[i * len_state + j]`` is the sign that the jth spin took on the
     ith anneal. ``values`` is an array of length ``num_anneals``.
 
+    If ``top`` is not NULL, then the states, values, and counts are the
+    distinct states that ``top`` kept, from the lowest to the highest value,
+    and ``py_counts`` is a list of ints, where each int is the number of
+    anneals that ended in that state.
+
+    If ``values_only`` is nonzero, then ``py_states`` is None.
+
     Parameters
     ----------
     num_anneals : int.
     len_state : int.
-    states : points to an int array of size ``num_anneals * len_state``.
-    values : points to a double array of size ``num_anneals``.
+    states : points to an int array of size ``num_anneals * len_state``, or
+        NULL if ``top`` is not NULL or ``values_only`` is nonzero.
+    values : points to a double array of size ``num_anneals``, or NULL if
+        ``top`` is not NULL.
+    top : points to a ``top_states_t`` struct, or NULL.
+    values_only : int.
 
     Returns
     -------
     res : a Python tuple.
-        The first element of the tuple is a list of lists of ints, and the
-        second element is a list of floats.
+        The first element of the tuple is a list of lists of ints or None,
+        the second element is a list of floats, and the third element is a
+        list of ints or None.
 
     */
-    PyObject *py_states = PyList_New(num_anneals);
-    PyObject *py_values = PyList_New(num_anneals);
-    PyObject *py_state; int i, j;
-    for(i=0; i<num_anneals; i++) {
-        py_state = PyList_New(len_state);
-        for(j=0; j<len_state; j++) {
-            PyList_SetItem(py_state, j, PyLong_FromLong(states[i * len_state + j]));
+    int i, j, num = top ? top->size : num_anneals;
+    int *order = NULL, *state = NULL;
+    PyObject *py_state, *py_values = PyList_New(num);
+    PyObject *py_states = values_only ? Py_None : PyList_New(num);
+    PyObject *py_counts = top ? PyList_New(num) : Py_None;
+    if(values_only) {
+        Py_INCREF(Py_None);
+    }
+    if(!top) {
+        Py_INCREF(Py_None);
+    }
+
+    if(top) {
+        order = (int*)malloc((num ? num : 1) * sizeof(int));
+        state = (int*)malloc((len_state ? len_state : 1) * sizeof(int));
+        top_states_order(top, order);
+    }
+    for(i=0; i<num; i++) {
+        if(top) {
+            PyList_SetItem(
+                py_values, i, PyFloat_FromDouble(top->values[order[i]])
+            );
+            PyList_SetItem(
+                py_counts, i, PyLong_FromLong(top->counts[order[i]])
+            );
+            top_states_unpack(top, order[i], len_state, state);
+        } else {
+            PyList_SetItem(py_values, i, PyFloat_FromDouble(values[i]));
+        }
+        if(!values_only) {
+            py_state = PyList_New(len_state);
+            for(j=0; j<len_state; j++) {
+                PyList_SetItem(py_state, j, PyLong_FromLong(
+                    top ? state[j] : states[i * len_state + j]
+                ));
+            }
+            PyList_SetItem(py_states, i, py_state);
+        }
+    }
+    free(order); free(state);
+
+    // "N" steals the references, so the lists are not leaked.
+    return Py_BuildValue("NNN", py_states, py_values, py_counts);
+}
+
+
+double *read_doubles(PyObject *py_seq, long *len) {
+    /*
+    Copy a Python list of floats, or an object that exposes a contiguous
+    float64 buffer (such as a NumPy array), into a new C array, so that large
+    models can be handed to C without building a Python float for every
+    term.
+
+    Parameters
+    ----------
+    py_seq : a Python list or buffer.
+    len : points to a long that is set to the length of ``py_seq``.
+
+    Returns
+    -------
+    res : points to a malloc'd double array of length ``*len``, or NULL if
+        ``py_seq`` is neither a list nor a float64 buffer, in which case a
+        Python exception is set.
+
+    */
+    long i; double *res;
+    if(PyList_Check(py_seq)) {
+        *len = (long)PyList_Size(py_seq);
+        res = (double*)malloc((*len ? *len : 1) * sizeof(double));
+        for(i=0; i<*len; i++) {
+            res[i] = PyFloat_AsDouble(PyList_GetItem(py_seq, i));
+        }
+        return res;
+    }
+
+    Py_buffer view;
+    if(PyObject_GetBuffer(py_seq, &view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT)) {
+        return NULL;
+    }
+    if(view.itemsize != sizeof(double) || !view.format ||
+       view.format[0] != 'd') {
+        PyBuffer_Release(&view);
+        PyErr_SetString(PyExc_TypeError, "expected a float64 buffer");
+        return NULL;
+    }
+    *len = (long)(view.len / view.itemsize);
+    res = (double*)malloc((*len ? *len : 1) * sizeof(double));
+    memcpy(res, view.buf, view.len);
+    PyBuffer_Release(&view);
+    return res;
+}
+
+
+int *read_ints(PyObject *py_seq, long *len) {
+    /*
+    Copy a Python list of ints, or an object that exposes a contiguous
+    int32 or int64 buffer (such as a NumPy array), into a new C int array.
+    See ``read_doubles``.
+
+    Parameters
+    ----------
+    py_seq : a Python list or buffer.
+    len : points to a long that is set to the length of ``py_seq``.
+
+    Returns
+    -------
+    res : points to a malloc'd int array of length ``*len``, or NULL if
+        ``py_seq`` is neither a list nor an integer buffer, in which case a
+        Python exception is set.
+
+    */
+    long i; int *res;
+    if(PyList_Check(py_seq)) {
+        *len = (long)PyList_Size(py_seq);
+        res = (int*)malloc((*len ? *len : 1) * sizeof(int));
+        for(i=0; i<*len; i++) {
+            res[i] = (int)PyLong_AsLong(PyList_GetItem(py_seq, i));
+        }
+        return res;
+    }
+
+    Py_buffer view;
+    if(PyObject_GetBuffer(py_seq, &view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT)) {
+        return NULL;
+    }
+    char format = view.format ? view.format[0] : 0;
+    if(format == '<' || format == '=' || format == '@') {
+        format = view.format[1];
+    }
+    if(!strchr("ilq", format) ||
+       (view.itemsize != sizeof(int) && view.itemsize != sizeof(long long))) {
+        PyBuffer_Release(&view);
+        PyErr_SetString(PyExc_TypeError, "expected an integer buffer");
+        return NULL;
+    }
+    *len = (long)(view.len / view.itemsize);
+    res = (int*)malloc((*len ? *len : 1) * sizeof(int));
+    if(view.itemsize == sizeof(int)) {
+        memcpy(res, view.buf, view.len);
+    } else {
+        for(i=0; i<*len; i++) {
+            res[i] = (int)((long long*)view.buf)[i];
         }
-        PyList_SetItem(py_states, i, py_state);
-        PyList_SetItem(py_values, i, PyFloat_FromDouble(values[i]));
     }
-    return Py_BuildValue("OO", py_states, py_values);
+    PyBuffer_Release(&view);
+    return res;
 }
 
 
@@ -65,14 +215,14 @@ static char c_anneal_quso_docstring[] =
     "Anneal a QUSO with the C source.\n\n"
     "Parameters\n"
     "----------\n"
-    "h : list of floats.\n"
+    "h : list of floats, or float64 NumPy array.\n"
     "    ``h[i]`` is the field value on spin ``i``.\n"
-    "num_neighbors : list of ints.\n"
+    "num_neighbors : list of ints, or int32 or int64 NumPy array.\n"
     "    ``num_neighbors[i]`` is the number of neighbors that spin i has.\n"
-    "neighbors : list of ints.\n"
+    "neighbors : list of ints, or int32 or int64 NumPy array.\n"
     "    ``neighbors[i]`` is the jth neighbor of spin ``k``, where\n"
     "    ``j = i - num_neighbors[k-1] - num_neighbors[k-2] - ...``\n"
-    "J : list of doubles.\n"
+    "J : list of doubles, or float64 NumPy array.\n"
     "    ``J[i]`` is the coupling value between spin ``k`` and\n"
     "    ``neighbors[i]``.\n"
     "Ts : list of floats\n"
@@ -90,13 +240,39 @@ static char c_anneal_quso_docstring[] =
     "seed : int.\n"
     "    seeds the random number generator If ``seed`` is a negative integer,\n"
     "    then we seed the random number generator with ``time(NULL)``.\n"
-    "    Otherwise, we use ``seed``.\n\n"
+    "    Otherwise, we use ``seed``.\n"
+    "anneal_offset : int.\n"
+    "    The index of the first anneal. The ith anneal uses the random\n"
+    "    number stream ``anneal_offset + i``, so a seeded run split into\n"
+    "    chunks with the appropriate offsets gives the same results as one\n"
+    "    single run.\n"
+    "group_sizes : list of ints.\n"
+    "    ``group_sizes[g]`` is the number of spins in the one-hot group\n"
+    "    ``g``. If there are no one-hot groups, then ``group_sizes`` should\n"
+    "    be ``[]``.\n"
+    "groups : list of ints.\n"
+    "    The spins of each one-hot group, one group after the other. Exactly\n"
+    "    one spin of each group is -1, and the groups are updated with swap\n"
+    "    moves that preserve this.\n"
+    "top_k : int.\n"
+    "    If ``top_k`` is positive, then only the ``top_k`` distinct states\n"
+    "    with the lowest values are kept, along with the number of anneals\n"
+    "    that ended in each of them. The states are hashed in C, so the\n"
+    "    memory used does not grow with ``num_anneals``. If ``top_k`` is 0,\n"
+    "    then every state is kept.\n"
+    "values_only : int.\n"
+    "    If ``values_only`` is nonzero, then the states are not returned.\n\n"
     "Returns\n"
     "-------\n"
-    "tuple : (states, values).\n"
-    "    ``states`` is a list of lists, where each list represents a state.\n"
+    "tuple : (states, values, counts).\n"
+    "    ``states`` is a list of lists, where each list represents a state,\n"
+    "    or None if ``values_only`` is nonzero.\n"
     "    ``values`` is a list of floats, where each float is the QUSO value\n"
-    "    for the corresponding state.\n\n"
+    "    for the corresponding state.\n"
+    "    If ``top_k`` is positive, then the states are sorted from the\n"
+    "    lowest to the highest value and ``counts`` is a list of ints, where\n"
+    "    each int is the number of anneals that ended in the corresponding\n"
+    "    state. Otherwise, ``counts`` is None.\n\n"
     "Example\n"
     "-------\n"
     "``neighbors`` and ``J`` are basically flattened arrays.\n"
@@ -128,69 +304,98 @@ static PyObject* c_anneal_quso(PyObject* self, PyObject* args) {
     for details on what ``args`` should be.
     */
     PyObject *py_h, *py_num_neighbors, *py_neighbors,
-             *py_J, *py_Ts, *py_initial_state;
-    int num_anneals, in_order, seed;
+             *py_J, *py_Ts, *py_initial_state, *py_group_sizes, *py_groups;
+    int num_anneals, in_order, seed, top_k, values_only;
+    long anneal_offset;
 
-    if (!PyArg_ParseTuple(args, "OOOOOiiOi",
+    if (!PyArg_ParseTuple(args, "OOOOOiiOilOOii",
                           &py_h, &py_num_neighbors, &py_neighbors, &py_J,
-                          &py_Ts, &num_anneals, &in_order, 
-                          &py_initial_state, &seed)) {
+                          &py_Ts, &num_anneals, &in_order,
+                          &py_initial_state, &seed, &anneal_offset,
+                          &py_group_sizes, &py_groups,
+                          &top_k, &values_only)) {
         return NULL;
     }
 
-    int len_state = (int)PyList_Size(py_h);
-    int len_J = (int)PyList_Size(py_J);
+    // the model may be given as lists or NumPy arrays. See ``read_ints``.
+    long len_h, len_num_neighbors, len_neighbors, len_J;
+    double *h = read_doubles(py_h, &len_h);
+    int *num_neighbors = h ? read_ints(py_num_neighbors, &len_num_neighbors)
+                           : NULL;
+    int *neighbors = num_neighbors ? read_ints(py_neighbors, &len_neighbors)
+                                   : NULL;
+    double *J = neighbors ? read_doubles(py_J, &len_J) : NULL;
+    if(!h || !num_neighbors || !neighbors || !J) {
+        free(h); free(num_neighbors); free(neighbors); free(J);
+        return NULL;
+    }
+
+    int len_state = (int)len_h;
     int len_Ts = (int)PyList_Size(py_Ts);
-    double *h = (double*)malloc(len_state * sizeof(double));
-    int *num_neighbors = (int*)malloc(len_state * sizeof(int));
-    int *neighbors = (int*)malloc(len_J * sizeof(int));
-    double *J = (double*)malloc(len_J * sizeof(double));
     double *Ts = (double*)malloc(len_Ts * sizeof(double));
 
     int i, j;
-    for(i=0; i<len_state; i++) {
-        h[i] = PyFloat_AsDouble(PyList_GetItem(py_h, i));
-        num_neighbors[i] = (int)PyLong_AsLong(PyList_GetItem(py_num_neighbors, i));
-    }
-    for(i=0; i<len_J; i++) {
-        neighbors[i] = (int)PyLong_AsLong(PyList_GetItem(py_neighbors, i));
-        J[i] = PyFloat_AsDouble(PyList_GetItem(py_J, i));
-    }
     for(i=0; i<len_Ts; i++) {
         Ts[i] = PyFloat_AsDouble(PyList_GetItem(py_Ts, i));
     }
 
-    // create buffers for the states and values of anneal_quso.
-    double *values = (double*)malloc(num_anneals * sizeof(double));
-    int *states = (int*)malloc(num_anneals * len_state * sizeof(int));
+    int num_groups = (int)PyList_Size(py_group_sizes);
+    int len_groups = (int)PyList_Size(py_groups);
+    int *group_sizes = (int*)malloc((num_groups ? num_groups : 1) * sizeof(int));
+    int *groups = (int*)malloc((len_groups ? len_groups : 1) * sizeof(int));
+    for(i=0; i<num_groups; i++) {
+        group_sizes[i] = (int)PyLong_AsLong(PyList_GetItem(py_group_sizes, i));
+    }
+    for(i=0; i<len_groups; i++) {
+        groups[i] = (int)PyLong_AsLong(PyList_GetItem(py_groups, i));
+    }
 
-    int initial_state_provided = (int)PyList_Size(py_initial_state);
-    if(initial_state_provided) {
-        // encode the initial state into the buffers.
-        for(i=0; i<num_anneals; i++) {
-            for(j=0; j<len_state; j++) {
-                states[i * len_state + j] = (int)PyLong_AsLong(
-                    PyList_GetItem(py_initial_state, j)
-                );
-            }
+    // create buffers for the states and values of anneal_quso. If we only
+    // keep the top_k states, then they are collected in `top` instead, so
+    // that the memory does not grow with num_anneals.
+    top_states_t top_states, *top = NULL;
+    double *values = NULL; int *states = NULL;
+    if(top_k > 0) {
+        top = &top_states;
+        top_states_init(top, top_k, len_state);
+    } else {
+        values = (double*)malloc(num_anneals * sizeof(double));
+        if(!values_only) {
+            states = (int*)malloc((long)num_anneals * len_state * sizeof(int));
+        }
+    }
+
+    int *initial_state = NULL;
+    if(PyList_Size(py_initial_state)) {
+        // the state that every anneal starts in.
+        initial_state = (int*)malloc(len_state * sizeof(int));
+        for(j=0; j<len_state; j++) {
+            initial_state[j] = (int)PyLong_AsLong(
+                PyList_GetItem(py_initial_state, j)
+            );
         }
     }
 
     // call C source code in src/ directory
-    anneal_quso(  // updates states and values in place
-    	num_anneals, states, values,
+    anneal_quso(  // updates states, values, and top in place
+        num_anneals, states, values, top,
         len_state, h, num_neighbors, neighbors, J,
-        len_Ts, Ts, in_order, initial_state_provided, seed
+        len_Ts, Ts, in_order, initial_state, seed,
+        anneal_offset, num_groups, group_sizes, groups
     );
 
-    PyObject *py_states_values = build_py_states_values(
-        num_anneals, len_state, states, values
+    PyObject *py_results = build_py_results(
+        num_anneals, len_state, states, values, top, values_only
     );
 
     free(h); free(num_neighbors); free(neighbors); free(J);
-    free(Ts); free(states); free(values);
+    free(Ts); free(states); free(values); free(initial_state);
+    free(group_sizes); free(groups);
+    if(top) {
+        top_states_free(top);
+    }
 
-    return py_states_values;
+    return py_results;
 }
 
 
@@ -201,15 +406,15 @@ static char c_anneal_puso_docstring[] =
     "----------\n"
     "len_state : int.\n"
     "    The number of spin variables in the problem.\n"
-    "num_couplings : list of ints.\n"
+    "num_couplings : list of ints, or int32 or int64 NumPy array.\n"
     "    To see how ``num_couplings`` works, see the Example below, or look\n"
     "    at the ``puso_value`` function in the sanneal/src/anneal_puso.c\n"
     "    file. Or see the ``sanneal.anneal_puso`` function source code.\n"
-    "terms : list of ints.\n"
+    "terms : list of ints, or int32 or int64 NumPy array.\n"
     "    To see how ``terms`` works, see the Example below, or look at the\n"
     "    ``puso_value`` function in the sanneal/src/anneal_puso.c file.\n"
     "    Or see the ``sanneal.anneal_puso`` function source code.\n"
-    "couplings : list of floats.\n"
+    "couplings : list of floats, or float64 NumPy array.\n"
     "    To see how ``couplings`` works, see the Example below, or look at\n"
     "    the ``puso_value`` function in the sanneal/src/anneal_puso.c file.\n"
     "    Or see the ``sanneal.anneal_puso`` function source code.\n"
@@ -228,13 +433,39 @@ static char c_anneal_puso_docstring[] =
     "seed : int.\n"
     "    seeds the random number generator If ``seed`` is a negative integer,\n"
     "    then we seed the random number generator with ``time(NULL)``.\n"
-    "    Otherwise, we use ``seed``.\n\n"
+    "    Otherwise, we use ``seed``.\n"
+    "anneal_offset : int.\n"
+    "    The index of the first anneal. The ith anneal uses the random\n"
+    "    number stream ``anneal_offset + i``, so a seeded run split into\n"
+    "    chunks with the appropriate offsets gives the same results as one\n"
+    "    single run.\n"
+    "group_sizes : list of ints.\n"
+    "    ``group_sizes[g]`` is the number of spins in the one-hot group\n"
+    "    ``g``. If there are no one-hot groups, then ``group_sizes`` should\n"
+    "    be ``[]``.\n"
+    "groups : list of ints.\n"
+    "    The spins of each one-hot group, one group after the other. Exactly\n"
+    "    one spin of each group is -1, and the groups are updated with swap\n"
+    "    moves that preserve this.\n"
+    "top_k : int.\n"
+    "    If ``top_k`` is positive, then only the ``top_k`` distinct states\n"
+    "    with the lowest values are kept, along with the number of anneals\n"
+    "    that ended in each of them. The states are hashed in C, so the\n"
+    "    memory used does not grow with ``num_anneals``. If ``top_k`` is 0,\n"
+    "    then every state is kept.\n"
+    "values_only : int.\n"
+    "    If ``values_only`` is nonzero, then the states are not returned.\n\n"
     "Returns\n"
     "-------\n"
-    "tuple : (states, values).\n"
-    "    ``states`` is a list of lists, where each list represents a state.\n"
+    "tuple : (states, values, counts).\n"
+    "    ``states`` is a list of lists, where each list represents a state,\n"
+    "    or None if ``values_only`` is nonzero.\n"
     "    ``values`` is a list of floats, where each float is the PUSO value\n"
-    "    for the corresponding state.\n\n"
+    "    for the corresponding state.\n"
+    "    If ``top_k`` is positive, then the states are sorted from the\n"
+    "    lowest to the highest value and ``counts`` is a list of ints, where\n"
+    "    each int is the number of anneals that ended in the corresponding\n"
+    "    state. Otherwise, ``counts`` is None.\n\n"
     "Example\n"
     "-------\n"
     "Consider a PUSO\n"
@@ -255,67 +486,94 @@ static PyObject* c_anneal_puso(PyObject* self, PyObject* args) {
     for details on what ``args`` should be.
     */
     PyObject *py_num_couplings, *py_terms, *py_couplings,
-             *py_Ts, *py_initial_state;
-    int num_anneals, in_order, seed, len_state;
+             *py_Ts, *py_initial_state, *py_group_sizes, *py_groups;
+    int num_anneals, in_order, seed, len_state, top_k, values_only;
+    long anneal_offset;
 
-    if (!PyArg_ParseTuple(args, "iOOOOiiOi",
+    if (!PyArg_ParseTuple(args, "iOOOOiiOilOOii",
                           &len_state, &py_num_couplings, &py_terms,
                           &py_couplings, &py_Ts, &num_anneals,
-                          &in_order, &py_initial_state, &seed)) {
+                          &in_order, &py_initial_state, &seed,
+                          &anneal_offset, &py_group_sizes, &py_groups,
+                          &top_k, &values_only)) {
+        return NULL;
+    }
+
+    // the terms may be lists or NumPy arrays. See ``read_ints``.
+    long num_terms, len_terms;
+    int *num_couplings = read_ints(py_num_couplings, &num_terms);
+    int *terms = num_couplings ? read_ints(py_terms, &len_terms) : NULL;
+    double *couplings = terms ? read_doubles(py_couplings, &num_terms) : NULL;
+    if(!num_couplings || !terms || !couplings) {
+        free(num_couplings); free(terms); free(couplings);
         return NULL;
     }
 
     int len_Ts = (int)PyList_Size(py_Ts);
     double *Ts = (double*)malloc(len_Ts * sizeof(double));
-    long num_terms = (long int)PyList_Size(py_couplings);
-    int *num_couplings = (int*)malloc(num_terms * sizeof(int));
-    long len_terms = (long int)PyList_Size(py_terms);
-    int *terms = (int*)malloc(len_terms * sizeof(int));
-    double *couplings = (double*)malloc(num_terms * sizeof(double));
 
     long i; int j;
-    for(i=0; i<len_terms; i++) {
-        terms[i] = (int)PyLong_AsLong(PyList_GetItem(py_terms, i));
-    }
-    for(i=0; i<num_terms; i++) {
-        num_couplings[i] = (int)PyLong_AsLong(PyList_GetItem(py_num_couplings, i));
-        couplings[i] = PyFloat_AsDouble(PyList_GetItem(py_couplings, i));
-    }
     for(i=0; i<len_Ts; i++) {
         Ts[i] = PyFloat_AsDouble(PyList_GetItem(py_Ts, i));
     }
 
-    // create buffers for the states and values of anneal_quso.
-    double *values = (double*)malloc(num_anneals * sizeof(double));
-    int *states = (int*)malloc(num_anneals * len_state * sizeof(int));
+    int num_groups = (int)PyList_Size(py_group_sizes);
+    int len_groups = (int)PyList_Size(py_groups);
+    int *group_sizes = (int*)malloc((num_groups ? num_groups : 1) * sizeof(int));
+    int *groups = (int*)malloc((len_groups ? len_groups : 1) * sizeof(int));
+    for(i=0; i<num_groups; i++) {
+        group_sizes[i] = (int)PyLong_AsLong(PyList_GetItem(py_group_sizes, i));
+    }
+    for(i=0; i<len_groups; i++) {
+        groups[i] = (int)PyLong_AsLong(PyList_GetItem(py_groups, i));
+    }
 
-    int initial_state_provided = (int)PyList_Size(py_initial_state);
-    if(initial_state_provided) {
-        // encode the initial state into the buffers.
-        for(i=0; i<num_anneals; i++) {
-            for(j=0; j<len_state; j++) {
-                states[i * len_state + j] = (int)PyLong_AsLong(
-                    PyList_GetItem(py_initial_state, j)
-                );
-            }
+    // create buffers for the states and values of anneal_puso. If we only
+    // keep the top_k states, then they are collected in `top` instead, so
+    // that the memory does not grow with num_anneals.
+    top_states_t top_states, *top = NULL;
+    double *values = NULL; int *states = NULL;
+    if(top_k > 0) {
+        top = &top_states;
+        top_states_init(top, top_k, len_state);
+    } else {
+        values = (double*)malloc(num_anneals * sizeof(double));
+        if(!values_only) {
+            states = (int*)malloc((long)num_anneals * len_state * sizeof(int));
+        }
+    }
+
+    int *initial_state = NULL;
+    if(PyList_Size(py_initial_state)) {
+        // the state that every anneal starts in.
+        initial_state = (int*)malloc(len_state * sizeof(int));
+        for(j=0; j<len_state; j++) {
+            initial_state[j] = (int)PyLong_AsLong(
+                PyList_GetItem(py_initial_state, j)
+            );
         }
     }
 
     // call C source code in src/ directory
-    anneal_puso(  // updates states and values in place
-        num_anneals, states, values, len_state,
+    anneal_puso(  // updates states, values, and top in place
+        num_anneals, states, values, top, len_state,
         num_terms, num_couplings, terms, couplings,
-        len_Ts, Ts, in_order, initial_state_provided, seed
+        len_Ts, Ts, in_order, initial_state, seed,
+        anneal_offset, num_groups, group_sizes, groups
     );
 
-    PyObject *py_states_values = build_py_states_values(
-        num_anneals, len_state, states, values
+    PyObject *py_results = build_py_results(
+        num_anneals, len_state, states, values, top, values_only
     );
 
     free(num_couplings); free(terms); free(couplings);
-    free(Ts); free(states); free(values);
+    free(Ts); free(states); free(values); free(initial_state);
+    free(group_sizes); free(groups);
+    if(top) {
+        top_states_free(top);
+    }
 
-    return py_states_values;
+    return py_results;
 }
 
 
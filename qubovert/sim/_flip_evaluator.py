@@ -0,0 +1,336 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""_flip_evaluator.py.
+
+This file contains the FlipEvaluator object, which keeps track of the value of
+a model as single variables are flipped, for writing local search heuristics.
+
+"""
+
+from qubovert.utils import PUSOMatrix
+
+
+__all__ = 'FlipEvaluator',
+
+
+class FlipEvaluator:
+    """FlipEvaluator.
+
+    Keep track of the value of a model, along with the local field on each
+    variable, as single variables are flipped. This is the same incremental
+    bookkeeping that the anneal functions do in C. Each term records which
+    variables it contains, and each variable records which terms it is in,
+    so scoring a flip costs O(1) and making a flip costs O(the number of
+    terms that the variable is in times their degree), rather than the
+    O(number of terms) of calling ``value`` twice.
+
+    The local field on variable ``v`` is the derivative of the model with
+    respect to ``v``, ie the sum of the coefficients of the terms that
+    contain ``v`` times the values of the other variables in the terms. Then
+    flipping ``v`` changes the value of the model by
+    ``(1 - 2 x[v]) * field[v]`` for boolean models and
+    ``-2 z[v] * field[v]`` for spin models.
+
+    Example
+    -------
+    >>> from qubovert import QUBO
+    >>> from qubovert.sim import FlipEvaluator
+    >>> Q = QUBO({('a',): 1, ('a', 'b'): -3, ('b',): 1})
+    >>> evaluator = FlipEvaluator(Q)
+    >>> evaluator.energy
+    0
+    >>> evaluator.flip_delta('a')
+    1
+    >>> evaluator.flip('a')
+    >>> evaluator.flip_delta('b')
+    -2
+    >>> evaluator.flip('b')
+    >>> evaluator.energy, evaluator.state
+    (-1, {'a': 1, 'b': 1})
+
+    """
+
+    def __init__(self, model, state=None, spin=None):
+        """__init__.
+
+        Parameters
+        ----------
+        model : dict, or any object in ``qubovert.BOOLEAN_MODELS`` or
+            ``qubovert.SPIN_MODELS``.
+            The model to evaluate. Its coefficients must be numeric. Later
+            changes to ``model`` are not reflected in the evaluator.
+        state : dict (optional, defaults to None).
+            The state to start in. It maps each variable label to its value,
+            0 or 1 for boolean models and 1 or -1 for spin models. If
+            ``state`` is None, then every variable starts at 0 for boolean
+            models and at 1 for spin models. Variables missing from ``state``
+            start there as well.
+        spin : bool (optional, defaults to None).
+            Whether the model is a spin model. If ``spin`` is None, then it is
+            True if ``model`` is one of ``qubovert.SPIN_MODELS`` and False
+            otherwise.
+
+        """
+        self._spin = isinstance(model, PUSOMatrix) if spin is None else spin
+        self._index, self._labels = {}, []
+        self._terms, self._coefficients, self._incidence = [], [], []
+        offset = 0
+        for key, value in model.items():
+            if not key:
+                offset += value
+                continue
+            for v in key:
+                self._add_label(v)
+            term = [self._index[v] for v in key]
+            for i in term:
+                self._incidence[i].append(len(self._terms))
+            self._terms.append(term)
+            self._coefficients.append(value)
+        # the variables whose terms all cancelled are still variables of the
+        # model, so they can be flipped too.
+        for v in getattr(model, 'variables', ()):
+            self._add_label(v)
+
+        default = 1 if self._spin else 0
+        state = state or {}
+        self._x = [state.get(v, default) for v in self._labels]
+
+        # for boolean models, _term_states[t] is the number of variables in
+        # term t that are 0, and for spin models it is the product of the
+        # spins in term t.
+        self._term_states = [
+            self._term_state(term) for term in self._terms
+        ]
+        self._fields = [0] * len(self._labels)
+        self._energy = offset
+        for t, term in enumerate(self._terms):
+            c = self._coefficients[t]
+            self._energy += c * self._product(t, ())
+            for i in term:
+                self._fields[i] += c * self._product(t, (i,))
+
+    def _add_label(self, v):
+        """_add_label.
+
+        Give the variable ``v`` an index if it does not have one yet.
+
+        Parameters
+        ----------
+        v : hashable.
+            The label of the variable.
+
+        """
+        if v not in self._index:
+            self._index[v] = len(self._labels)
+            self._labels.append(v)
+            self._incidence.append([])
+
+    def _term_state(self, term):
+        """_term_state.
+
+        Compute the state of ``term``. See ``__init__``.
+
+        Parameters
+        ----------
+        term : list of ints.
+
+        Returns
+        -------
+        res : int.
+
+        """
+        if self._spin:
+            res = 1
+            for i in term:
+                res *= self._x[i]
+            return res
+        return sum(not self._x[i] for i in term)
+
+    def _product(self, t, exclude):
+        """_product.
+
+        Compute the product of the values of the variables in term ``t``
+        other than those in ``exclude``, from the state of the term.
+
+        Parameters
+        ----------
+        t : int.
+            The index of the term.
+        exclude : tuple of ints.
+            Distinct variables in term ``t``.
+
+        Returns
+        -------
+        res : int.
+
+        """
+        if self._spin:
+            res = self._term_states[t]
+            for i in exclude:
+                res *= self._x[i]
+            return res
+        return int(
+            self._term_states[t] == sum(not self._x[i] for i in exclude)
+        )
+
+    def _get_index(self, v):
+        """_get_index.
+
+        Internal method to find the index of the variable with label ``v``.
+
+        Parameters
+        ----------
+        v : hashable.
+            The label of a variable.
+
+        Returns
+        -------
+        i : int.
+
+        Raises
+        ------
+        KeyError if ``v`` is not a variable of the model.
+
+        """
+        try:
+            return self._index[v]
+        except KeyError:
+            raise KeyError("%s is not a variable of the model" % repr(v))
+
+    @property
+    def energy(self):
+        """energy.
+
+        The value of the model with the current state.
+
+        Returns
+        -------
+        energy : number.
+
+        """
+        return self._energy
+
+    @property
+    def state(self):
+        """state.
+
+        A copy of the current state.
+
+        Returns
+        -------
+        state : dict.
+            Maps each variable label to its value.
+
+        """
+        return dict(zip(self._labels, self._x))
+
+    @property
+    def local_fields(self):
+        """local_fields.
+
+        A copy of the local field on every variable. See
+        ``help(qubovert.sim.FlipEvaluator)``.
+
+        Returns
+        -------
+        fields : dict.
+            Maps each variable label to its local field.
+
+        """
+        return dict(zip(self._labels, self._fields))
+
+    def local_field(self, v):
+        """local_field.
+
+        The local field on variable ``v``. See
+        ``help(qubovert.sim.FlipEvaluator)``.
+
+        Parameters
+        ----------
+        v : hashable.
+            The label of a variable.
+
+        Returns
+        -------
+        field : number.
+
+        Raises
+        ------
+        KeyError if ``v`` is not a variable of the model.
+
+        """
+        return self._fields[self._get_index(v)]
+
+    def flip_delta(self, v):
+        """flip_delta.
+
+        The change in the value of the model if variable ``v`` were flipped.
+        This costs O(1).
+
+        Parameters
+        ----------
+        v : hashable.
+            The label of a variable.
+
+        Returns
+        -------
+        delta : number.
+
+        Raises
+        ------
+        KeyError if ``v`` is not a variable of the model.
+
+        """
+        i = self._get_index(v)
+        if self._spin:
+            return -2 * self._x[i] * self._fields[i]
+        return (1 - 2 * self._x[i]) * self._fields[i]
+
+    def flip(self, v):
+        """flip.
+
+        Flip variable ``v``, and update the value of the model and the local
+        fields on the variables that share a term with ``v``.
+
+        Parameters
+        ----------
+        v : hashable.
+            The label of a variable.
+
+        Raises
+        ------
+        KeyError if ``v`` is not a variable of the model.
+
+        """
+        i = self._get_index(v)
+        self._energy += self.flip_delta(v)
+        old = self._x[i]
+        new = -old if self._spin else 1 - old
+
+        for t in self._incidence[i]:
+            # the field on j from term t is c * (product of the others), and
+            # the only factor of it that changes is x[i].
+            c = self._coefficients[t]
+            for j in self._terms[t]:
+                if j != i:
+                    self._fields[j] += (
+                        c * (new - old) * self._product(t, (i, j))
+                    )
+            if self._spin:
+                self._term_states[t] = -self._term_states[t]
+            else:
+                self._term_states[t] += 1 if old else -1
+
+        self._x[i] = new
@@ -0,0 +1,466 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""_numpy_anneal.py.
+
+This file contains the NumPy implementation of the simulated annealing
+algorithm. The functions take the same arguments and return the same results
+as the functions in the ``_canneal`` C extension, but instead of running the
+anneals one after the other, all of the anneals are run at once as the rows of
+an ``(N, num_anneals)`` state array.
+
+"""
+
+import numpy as np
+
+
+__all__ = 'np_anneal_quso', 'np_anneal_puso'
+
+
+# helpers
+
+def _pad(spins, N):
+    """_pad.
+
+    Create a 2D array of spin labels, padded with ``N``.
+
+    Parameters
+    ----------
+    spins : list of tuples of ints.
+    N : int.
+        The number of spins. The state arrays have an extra row ``N`` that
+        is always 1, so padded entries do not change products of spins.
+
+    Returns
+    -------
+    res : 2D numpy array.
+        ``res[r, :len(spins[r])] == spins[r]`` and the rest is ``N``.
+
+    """
+    res = np.full(
+        (len(spins), max(1, max(len(x) for x in spins))), N, dtype=np.intp
+    )
+    for r, x in enumerate(spins):
+        res[r, :len(x)] = x
+    return res
+
+
+def _field_arrays(members, incident, N):
+    """_field_arrays.
+
+    Flatten the terms that contain each of ``members`` into the arrays that
+    ``_fields`` uses.
+
+    Parameters
+    ----------
+    members : list of ints.
+        The spins to compute the local fields of.
+    incident : list of lists of tuples.
+        ``incident[i]`` contains a ``(coupling, others)`` pair for each term
+        that contains spin ``i``, where ``others`` are the other spins in the
+        term.
+    N : int.
+        The number of spins. The state arrays have an extra row ``N`` that
+        is always 1, which is used to pad ``others``.
+
+    Returns
+    -------
+    res : tuple of numpy arrays (members, couplings, others, starts).
+        ``others[r]`` are the other spins of the ``r`` th term, padded with
+        ``N``, and the terms of ``members[k]`` begin at ``starts[k]``.
+
+    """
+    couplings, others, starts = [], [], []
+    for i in members:
+        starts.append(len(couplings))
+        for c, o in incident[i] or [(0., ())]:
+            couplings.append(c)
+            others.append(o)
+
+    return (
+        np.array(members, dtype=np.intp), np.array(couplings)[:, None],
+        _pad(others, N), np.array(starts, dtype=np.intp)
+    )
+
+
+def _fields(z, arrays):
+    """_fields.
+
+    Compute the local fields of the spins in ``arrays``, ie the derivative
+    of the model with respect to each spin, for every anneal at once. The
+    change in the value of the model from flipping spin ``i`` is
+    ``-2 * z[i] * field[i]``.
+
+    Parameters
+    ----------
+    z : 2D numpy array.
+        ``z[:, k]`` is the state of the ``k`` th anneal, with an extra row of
+        ones at the end. Storing the anneals along the second axis keeps the
+        values of each spin contiguous.
+    arrays : tuple.
+        The output of ``_field_arrays``.
+
+    Returns
+    -------
+    field : 2D numpy array.
+        ``field[j, k]`` is the local field of spin ``arrays[0][j]`` in the
+        ``k`` th anneal.
+
+    """
+    _, couplings, others, starts = arrays
+    return np.add.reduceat(
+        couplings * z[others].prod(1, dtype=np.int8), starts, axis=0
+    )
+
+
+def _accept(dE, T, rng):
+    """_accept.
+
+    The Metropolis acceptance rule.
+
+    Parameters
+    ----------
+    dE : numpy array.
+        The change in the value of the model from each proposed update.
+    T : float.
+        The temperature.
+    rng : numpy.random.Generator object.
+
+    Returns
+    -------
+    accept : numpy array of bools.
+
+    """
+    if T <= 0:
+        return dE <= 0
+    return rng.random(dE.shape) < np.exp(-np.maximum(dE, 0) / T)
+
+
+def _top_states(states, values, counts, top_k):
+    """_top_states.
+
+    Find the ``top_k`` distinct states with the lowest values. The states are
+    packed into bits so that duplicates are found by comparing bytes.
+
+    Parameters
+    ----------
+    states : 2D numpy array.
+        ``states[r]`` is a state, with spins that are 1 or -1.
+    values : numpy array.
+        ``values[r]`` is the value of ``states[r]``.
+    counts : numpy array.
+        ``counts[r]`` is the number of anneals that ended in ``states[r]``.
+    top_k : int.
+        The number of distinct states to keep.
+
+    Returns
+    -------
+    res : tuple of numpy arrays (states, values, counts).
+        The distinct states, their values, and the total number of anneals
+        that ended in each of them, sorted from the lowest to the highest
+        value.
+
+    """
+    _, index, inverse = np.unique(
+        np.packbits(states == -1, axis=1), axis=0,
+        return_index=True, return_inverse=True
+    )
+    counts = np.bincount(inverse.ravel(), counts, len(index))
+    keep = np.argsort(values[index], kind='stable')[:top_k]
+    return (
+        states[index[keep]], values[index[keep]],
+        counts[keep].astype(np.int64)
+    )
+
+
+def _np_anneal(N, terms, couplings, Ts, num_anneals, in_order,
+               initial_state, seed, anneal_offset, group_sizes, groups,
+               top_k, values_only):
+    """_np_anneal.
+
+    Run ``num_anneals`` simulated anneals of the spin model with the given
+    ``terms`` and ``couplings`` at once.
+
+    Each update step, the spins that are not in a one-hot group are updated
+    one color class at a time, where the color classes are a coloring of the
+    interaction graph. No two spins in a color class share a term, so all of
+    the spins in a class can be updated at once with the Metropolis rule
+    from their local fields. Then each one-hot group gets as many swap moves
+    as it has spins.
+
+    Parameters
+    ----------
+    N : int.
+        The number of spins.
+    terms : list of tuples of ints.
+        The spins in each term of the model.
+    couplings : list of floats.
+        The coefficient of each term.
+    Ts : list of floats.
+        The temperature at each update step.
+    num_anneals : int.
+        The number of anneals to run.
+    in_order : bool.
+        Whether to update the color classes in order or in a random order.
+    initial_state : list of ints.
+        The state to start every anneal in, or an empty list to start each
+        anneal in a random state.
+    seed : int.
+        The seed of the random number generator. If ``seed < 0``, then the
+        generator is seeded randomly.
+    anneal_offset : int.
+        Combined with ``seed`` to seed the random number generator.
+    group_sizes : list of ints.
+        The number of spins in each one-hot group.
+    groups : list of ints.
+        The spins in each one-hot group, one group after the other.
+    top_k : int.
+        If ``top_k`` is positive, then only the ``top_k`` distinct states
+        with the lowest values are returned, along with the number of
+        anneals that ended in each of them.
+    values_only : int.
+        Whether to only return the values and not the states.
+
+    Returns
+    -------
+    res : tuple (states, values, counts).
+        ``states`` is a list of the final states of the anneals, or None if
+        ``values_only``, ``values`` is a list of their values (not including
+        the offset), and ``counts`` is a list of the number of anneals that
+        ended in each state if ``top_k`` is positive, otherwise None.
+
+    """
+    rng = np.random.default_rng(None if seed < 0 else (seed, anneal_offset))
+
+    incident, neighbors = [[] for _ in range(N)], [set() for _ in range(N)]
+    for term, c in zip(terms, couplings):
+        for i in term:
+            incident[i].append((c, tuple(j for j in term if j != i)))
+            neighbors[i].update(term)
+
+    group_members, start = [], 0
+    for size in group_sizes:
+        group_members.append(groups[start:start+size])
+        start += size
+    in_group = set(groups)
+
+    # greedy coloring of the spins that are not in a group
+    color, classes = {}, []
+    for i in range(N):
+        if i in in_group:
+            continue
+        used = {color[j] for j in neighbors[i] if j in color}
+        color[i] = next(c for c in range(len(classes) + 1) if c not in used)
+        if color[i] == len(classes):
+            classes.append([])
+        classes[color[i]].append(i)
+    classes = [_field_arrays(c, incident, N) for c in classes]
+    group_arrays = [_field_arrays(g, incident, N) for g in group_members]
+
+    # the extra row of ones pads the terms
+    z = np.ones((N + 1, num_anneals), dtype=np.int8)
+    cols = np.arange(num_anneals)
+    hot = []
+    if initial_state:
+        z[:N] = np.array(initial_state, dtype=np.int8)[:, None]
+        for members in group_members:
+            hot.append(np.full(
+                num_anneals, [initial_state[i] for i in members].index(-1)
+            ))
+    else:
+        z[:N] = rng.choice(np.array((-1, 1), dtype=np.int8), (N, num_anneals))
+        for members in group_members:
+            z[members] = 1
+            hot.append(rng.integers(len(members), size=num_anneals))
+            z[np.array(members)[hot[-1]], cols] = -1
+
+    for T in Ts:
+        order = (
+            range(len(classes)) if in_order else rng.permutation(len(classes))
+        )
+        for c in order:
+            members = classes[c][0]
+            dE = -2 * z[members] * _fields(z, classes[c])
+            z[members] *= np.where(_accept(dE, T, rng), -1, 1).astype(
+                np.int8
+            )
+
+        for g, arrays in enumerate(group_arrays):
+            members, size = arrays[0], len(arrays[0])
+            for _ in range(size if size > 1 else 0):
+                field = _fields(z, arrays)
+                a = hot[g]
+                b = (a + rng.integers(1, size, size=num_anneals)) % size
+                # the spins of a group never share a term, so the change
+                # in value is the sum of the changes of the two flips
+                accept = _accept(
+                    2 * field[a, cols] - 2 * field[b, cols], T, rng
+                )
+                z[members[a[accept]], cols[accept]] = 1
+                z[members[b[accept]], cols[accept]] = -1
+                hot[g] = np.where(accept, b, a)
+
+    if terms:
+        values = np.array(couplings) @ z[_pad(terms, N)].prod(1, dtype=np.int8)
+    else:
+        values = np.zeros(num_anneals)
+
+    states, counts = z[:N].T, None
+    if top_k > 0:
+        states, values, counts = _top_states(
+            states, values, np.ones(num_anneals), top_k
+        )
+        counts = counts.tolist()
+    return (
+        None if values_only else states.tolist(), values.tolist(), counts
+    )
+
+
+# annealing functions
+
+def np_anneal_quso(h, num_neighbors, neighbors, J, Ts, num_anneals,
+                   in_order, initial_state, seed, anneal_offset,
+                   group_sizes, groups, top_k, values_only):
+    """np_anneal_quso.
+
+    NumPy implementation of ``qubovert.sim._canneal.c_anneal_quso``. See
+    ``qubovert.sim.anneal_quso`` for how the arguments are created.
+
+    Parameters
+    ----------
+    h : list of floats.
+        ``h[i]`` is the field on spin ``i``.
+    num_neighbors : list of ints.
+        ``num_neighbors[i]`` is the number of spins that spin ``i`` is
+        coupled to.
+    neighbors : list of ints.
+        The neighbors of each spin, one spin after the other.
+    J : list of floats.
+        The coupling to each neighbor in ``neighbors``.
+    Ts : list of floats.
+        The temperature at each update step.
+    num_anneals : int.
+        The number of anneals to run.
+    in_order : int.
+        Whether to update the color classes in order or in a random order.
+    initial_state : list of ints.
+        The state to start every anneal in, or an empty list to start each
+        anneal in a random state.
+    seed : int.
+        The seed of the random number generator. If ``seed < 0``, then the
+        generator is seeded randomly.
+    anneal_offset : int.
+        Combined with ``seed`` to seed the random number generator.
+    group_sizes : list of ints.
+        The number of spins in each one-hot group.
+    groups : list of ints.
+        The spins in each one-hot group, one group after the other.
+    top_k : int.
+        If ``top_k`` is positive, then only the ``top_k`` distinct states
+        with the lowest values are returned, along with the number of
+        anneals that ended in each of them.
+    values_only : int.
+        Whether to only return the values and not the states.
+
+    Returns
+    -------
+    res : tuple (states, values, counts).
+        ``states`` is a list of the final states of the anneals, or None if
+        ``values_only``, ``values`` is a list of their values (not including
+        the offset), and ``counts`` is a list of the number of anneals that
+        ended in each state if ``top_k`` is positive, otherwise None.
+
+    """
+    terms, couplings = [], []
+    for i, v in enumerate(h):
+        if v:
+            terms.append((i,))
+            couplings.append(v)
+
+    start = 0
+    for i, n in enumerate(num_neighbors):
+        for j, v in zip(neighbors[start:start+n], J[start:start+n]):
+            if i < j:  # each coupling appears once for each spin
+                terms.append((i, j))
+                couplings.append(v)
+        start += n
+
+    return _np_anneal(
+        len(h), terms, couplings, Ts, num_anneals, in_order, initial_state,
+        seed, anneal_offset, group_sizes, groups, top_k, values_only
+    )
+
+
+def np_anneal_puso(len_state, num_couplings, terms, couplings, Ts,
+                   num_anneals, in_order, initial_state, seed, anneal_offset,
+                   group_sizes, groups, top_k, values_only):
+    """np_anneal_puso.
+
+    NumPy implementation of ``qubovert.sim._canneal.c_anneal_puso``. See
+    ``qubovert.sim.anneal_puso`` for how the arguments are created.
+
+    Parameters
+    ----------
+    len_state : int.
+        The number of spins.
+    num_couplings : list of ints.
+        ``num_couplings[k]`` is the number of spins in the ``k`` th term.
+    terms : list of ints.
+        The spins in each term, one term after the other.
+    couplings : list of floats.
+        The coefficient of each term.
+    Ts : list of floats.
+        The temperature at each update step.
+    num_anneals : int.
+        The number of anneals to run.
+    in_order : int.
+        Whether to update the color classes in order or in a random order.
+    initial_state : list of ints.
+        The state to start every anneal in, or an empty list to start each
+        anneal in a random state.
+    seed : int.
+        The seed of the random number generator. If ``seed < 0``, then the
+        generator is seeded randomly.
+    anneal_offset : int.
+        Combined with ``seed`` to seed the random number generator.
+    group_sizes : list of ints.
+        The number of spins in each one-hot group.
+    groups : list of ints.
+        The spins in each one-hot group, one group after the other.
+    top_k : int.
+        If ``top_k`` is positive, then only the ``top_k`` distinct states
+        with the lowest values are returned, along with the number of
+        anneals that ended in each of them.
+    values_only : int.
+        Whether to only return the values and not the states.
+
+    Returns
+    -------
+    res : tuple (states, values, counts).
+        ``states`` is a list of the final states of the anneals, or None if
+        ``values_only``, ``values`` is a list of their values (not including
+        the offset), and ``counts`` is a list of the number of anneals that
+        ended in each state if ``top_k`` is positive, otherwise None.
+
+    """
+    split, start = [], 0
+    for n in num_couplings:
+        split.append(tuple(terms[start:start+n]))
+        start += n
+
+    return _np_anneal(
+        len_state, split, couplings, Ts, num_anneals, in_order,
+        initial_state, seed, anneal_offset, group_sizes, groups, top_k,
+        values_only
+    )
@@ -0,0 +1,316 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""_tune_lam.py.
+
+This file contains the function to tune the penalty factors that enforce the
+constraints of a ``qubovert.PCBO`` or ``qubovert.PCSO`` by annealing.
+
+"""
+
+from qubovert.utils import (
+    QUBOMatrix, QUSOMatrix, PUBOMatrix, PUSOMatrix, QUBOVertWarning
+)
+from qubovert import PCSO
+from . import AnnealResults, anneal_qubo, anneal_quso, anneal_pubo, anneal_puso
+
+
+__all__ = 'tune_lam',
+
+
+# helpers
+
+def _split_penalties(compiled, symbols):
+    """_split_penalties.
+
+    Split the compiled model into the part that does not depend on the
+    penalty factors and the part that each penalty factor multiplies.
+
+    Parameters
+    ----------
+    compiled : ``qubovert.utils.PUBOMatrix`` or ``qubovert.utils.PUSOMatrix``.
+        The integer labeled model whose coefficients are linear in
+        ``symbols``.
+    symbols : list of sympy Symbols.
+
+    Returns
+    -------
+    res : tuple (base, penalties).
+        ``base`` is ``compiled`` with every symbol set to zero, and
+        ``penalties[i]`` is the model that ``symbols[i]`` multiplies.
+
+    """
+    zeros = {s: 0 for s in symbols}
+    base = compiled.subs(zeros)
+    penalties = []
+    for s in symbols:
+        unit = zeros.copy()
+        unit[s] = 1
+        penalties.append(compiled.subs(unit) - base)
+    return base, penalties
+
+
+# whether the value of a constraint of each kind violates it. See
+# ``qubovert.PCBO.is_solution_valid``.
+_VIOLATED = {
+    'eq': lambda v: v != 0, 'ne': lambda v: v == 0,
+    'lt': lambda v: v >= 0, 'le': lambda v: v > 0,
+    'gt': lambda v: v <= 0, 'ge': lambda v: v < 0
+}
+
+
+def _constraint_symbols(model, penalties, symbols):
+    """_constraint_symbols.
+
+    Find the symbols that penalize each constraint of ``model``. A symbol
+    penalizes a constraint if its penalty contains every variable of the
+    constraint, or if no symbol does, any of them.
+
+    Parameters
+    ----------
+    model : ``qubovert.PCBO`` or ``qubovert.PCSO`` object.
+    penalties : list of ``qubovert.utils.PUBOMatrix`` or
+                ``qubovert.utils.PUSOMatrix``.
+        The integer labeled model that each symbol multiplies. See
+        ``_split_penalties``.
+    symbols : list of sympy Symbols.
+
+    Returns
+    -------
+    res : list of tuples (kind, constraint, owners).
+        ``kind`` is one of the keys of ``model.constraints``, and ``owners``
+        is the set of symbols that penalize ``constraint``.
+
+    """
+    # ``P.variables`` keeps the variables of the terms that cancelled when
+    # the penalties were split, so take them from the terms instead.
+    variables = [{v for k in P for v in k} for P in penalties]
+    res = []
+    for kind, constraints in model.constraints.items():
+        for C in constraints:
+            labels = {model.mapping[v] for v in C.variables}
+            owners = {
+                s for s, V in zip(symbols, variables) if labels <= V
+            } or {s for s, V in zip(symbols, variables) if labels & V}
+            res.append((kind, C, owners))
+    return res
+
+
+def _violated_symbols(constraints, solution):
+    """_violated_symbols.
+
+    Find the symbols that penalize the constraints that ``solution``
+    violates.
+
+    Parameters
+    ----------
+    constraints : list of tuples (kind, constraint, owners).
+        The output of ``_constraint_symbols``.
+    solution : dict.
+        Maps the variable labels of the model to their values. The ancillas
+        are not needed, since the constraints do not contain them.
+
+    Returns
+    -------
+    res : set of sympy Symbols.
+
+    """
+    return set().union(*(
+        owners for kind, C, owners in constraints
+        if _VIOLATED[kind](C.value(solution))
+    ))
+
+
+def _combine(base, penalties, symbols, lam, spin):
+    """_combine.
+
+    Create the model to anneal at the penalty factors ``lam``.
+
+    Parameters
+    ----------
+    base : ``qubovert.utils.PUBOMatrix`` or ``qubovert.utils.PUSOMatrix``.
+    penalties : list of ``qubovert.utils.PUBOMatrix`` or
+                ``qubovert.utils.PUSOMatrix``.
+    symbols : list of sympy Symbols.
+    lam : dict.
+        Maps each symbol to its value.
+    spin : bool.
+        Whether or not the model is a spin model.
+
+    Returns
+    -------
+    res : tuple (model, anneal).
+        ``model`` is the model to anneal and ``anneal`` is the annealing
+        function to use for it.
+
+    """
+    model = base.copy()
+    for s, P in zip(symbols, penalties):
+        model += lam[s] * P
+
+    if model.degree <= 2:
+        if spin:
+            return QUSOMatrix(model), anneal_quso
+        return QUBOMatrix(model), anneal_qubo
+    if spin:
+        return PUSOMatrix(model), anneal_puso
+    return PUBOMatrix(model), anneal_pubo
+
+
+# tune lam function
+
+def tune_lam(model, lam, target=0.9, num_anneals=100, factor=2, rtol=0.05,
+             max_iter=20, **anneal_args):
+    """tune_lam.
+
+    Find small penalty factors that enforce the constraints of ``model``.
+    When a constraint is added to a ``qubovert.PCBO`` or ``qubovert.PCSO``
+    with a ``sympy.Symbol`` as its penalty factor ``lam``, the value of the
+    symbol must be chosen before solving. If it is too small, then the
+    solutions found are invalid; if it is too large, then the penalties
+    dominate the objective function and the anneal freezes.
+
+    ``tune_lam`` repeatedly anneals ``model`` at different values of the
+    symbols and uses ``model.is_solution_valid`` on the results to adjust
+    them. If less than a fraction ``target`` of the anneals give valid
+    solutions, then the symbols that penalize the constraints that are
+    violated are increased; otherwise every symbol is decreased. A symbol
+    penalizes a constraint if its penalty terms contain every variable of
+    the constraint. Each symbol is bracketed between the
+    largest value that was too small and the smallest value that was large
+    enough, and the search stops once each bracket is within ``rtol`` or
+    after ``max_iter`` iterations. ``model`` is compiled to an integer
+    labeled model once, so no iteration rebuilds the model.
+
+    Parameters
+    ----------
+    model : ``qubovert.PCBO`` or ``qubovert.PCSO`` object.
+        The model to tune. Every symbol in ``model`` must appear in ``lam``,
+        and every coefficient of ``model`` must be linear in the symbols, as
+        they are when the symbols are used as the ``lam`` argument of the
+        ``add_constraint`` methods.
+    lam : dict.
+        Maps each ``sympy.Symbol`` in ``model`` to the value to start the
+        search at.
+    target : float in (0, 1] (optional, defaults to 0.9).
+        The fraction of the anneals that must give valid solutions.
+    num_anneals : int >= 1 (optional, defaults to 100).
+        The number of anneals to run at each iteration.
+    factor : float > 1 (optional, defaults to 2).
+        The factor to grow or shrink a symbol by while it is not yet
+        bracketed.
+    rtol : float > 0 (optional, defaults to 0.05).
+        The relative width that each bracket must reach to stop the search.
+    max_iter : int >= 1 (optional, defaults to 20).
+        The maximum number of iterations.
+    anneal_args : keyword arguments.
+        Passed to the annealing function, for example ``anneal_duration``,
+        ``temperature_range``, ``schedule``, ``in_order``, or ``seed``. If a
+        ``seed`` is given, then every iteration uses the same random numbers,
+        which makes the iterations directly comparable. The annealing
+        function is ``qubovert.sim.anneal_qubo``, ``qubovert.sim.anneal_quso``,
+        ``qubovert.sim.anneal_pubo``, or ``qubovert.sim.anneal_puso``
+        depending on the type and degree of ``model``.
+
+    Returns
+    -------
+    res : tuple (lam, results).
+        ``lam`` is a dict mapping each symbol to the smallest values found
+        at which a fraction ``target`` of the anneals gave valid solutions.
+        ``results`` is the ``qubovert.sim.AnnealResults`` object of the
+        anneals at those values, with the states in terms of the variables
+        of ``model`` (including the ancillas).
+
+    Warns
+    -----
+    qubovert.utils.QUBOVertWarning
+        If no values were found at which a fraction ``target`` of the anneals
+        gave valid solutions. In this case, the last values that were tried
+        are returned.
+
+    Example
+    -------
+    >>> from sympy import Symbol
+    >>> import qubovert as qv
+    >>>
+    >>> a = Symbol('a')
+    >>> H = qv.PCBO()
+    >>> for i in range(3):
+    >>>     H[(i,)] -= 1
+    >>> H.add_constraint_eq_zero(H.copy() + 1, lam=a)
+    >>> lam, res = qv.sim.tune_lam(H, {a: 1}, seed=0)
+    >>> lam
+    {a: 1.0442737824274138}
+    >>> H.is_solution_valid(res.best.state)
+    True
+
+    """
+    spin = isinstance(model, PCSO)
+    compiled = model.to_puso() if spin else model.to_pubo()
+    symbols = list(lam)
+    base, penalties = _split_penalties(compiled, symbols)
+    N, default = model.num_binary_variables, 1 if spin else 0
+    constraints = _constraint_symbols(model, penalties, symbols)
+
+    lam = {s: float(v) for s, v in lam.items()}
+    lo, hi = {s: 0. for s in symbols}, {s: None for s in symbols}
+    best, best_results = None, None
+
+    for _ in range(max_iter):
+        D, anneal = _combine(base, penalties, symbols, lam, spin)
+        results, tried = AnnealResults(), dict(lam)
+        num_valid, blame = 0, set()
+        for r in anneal(D, num_anneals, **anneal_args):
+            state = {i: r.state.get(i, default) for i in range(N)}
+            solution = {model.reverse_mapping[i]: v for i, v in state.items()}
+            results.add_state(solution, r.value, spin)
+            if model.is_solution_valid(solution):
+                num_valid += 1
+            else:
+                # the penalties of inequality constraints can be positive
+                # when they are satisfied, so check the constraints
+                # themselves, which do not contain the ancillas.
+                blame.update(
+                    _violated_symbols(constraints, solution) or symbols
+                )
+
+        if num_valid >= target * num_anneals:
+            if best is None or sum(tried.values()) <= sum(best.values()):
+                best, best_results = tried, results
+            for s in symbols:
+                hi[s] = lam[s]
+                lam[s] = (lo[s] * hi[s]) ** .5 if lo[s] else lam[s] / factor
+        else:
+            for s in blame:
+                lo[s] = lam[s]
+                if hi[s] is not None and hi[s] <= lo[s]:
+                    hi[s] = None
+                lam[s] = (
+                    lam[s] * factor if hi[s] is None
+                    else (lo[s] * hi[s]) ** .5
+                )
+
+        if all(hi[s] is not None and hi[s] - lo[s] <= rtol * hi[s]
+               for s in symbols):
+            break
+
+    if best is None:
+        QUBOVertWarning.warn(
+            "No penalty factors were found that give the target fraction of "
+            "valid solutions; consider increasing ``max_iter`` or the "
+            "initial values in ``lam``"
+        )
+        best, best_results = tried, results
+
+    return best, best_results
@@ -79,7 +79,10 @@ void single_anneal_puso(
     int len_state, int *state,
     int *num_couplings, int *terms, double *couplings,
     long *index, long **subgraphs,
-    int len_Ts, double *Ts, int in_order, rng_t *rng
+    int len_Ts, double *Ts, int in_order, rng_t *rng,
+    int num_free, int *free_spins,
+    int num_groups, int *group_sizes, long *group_index, int *groups,
+    int *hot
 ) {
     /*
     Run one simulated annealing algorithm. Updates ``state`` in place.
@@ -110,8 +113,28 @@ void single_anneal_puso(
     in_order : bool.
         Indicates whether to iterate through the variables in order
         `in_order=1` or randomly `in_order=0` during an update step.
-    rng : rng_t (from random.h). 
+    rng : rng_t (from random.h).
         The random number generator's state.
+    num_free : int.
+        The length of ``free_spins``.
+    free_spins : points to an int array.
+        The spins that are not in any one-hot group. These are updated with
+        single spin flips.
+    num_groups : int.
+        The number of one-hot groups.
+    group_sizes : points to an int array.
+        ``group_sizes[g]`` is the number of spins in group ``g``.
+    group_index : points to a long array.
+        ``group_index[g]`` is the index of ``groups`` where the spins of group
+        ``g`` start.
+    groups : points to an int array.
+        ``groups[group_index[g] + j]`` is the jth spin of group ``g``.
+        Exactly one spin of each group is -1. The spins in a group are
+        updated with swap moves that flip the -1 spin to 1 and another spin
+        of the group to -1, so that this always stays true.
+    hot : points to an int array.
+        ``hot[g]`` is the spin of group ``g`` that is -1. It is updated in
+        place.
 
     Example
     -------
@@ -138,12 +161,12 @@ void single_anneal_puso(
 
     */
     double T, dE;
-    int t, i, j;
+    int t, i, j, g, a, b;
 
     for(t=0; t<len_Ts; t++) {
         T = Ts[t];
-        for(j=0; j<len_state; j++) {
-            i = in_order ? j : rand_int(rng, len_state);
+        for(j=0; j<num_free; j++) {
+            i = free_spins[in_order ? j : rand_int(rng, num_free)];
 
             // We take the value of the PUSO of all spins in the subgraph
             // containing spin i. Call this value E. Then if we flip spin i,
@@ -158,6 +181,35 @@ void single_anneal_puso(
                 state[i] *= -1;
             }
         }
+        for(g=0; g<num_groups; g++) {
+            for(j=0; j<group_sizes[g]; j++) {
+                a = hot[g];
+                b = groups[
+                    group_index[g] + (
+                        in_order ? j : rand_int(rng, group_sizes[g])
+                    )
+                ];
+                if(a == b) {
+                    continue;
+                }
+                // the change in energy from flipping a and then flipping b.
+                dE = -2 * puso_subgraph_value(
+                    state, a, num_couplings, terms, couplings,
+                    index, subgraphs
+                );
+                state[a] *= -1;
+                dE -= 2 * puso_subgraph_value(
+                    state, b, num_couplings, terms, couplings,
+                    index, subgraphs
+                );
+                if(dE <= 0 || (T > 0 && rand_double(rng) < exp(-dE / T))) {
+                    state[b] *= -1;
+                    hot[g] = b;
+                } else {
+                    state[a] *= -1;
+                }
+            }
+        }
     }
 }
 
@@ -212,25 +264,33 @@ double puso_value(
 }
 
 
-void anneal_puso(  // updates states and values in place
-    int num_anneals, int *states, double *values, int len_state,
+void anneal_puso(  // updates states, values, and top in place
+    int num_anneals, int *states, double *values, top_states_t *top,
+    int len_state,
     long num_terms, int *num_couplings, int *terms, double *couplings,
-    int len_Ts, double *Ts, int in_order, int initial_state_provided, int seed
+    int len_Ts, double *Ts, int in_order, int *initial_state, int seed,
+    long anneal_offset, int num_groups, int *group_sizes, int *groups
 ) {
     /*
     Run many rounds of simulated annealing.
-    Updates ``states`` and ``values`` in place.
+    Updates ``states``, ``values``, and ``top`` in place.
 
     Parameters
     ----------
     num_anneals : int.
         The number of times to run simulated annealing.
-    states : points to a buffer array to build the resulting states.
+    states : points to a buffer array to build the resulting states, or NULL.
         It will be of dimension `states[num_anneals * len_state]`.
-        The jth spin in the ith state can be accessed with 
-        `states[i * len_state + j]`.
-    values : points to a buffer array to store the resulting values.
-        It will be of dimension `values[num_anneals]`.
+        The jth spin in the ith state can be accessed with
+        `states[i * len_state + j]`. If `states` is NULL, then the states
+        are not stored.
+    values : points to a buffer array to store the resulting values, or NULL.
+        It will be of dimension `values[num_anneals]`. If `values` is NULL,
+        then the values are not stored.
+    top : points to an initialized `top_states_t` struct, or NULL.
+        If `top` is not NULL, then each resulting state is added to it, so
+        that it keeps the distinct states with the lowest values and how
+        many times each of them occurred. See top_states.c.
     len_state : int.
         The number of spins.
     state : points to an integer array.
@@ -250,14 +310,28 @@ void anneal_puso(  // updates states and values in place
     in_order : bool.
         Indicates whether to iterate through the variables in order
         `in_order=1` or randomly `in_order=0` during an update step.
-    initial_state_provided : bool.
-        If ``initial_state_provided == 0``, then we randomly initiate each
-        initial state for each anneal. Otherwise, we assume that the desired
-        starting states are encoded in the buffer ``states``.
+    initial_state : points to an int array, or NULL.
+        If ``initial_state`` is NULL, then we randomly initiate each initial
+        state for each anneal. Otherwise, each anneal starts in the state
+        ``initial_state``, which is an array of length ``len_state``.
     seed : int.
         The value to seed the random number generator.
         If `seed < 0`, then the random number generator will be seeded with
         the internal clock.
+    anneal_offset : long int.
+        The index of the first anneal. The ith anneal draws its random
+        numbers from the stream ``anneal_offset + i`` of the random number
+        generator, so that splitting a run into chunks with the appropriate
+        offsets gives the same results as one single run.
+    num_groups : int.
+        The number of one-hot groups.
+    group_sizes : points to an int array.
+        ``group_sizes[g]`` is the number of spins in group ``g``.
+    groups : points to an int array.
+        The spins of each group, one group after the other. In every state,
+        exactly one spin of each group is -1, and annealing preserves this
+        with swap moves. If an initial state is provided, then it must
+        satisfy this.
 
     Example
     -------
@@ -272,10 +346,10 @@ void anneal_puso(  // updates states and values in place
     so that you can see how these terms are separated.
 
     */
-    int i, j, k;
+    int i, j, k; double value;
 
     int *state = (int*)malloc(len_state * sizeof(int));
-    rng_t rng = rand_init(seed);
+    rng_t rng;
 
     // create subgraphs and index. please see the Parameters and Example
     // sections in the comments of the `single_anneal_puso` function for info
@@ -305,29 +379,85 @@ void anneal_puso(  // updates states and values in place
         }
     }
 
+    // spins that are in a one-hot group are updated with swap moves, all the
+    // others are free and updated with single spin flips.
+    int num_free = len_state, g;
+    int *free_spins = (int*)malloc(len_state * sizeof(int));
+    int *hot = (int*)malloc((num_groups ? num_groups : 1) * sizeof(int));
+    long *group_index = (long*)malloc(
+        (num_groups ? num_groups : 1) * sizeof(long)
+    );
+    for(j=0; j<len_state; j++) {
+        free_spins[j] = 1;
+    }
+    for(g=0; g<num_groups; g++) {
+        group_index[g] = g ? group_index[g-1] + group_sizes[g-1] : 0;
+        for(j=0; j<group_sizes[g]; j++) {
+            free_spins[groups[group_index[g] + j]] = 0;
+            num_free--;
+        }
+    }
+    for(i=0, j=0; j<len_state; j++) {
+        if(free_spins[j]) {
+            free_spins[i++] = j;
+        }
+    }
+
     // run simulated annealing `num_anneals` times.
     for(i=0; i<num_anneals; i++) {
+        // each anneal gets its own random number stream.
+        rand_seed_stream(&rng, seed, anneal_offset + i);
+
         // generate random initial state
         for(j=0; j<len_state; j++) {
-            if(initial_state_provided) {
-                state[j] = states[i * len_state + j];
+            if(initial_state) {
+                state[j] = initial_state[j];
             } else {
                 state[j] = rand_double(&rng) < 0.5 ? 1 : -1;
             }
         }
 
+        // find or pick the -1 spin of each one-hot group.
+        for(g=0; g<num_groups; g++) {
+            if(initial_state) {
+                for(j=0; j<group_sizes[g]; j++) {
+                    if(state[groups[group_index[g] + j]] == -1) {
+                        hot[g] = groups[group_index[g] + j];
+                    }
+                }
+            } else {
+                for(j=0; j<group_sizes[g]; j++) {
+                    state[groups[group_index[g] + j]] = 1;
+                }
+                hot[g] = groups[
+                    group_index[g] + rand_int(&rng, group_sizes[g])
+                ];
+                state[hot[g]] = -1;
+            }
+        }
+
         // run simulated annealing, updates `state` in place.
         single_anneal_puso(
             len_state, state,
             num_couplings, terms, couplings,
             index, subgraphs,
-            len_Ts, Ts, in_order, &rng
+            len_Ts, Ts, in_order, &rng,
+            num_free, free_spins,
+            num_groups, group_sizes, group_index, groups, hot
         );
 
         // add the new state and the new value to the buffers
-        values[i] = puso_value(state, num_terms, num_couplings, terms, couplings);
-        for(j=0; j<len_state; j++) {
-            states[i * len_state + j] = state[j];
+        value = puso_value(state, num_terms, num_couplings, terms, couplings);
+        if(values) {
+            values[i] = value;
+        }
+        if(states) {
+            for(j=0; j<len_state; j++) {
+                states[i * len_state + j] = state[j];
+            }
+        }
+        if(top) {
+            top_states_add(top, len_state, state, value);
         }
     }
 
@@ -337,4 +467,5 @@ void anneal_puso(  // updates states and values in place
         free(subgraphs[i]);
     }
     free(subgraphs);
+    free(free_spins); free(hot); free(group_index);
 }
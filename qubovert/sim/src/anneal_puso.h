@@ -1,10 +1,14 @@
 #ifndef ANNEAL_PUSO_H_INCLUDED
 #define ANNEAL_PUSO_H_INCLUDED
 
-void anneal_puso(  // updates states and values in place
-    int num_anneals, int *states, double *values, int len_state,
+#include "top_states.h"
+
+void anneal_puso(  // updates states, values, and top in place
+    int num_anneals, int *states, double *values, top_states_t *top,
+    int len_state,
     long num_terms, int *num_couplings, int *terms, double *couplings,
-    int len_Ts, double *Ts, int in_order, int initial_state_provided, int seed
+    int len_Ts, double *Ts, int in_order, int *initial_state, int seed,
+    long anneal_offset, int num_groups, int *group_sizes, int *groups
 );
 
 #endif
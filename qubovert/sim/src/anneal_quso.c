@@ -106,11 +106,50 @@ void recompute_flip_dE(
 }
 
 
+double coupling_value(
+    int a, int b, int *num_neighbors, int *neighbors, double *J, long *index
+) {
+    /*
+    Find the coupling value between spin `a` and spin `b`.
+
+    Parameters
+    ----------
+    `a` and `b` are the two spins.
+    `num_neighbors` points to an array such that `num_neighbors[i]` is
+        the length of the array `neighbors[i]`.
+    `neighbors` points to an array where `neighbors[index[i]+j]` is
+        one of the neighboring spins of spin i, for j
+        in {0, 1, ..., num_neighbors[i]-1}.
+    `J` points to an array where `J[index[i]+j]` is the coupling value
+        between the spin i and spin `neighbors[index[i]+j]`, for j
+        in {0, 1, ..., num_neighbors[i]-1}.
+    `index` points to an array such that `index[i]` is the index of
+        `neighbors` and `J` where the information for spin `i` starts.
+
+    Returns
+    -------
+    value : double.
+        The coupling value between `a` and `b`, 0 if they are not neighbors.
+
+    */
+    int j; double value = 0.;
+    for(j=0; j<num_neighbors[a]; j++) {
+        if(neighbors[index[a] + j] == b) {
+            value += J[index[a] + j];
+        }
+    }
+    return value;
+}
+
+
 void single_anneal_quso(
     int len_state, int *state,
     double *h, int *num_neighbors, int *neighbors, double *J,
     long *index, int len_Ts, double *Ts,
-    int in_order, rng_t *rng
+    int in_order, rng_t *rng,
+    int num_free, int *free_spins,
+    int num_groups, int *group_sizes, long *group_index, int *groups,
+    int *hot
 ) {
     /*
     Anneal a QUSO once.
@@ -136,6 +175,20 @@ void single_anneal_quso(
     `in_order` indicates whether to iterate through the variables in order
         `in_order=1` or randomly `in_order=0` during an update step.
     `rng` is the random number generator's state.
+    `num_free` is the length of `free_spins`.
+    `free_spins` points to an array of the spins that are not in any one-hot
+        group. These are updated with single spin flips.
+    `num_groups` is the number of one-hot groups.
+    `group_sizes` points to an array where `group_sizes[g]` is the number
+        of spins in group `g`.
+    `group_index` points to an array such that `group_index[g]` is the index
+        of `groups` where the spins of group `g` start.
+    `groups` points to an array where `groups[group_index[g]+j]` is the jth
+        spin of group `g`. Exactly one spin of each group is -1. The spins
+        in a group are updated with swap moves that flip the -1 spin to 1
+        and another spin of the group to -1, so that this always stays true.
+    `hot` points to an array where `hot[g]` is the spin of group `g` that
+        is -1. It is updated in place.
 
     Returns
     -------
@@ -166,7 +219,7 @@ void single_anneal_quso(
                2}`
     */
     double T, dE;
-    int t, i, j;
+    int t, i, j, g, a, b;
 
     double *flip_spin_dE;
     flip_spin_dE = (double*)malloc(len_state * sizeof(double));
@@ -179,8 +232,8 @@ void single_anneal_quso(
 
     for(t=0; t<len_Ts; t++) {
         T = Ts[t];
-        for(j=0; j<len_state; j++) {
-            i = in_order ? j : rand_int(rng, len_state);
+        for(j=0; j<num_free; j++) {
+            i = free_spins[in_order ? j : rand_int(rng, num_free)];
             dE = flip_spin_dE[i];
             if(dE <= 0 || (T > 0 && rand_double(rng) < exp(-dE / T))) {
                 recompute_flip_dE(
@@ -191,6 +244,41 @@ void single_anneal_quso(
                 state[i] *= -1;
             }
         }
+        for(g=0; g<num_groups; g++) {
+            for(j=0; j<group_sizes[g]; j++) {
+                a = hot[g];
+                b = groups[
+                    group_index[g] + (
+                        in_order ? j : rand_int(rng, group_sizes[g])
+                    )
+                ];
+                if(a == b) {
+                    continue;
+                }
+                // flipping both a and b changes the energy by the sum of
+                // their individual flips, but the coupling between them
+                // is counted twice with the wrong sign.
+                dE = flip_spin_dE[a] + flip_spin_dE[b] + 4. * state[a] *
+                     state[b] * coupling_value(
+                         a, b, num_neighbors, neighbors, J, index
+                     );
+                if(dE <= 0 || (T > 0 && rand_double(rng) < exp(-dE / T))) {
+                    recompute_flip_dE(
+                        a, flip_spin_dE, state,
+                        num_neighbors, neighbors, J,
+                        index
+                    );
+                    state[a] *= -1;
+                    recompute_flip_dE(
+                        b, flip_spin_dE, state,
+                        num_neighbors, neighbors, J,
+                        index
+                    );
+                    state[b] *= -1;
+                    hot[g] = b;
+                }
+            }
+        }
     }
     free(flip_spin_dE);
 }
@@ -240,10 +328,12 @@ double quso_value(
 }
 
 
-void anneal_quso(  // updates states and values in place
-    int num_anneals, int *states, double *values, int len_state,
+void anneal_quso(  // updates states, values, and top in place
+    int num_anneals, int *states, double *values, top_states_t *top,
+    int len_state,
     double *h, int *num_neighbors, int *neighbors, double *J,
-    int len_Ts, double *Ts, int in_order, int initial_state_provided, int seed
+    int len_Ts, double *Ts, int in_order, int *initial_state, int seed,
+    long anneal_offset, int num_groups, int *group_sizes, int *groups
 ) {
     /*
     Anneal a QUSO ``num_anneals`` times.
@@ -251,12 +341,18 @@ void anneal_quso(  // updates states and values in place
     Parameters
     ----------
     `num_anneals` is the number of times to run simulated annealing.
-    `states` points to a buffer array to build the resulting states.
-        It will be of dimension `states[num_anneals * len_state]`.
-        The jth spin in the ith state can be accessed with 
-        `states[i * len_state + j]`.
-    `values` points to a buffer array to store the resulting values.
-        It will be of dimension `values[num_anneals]`.
+    `states` points to a buffer array to build the resulting states, or is
+        NULL. It will be of dimension `states[num_anneals * len_state]`.
+        The jth spin in the ith state can be accessed with
+        `states[i * len_state + j]`. If `states` is NULL, then the states
+        are not stored.
+    `values` points to a buffer array to store the resulting values, or is
+        NULL. It will be of dimension `values[num_anneals]`. If `values` is
+        NULL, then the values are not stored.
+    `top` points to an initialized `top_states_t` struct, or is NULL. If
+        `top` is not NULL, then each resulting state is added to it, so that
+        it keeps the distinct states with the lowest values and how many
+        times each of them occurred. See top_states.c.
     `len_state` is the length of `state`, ie the number of spin.
     `h` points to an array where `h[i]` is the field value on spin `i`.
     `num_neighbors` points to an array where `num_neighbors[i]` is
@@ -272,13 +368,24 @@ void anneal_quso(  // updates states and values in place
     `Ts` points to an array where `Ts[j]` is the jth temperature to simulate
         the QUSO at.
     `in_order` indicates whether to iterate through the variables in order
-    initial_state_provided : bool.
-        If ``initial_state_provided == 0``, then we randomly initiate each
-        initial state for each anneal. Otherwise, we assume that the desired
-        starting states are encoded in the buffer ``states``.
+    `initial_state` points to an array of length `len_state`, or is NULL.
+        If `initial_state` is NULL, then we randomly initiate each initial
+        state for each anneal. Otherwise, each anneal starts in the state
+        `initial_state`.
     `seed` is the value to seed the random number generator.
         If `seed < 0`, then the random number generator will be seeded with
         the internal clock.
+    `anneal_offset` is the index of the first anneal. The ith anneal draws
+        its random numbers from the stream `anneal_offset + i` of the random
+        number generator, so that splitting a run into chunks with the
+        appropriate offsets gives the same results as one single run.
+    `num_groups` is the number of one-hot groups.
+    `group_sizes` points to an array where `group_sizes[g]` is the number
+        of spins in group `g`.
+    `groups` points to an array containing the spins of each group, one
+        group after the other. In every state, exactly one spin of each group
+        is -1, and annealing preserves this with swap moves. If an initial
+        state is provided, then it must satisfy this.
 
     Returns
     -------
@@ -308,9 +415,9 @@ void anneal_quso(  // updates states and values in place
               -1, 2,
                2}`
     */
-    int i, j;
+    int i, j; double value;
 
-    rng_t rng = rand_init(seed);
+    rng_t rng;
 
     // index[i] points to where the information for spin i starts
     // in the J and neighbor arrays.
@@ -322,31 +429,88 @@ void anneal_quso(  // updates states and values in place
 
     int *state = (int*)malloc(len_state * sizeof(int));
 
+    // spins that are in a one-hot group are updated with swap moves, all the
+    // others are free and updated with single spin flips.
+    int num_free = len_state, g;
+    int *free_spins = (int*)malloc(len_state * sizeof(int));
+    int *hot = (int*)malloc((num_groups ? num_groups : 1) * sizeof(int));
+    long *group_index = (long*)malloc(
+        (num_groups ? num_groups : 1) * sizeof(long)
+    );
+    for(j=0; j<len_state; j++) {
+        free_spins[j] = 1;
+    }
+    for(g=0; g<num_groups; g++) {
+        group_index[g] = g ? group_index[g-1] + group_sizes[g-1] : 0;
+        for(j=0; j<group_sizes[g]; j++) {
+            free_spins[groups[group_index[g] + j]] = 0;
+            num_free--;
+        }
+    }
+    for(i=0, j=0; j<len_state; j++) {
+        if(free_spins[j]) {
+            free_spins[i++] = j;
+        }
+    }
+
     for(i=0; i<num_anneals; i++) {
+        // each anneal gets its own random number stream.
+        rand_seed_stream(&rng, seed, anneal_offset + i);
+
         // generate random initial state
         for(j=0; j<len_state; j++) {
-            if(initial_state_provided) {
-                state[j] = states[i * len_state + j];
+            if(initial_state) {
+                state[j] = initial_state[j];
             } else {
                 state[j] = rand_double(&rng) < 0.5 ? 1 : -1;
             }
         }
 
+        // find or pick the -1 spin of each one-hot group.
+        for(g=0; g<num_groups; g++) {
+            if(initial_state) {
+                for(j=0; j<group_sizes[g]; j++) {
+                    if(state[groups[group_index[g] + j]] == -1) {
+                        hot[g] = groups[group_index[g] + j];
+                    }
+                }
+            } else {
+                for(j=0; j<group_sizes[g]; j++) {
+                    state[groups[group_index[g] + j]] = 1;
+                }
+                hot[g] = groups[
+                    group_index[g] + rand_int(&rng, group_sizes[g])
+                ];
+                state[hot[g]] = -1;
+            }
+        }
+
         // run simulated annealing, updates `state` in place.
         single_anneal_quso(
             len_state, state,
             h, num_neighbors, neighbors, J, index,
-            len_Ts, Ts, in_order, &rng
+            len_Ts, Ts, in_order, &rng,
+            num_free, free_spins,
+            num_groups, group_sizes, group_index, groups, hot
         );
 
         // add the new state and the new value to the buffers
-        values[i] = quso_value(
+        value = quso_value(
             len_state, state, h, num_neighbors, neighbors, J, index
         );
-        for(j=0; j<len_state; j++) {
-            states[i * len_state + j] = state[j];
+        if(values) {
+            values[i] = value;
+        }
+        if(states) {
+            for(j=0; j<len_state; j++) {
+                states[i * len_state + j] = state[j];
+            }
+        }
+        if(top) {
+            top_states_add(top, len_state, state, value);
         }
     }
 
     free(index); free(state);
+    free(free_spins); free(hot); free(group_index);
 }
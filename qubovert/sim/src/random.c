@@ -20,6 +20,20 @@ void rand_seed(rng_t *rng, int seed) {
 }
 
 
+void rand_seed_stream(rng_t *rng, int seed, long stream) {
+    // Seed `rng` with `seed` and select the PCG stream `stream`. Every
+    // anneal gets its own stream (its anneal index), so that the random
+    // numbers used by an anneal only depend on `seed` and on its index, and
+    // not on which anneals were run before it. If seed is negative, then we
+    // will seed with time, otherwise, seed with seed.
+    if(seed < 0) {
+        pcg32_srandom_r(rng, (unsigned int)time(NULL), (uint64_t)stream);
+    } else {
+        pcg32_srandom_r(rng, (unsigned)seed, (uint64_t)stream);
+    }
+}
+
+
 rng_t rand_init(int seed) {
     // If seed is negative, then we will seed with time, otherwise,
     // seed with seed.
@@ -11,6 +11,7 @@
 #define rng_t pcg32_random_t
 
 void rand_seed(rng_t *rng, int seed);
+void rand_seed_stream(rng_t *rng, int seed, long stream);
 rng_t rand_init(int seed);
 double rand_double(rng_t *rng);
 int rand_int(rng_t *rng, int stop);
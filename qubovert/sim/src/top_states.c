@@ -0,0 +1,247 @@
+#include "top_states.h"
+#include <stdlib.h>
+#include <string.h>
+
+
+/*
+Here we keep track of the `k` distinct states with the lowest values that
+the anneals end in, along with how many anneals ended in each of them. The
+states are packed into the bits of 64 bit words, with a bit set for each spin
+that is -1. The packed states are stored in a hash table so that a state that
+has already been seen is found in constant time, and their slots are kept in
+a max-heap by value so that the worst state can be replaced in logarithmic
+time. So the memory used is `O(k * len_state)` regardless of the number of
+anneals.
+*/
+
+
+uint64_t hash_packed(int num_words, uint64_t *packed) {
+    /*
+    Hash a packed state by mixing each of its words with the splitmix64
+    finalizer.
+
+    Parameters
+    ----------
+    `num_words` is the length of `packed`.
+    `packed` points to the packed state.
+
+    Returns
+    -------
+    The hash of the packed state.
+
+    */
+    uint64_t h = 0x9e3779b97f4a7c15ULL, x; int i;
+    for(i=0; i<num_words; i++) {
+        x = h ^ packed[i];
+        x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9ULL;
+        x = (x ^ (x >> 27)) * 0x94d049bb133111ebULL;
+        h = x ^ (x >> 31);
+    }
+    return h;
+}
+
+
+void heap_swap(top_states_t *top, int a, int b) {
+    /*
+    Swap the slots at positions `a` and `b` of the heap.
+    */
+    int s = top->heap[a];
+    top->heap[a] = top->heap[b]; top->heap[b] = s;
+    top->heap_pos[top->heap[a]] = a; top->heap_pos[top->heap[b]] = b;
+}
+
+
+void heap_sift_up(top_states_t *top, int pos) {
+    /*
+    Move the slot at position `pos` of the heap up until its parent has a
+    value at least as large as it.
+    */
+    int parent;
+    while(pos > 0) {
+        parent = (pos - 1) / 2;
+        if(top->values[top->heap[parent]] >= top->values[top->heap[pos]]) {
+            break;
+        }
+        heap_swap(top, pos, parent);
+        pos = parent;
+    }
+}
+
+
+void heap_sift_down(top_states_t *top, int pos, int size) {
+    /*
+    Move the slot at position `pos` of the first `size` positions of the
+    heap down until its children have values at most as large as it.
+    */
+    int child;
+    while((child = 2 * pos + 1) < size) {
+        if(
+            child + 1 < size &&
+            top->values[top->heap[child + 1]] > top->values[top->heap[child]]
+        ) {
+            child++;
+        }
+        if(top->values[top->heap[pos]] >= top->values[top->heap[child]]) {
+            break;
+        }
+        heap_swap(top, pos, child);
+        pos = child;
+    }
+}
+
+
+void top_states_init(top_states_t *top, int k, int len_state) {
+    /*
+    Allocate the memory to keep the `k` distinct states with the lowest
+    values.
+
+    Parameters
+    ----------
+    `top` points to the struct to initialize.
+    `k` is the number of states to keep. It must be positive.
+    `len_state` is the number of spins in each state.
+
+    */
+    int i;
+    top->k = k; top->size = 0;
+    top->num_words = len_state / 64 + 1;
+    // at least twice as many buckets as states, and a power of 2
+    for(top->num_buckets=1; top->num_buckets<2*k; top->num_buckets*=2);
+
+    top->packed = (uint64_t*)malloc(k * top->num_words * sizeof(uint64_t));
+    top->scratch = (uint64_t*)malloc(top->num_words * sizeof(uint64_t));
+    top->hashes = (uint64_t*)malloc(k * sizeof(uint64_t));
+    top->values = (double*)malloc(k * sizeof(double));
+    top->counts = (long*)malloc(k * sizeof(long));
+    top->heap = (int*)malloc(k * sizeof(int));
+    top->heap_pos = (int*)malloc(k * sizeof(int));
+    top->next = (int*)malloc(k * sizeof(int));
+    top->buckets = (int*)malloc(top->num_buckets * sizeof(int));
+    for(i=0; i<top->num_buckets; i++) {
+        top->buckets[i] = -1;
+    }
+}
+
+
+void top_states_add(top_states_t *top, int len_state, int *state, double value) {
+    /*
+    Record that an anneal ended in `state`. If `state` is already kept, then
+    its count is incremented. Otherwise, it is kept if fewer than `k` states
+    are kept, or if its value is lower than the value of the worst kept
+    state, which is then dropped. A state that is dropped has a value at
+    least as large as `k` kept states, and since the kept values only ever
+    decrease, it can never be kept again, so the counts of the kept states
+    are exact.
+
+    Parameters
+    ----------
+    `top` points to the initialized struct.
+    `len_state` is the number of spins in `state`.
+    `state` points to an array where `state[i]` is the value of the ith
+        spin, either 1 or -1.
+    `value` is the value of the model with `state`.
+
+    */
+    int i, s, replaced = 0, *link;
+    uint64_t h, mask = (uint64_t)(top->num_buckets - 1), *packed;
+
+    memset(top->scratch, 0, top->num_words * sizeof(uint64_t));
+    for(i=0; i<len_state; i++) {
+        if(state[i] == -1) {
+            top->scratch[i / 64] |= (uint64_t)1 << (i % 64);
+        }
+    }
+    h = hash_packed(top->num_words, top->scratch);
+
+    for(s=top->buckets[h & mask]; s>=0; s=top->next[s]) {
+        if(
+            top->hashes[s] == h && !memcmp(
+                top->packed + (long)s * top->num_words, top->scratch,
+                top->num_words * sizeof(uint64_t)
+            )
+        ) {
+            top->counts[s]++;
+            return;
+        }
+    }
+
+    if(top->size < top->k) {
+        s = top->size++;
+        top->heap[s] = s; top->heap_pos[s] = s;
+    } else if(value < top->values[top->heap[0]]) {
+        // drop the worst state; unlink it from its bucket.
+        s = top->heap[0];
+        for(link=&top->buckets[top->hashes[s] & mask]; *link!=s;
+            link=&top->next[*link]);
+        *link = top->next[s];
+        replaced = 1;
+    } else {
+        return;
+    }
+
+    packed = top->packed + (long)s * top->num_words;
+    memcpy(packed, top->scratch, top->num_words * sizeof(uint64_t));
+    top->hashes[s] = h; top->values[s] = value; top->counts[s] = 1;
+    top->next[s] = top->buckets[h & mask]; top->buckets[h & mask] = s;
+
+    // a new state has to go up the heap, and a replacement has a lower
+    // value than the state that it replaced so it has to go down.
+    if(replaced) {
+        heap_sift_down(top, 0, top->size);
+    } else {
+        heap_sift_up(top, top->heap_pos[s]);
+    }
+}
+
+
+void top_states_order(top_states_t *top, int *order) {
+    /*
+    Sort the kept states from the lowest to the highest value by popping
+    the heap. The heap is not valid afterwards, so no more states can be
+    added.
+
+    Parameters
+    ----------
+    `top` points to the struct.
+    `order` points to an array of length `top->size`. It is filled with the
+        slots of the kept states from the lowest to the highest value.
+
+    */
+    int i;
+    for(i=top->size-1; i>=0; i--) {
+        order[i] = top->heap[0];
+        heap_swap(top, 0, i);
+        heap_sift_down(top, 0, i);
+    }
+}
+
+
+void top_states_unpack(top_states_t *top, int slot, int len_state, int *state) {
+    /*
+    Unpack the state kept in `slot` into `state`.
+
+    Parameters
+    ----------
+    `top` points to the struct.
+    `slot` is the slot of the state.
+    `len_state` is the number of spins.
+    `state` points to an array of length `len_state` to fill with the
+        values of the spins, either 1 or -1.
+
+    */
+    int i; uint64_t *packed = top->packed + (long)slot * top->num_words;
+    for(i=0; i<len_state; i++) {
+        state[i] = (packed[i / 64] >> (i % 64)) & 1 ? -1 : 1;
+    }
+}
+
+
+void top_states_free(top_states_t *top) {
+    /*
+    Free the memory of the struct.
+    */
+    free(top->packed); free(top->scratch); free(top->hashes);
+    free(top->values); free(top->counts);
+    free(top->heap); free(top->heap_pos);
+    free(top->next); free(top->buckets);
+}
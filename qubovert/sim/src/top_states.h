@@ -0,0 +1,20 @@
+#ifndef TOP_STATES_H_INCLUDED
+#define TOP_STATES_H_INCLUDED
+
+#include <stdint.h>
+
+typedef struct {
+    int k, num_words, size, num_buckets;
+    uint64_t *packed, *hashes, *scratch;
+    double *values;
+    long *counts;
+    int *heap, *heap_pos, *buckets, *next;
+} top_states_t;
+
+void top_states_init(top_states_t *top, int k, int len_state);
+void top_states_add(top_states_t *top, int len_state, int *state, double value);
+void top_states_order(top_states_t *top, int *order);
+void top_states_unpack(top_states_t *top, int slot, int len_state, int *state);
+void top_states_free(top_states_t *top);
+
+#endif
@@ -34,6 +34,8 @@ from ._qubomatrix import *
 from ._qusomatrix import *
 from ._conversions import *
 from ._bo_parentclass import *
+from ._lazy import *
+from ._compact import *
 
 from ._warn import __all__ as __all_warn__
 from ._binary_helpers import __all__ as __all_bh__
@@ -50,6 +52,8 @@ from ._qubomatrix import __all__ as __all_qubomatrix__
 from ._qusomatrix import __all__ as __all_qusomatrix__
 from ._conversions import __all__ as __all_conversions__
 from ._bo_parentclass import __all__ as __all_bo__
+from ._lazy import __all__ as __all_lazy__
+from ._compact import __all__ as __all_compact__
 
 
 __all__ = (
@@ -67,14 +71,16 @@ __all__ = (
     __all_qubomatrix__ +
     __all_qusomatrix__ +
     __all_conversions__ +
-    __all_bo__
+    __all_bo__ +
+    __all_lazy__ +
+    __all_compact__
 )
 
 del __all_warn__, __all_bh__, __all_ae__, __all_hash__, __all_subgraph__
 del __all_normalize__, __all_values__, __all_solve_bruteforce__
 del __all_dict_arithmetic__, __all_pubomatrix__, __all_pusomatrix__
 del __all_qubomatrix__, __all_qusomatrix__
-del __all_conversions__, __all_bo__
+del __all_conversions__, __all_bo__, __all_lazy__, __all_compact__
 
 
 name = "utils"
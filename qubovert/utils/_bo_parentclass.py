@@ -20,6 +20,7 @@ class for some Binary Optimization classes, such as ``qubovert.QUBO``,
 
 """
 
+from itertools import chain
 from . import Conversions
 from ._dict_arithmetic import _generate_key_value_pairs
 
@@ -224,6 +225,197 @@ class BO(Conversions):
                 self._reverse_mapping[self._next_label] = i
                 self._next_label += 1
 
+    def _term_arrays(self):
+        """_term_arrays.
+
+        Internal method to flatten the terms of the model into arrays, with
+        each variable replaced by its integer label in ``mapping``. See
+        ``to_arrays``.
+
+        Returns
+        -------
+        res : tuple (offset, term_ptr, variables, coefficients).
+
+        """
+        return super()._term_arrays(self._mapping)
+
+    @classmethod
+    def _from_term_arrays(cls, term_ptr, variables, coefficients, offset,
+                          labels):
+        """_from_term_arrays.
+
+        Internal method to build the model from arrays. See
+        ``help(qubovert.utils.PUBOMatrix.from_arrays)``. The mapping sends
+        the labels of the variables that appear in the model to integers from
+        0 to n-1, in the order of their index in ``labels``.
+
+        Parameters
+        ----------
+        term_ptr, variables, coefficients, offset, labels : see
+            ``help(qubovert.utils.PUBOMatrix.from_arrays)``.
+
+        Returns
+        -------
+        D : the model, an object of type ``cls``.
+
+        """
+        D = super()._from_term_arrays(
+            term_ptr, variables, coefficients, offset, labels
+        )
+        if labels is None:
+            used = sorted(D._variables)
+        else:
+            index = {v: i for i, v in enumerate(labels)}
+            used = sorted(D._variables, key=index.__getitem__)
+        D._mapping = {v: i for i, v in enumerate(used)}
+        D._reverse_mapping = dict(enumerate(used))
+        D._next_label = len(used)
+        return D
+
+    def to_arrays(self, *args, **kwargs):
+        """to_arrays.
+
+        Export the coefficients of the model as numpy arrays, without building
+        the enumerated model. The arrays are the same as those of
+        ``self.to_enumerated().to_arrays(*args, **kwargs)``, up to the order of
+        the terms, and the ``reverse_mapping`` is appended to them so that the
+        integer labels can be converted back.
+
+        If ``self`` is a QUBO or QUSO, then see
+        ``help(qubovert.utils.QUBOMatrix.to_arrays)``. Otherwise, see
+        ``help(qubovert.utils.PUBOMatrix.to_arrays)``.
+
+        Parameters
+        ----------
+        arguments : passed to the ``to_arrays`` method of the matrix class.
+
+        Returns
+        -------
+        res : tuple.
+            The arrays of the matrix class with ``reverse_mapping`` as the
+            last element.
+
+        Example
+        -------
+        >>> from qubovert import QUBO
+        >>> Q = QUBO({('a', 'b'): 2, ('b',): -1, (): 3})
+        >>> offset, linear, row, col, values, reverse_mapping = Q.to_arrays()
+        >>> linear, row, col, values
+        (array([ 0., -1.]), array([0]), array([1]), array([2.]))
+        >>> reverse_mapping
+        {0: 'a', 1: 'b'}
+
+        """
+        return super().to_arrays(*args, **kwargs) + (self.reverse_mapping,)
+
+    def __imul__(self, other):
+        """__imul__.
+
+        Multiply in place. See ``help(qubovert.utils.DictArithmetic)``. The
+        product is cleared and refilled, so the mapping is rebuilt. It is
+        rebuilt in the order that the variables appear in the pairs of keys
+        that are multiplied, as if each product were set with
+        ``__setitem__``.
+
+        Parameters
+        ----------
+        other : numeric or dict.
+
+        Returns
+        -------
+        self.
+
+        """
+        if not isinstance(other, dict):
+            return super().__imul__(other)
+
+        # the pairs are (k0, ko0), (k0, ko1), ..., (k1, ko0), ..., so the
+        # variables first appear in this order.
+        keys = [k if isinstance(k, tuple) else (k,) for k in other]
+        labels = list(chain(next(iter(self)), *keys, *self)) if (
+            self and keys
+        ) else []
+
+        super().__imul__(other)
+        self._mapping, self._reverse_mapping = {}, {}
+        self._next_label = 0
+        self._add_to_mapping(labels)
+        return self
+
+    def _add_items(self, items):
+        """_add_items.
+
+        Internal method to add the terms of ``items`` to ``self`` in one pass.
+        See ``help(qubovert.utils.PUBOMatrix._add_items)``. Like
+        ``__setitem__``, the variables of every key are added to the mapping
+        in the order that they appear, even if the value of the key is 0.
+
+        Parameters
+        ----------
+        items : dict.
+            Maps canonical keys to values.
+
+        """
+        super()._add_items(items)
+        self._add_to_mapping(chain.from_iterable(items))
+
+    def _add_staged(self, staged):
+        """_add_staged.
+
+        Internal method to add the terms that were staged in ``bulk`` to
+        ``self``. See ``help(qubovert.utils.PUBOMatrix._add_staged)``. Like
+        ``__setitem__``, the variables of every staged key are added to the
+        mapping in the order that they appear in the key.
+
+        Parameters
+        ----------
+        staged : dict.
+            Maps keys, not necessarily canonical, to values.
+
+        Raises
+        ------
+        KeyError if a staged key is invalid for the class. Then nothing is
+        added to ``self``.
+
+        """
+        items = self._squash_items(staged)
+        self._add_to_mapping(chain.from_iterable(staged))
+        self._add_items(items)
+
+    def _copy_attributes(self, other):
+        """_copy_attributes.
+
+        Internal method to set the attributes of a copy of ``other``. See
+        ``help(qubovert.utils.DictArithmetic._copy_attributes)``. Like
+        ``self.__class__(other)``, the mapping is rebuilt from the keys in
+        order.
+
+        Parameters
+        ----------
+        other : BO object.
+
+        """
+        super()._copy_attributes(other)
+        self._mapping, self._reverse_mapping, self._next_label = {}, {}, 0
+        self._add_to_mapping(chain.from_iterable(self))
+
+    def _add_to_mapping(self, labels):
+        """_add_to_mapping.
+
+        Internal method to add the ``labels`` that are not already in the
+        mapping to it, in order.
+
+        Parameters
+        ----------
+        labels : iterable.
+
+        """
+        for i in dict.fromkeys(labels):
+            if i not in self._mapping:
+                self._mapping[i] = self._next_label
+                self._reverse_mapping[self._next_label] = i
+                self._next_label += 1
+
     def to_enumerated(self):
         """to_enumerated.
 
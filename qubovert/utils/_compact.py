@@ -0,0 +1,1353 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""_compact.py.
+
+This file contains the CompactPUBOMatrix and CompactPUSOMatrix objects, which
+store the terms of very large models in numpy arrays instead of in a dict.
+
+"""
+
+import numpy as np
+from . import PUBOMatrix, PUSOMatrix, QUBOMatrix, QUSOMatrix, qubo_to_quso
+from ._pubomatrix import _merge_terms
+# for PUBO and PUSO, can't import directly because it will cause circular
+# imports, so instead just import qubovert.
+import qubovert as qv
+
+
+__all__ = 'CompactPUBOMatrix', 'CompactPUSOMatrix'
+
+
+_MASK = (1 << 64) - 1
+_GOLDEN = 0x9e3779b97f4a7c15
+
+# the number of terms that are converted to Python objects at a time when
+# iterating through the model.
+_CHUNK = 1 << 16
+
+
+def _mix(x):
+    """_mix.
+
+    The splitmix64 finalizer, on a Python int. See ``_mix_array``.
+
+    Parameters
+    ----------
+    x : int in ``range(2**64)``.
+
+    Returns
+    -------
+    x : int in ``range(2**64)``.
+
+    """
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & _MASK
+    return x ^ (x >> 31)
+
+
+def _mix_array(x):
+    """_mix_array.
+
+    The splitmix64 finalizer, on a uint64 array. It gives the same values as
+    ``_mix``.
+
+    Parameters
+    ----------
+    x : uint64 array.
+
+    Returns
+    -------
+    x : uint64 array.
+
+    """
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+
+def _hash_key(key):
+    """_hash_key.
+
+    Hash a term. See ``_hash_terms``.
+
+    Parameters
+    ----------
+    key : tuple of non negative ints.
+
+    Returns
+    -------
+    h : int in ``range(2**64)``.
+
+    """
+    h = sum(_mix(v + 1) for v in key) & _MASK
+    return _mix((h + len(key) * _GOLDEN) & _MASK)
+
+
+def _hash_terms(term_ptr, variables):
+    """_hash_terms.
+
+    Hash every term at once. The hash of a term is a mix of the sum of the
+    mixed variables in it, so that it is the same for every order of the
+    variables, and it gives the same values as ``_hash_key``.
+
+    Parameters
+    ----------
+    term_ptr : int64 array.
+        The variables of the ``t`` th term are
+        ``variables[term_ptr[t]:term_ptr[t+1]]``. Each term must have at
+        least one variable.
+    variables : int array.
+
+    Returns
+    -------
+    h : uint64 array.
+        ``h[t]`` is the hash of the ``t`` th term.
+
+    """
+    if len(term_ptr) < 2:
+        return np.zeros(0, dtype=np.uint64)
+    x = _mix_array(variables.astype(np.uint64) + np.uint64(1))
+    h = np.add.reduceat(x, term_ptr[:-1])
+    lengths = np.diff(term_ptr).astype(np.uint64)
+    return _mix_array(h + lengths * np.uint64(_GOLDEN))
+
+
+def _grow(array, size):
+    """_grow.
+
+    Copy ``array`` into a new array of length ``size``.
+
+    Parameters
+    ----------
+    array : numpy array.
+    size : int >= len(array).
+
+    Returns
+    -------
+    res : numpy array.
+
+    """
+    res = np.empty(size, dtype=array.dtype)
+    res[:len(array)] = array
+    return res
+
+
+def _iter_items(term_ptr, variables, coefficients, offset, labels=None):
+    """_iter_items.
+
+    Iterate through the terms in the arrays, converting them to Python
+    objects a chunk at a time, and skipping the terms whose coefficient is 0.
+    The offset comes last.
+
+    Parameters
+    ----------
+    term_ptr, variables, coefficients, offset : see
+        ``CompactPUBOMatrix.from_arrays``.
+    labels : numpy object array (optional, defaults to None).
+        If ``labels`` is not None, then the variable ``i`` is replaced with
+        ``labels[i]`` in the keys, so that all of the keys share the same
+        objects instead of each key having its own ints.
+
+    Yields
+    ------
+    item : tuple (key, value).
+        ``key`` is a tuple of ints and ``value`` is a float.
+
+    """
+    n = len(coefficients)
+    for first in range(0, n, _CHUNK):
+        last = min(first + _CHUNK, n)
+        ptr = term_ptr[first:last+1]
+        chunk = variables[ptr[0]:ptr[-1]]
+        chunk = (chunk if labels is None else labels[chunk]).tolist()
+        ptr = (ptr - ptr[0]).tolist()
+        for t, v in enumerate(coefficients[first:last].tolist()):
+            if v:
+                yield tuple(chunk[ptr[t]:ptr[t+1]]), v
+    if offset:
+        yield (), offset
+
+
+class CompactPUBOMatrix:
+    """CompactPUBOMatrix.
+
+    A PUBO matrix, like ``qubovert.utils.PUBOMatrix``, that stores its terms
+    in numpy arrays rather than as tuple keys in a dict. A term in a
+    ``PUBOMatrix`` costs more than 100 bytes, plus more for each variable in
+    it. Here the variables of all of the terms are in one flat int32 array,
+    with an int64 array of where each term starts, a float64 array of the
+    coefficients, and an open addressing hash table of the terms for
+    looking up keys. So a term of degree ``d`` costs about ``4 d + 24``
+    bytes, which makes it possible to hold models with tens of millions of
+    terms in memory.
+
+    The variables must be integers in ``range(2**31)``, and the coefficients
+    are stored as floats, so they must be numbers (ie not ``sympy``
+    symbols).
+
+    The dict-like methods (``[]``, ``in``, ``len``, ``items``, ...) work the
+    same as they do for ``PUBOMatrix``, but a single lookup is slower than in
+    a dict, so large models should be built with ``from_arrays`` and read
+    with ``to_arrays``. Terms whose coefficient is set to 0 stay in the
+    arrays until ``refresh`` is called, but they are skipped everywhere else.
+    Similarly to ``PUBOMatrix``, ``degree`` and ``max_index`` are not
+    lowered when terms are removed until ``refresh`` is called.
+
+    The model can be given directly to ``qubovert.sim.anneal_pubo``, and
+    ``to_pubo``, ``to_puso``, ``to_qubo``, and ``to_quso`` convert it to
+    the dict based models.
+
+    Examples
+    --------
+    >>> from qubovert.utils import CompactPUBOMatrix
+    >>> P = CompactPUBOMatrix({(0, 1): 1, (1, 2, 0): -2, (): 3})
+    >>> P[(1, 0)] += 1
+    >>> P
+    {(0, 1): 2.0, (0, 1, 2): -2.0, (): 3}
+    >>> P.value({0: 1, 1: 1, 2: 0})
+    5.0
+
+    >>> P = CompactPUBOMatrix.from_arrays([0, 2, 3], [0, 1, 1], [2, -1])
+    >>> P.to_arrays()
+    (0, array([0, 2, 3]), array([0, 1, 1], dtype=int32), array([ 2., -1.]))
+
+    """
+
+    # the dict based model class that keys are squashed with. See
+    # ``PUBOMatrix.squash_key``.
+    _matrix_type = PUBOMatrix
+
+    def __init__(self, *args, **kwargs):
+        """__init__.
+
+        Parameters
+        ----------
+        arguments : define a dictionary with ``dict(*args, **kwargs)``.
+            The keys of the dictionary are squashed according to
+            ``qubovert.utils.PUBOMatrix.squash_key``. Alternatively,
+            ``args[0]`` can be a CompactPUBOMatrix, in which case ``self``
+            is a copy of it.
+
+        Raises
+        ------
+        KeyError if a key is invalid.
+
+        """
+        if len(args) == 1 and not kwargs and isinstance(args[0],
+                                                        CompactPUBOMatrix):
+            self._load(*args[0]._live_arrays(), args[0]._offset)
+            return
+
+        squash_key = self._matrix_type.squash_key
+        lengths, variables, coefficients, offset = [], [], [], 0
+        for k, v in dict(*args, **kwargs).items():
+            k = squash_key(k)
+            if k:
+                lengths.append(len(k))
+                variables.extend(k)
+                coefficients.append(v)
+            else:
+                offset += v
+        term_ptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=term_ptr[1:])
+        self._load(term_ptr, np.array(variables, dtype=np.int64),
+                   np.array(coefficients, dtype=np.float64), offset)
+
+    @classmethod
+    def from_arrays(cls, term_ptr, variables, coefficients, offset=0):
+        """from_arrays.
+
+        Build the model from numpy arrays in the format returned by
+        ``to_arrays``, without any Python loop over the terms. The terms do
+        not need to be canonical: the variables in each term may be in any
+        order and repeated, and the same term may appear more than once, in
+        which case the coefficients are summed.
+
+        Parameters
+        ----------
+        term_ptr : array of ints.
+            The variables of the ``t`` th term are
+            ``variables[term_ptr[t]:term_ptr[t+1]]``.
+        variables : array of ints in ``range(2**31)``.
+        coefficients : array of floats.
+        offset : number (optional, defaults to 0).
+
+        Returns
+        -------
+        D : the model, an object of type ``cls``.
+
+        Raises
+        ------
+        ValueError if the arrays are inconsistent or if a variable is
+        negative or too large.
+
+        """
+        D = cls.__new__(cls)
+        D._load(term_ptr, variables, coefficients, offset)
+        return D
+
+    def _load(self, term_ptr, variables, coefficients, offset):
+        """_load.
+
+        Internal method to replace the terms of ``self`` with the terms in
+        the arrays, merging them with ``_merge_terms``, and to build the hash
+        table.
+
+        Parameters
+        ----------
+        term_ptr, variables, coefficients, offset : see ``from_arrays``.
+
+        Raises
+        ------
+        ValueError if the arrays are inconsistent or if a variable is
+        negative or too large.
+
+        """
+        terms, lengths, values, constant = _merge_terms(
+            term_ptr, variables, coefficients, self._matrix_type._spin
+        )
+        keep = (lengths > 0) & (values != 0)
+        terms, lengths = terms[keep], lengths[keep]
+        variables = terms[terms >= 0]
+        if len(variables) and variables.max() >= 1 << 31:
+            raise ValueError("Variables must be less than 2**31")
+
+        self._ptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self._ptr[1:])
+        self._vars = variables.astype(np.int32)
+        self._coef = values[keep]
+        self._offset = offset + constant if constant else offset
+        self._num_stored = self._num_live = len(lengths)
+        self._degree = int(lengths.max()) if len(lengths) else 0
+        self._max_index = int(variables.max()) if len(variables) else -1
+        self._build_table(max(8, 1 << (2 * len(lengths)).bit_length()))
+
+    def _build_table(self, size):
+        """_build_table.
+
+        Internal method to rebuild the open addressing hash table of the
+        stored terms with ``size`` slots. The terms are placed with linear
+        probing in vectorized rounds: in each round, every term that is not
+        placed yet tries its next slot, and the first term to try each free
+        slot takes it.
+
+        Parameters
+        ----------
+        size : int.
+            A power of 2 that is larger than the number of stored terms.
+
+        """
+        n, mask = self._num_stored, size - 1
+        self._table = np.full(
+            size, -1, dtype=np.int32 if size <= 1 << 31 else np.int64
+        )
+        if not n:
+            return
+        hashes = _hash_terms(self._ptr[:n+1], self._vars[:self._ptr[n]])
+        slots = (hashes & np.uint64(mask)).astype(np.int64)
+        pending = np.arange(n)
+        while len(pending):
+            free = np.flatnonzero(self._table[slots] < 0)
+            _, first = np.unique(slots[free], return_index=True)
+            placed = free[first]
+            self._table[slots[placed]] = pending[placed]
+            left = np.ones(len(pending), dtype=bool)
+            left[placed] = False
+            pending, slots = pending[left], (slots[left] + 1) & mask
+
+    def _find(self, key):
+        """_find.
+
+        Internal method to look up a canonical key in the hash table.
+
+        Parameters
+        ----------
+        key : tuple of ints.
+            A squashed, nonempty key.
+
+        Returns
+        -------
+        res : tuple (t, slot).
+            ``t`` is the index of the term with the key, or -1 if it is not
+            stored, in which case ``slot`` is the free slot of the table
+            that it would go in.
+
+        """
+        table, mask = self._table, len(self._table) - 1
+        slot, key_list = _hash_key(key) & mask, list(key)
+        while True:
+            t = int(table[slot])
+            if t < 0:
+                return -1, slot
+            start, end = self._ptr[t], self._ptr[t+1]
+            if (
+                end - start == len(key_list) and
+                self._vars[start:end].tolist() == key_list
+            ):
+                return t, slot
+            slot = (slot + 1) & mask
+
+    def _squash_key(self, key):
+        """_squash_key.
+
+        Internal method to squash ``key``. See
+        ``qubovert.utils.PUBOMatrix.squash_key``.
+
+        Parameters
+        ----------
+        key : tuple of ints.
+
+        Returns
+        -------
+        k : tuple of ints.
+
+        Raises
+        ------
+        KeyError if the key is invalid.
+
+        """
+        k = self._matrix_type.squash_key(key)
+        # the keys are sorted, so the last variable is the largest.
+        if k and k[-1] >= 1 << 31:
+            raise KeyError("Variables must be less than 2**31")
+        return k
+
+    def _append(self, key, value, slot):
+        """_append.
+
+        Internal method to store a new term, growing the arrays and the hash
+        table as needed.
+
+        Parameters
+        ----------
+        key : tuple of ints.
+            A squashed, nonempty key that is not stored.
+        value : number.
+        slot : int.
+            The free slot of the hash table for ``key``, from ``_find``.
+
+        """
+        n = self._num_stored
+        start, end = self._ptr[n], self._ptr[n] + len(key)
+        if n + 2 > len(self._ptr):
+            self._ptr = _grow(self._ptr, 2 * len(self._ptr))
+            self._coef = _grow(self._coef, len(self._ptr))
+        if end > len(self._vars):
+            self._vars = _grow(self._vars, 2 * end)
+
+        self._vars[start:end] = key
+        self._ptr[n+1], self._coef[n] = end, value
+        self._table[slot] = n
+        self._num_stored += 1
+        self._num_live += 1
+        self._degree = max(self._degree, len(key))
+        self._max_index = max(self._max_index, key[-1])
+        if 2 * self._num_stored > len(self._table):
+            self._build_table(2 * len(self._table))
+
+    def __getitem__(self, key):
+        """__getitem__.
+
+        Parameters
+        ----------
+        key : tuple of integers.
+            It is squashed according to
+            ``qubovert.utils.PUBOMatrix.squash_key``.
+
+        Returns
+        -------
+        value : number.
+            The coefficient of the term, or 0 if it is not in the model.
+
+        Raises
+        ------
+        KeyError if the key is invalid.
+
+        """
+        k = self._squash_key(key)
+        if not k:
+            return self._offset
+        t, _ = self._find(k)
+        return self._coef[t].item() if t >= 0 and self._coef[t] else 0
+
+    def __setitem__(self, key, value):
+        """__setitem__.
+
+        Set the coefficient of a term. If ``value`` is 0, then the term is
+        removed from the model.
+
+        Parameters
+        ----------
+        key : tuple of integers.
+            It is squashed according to
+            ``qubovert.utils.PUBOMatrix.squash_key``.
+        value : number.
+
+        Raises
+        ------
+        KeyError if the key is invalid.
+
+        """
+        k = self._squash_key(key)
+        if not k:
+            self._offset = value
+            return
+        t, slot = self._find(k)
+        if t >= 0:
+            self._num_live += bool(value) - bool(self._coef[t])
+            self._coef[t] = value
+        elif value:
+            self._append(k, value, slot)
+
+    def __contains__(self, key):
+        """__contains__.
+
+        Parameters
+        ----------
+        key : tuple of integers.
+
+        Returns
+        -------
+        res : bool.
+            Whether the term has a nonzero coefficient.
+
+        """
+        try:
+            k = self._squash_key(key)
+        except (KeyError, TypeError):
+            return False
+        if not k:
+            return bool(self._offset)
+        t, _ = self._find(k)
+        return t >= 0 and bool(self._coef[t])
+
+    def get(self, key, default=None):
+        """get.
+
+        Same as ``dict.get``.
+
+        Parameters
+        ----------
+        key : tuple of integers.
+        default : anything (optional, defaults to None).
+
+        Returns
+        -------
+        value : number, or ``default`` if ``key`` is not in the model.
+
+        """
+        return self[key] if key in self else default
+
+    def __len__(self):
+        """__len__.
+
+        Returns
+        -------
+        n : int.
+            The number of terms with a nonzero coefficient, including the
+            offset.
+
+        """
+        return self._num_live + bool(self._offset)
+
+    @property
+    def num_terms(self):
+        """num_terms.
+
+        Return the number of terms in the model, ie ``len(self)``.
+
+        Returns
+        -------
+        n : int.
+
+        """
+        return len(self)
+
+    def items(self):
+        """items.
+
+        Iterate through the terms of the model. The terms are converted to
+        Python objects a chunk at a time, so that a large model is never
+        converted all at once. The offset comes last.
+
+        Yields
+        ------
+        item : tuple (key, value).
+            ``key`` is a tuple of ints and ``value`` is a float.
+
+        """
+        n = self._num_stored
+        return _iter_items(
+            self._ptr[:n+1], self._vars, self._coef[:n], self._offset
+        )
+
+    def keys(self):
+        """keys.
+
+        Iterate through the keys of the model. See ``items``.
+
+        Yields
+        ------
+        key : tuple of ints.
+
+        """
+        for k, _ in self.items():
+            yield k
+
+    def values(self):
+        """values.
+
+        Iterate through the coefficients of the model. See ``items``.
+
+        Yields
+        ------
+        value : number.
+
+        """
+        for _, v in self.items():
+            yield v
+
+    def __iter__(self):
+        """__iter__.
+
+        Iterate through the keys of the model. See ``items``.
+
+        Yields
+        ------
+        key : tuple of ints.
+
+        """
+        return self.keys()
+
+    def __eq__(self, other):
+        """__eq__.
+
+        Parameters
+        ----------
+        other : dict or CompactPUBOMatrix.
+
+        Returns
+        -------
+        res : bool.
+            Whether ``self`` and ``other`` have the same terms.
+
+        """
+        if not isinstance(other, (dict, CompactPUBOMatrix)):
+            return NotImplemented
+        return len(self) == len(other) and dict(self.items()) == dict(
+            other.items()
+        )
+
+    def __repr__(self):
+        """__repr__.
+
+        Returns
+        -------
+        res : str.
+            The same as the representation of the terms in a dict.
+
+        """
+        return repr(dict(self.items()))
+
+    def copy(self):
+        """copy.
+
+        Returns
+        -------
+        D : same type as ``self``.
+            A copy of ``self`` whose arrays are not shared with ``self``.
+
+        """
+        D = self.__class__.__new__(self.__class__)
+        n = self._num_stored
+        D._ptr, D._coef = self._ptr[:n+1].copy(), self._coef[:n].copy()
+        D._vars = self._vars[:self._ptr[n]].copy()
+        D._table = self._table.copy()
+        for attr in ('_offset', '_num_stored', '_num_live', '_degree',
+                     '_max_index'):
+            setattr(D, attr, getattr(self, attr))
+        return D
+
+    def refresh(self):
+        """refresh.
+
+        Remove the terms whose coefficients have been set to 0 from the
+        arrays and the hash table, and recompute ``degree`` and
+        ``max_index``.
+
+        """
+        self._load(*self._live_arrays(), self._offset)
+
+    @property
+    def offset(self):
+        """offset.
+
+        Get the part of the model that does not depend on any variables,
+        ie the value corresponding to the () key.
+
+        Returns
+        -------
+        offset : number.
+
+        """
+        return self._offset
+
+    @property
+    def degree(self):
+        """degree.
+
+        Return the degree of the model, ie the length of its longest term.
+
+        Returns
+        -------
+        deg : int.
+
+        """
+        return self._degree
+
+    @property
+    def max_index(self):
+        """max_index.
+
+        Return the largest variable in the model.
+
+        Returns
+        -------
+        index : int, or None if the model has no variables.
+
+        """
+        return self._max_index if self._max_index >= 0 else None
+
+    @property
+    def variables(self):
+        """variables.
+
+        Return the set of variables in the terms of the model.
+
+        Returns
+        -------
+        variables : set of ints.
+
+        """
+        _, variables, _ = self._live_arrays()
+        return set(np.unique(variables).tolist())
+
+    @property
+    def num_binary_variables(self):
+        """num_binary_variables.
+
+        Return the number of variables in the terms of the model.
+
+        Returns
+        -------
+        n : int.
+
+        """
+        _, variables, _ = self._live_arrays()
+        return len(np.unique(variables))
+
+    @property
+    def nbytes(self):
+        """nbytes.
+
+        Return the number of bytes that the arrays of the model use.
+
+        Returns
+        -------
+        n : int.
+
+        """
+        return sum(a.nbytes for a in (self._ptr, self._vars, self._coef,
+                                      self._table))
+
+    def _live_arrays(self):
+        """_live_arrays.
+
+        Internal method to get the arrays of the terms with a nonzero
+        coefficient.
+
+        Returns
+        -------
+        res : tuple (term_ptr, variables, coefficients).
+            Slices of the arrays of ``self`` if no term has been removed, and
+            otherwise new arrays.
+
+        """
+        n = self._num_stored
+        term_ptr, coefficients = self._ptr[:n+1], self._coef[:n]
+        variables = self._vars[:term_ptr[-1]]
+        if self._num_live == n:
+            return term_ptr, variables, coefficients
+        live = coefficients != 0
+        lengths = np.diff(term_ptr)
+        variables = variables[np.repeat(live, lengths)]
+        term_ptr = np.zeros(self._num_live + 1, dtype=np.int64)
+        np.cumsum(lengths[live], out=term_ptr[1:])
+        return term_ptr, variables, coefficients[live]
+
+    def to_arrays(self):
+        """to_arrays.
+
+        Export the model as flat numpy arrays, in the same format as
+        ``qubovert.utils.PUBOMatrix.to_arrays``. The arrays are copies, so
+        modifying them does not modify ``self``.
+
+        Returns
+        -------
+        res : tuple (offset, term_ptr, variables, coefficients).
+            ``offset`` is the offset of the model. The variables of the
+            ``t`` th term are ``variables[term_ptr[t]:term_ptr[t+1]]``, in
+            order, and its coefficient is ``coefficients[t]``. ``term_ptr``
+            is int64, ``variables`` is int32, and ``coefficients`` is
+            float64.
+
+        """
+        term_ptr, variables, coefficients = self._live_arrays()
+        return (self._offset, term_ptr.copy(), variables.copy(),
+                coefficients.copy())
+
+    def value(self, x):
+        """value.
+
+        Find the value of the model for the values of the variables in
+        ``x``.
+
+        Parameters
+        ----------
+        x : dict or array.
+            Maps each variable to its value. If ``x`` is an array, then
+            ``x[i]`` is the value of variable ``i``.
+
+        Returns
+        -------
+        value : float.
+
+        Raises
+        ------
+        KeyError if ``x`` is a dict that is missing a variable of the model.
+
+        """
+        n = self._num_stored
+        if not n:
+            return self._offset
+        if isinstance(x, dict):
+            state = np.zeros(self._max_index + 1)
+            used = np.unique(self._vars[:self._ptr[n]])
+            state[used] = [x[i] for i in used.tolist()]
+        else:
+            state = np.asarray(x, dtype=np.float64)
+        products = np.multiply.reduceat(
+            state[self._vars[:self._ptr[n]]], self._ptr[:n]
+        )
+        return self._offset + float(self._coef[:n] @ products)
+
+    def _add(self, other, scale):
+        """_add.
+
+        Internal method to add ``scale * other`` to ``self`` in place.
+
+        Parameters
+        ----------
+        other : number, dict, or CompactPUBOMatrix.
+        scale : number.
+
+        """
+        if isinstance(other, dict) and len(other) < 64:
+            for k, v in other.items():
+                self[k] += scale * v
+        elif isinstance(other, (dict, CompactPUBOMatrix)):
+            if not isinstance(other, self.__class__):
+                other = self.__class__(other)
+            term_ptr, variables, coefficients = self._live_arrays()
+            other_ptr, other_vars, other_coef = other._live_arrays()
+            self._load(
+                np.concatenate((term_ptr, term_ptr[-1] + other_ptr[1:])),
+                np.concatenate((variables, other_vars)),
+                np.concatenate((coefficients, scale * other_coef)),
+                self._offset + scale * other._offset
+            )
+        else:
+            self._offset += scale * other
+
+    def __iadd__(self, other):
+        """__iadd__.
+
+        Parameters
+        ----------
+        other : number, dict, or CompactPUBOMatrix.
+
+        Returns
+        -------
+        self : same type as ``self``.
+
+        """
+        self._add(other, 1)
+        return self
+
+    def __isub__(self, other):
+        """__isub__.
+
+        Parameters
+        ----------
+        other : number, dict, or CompactPUBOMatrix.
+
+        Returns
+        -------
+        self : same type as ``self``.
+
+        """
+        self._add(other, -1)
+        return self
+
+    def __imul__(self, other):
+        """__imul__.
+
+        Multiply the model by a number in place.
+
+        Parameters
+        ----------
+        other : number.
+
+        Returns
+        -------
+        self : same type as ``self``.
+
+        Raises
+        ------
+        TypeError if ``other`` is a dict. Multiply the dict based models from
+        ``to_pubo`` or ``to_puso`` instead.
+
+        """
+        if isinstance(other, (dict, CompactPUBOMatrix)):
+            raise TypeError("%s can only be multiplied by numbers"
+                            % self.__class__.__name__)
+        self._coef[:self._num_stored] *= other
+        self._offset *= other
+        if not other:
+            self._num_live = 0
+        return self
+
+    def __itruediv__(self, other):
+        """__itruediv__.
+
+        Divide the model by a number in place.
+
+        Parameters
+        ----------
+        other : number.
+
+        Returns
+        -------
+        self : same type as ``self``.
+
+        """
+        self._coef[:self._num_stored] /= other
+        self._offset /= other
+        return self
+
+    def __add__(self, other):
+        """__add__.
+
+        Parameters
+        ----------
+        other : number, dict, or CompactPUBOMatrix.
+
+        Returns
+        -------
+        res : same type as ``self``.
+
+        """
+        res = self.copy()
+        res += other
+        return res
+
+    def __radd__(self, other):
+        """__radd__.
+
+        Parameters
+        ----------
+        other : number or dict.
+
+        Returns
+        -------
+        res : same type as ``self``.
+
+        """
+        return self + other
+
+    def __sub__(self, other):
+        """__sub__.
+
+        Parameters
+        ----------
+        other : number, dict, or CompactPUBOMatrix.
+
+        Returns
+        -------
+        res : same type as ``self``.
+
+        """
+        res = self.copy()
+        res -= other
+        return res
+
+    def __rsub__(self, other):
+        """__rsub__.
+
+        Parameters
+        ----------
+        other : number or dict.
+
+        Returns
+        -------
+        res : same type as ``self``.
+
+        """
+        res = -self
+        res += other
+        return res
+
+    def __mul__(self, other):
+        """__mul__.
+
+        Parameters
+        ----------
+        other : number.
+
+        Returns
+        -------
+        res : same type as ``self``.
+
+        """
+        res = self.copy()
+        res *= other
+        return res
+
+    def __rmul__(self, other):
+        """__rmul__.
+
+        Parameters
+        ----------
+        other : number.
+
+        Returns
+        -------
+        res : same type as ``self``.
+
+        """
+        return self * other
+
+    def __truediv__(self, other):
+        """__truediv__.
+
+        Parameters
+        ----------
+        other : number.
+
+        Returns
+        -------
+        res : same type as ``self``.
+
+        """
+        res = self.copy()
+        res /= other
+        return res
+
+    def __neg__(self):
+        """__neg__.
+
+        Returns
+        -------
+        res : same type as ``self``.
+
+        """
+        return self * -1
+
+    def _convert(self, cls):
+        """_convert.
+
+        Internal method to convert between boolean and spin models with
+        vectorized numpy operations. Boolean variables and spins are related
+        by ``x = (1 - z) / 2``, so a boolean term of degree ``d`` becomes
+        ``2**-d`` times the sum over the subsets ``S`` of the term of
+        ``(-1)**len(S)`` times the product of the spins in ``S``. Similarly,
+        a spin term becomes the sum over the subsets ``S`` of
+        ``(-2)**len(S)`` times the product of the boolean variables in
+        ``S``.
+
+        Parameters
+        ----------
+        cls : CompactPUBOMatrix or CompactPUSOMatrix.
+            The type to convert to.
+
+        Returns
+        -------
+        res : ``cls`` object.
+
+        """
+        spin = self._matrix_type._spin
+        term_ptr, variables, coefficients = self._live_arrays()
+        lengths = np.diff(term_ptr)
+        offset = self._offset
+        new_lengths, new_vars, new_coef = [], [], []
+        for d in np.unique(lengths).tolist():
+            rows = np.flatnonzero(lengths == d)
+            terms = variables[term_ptr[rows][:, None] + np.arange(d)]
+            for subset in range(1 << d):
+                cols = [j for j in range(d) if subset >> j & 1]
+                factor = (
+                    (-2.) ** len(cols) if spin else
+                    (-1.) ** len(cols) / (1 << d)
+                )
+                if not cols:
+                    offset = offset + factor * float(coefficients[rows].sum())
+                    continue
+                new_lengths.append(np.full(len(rows), len(cols)))
+                new_vars.append(terms[:, cols].ravel())
+                new_coef.append(factor * coefficients[rows])
+
+        new_ptr = np.zeros(sum(map(len, new_lengths)) + 1, dtype=np.int64)
+        if new_lengths:
+            np.cumsum(np.concatenate(new_lengths), out=new_ptr[1:])
+        return cls.from_arrays(
+            new_ptr,
+            np.concatenate(new_vars) if new_vars else np.zeros(0, np.int64),
+            np.concatenate(new_coef) if new_coef else np.zeros(0),
+            offset
+        )
+
+    def _to_matrix(self):
+        """_to_matrix.
+
+        Internal method to convert to the dict based model of the same kind,
+        ie ``PUBOMatrix`` or ``PUSOMatrix``.
+
+        Returns
+        -------
+        res : PUBOMatrix or PUSOMatrix object.
+
+        """
+        return self._matrix_type._from_term_arrays(
+            *self._live_arrays(), self._offset, None
+        )
+
+    def _enumerate(self):
+        """_enumerate.
+
+        Internal method to relabel the variables with integers from 0 to n-1
+        in order, the same as the mapping of ``qubovert.PUBO`` and
+        ``qubovert.PUSO`` when they are built from the arrays of ``self``,
+        without building a dict.
+
+        Returns
+        -------
+        res : tuple (D, labels).
+            ``D`` is the relabeled model, of the same type as ``self``, and
+            ``labels[i]`` is the variable of ``self`` that is labeled ``i``.
+
+        """
+        term_ptr, variables, coefficients = self._live_arrays()
+        labels, variables = np.unique(variables, return_inverse=True)
+        return self.from_arrays(
+            term_ptr, variables.ravel(), coefficients, self._offset
+        ), labels
+
+    def to_compact_puso(self):
+        """to_compact_puso.
+
+        Convert the model to a spin model without building a dict.
+
+        Returns
+        -------
+        H : qubovert.utils.CompactPUSOMatrix object.
+
+        """
+        return self._convert(CompactPUSOMatrix)
+
+    def to_pubo(self):
+        """to_pubo.
+
+        Convert the model to a dict based PUBO with the same labels.
+
+        Returns
+        -------
+        P : qubovert.utils.PUBOMatrix object.
+
+        """
+        return self._to_matrix()
+
+    def to_puso(self):
+        """to_puso.
+
+        Convert the model to a dict based PUSO with the same labels.
+
+        Returns
+        -------
+        H : qubovert.utils.PUSOMatrix object.
+
+        """
+        return self.to_compact_puso()._to_matrix()
+
+    def to_qubo(self, lam=None, pairs=None, reduction='substitution'):
+        """to_qubo.
+
+        Convert the model to a QUBO, reducing the degree if necessary. This
+        is the same as ``qubovert.PUBO.to_qubo``, so the variables are
+        relabeled with integers from 0 to n-1 in order, which does not
+        change them if they are already 0 to n-1. See
+        ``help(qubovert.PUBO.to_qubo)`` for the parameters.
+
+        The terms are relabeled and summed into the QUBO straight from the
+        arrays, a chunk at a time, without building a ``qubovert.PUBO`` of
+        the model first. The QUBO itself is a dict, so a model whose QUBO
+        does not fit in memory cannot be converted. Moreover, the terms with
+        more than two variables are reduced with
+        ``qubovert.PUBO.to_qubo``'s pair reduction, which holds a tuple for
+        each of them, and an index and a count of each of the pairs of
+        variables in them, while they are reduced. So for a model with many
+        terms of degree above two, the memory that is used is several times
+        that of the arrays, and only the PUBO of the model is saved. A spin
+        model is first converted to a boolean model with
+        ``to_compact_pubo``, whose arrays hold all ``2**d`` boolean terms of
+        each spin term of degree ``d`` before they are merged.
+
+        Returns
+        -------
+        Q : qubovert.utils.QUBOMatrix object.
+
+        """
+        D, labels = self._enumerate()
+        if self._matrix_type._spin:
+            D = D.to_compact_pubo()
+        index = {v: i for i, v in enumerate(labels.tolist())} if pairs else {}
+        pairs = {
+            tuple(sorted(index[i] for i in p))
+            if all(i in index for i in p) else ()
+            for p in pairs or {}
+        }
+        # reduce the terms in order of degree, which is the order of the
+        # terms of a ``qubovert.PUBO`` built from the arrays, so that the
+        # coefficients are summed in the same order.
+        term_ptr, variables, coefficients = D._live_arrays()
+        lengths = np.diff(term_ptr)
+        order = np.argsort(lengths, kind='stable')
+        lengths = lengths[order]
+        new_ptr = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=new_ptr[1:])
+        variables = variables[
+            np.repeat(term_ptr[:-1][order] - new_ptr[:-1], lengths) +
+            np.arange(new_ptr[-1])
+        ]
+        ints = np.empty(len(labels), dtype=object)
+        ints[:] = range(len(labels))
+        Q = QUBOMatrix()
+        qv.PUBO._reduce_terms(
+            Q, _iter_items(
+                new_ptr, variables, coefficients[order], D._offset, ints
+            ),
+            2, lam, pairs, reduction, len(labels)
+        )
+        return Q
+
+    def to_quso(self, lam=None, pairs=None, reduction='substitution'):
+        """to_quso.
+
+        Convert the model to a QUSO, reducing the degree if necessary. See
+        ``to_qubo``.
+
+        Returns
+        -------
+        L : qubovert.utils.QUSOMatrix object.
+
+        """
+        if self._matrix_type._spin:
+            D = self._enumerate()[0]
+            if D.degree <= 2:
+                return QUSOMatrix._from_term_arrays(
+                    *D._live_arrays(), D._offset, None
+                )
+        return qubo_to_quso(self.to_qubo(lam, pairs, reduction))
+
+
+class CompactPUSOMatrix(CompactPUBOMatrix):
+    """CompactPUSOMatrix.
+
+    A PUSO matrix, like ``qubovert.utils.PUSOMatrix``, that stores its terms
+    in numpy arrays rather than as tuple keys in a dict. Keys are squashed
+    according to ``qubovert.utils.PUSOMatrix.squash_key``, so pairs of
+    repeated spins cancel out. See ``help(qubovert.utils.CompactPUBOMatrix)``
+    for everything else.
+
+    The model can be given directly to ``qubovert.sim.anneal_puso``.
+
+    Example
+    -------
+    >>> from qubovert.utils import CompactPUSOMatrix
+    >>> H = CompactPUSOMatrix({(0, 1): 1, (1, 2, 1): -2})
+    >>> H
+    {(0, 1): 1.0, (2,): -2.0}
+    >>> H.value({0: 1, 1: -1, 2: 1})
+    -3.0
+
+    """
+
+    _matrix_type = PUSOMatrix
+
+    def to_compact_pubo(self):
+        """to_compact_pubo.
+
+        Convert the model to a boolean model without building a dict.
+
+        Returns
+        -------
+        P : qubovert.utils.CompactPUBOMatrix object.
+
+        """
+        return self._convert(CompactPUBOMatrix)
+
+    def to_compact_puso(self):
+        """to_compact_puso.
+
+        Returns
+        -------
+        H : qubovert.utils.CompactPUSOMatrix object.
+            A copy of ``self``.
+
+        """
+        return self.copy()
+
+    def to_pubo(self):
+        """to_pubo.
+
+        Convert the model to a dict based PUBO with the same labels.
+
+        Returns
+        -------
+        P : qubovert.utils.PUBOMatrix object.
+
+        """
+        return self.to_compact_pubo()._to_matrix()
+
+    def to_puso(self):
+        """to_puso.
+
+        Convert the model to a dict based PUSO with the same labels.
+
+        Returns
+        -------
+        H : qubovert.utils.PUSOMatrix object.
+
+        """
+        return self._to_matrix()
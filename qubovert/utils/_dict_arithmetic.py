@@ -20,6 +20,7 @@ other classes, such as ``qubovert.utils.QUBOMatrix`` and ``qubovert.utils.BO``.
 
 """
 
+from contextlib import contextmanager
 from . import subgraph, subvalue
 
 
@@ -276,13 +277,38 @@ class DictArithmetic(dict):
         Same as dict.copy, but we adjust the method so that it returns a
         DictArithmetic object, or whatever object is the subclass.
 
+        The keys of ``self`` already follow the conventions of the class, so
+        the items are copied directly instead of going through
+        ``__setitem__`` again, and then ``_copy_attributes`` sets the internal
+        attributes of the copy.
+
         Returns
         -------
         d : DictArithmetic object, or subclass of.
             Same as ``self.__class__``.
 
         """
-        return self.__class__(self)
+        d = self.__class__.__new__(self.__class__)
+        dict.update(d, self)
+        d._copy_attributes(self)
+        return d
+
+    def _copy_attributes(self, other):
+        """_copy_attributes.
+
+        Internal method to set the attributes of ``self``, which was just
+        created by ``copy`` with the same items as ``other``. The attributes
+        must come out the same as if ``self`` had been initialized with
+        ``self.__class__(other)``. Subclasses with their own attributes
+        override this method and call it with ``super``.
+
+        Parameters
+        ----------
+        other : DictArithmetic object.
+            The object that ``self`` is a copy of.
+
+        """
+        self.name = None
 
     def update(self, *args, **kwargs):
         """update.
@@ -556,13 +582,9 @@ class DictArithmetic(dict):
 
         """
         if isinstance(other, dict):
-            items, oitems = tuple(self.items()), tuple(other.items())
+            product = self._product(other)
             self.clear()
-            for k, v in items:
-                kp = k if isinstance(k, tuple) else (k,)
-                for ko, vo in oitems:
-                    kop = ko if isinstance(ko, tuple) else (ko,)
-                    self[kp + kop] += v * vo
+            self._add_items(product)
 
         else:
             for k in tuple(self.keys()):
@@ -570,6 +592,115 @@ class DictArithmetic(dict):
 
         return self
 
+    def _product(self, other):
+        """_product.
+
+        Internal method to multiply ``self`` by the dictionary ``other``. The
+        terms are accumulated in a plain dictionary, so that each pair of terms
+        does not go through ``__getitem__`` and ``__setitem__``. Subclasses
+        whose keys are canonicalized override this method to build the
+        canonical product keys directly. See ``__imul__``.
+
+        Parameters
+        ----------
+        other : dict.
+
+        Returns
+        -------
+        product : dict.
+            Maps each key of the product to its nonzero value.
+
+        """
+        # a key whose value becomes 0 is removed, as with ``__setitem__``, so
+        # that the keys are in the same order as when multiplying term by
+        # term.
+        product = {}
+        oitems = [(k if isinstance(k, tuple) else (k,), v)
+                  for k, v in other.items()]
+        for k, v in self.items():
+            kp = k if isinstance(k, tuple) else (k,)
+            for kop, vo in oitems:
+                key = kp + kop
+                u = product.get(key, 0) + v * vo
+                if u:
+                    product[key] = u
+                else:
+                    product.pop(key, None)
+        return product
+
+    def _add_items(self, items):
+        """_add_items.
+
+        Internal method to add the terms of ``items``, for example those
+        returned by ``_product``, to ``self``. Subclasses override this method
+        to insert the terms without going through ``__setitem__``.
+
+        Parameters
+        ----------
+        items : dict.
+
+        """
+        for k, v in items.items():
+            self[k] += v
+
+    @contextmanager
+    def bulk(self):
+        """bulk.
+
+        Context manager for adding many terms at once. It yields a staging
+        DictArithmetic that the terms should be added to instead of ``self``.
+        The staging dictionary keeps the keys exactly as they are given, so
+        adding to it does not canonicalize the key or update any of the
+        internal variables of ``self`` (ie ``degree``, ``variables``,
+        ``mapping``, ...). When the context exits, the staged terms are
+        canonicalized, merged, and added to ``self`` in one pass, and the
+        internal variables are updated once. If an exception is raised inside
+        the context, then nothing is added to ``self``.
+
+        Yields
+        ------
+        staged : DictArithmetic object.
+            Add terms to ``staged`` with ``staged[key] += value``,
+            ``staged[key] -= value``, ``staged += dict``, etc. Note that the
+            values of ``staged`` are the amounts that will be added to
+            ``self``, not the values of ``self``.
+
+        Raises
+        ------
+        KeyError if a staged key is invalid for the class. Then nothing is
+        added to ``self``.
+
+        Example
+        -------
+        >>> from qubovert import PUBO
+        >>> P = PUBO({('a',): 1})
+        >>> with P.bulk() as staged:
+        ...     for i in range(3):
+        ...         staged[('b', 'a')] += 1
+        ...         staged[('a',)] -= 1
+        >>> P
+        {('a',): -2, ('a', 'b'): 3}
+
+        """
+        staged = DictArithmetic()
+        yield staged
+        self._add_staged(staged)
+
+    def _add_staged(self, staged):
+        """_add_staged.
+
+        Internal method to add the terms that were staged in ``bulk`` to
+        ``self``. Subclasses override this method to canonicalize the keys in
+        one pass. See ``bulk``.
+
+        Parameters
+        ----------
+        staged : dict.
+            Maps keys, not necessarily canonical, to values.
+
+        """
+        self._add_items(staged)
+
     def __pow__(self, exponent):
         """__pow__.
 
@@ -596,7 +727,10 @@ class DictArithmetic(dict):
         Same as ``__pow__`` but in place.
 
         Raise the object to an integer power. Note that for example
-        ``self ** 3 == self * self * self``.
+        ``self ** 3 == self * self * self``. The power is computed by
+        squaring, so for exponents above 2 the keys (and hence the labels
+        of ``qubovert.PUBO`` and its subclasses) may be ordered differently
+        than with ``self * self * self``, although the values are the same.
 
         Parameters
         ----------
@@ -611,10 +745,14 @@ class DictArithmetic(dict):
         if not isinstance(exponent, int) or exponent <= 0:
             raise ValueError("Exponent must be a positive integer")
 
-        if exponent > 1:
-            old = self.copy()
-            for _ in range(exponent-1):
-                self *= old
+        # exponentiation by squaring
+        base, exponent = self.copy(), exponent - 1
+        while exponent:
+            if exponent % 2:
+                self *= base
+            exponent //= 2
+            if exponent:
+                base *= base
 
         return self
 
@@ -0,0 +1,536 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""_lazy.py.
+
+This file contains the LazyExpression object, which records the arithmetic
+done on models and only expands it into a model when it is needed.
+
+"""
+
+from . import DictArithmetic
+
+
+__all__ = 'LazyExpression',
+
+
+class LazyExpression:
+    """LazyExpression.
+
+    Every ``+`` or ``*`` of two models (ie ``qubovert.PCBO``,
+    ``qubovert.PUSO``, ``qubovert.utils.QUBOMatrix``, ...) copies the left
+    model and then adds or multiplies the right model into the copy. So
+    building an expression like ``sum(c[i] * x[i] for i in range(n))`` one
+    operator at a time copies the partial sum at every ``+``, which costs
+    O(n**2) in total.
+
+    A LazyExpression wraps a model, and arithmetic with it only records the
+    operation in a graph, which costs O(1) per operator. The graph is
+    expanded into a single model the first time that it is needed, ie when
+    ``expand``, ``value``, ``to_qubo``, etc. are called. Sums are expanded
+    by accumulating all of their terms, however deeply nested, into one
+    dictionary, and then adding that dictionary to a new model in a single
+    pass. Products and powers are expanded with the arithmetic of the model.
+
+    The expanded model has the type of the left-most model in the
+    expression, just like it would with ordinary arithmetic, and, up to
+    floating point rounding, the same terms. Constraints of ``qubovert.PCBO``
+    and ``qubovert.PCSO`` objects in the expression are not carried over
+    into the expanded model, so constraints should be added to the expanded
+    model.
+
+    Note that the models in the expression are not copied. Changing one of
+    them before the expression is expanded changes the expansion, and the
+    expansion is computed only once, so changing one of them afterwards has
+    no effect.
+
+    Examples
+    --------
+    >>> from qubovert import boolean_var
+    >>> from qubovert.utils import LazyExpression
+    >>> x = [LazyExpression(boolean_var(i)) for i in range(3)]
+    >>> expression = sum(i * x[i] for i in range(3)) + 1
+    >>> P = expression.expand()
+    >>> P
+    {(1,): 1, (2,): 2, (): 1}
+    >>> type(P)
+    <class 'qubovert._pcbo.PCBO'>
+
+    >>> H = ((x[0] + x[1]) * (x[1] - x[2])) ** 2
+    >>> H.value({0: 1, 1: 1, 2: 0})
+    4
+
+    """
+
+    def __init__(self, model):
+        """__init__.
+
+        Parameters
+        ----------
+        model : dict, DictArithmetic, or any object in
+            ``qubovert.BOOLEAN_MODELS`` or ``qubovert.SPIN_MODELS``.
+            The model to wrap. If it is a plain dict, then it is converted
+            into the type of the expression when the expression is expanded.
+
+        """
+        self._operation, self._arguments = 'model', model
+        self._type = (
+            type(model) if isinstance(model, DictArithmetic) else None
+        )
+        self._expansion = None
+
+    @classmethod
+    def _record(cls, operation, arguments, *expressions):
+        """_record.
+
+        Internal method to record an operation in the graph.
+
+        Parameters
+        ----------
+        operation : str.
+            One of ``'sum'``, ``'product'``, or ``'power'``.
+        arguments : tuple.
+            For a sum, ``(constant, terms)`` where ``terms`` is a tuple of
+            ``(coefficient, LazyExpression)`` tuples. For a product, the two
+            LazyExpression factors. For a power, the LazyExpression base and
+            the exponent.
+        expressions : LazyExpression objects.
+            The operands, from left to right.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        expression = cls.__new__(cls)
+        expression._operation, expression._arguments = operation, arguments
+        expression._type = next(
+            (e._type for e in expressions if e._type is not None), None
+        )
+        expression._expansion = None
+        return expression
+
+    @staticmethod
+    def _wrap(other):
+        """_wrap.
+
+        Internal method to wrap a dict in a LazyExpression.
+
+        Parameters
+        ----------
+        other : LazyExpression or dict.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        if isinstance(other, LazyExpression):
+            return other
+        return LazyExpression(other)
+
+    @classmethod
+    def _sum(cls, terms, constant=0):
+        """_sum.
+
+        Internal method to record a sum.
+
+        Parameters
+        ----------
+        terms : tuple of (coefficient, LazyExpression) tuples.
+        constant : number (optional, defaults to 0).
+
+        Returns
+        -------
+        expression : LazyExpression.
+            Represents ``sum(c * e for c, e in terms) + constant``.
+
+        """
+        return cls._record(
+            'sum', (constant, terms), *(e for _, e in terms)
+        )
+
+    def __add__(self, other):
+        """__add__.
+
+        Record ``self + other``.
+
+        Parameters
+        ----------
+        other : LazyExpression, dict, or number.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        if isinstance(other, (LazyExpression, dict)):
+            return self._sum(((1, self), (1, self._wrap(other))))
+        return self._sum(((1, self),), other)
+
+    def __radd__(self, other):
+        """__radd__.
+
+        Record ``other + self``.
+
+        Parameters
+        ----------
+        other : dict or number.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        if isinstance(other, dict):
+            return self._wrap(other) + self
+        return self + other
+
+    def __sub__(self, other):
+        """__sub__.
+
+        Record ``self - other``.
+
+        Parameters
+        ----------
+        other : LazyExpression, dict, or number.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        if isinstance(other, (LazyExpression, dict)):
+            return self._sum(((1, self), (-1, self._wrap(other))))
+        return self._sum(((1, self),), -other)
+
+    def __rsub__(self, other):
+        """__rsub__.
+
+        Record ``other - self``.
+
+        Parameters
+        ----------
+        other : dict or number.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        if isinstance(other, dict):
+            return self._wrap(other) - self
+        return self._sum(((-1, self),), other)
+
+    def __mul__(self, other):
+        """__mul__.
+
+        Record ``self * other``.
+
+        Parameters
+        ----------
+        other : LazyExpression, dict, or number.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        if isinstance(other, (LazyExpression, dict)):
+            other = self._wrap(other)
+            return self._record('product', (self, other), self, other)
+        return self._sum(((other, self),))
+
+    def __rmul__(self, other):
+        """__rmul__.
+
+        Record ``other * self``.
+
+        Parameters
+        ----------
+        other : dict or number.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        if isinstance(other, dict):
+            return self._wrap(other) * self
+        return self * other
+
+    def __truediv__(self, other):
+        """__truediv__.
+
+        Record ``self / other``.
+
+        Parameters
+        ----------
+        other : number.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        return self * (1 / other)
+
+    def __pow__(self, exponent):
+        """__pow__.
+
+        Record ``self ** exponent``.
+
+        Parameters
+        ----------
+        exponent : int.
+            Positive integer power to raise the expression to.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        Raises
+        ------
+        ValueError if ``exponent`` is not a positive integer.
+
+        """
+        if not isinstance(exponent, int) or exponent <= 0:
+            raise ValueError("Exponent must be a positive integer")
+        return self._record('power', (self, exponent), self)
+
+    def __pos__(self):
+        """__pos__.
+
+        Returns
+        -------
+        self : LazyExpression.
+
+        """
+        return self
+
+    def __neg__(self):
+        """__neg__.
+
+        Record ``-self``.
+
+        Returns
+        -------
+        expression : LazyExpression.
+
+        """
+        return self._sum(((-1, self),))
+
+    def _accumulate(self, model_type, items):
+        """_accumulate.
+
+        Internal method to add the terms of the expression to the dictionary
+        ``items``. Nested sums are walked with a stack rather than by
+        recursion, so long chains of ``+`` do not hit the recursion limit.
+        The terms are added from left to right, which is the order that
+        ordinary arithmetic would add them in.
+
+        Parameters
+        ----------
+        model_type : type.
+            The type of the expansion.
+        items : dict.
+            Maps canonical keys to values.
+
+        """
+        stack = [(self, 1)]
+        while stack:
+            expression, scale = stack.pop()
+            if not isinstance(expression, LazyExpression):
+                if expression:
+                    items[()] = items.get((), 0) + scale * expression
+                continue
+
+            if expression._operation == 'sum':
+                constant, terms = expression._arguments
+                stack.append((constant, scale))
+                stack.extend((e, scale * c) for c, e in reversed(terms))
+                continue
+
+            if expression._operation == 'model':
+                model = expression._arguments
+                if not isinstance(model, model_type):
+                    model = model_type(model)
+            else:
+                model = expression._expand_model(model_type)
+            for k, v in model.items():
+                items[k] = items.get(k, 0) + scale * v
+
+    def _expand_model(self, model_type):
+        """_expand_model.
+
+        Internal method to expand the expression into a new model.
+
+        Parameters
+        ----------
+        model_type : type.
+            The type of the expansion.
+
+        Returns
+        -------
+        model : ``model_type`` object.
+
+        """
+        if self._operation == 'model':
+            model = self._arguments
+            if isinstance(model, model_type):
+                return model.copy()
+            return model_type(model)
+
+        if self._operation == 'power':
+            model = self._arguments[0]._expand_model(model_type)
+            model **= self._arguments[1]
+            return model
+
+        if self._operation == 'product':
+            # flatten the chain of products into its factors, in order.
+            factors, stack = [], [self]
+            while stack:
+                expression = stack.pop()
+                if expression._operation == 'product':
+                    stack.extend(reversed(expression._arguments))
+                else:
+                    factors.append(expression)
+            model = factors[0]._expand_model(model_type)
+            for factor in factors[1:]:
+                if (
+                    factor._operation == 'model' and
+                    isinstance(factor._arguments, model_type)
+                ):
+                    model *= factor._arguments
+                else:
+                    model *= factor._expand_model(model_type)
+            return model
+
+        items = {}
+        self._accumulate(model_type, items)
+        model = model_type()
+        model._add_items(items)
+        return model
+
+    def _expanded(self):
+        """_expanded.
+
+        Internal method to expand the expression the first time that it is
+        needed.
+
+        Returns
+        -------
+        model : DictArithmetic.
+            The cached expansion. It should not be modified.
+
+        """
+        if self._expansion is None:
+            self._expansion = self._expand_model(
+                DictArithmetic if self._type is None else self._type
+            )
+        return self._expansion
+
+    def expand(self):
+        """expand.
+
+        Expand the expression into a model.
+
+        Returns
+        -------
+        model : DictArithmetic.
+            The model has the type of the left-most model in the expression,
+            or is a DictArithmetic if the expression only contains plain
+            dicts.
+
+        Examples
+        --------
+        >>> from qubovert import spin_var
+        >>> from qubovert.utils import LazyExpression
+        >>> z = [LazyExpression(spin_var(i)) for i in range(2)]
+        >>> H = (z[0] + z[1]) * (z[0] - z[1])
+        >>> H.expand()
+        {}
+
+        """
+        return self._expanded().copy()
+
+    def value(self, state):
+        """value.
+
+        Find the value of the expression with ``state``. See the ``value``
+        method of the expanded model.
+
+        Parameters
+        ----------
+        state : dict.
+            Maps variable labels to their values.
+
+        Returns
+        -------
+        value : number.
+
+        """
+        return self._expanded().value(state)
+
+    def to_qubo(self, *args, **kwargs):
+        """to_qubo.
+
+        Expand the expression and call the ``to_qubo`` method of the
+        expansion with ``args`` and ``kwargs``.
+
+        Returns
+        -------
+        Q : qubovert.utils.QUBOMatrix object.
+
+        """
+        return self._expanded().to_qubo(*args, **kwargs)
+
+    def to_quso(self, *args, **kwargs):
+        """to_quso.
+
+        Expand the expression and call the ``to_quso`` method of the
+        expansion with ``args`` and ``kwargs``.
+
+        Returns
+        -------
+        L : qubovert.utils.QUSOMatrix object.
+
+        """
+        return self._expanded().to_quso(*args, **kwargs)
+
+    def to_pubo(self, *args, **kwargs):
+        """to_pubo.
+
+        Expand the expression and call the ``to_pubo`` method of the
+        expansion with ``args`` and ``kwargs``.
+
+        Returns
+        -------
+        P : qubovert.utils.PUBOMatrix object.
+
+        """
+        return self._expanded().to_pubo(*args, **kwargs)
+
+    def to_puso(self, *args, **kwargs):
+        """to_puso.
+
+        Expand the expression and call the ``to_puso`` method of the
+        expansion with ``args`` and ``kwargs``.
+
+        Returns
+        -------
+        H : qubovert.utils.PUSOMatrix object.
+
+        """
+        return self._expanded().to_puso(*args, **kwargs)
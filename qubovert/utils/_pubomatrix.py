@@ -18,6 +18,8 @@ This file contains the PUBOMatrix object.
 
 """
 
+from itertools import chain
+import numpy as np
 from . import (
     DictArithmetic, hash_function,
     pubo_value, solve_pubo_bruteforce
@@ -27,6 +29,102 @@ from . import (
 __all__ = 'PUBOMatrix',
 
 
+# the most keys that each class remembers the squashed form of. See
+# ``PUBOMatrix.squash_key``.
+_SQUASH_CACHE_SIZE = 1 << 17
+
+
+def _merge_terms(term_ptr, variables, coefficients, spin, rank=None):
+    """_merge_terms.
+
+    Canonicalize the terms given in the compressed sparse row style of
+    ``PUBOMatrix.to_arrays`` and merge the duplicates, with vectorized numpy
+    operations.
+
+    Parameters
+    ----------
+    term_ptr : array of ints.
+        The variables of the ``t`` th term are
+        ``variables[term_ptr[t]:term_ptr[t+1]]``.
+    variables : array of non negative ints.
+    coefficients : array of floats.
+        ``coefficients[t]`` is the coefficient of the ``t`` th term.
+    spin : bool.
+        Whether the variables are spins, in which case pairs of repeated
+        variables in a term cancel out. Otherwise repeated variables in a term
+        are squashed into one.
+    rank : array of ints (optional, defaults to None).
+        The variables in each term are sorted by ``rank[variable]``. If
+        ``rank`` is None, then they are sorted by their value.
+
+    Returns
+    -------
+    res : tuple (terms, lengths, values, constant).
+        ``terms`` is a 2d int64 array where the first ``lengths[t]`` entries
+        of row ``t`` are the sorted variables of a unique term and the rest
+        are -1, and ``values[t]`` is its nonzero coefficient. ``constant`` is
+        the sum of the coefficients of the terms with no variables.
+
+    Raises
+    ------
+    ValueError if the arrays are inconsistent or if a variable is negative.
+
+    """
+    term_ptr = np.asarray(term_ptr, dtype=np.int64)
+    variables = np.asarray(variables, dtype=np.int64)
+    coefficients = np.asarray(coefficients, dtype=np.float64)
+    lengths = np.diff(term_ptr)
+    num_terms = len(coefficients)
+    if (
+        term_ptr.ndim != 1 or len(term_ptr) != num_terms + 1 or
+        term_ptr[0] != 0 or term_ptr[-1] != len(variables) or
+        (lengths < 0).any()
+    ):
+        raise ValueError("term_ptr must be a nondecreasing array from 0 to "
+                         "len(variables) of length len(coefficients) + 1")
+    elif len(variables) and variables.min() < 0:
+        raise ValueError("Variables must be non negative integers")
+    elif rank is not None and len(variables) and variables.max() >= len(rank):
+        raise ValueError("Every variable must have a label")
+
+    # sort the variables within each term, then drop the repeated ones.
+    term = np.repeat(np.arange(num_terms), lengths)
+    key = variables if rank is None else np.asarray(rank)[variables]
+    order = np.lexsort((key, term))
+    term, variables = term[order], variables[order]
+    first = np.ones(len(variables), dtype=bool)
+    first[1:] = (term[1:] != term[:-1]) | (variables[1:] != variables[:-1])
+    if spin:
+        run = np.cumsum(first) - 1
+        first &= (np.bincount(run)[run] % 2).astype(bool)
+    term, variables = term[first], variables[first]
+
+    # pad the terms into the rows of a matrix, and sort the rows so that the
+    # duplicate terms are next to each other. Sorting the columns with
+    # lexsort is much faster than np.unique(axis=0), which compares the rows
+    # as raw bytes.
+    lengths = np.bincount(term, minlength=num_terms)
+    starts = np.cumsum(lengths) - lengths
+    terms = np.full((num_terms, lengths.max() if num_terms else 0), -1)
+    terms[term, np.arange(len(term)) - starts[term]] = variables
+    if terms.shape[1]:
+        order = np.lexsort(terms.T[::-1])
+        terms = terms[order]
+        first = np.ones(num_terms, dtype=bool)
+        first[1:] = (terms[1:] != terms[:-1]).any(axis=1)
+        group = np.cumsum(first) - 1
+        values = np.bincount(group, coefficients[order], group[-1] + 1)
+        terms = terms[first]
+    else:
+        terms, values = terms[:1], coefficients[:1].copy()
+        values[:] = coefficients.sum()
+
+    lengths = (terms >= 0).sum(axis=1)
+    constant = values[lengths == 0].sum()
+    keep = (lengths > 0) & (values != 0)
+    return terms[keep], lengths[keep], values[keep], float(constant)
+
+
 class PUBOMatrix(DictArithmetic):
     """PUBOMatrix.
 
@@ -132,6 +230,23 @@ class PUBOMatrix(DictArithmetic):
 
     """
 
+    # whether the variables are spins, so that repeated variables cancel out
+    # instead of being squashed. See ``from_arrays``.
+    _spin = False
+
+    # maps keys to their squashed form. Each subclass gets its own, since the
+    # classes squash and validate keys differently. See ``squash_key``.
+    _squash_cache = {}
+
+    def __init_subclass__(cls, **kwargs):
+        """__init_subclass__.
+
+        Give each subclass its own cache of squashed keys.
+
+        """
+        super().__init_subclass__(**kwargs)
+        cls._squash_cache = {}
+
     def __init__(self, *args, **kwargs):
         """__init__.
 
@@ -147,6 +262,146 @@ class PUBOMatrix(DictArithmetic):
         self._degree, self._variables, self._num_binary_variables = 0, set(), 0
         super().__init__(*args, **kwargs)
 
+    def _copy_attributes(self, other):
+        """_copy_attributes.
+
+        Internal method to set the attributes of a copy of ``other``. See
+        ``help(qubovert.utils.DictArithmetic._copy_attributes)``. The degree
+        and variables are recomputed from the keys, so that, like
+        ``self.__class__(other)``, they do not include terms that have been
+        removed from ``other``.
+
+        Parameters
+        ----------
+        other : PUBOMatrix object.
+
+        """
+        super()._copy_attributes(other)
+        self._variables = set(chain.from_iterable(self))
+        self._degree = max(map(len, self), default=0)
+        self._num_binary_variables = len(self._variables)
+
+    @classmethod
+    def from_arrays(cls, term_ptr, variables, coefficients, offset=0,
+                    labels=None):
+        """from_arrays.
+
+        Build the model from numpy arrays in the format returned by
+        ``to_arrays``. The terms are canonicalized and the duplicates are
+        merged with vectorized operations, and then the dictionary is filled
+        in one pass, which is much faster than setting each term.
+
+        Parameters
+        ----------
+        term_ptr : array of ints.
+            Array of length ``len(coefficients) + 1`` where the variables of
+            the ``t`` th term are ``variables[term_ptr[t]:term_ptr[t+1]]``.
+        variables : array of non negative ints.
+            The variables of all the terms concatenated together.
+        coefficients : array of floats.
+            ``coefficients[t]`` is the coefficient of the ``t`` th term.
+        offset : number (optional, defaults to 0).
+            The part of the model that does not depend on any variables.
+        labels : list (optional, defaults to None).
+            If ``labels`` is not None, then each variable ``i`` in
+            ``variables`` is given the label ``labels[i]``. This is mostly
+            useful for the subclasses that allow any labels, such as
+            ``qubovert.PUBO``.
+
+        Returns
+        -------
+        D : the model, an object of type ``cls``.
+
+        Raises
+        ------
+        ValueError if the arrays are inconsistent or if a variable is
+        negative.
+
+        Example
+        -------
+        >>> from qubovert.utils import PUBOMatrix
+        >>> P = PUBOMatrix.from_arrays([0, 3, 5, 7], [2, 0, 1, 1, 1, 0, 1],
+        ...                            [2, -1, 1], offset=3)
+        >>> P
+        {(1,): -1.0, (0, 1): 1.0, (0, 1, 2): 2.0, (): 3.0}
+
+        """
+        return cls._from_term_arrays(
+            term_ptr, variables, coefficients, offset, labels
+        )
+
+    @staticmethod
+    def _label_rank(labels):
+        """_label_rank.
+
+        Internal method to find the order that the variables with ``labels``
+        are sorted in within each key. See ``squash_key``.
+
+        Parameters
+        ----------
+        labels : list.
+
+        Returns
+        -------
+        rank : numpy array.
+            ``rank[i]`` is the position of ``labels[i]`` when the labels are
+            sorted.
+
+        """
+        order = sorted(range(len(labels)),
+                       key=lambda i: hash_function(labels[i]))
+        rank = np.empty(len(labels), dtype=np.int64)
+        rank[order] = np.arange(len(labels))
+        return rank
+
+    @classmethod
+    def _from_term_arrays(cls, term_ptr, variables, coefficients, offset,
+                          labels):
+        """_from_term_arrays.
+
+        Internal method to build the model from the compressed sparse row
+        style arrays without calling ``__setitem__``. See ``from_arrays``.
+
+        Parameters
+        ----------
+        term_ptr, variables, coefficients, offset, labels : see
+            ``from_arrays``.
+
+        Returns
+        -------
+        D : the model, an object of type ``cls``.
+
+        """
+        terms, lengths, values, constant = _merge_terms(
+            term_ptr, variables, coefficients, cls._spin,
+            None if labels is None else cls._label_rank(labels)
+        )
+        D = cls()
+        if labels is not None:
+            label_array = np.empty(len(labels), dtype=object)
+            label_array[:] = list(labels)
+        items = []
+        for length in np.unique(lengths).tolist():
+            group = lengths == length
+            keys = terms[group, :length]
+            if labels is not None:
+                keys = label_array[keys]
+            items.extend(zip(map(tuple, keys.tolist()),
+                             values[group].tolist()))
+            D._degree = length
+        dict.update(D, items)
+
+        used = np.unique(terms[terms >= 0])
+        D._variables = set(
+            used.tolist() if labels is None else label_array[used].tolist()
+        )
+        D._num_binary_variables = len(D._variables)
+
+        offset = offset + constant
+        if offset:
+            dict.__setitem__(D, (), offset)
+        return D
+
     def refresh(self):
         """refresh.
 
@@ -282,6 +537,13 @@ class PUBOMatrix(DictArithmetic):
         QUBOMatrix. It will get rid of duplicates and sort. This method
         will check to see if the input key is valid.
 
+        The same keys are usually squashed over and over while a model is
+        built, so each class remembers the squashed form of the last keys
+        that it squashed, and only squashes keys that it has not seen
+        recently with ``_canonical_key``. A key is only squashed from the
+        cache if its elements have the same types as the key that was
+        checked, so the cache never accepts an invalid key.
+
         Parameters
         ----------
         key : tuple of integers.
@@ -300,15 +562,61 @@ class PUBOMatrix(DictArithmetic):
         >>> squash_key((0, 4, 0, 3, 3, 2))
         >>> (0, 2, 3, 4)
 
+        """
+        cache = cls._squash_cache
+        try:
+            types, k = cache[key]
+        except (KeyError, TypeError):  # TypeError if key is unhashable
+            pass
+        else:
+            # equal keys share an entry, eg (1, 2) and (1.0, 2), so an entry
+            # is only used for keys whose elements have the same types as the
+            # key that was checked.
+            if types == tuple(map(type, key)):
+                return k
+        k = cls._canonical_key(key)
+        if len(cache) >= _SQUASH_CACHE_SIZE:
+            cache.clear()
+        cache[key] = tuple(map(type, key)), k
+        return k
+
+    @classmethod
+    def _canonical_key(cls, key):
+        """_canonical_key.
+
+        Internal method to squash ``key`` without the cache. See
+        ``squash_key``.
+
+        Parameters
+        ----------
+        key : tuple of integers.
+
+        Return
+        ------
+        k : tuple of integers.
+            A sorted and squashed version of ``key``.
+
+        Raises
+        ------
+        KeyError if the key is invalid.
+
         """
         # if f is not None, then it is the squashed key (see QUBOMatrix)
         f = cls._check_key_valid(key)
+        if f is not None:
+            return f
+        # keys with at most two variables that are already in order are
+        # common, and are already squashed.
+        if len(key) < 2 or (
+            len(key) == 2 and hash_function(key[0]) < hash_function(key[1])
+        ):
+            return key
         # here we use hash because some other classes that are subclasses of
         # this class will allow elements of the key to be strings! So we want
         # to still have something consistent to sort by. But for this class,
         # it doesn't make a difference, because hash_funcition(i) == i when i
         # is an int.
-        return f or tuple(sorted(set(key), key=lambda x: hash_function(x)))
+        return tuple(sorted(set(key), key=lambda x: hash_function(x)))
 
     @staticmethod
     def _check_key_valid(key):
@@ -381,12 +689,216 @@ class PUBOMatrix(DictArithmetic):
         """
         k = self.__class__.squash_key(key)
         if value:
-            self._degree = max(self._degree, len(k))
-            for i in filter(lambda x: x not in self._variables, k):
-                self._variables.add(i)
-                self._num_binary_variables += 1
+            if len(k) > self._degree:
+                self._degree = len(k)
+            if not self._variables.issuperset(k):
+                for i in filter(lambda x: x not in self._variables, k):
+                    self._variables.add(i)
+                    self._num_binary_variables += 1
         super().__setitem__(k, value)
 
+    def _product(self, other):
+        """_product.
+
+        Internal method to multiply ``self`` by the dictionary ``other``. See
+        ``help(qubovert.utils.DictArithmetic._product)``. Each variable is
+        replaced by its position in the order that ``squash_key`` sorts by,
+        so that the product of two keys can be canonicalized by merging two
+        small sorted tuples of integers instead of calling ``squash_key``.
+
+        Parameters
+        ----------
+        other : dict.
+
+        Returns
+        -------
+        product : dict.
+            Maps each canonical key of the product to its nonzero value.
+
+        """
+        spin = self._spin
+        oitems = []
+        for k, v in other.items():
+            k = k if isinstance(k, tuple) else (k,)
+            # squash the key without checking it, since a key that is invalid
+            # for the class may still give valid products.
+            oitems.append((
+                {x for x in k if k.count(x) % 2} if spin else set(k), v
+            ))
+
+        labels = set(self._variables).union(*(k for k, _ in oitems))
+        if all(type(x) is int for x in labels):
+            # hash_function(x) == x, so the labels are already in order.
+            labels, rank = None, {}
+        else:
+            labels = sorted(labels, key=hash_function)
+            rank = {x: i for i, x in enumerate(labels)}
+        sitems = [(tuple(sorted(map(rank.get, k, k))), v)
+                  for k, v in self.items()]
+        oitems = [(tuple(sorted(map(rank.get, k, k))), v)
+                  for k, v in oitems]
+
+        # a key whose value becomes 0 is removed, so that when it comes back
+        # it moves to the end, as with ``__setitem__``. This keeps the order
+        # of the keys, and so the labels of ``qubovert.PUBO`` and its
+        # subclasses, the same as multiplying term by term.
+        product = {}
+        get, pop = product.get, product.pop
+        for a, v in sitems:
+            if not a:
+                for b, w in oitems:
+                    u = get(b, 0) + v * w
+                    if u:
+                        product[b] = u
+                    else:
+                        pop(b, None)
+                continue
+            i = a[0] if len(a) == 1 else None
+            for b, w in oitems:
+                if not b:
+                    key = a
+                elif i is not None and len(b) == 1:
+                    j = b[0]
+                    if i == j:
+                        key = () if spin else a
+                    else:
+                        key = (i, j) if i < j else (j, i)
+                elif spin:
+                    key = tuple(sorted(set(a).symmetric_difference(b)))
+                else:
+                    key = tuple(sorted(set(a).union(b)))
+                u = get(key, 0) + v * w
+                if u:
+                    product[key] = u
+                else:
+                    pop(key, None)
+
+        if labels is None:
+            return product
+        return {tuple(map(labels.__getitem__, k)): v
+                for k, v in product.items()}
+
+    def _add_items(self, items):
+        """_add_items.
+
+        Internal method to add the terms of ``items`` to ``self`` in one pass,
+        updating the degree and variables without going through
+        ``__setitem__``. The keys must already be canonical, for example the
+        keys returned by ``_product``.
+
+        Parameters
+        ----------
+        items : dict.
+            Maps canonical keys to values.
+
+        Raises
+        ------
+        KeyError if a key is invalid for the class.
+
+        """
+        if self:
+            new = {}
+            for k, v in items.items():
+                v = dict.get(self, k, 0) + v
+                if v:
+                    new[k] = v
+                else:
+                    dict.pop(self, k, None)
+        elif all(items.values()):
+            # don't copy large dicts that have nothing to remove.
+            new = items
+        else:
+            new = {k: v for k, v in items.items() if v}
+        if not new:
+            return
+        # the keys are canonical products of valid keys, so the only way that
+        # one can be invalid is by being too long for the class (ie QUBOs).
+        self.__class__._check_key_valid(max(new, key=len))
+        dict.update(self, new)
+        self._degree = max(self._degree, max(map(len, new)))
+        self._variables.update(chain.from_iterable(new))
+        self._num_binary_variables = len(self._variables)
+
+    def _sum_items(self, items):
+        """_sum_items.
+
+        Internal method to sum the values of ``items`` into ``self`` in the
+        order that they are given, without going through ``__setitem__``.
+        Unlike ``_add_items``, the items are not collected into a dict first,
+        so a large model is never held twice. The keys must already be
+        canonical.
+
+        Parameters
+        ----------
+        items : iterable of tuples (key, value).
+            Canonical keys and the values to add to them.
+
+        Raises
+        ------
+        KeyError if a key is invalid for the class.
+
+        """
+        get, set_value = dict.get, dict.__setitem__
+        for k, v in items:
+            set_value(self, k, get(self, k, 0) + v)
+        for k in [k for k, v in dict.items(self) if not v]:
+            dict.__delitem__(self, k)
+        if self:
+            # the keys are canonical, so the only way that one can be invalid
+            # is by being too long for the class (ie QUBOs).
+            self.__class__._check_key_valid(max(self, key=len))
+        self._variables = set(chain.from_iterable(self))
+        self._degree = max(map(len, self), default=0)
+        self._num_binary_variables = len(self._variables)
+
+    def _squash_items(self, staged):
+        """_squash_items.
+
+        Internal method to canonicalize each key of ``staged`` once with
+        ``squash_key``, merging the values of keys that become the same.
+
+        Parameters
+        ----------
+        staged : dict.
+            Maps keys, not necessarily canonical, to values.
+
+        Returns
+        -------
+        items : dict.
+            Maps canonical keys to values. The values may be 0.
+
+        Raises
+        ------
+        KeyError if a key of ``staged`` is invalid for the class.
+
+        """
+        squash_key, items = self.__class__.squash_key, {}
+        for k, v in staged.items():
+            k = squash_key(k)
+            items[k] = items.get(k, 0) + v
+        return items
+
+    def _add_staged(self, staged):
+        """_add_staged.
+
+        Internal method to add the terms that were staged in ``bulk`` to
+        ``self``. The keys are canonicalized with ``_squash_items`` before
+        anything is added, and then the terms are added with ``_add_items``.
+        See ``help(qubovert.utils.DictArithmetic.bulk)``.
+
+        Parameters
+        ----------
+        staged : dict.
+            Maps keys, not necessarily canonical, to values.
+
+        Raises
+        ------
+        KeyError if a staged key is invalid for the class. Then nothing is
+        added to ``self``.
+
+        """
+        self._add_items(self._squash_items(staged))
+
     def is_solution_valid(self, solution):
         """is_solution_valid.
 
@@ -474,3 +986,131 @@ class PUBOMatrix(DictArithmetic):
 
         """
         return pubo_value(x, self)
+
+    def value_batch(self, states):
+        """value_batch.
+
+        Find the value of the model for many states at once. The terms are
+        exported with ``to_arrays`` and each term is evaluated for all of the
+        states with vectorized numpy operations, in blocks of terms so that
+        the memory stays bounded. The coefficients must be numeric.
+
+        Parameters
+        ----------
+        states : 2d array.
+            ``states[s][i]`` is the value of variable ``i`` in the ``s`` th
+            state, in the integer labeling of the model. That is, for
+            subclasses such as ``qubovert.QUBO``, the column of a variable is
+            given by ``mapping``. The values must be 0 or 1 for boolean models
+            and 1 or -1 for spin models.
+
+        Returns
+        -------
+        values : 1d numpy array of floats.
+            ``values[s]`` is the value of the model with the ``s`` th state.
+
+        Raises
+        ------
+        ValueError if ``states`` is not two dimensional or does not have a
+        column for every variable.
+
+        Example
+        -------
+        >>> from qubovert.utils import QUBOMatrix
+        >>> Q = QUBOMatrix({(0,): 1, (0, 1): -2, (): 1})
+        >>> Q.value_batch([[0, 0], [1, 0], [1, 1]])
+        array([1., 2., 0.])
+
+        """
+        states = np.asarray(states)
+        if states.ndim != 2:
+            raise ValueError("states must be a two dimensional array")
+        offset, term_ptr, variables, coefficients = self._term_arrays()
+        if len(variables) and variables.max() >= states.shape[1]:
+            raise ValueError("states must have a column for every variable")
+
+        # each row of x is the value of one variable in all of the states
+        x = np.ascontiguousarray(states.T, dtype=np.int8)
+        values = np.full(len(states), offset, dtype=np.float64)
+        block = max(1, 2 ** 22 // max(1, len(states)))
+        starts, lengths = term_ptr[:-1], np.diff(term_ptr)
+        for length in np.unique(lengths).tolist():
+            terms = lengths == length
+            columns = variables[starts[terms, None] + np.arange(length)]
+            weights = coefficients[terms]
+            for i in range(0, len(weights), block):
+                product = x[columns[i:i+block, 0]]
+                for j in range(1, length):
+                    product *= x[columns[i:i+block, j]]
+                values += weights[i:i+block] @ product
+        return values
+
+    def _term_arrays(self, mapping=None):
+        """_term_arrays.
+
+        Internal method to flatten the terms of the model into arrays. See
+        ``to_arrays``.
+
+        Parameters
+        ----------
+        mapping : dict (optional, defaults to None).
+            If ``mapping`` is not None, then each variable ``i`` of the model
+            is replaced with ``mapping[i]`` in the arrays.
+
+        Returns
+        -------
+        res : tuple (offset, term_ptr, variables, coefficients).
+            See ``to_arrays``.
+
+        """
+        keys = list(self)
+        lengths = np.fromiter(map(len, keys), np.int64, len(keys))
+        variables = chain.from_iterable(keys)
+        if mapping is not None:
+            variables = map(mapping.__getitem__, variables)
+        variables = np.fromiter(variables, np.int64, lengths.sum())
+        coefficients = np.fromiter(self.values(), np.float64, len(keys))
+
+        # the offset is the only term that has no variables
+        terms = lengths.astype(bool)
+        if not terms.all():
+            lengths, coefficients = lengths[terms], coefficients[terms]
+        term_ptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=term_ptr[1:])
+
+        return self.offset, term_ptr, variables, coefficients
+
+    def to_arrays(self):
+        """to_arrays.
+
+        Export the coefficients of the model as flat numpy arrays, in the
+        style of the compressed sparse row format. The variables of the
+        ``t`` th term are ``variables[term_ptr[t]:term_ptr[t+1]]`` and its
+        coefficient is ``coefficients[t]``. The coefficients must be numeric.
+
+        Returns
+        -------
+        res : tuple (offset, term_ptr, variables, coefficients).
+            ``offset`` is the value of the model that does not depend on any
+            variables. ``term_ptr`` is an int64 array of length one more than
+            the number of terms, ``variables`` is an int64 array of the
+            variables of all the terms concatenated together, and
+            ``coefficients`` is a float64 array of the coefficients of the
+            terms.
+
+        Example
+        -------
+        >>> from qubovert.utils import PUBOMatrix
+        >>> P = PUBOMatrix({(0, 1, 2): 2, (1,): -1, (): 3})
+        >>> offset, term_ptr, variables, coefficients = P.to_arrays()
+        >>> offset
+        3
+        >>> term_ptr
+        array([0, 3, 4])
+        >>> variables
+        array([0, 1, 2, 1])
+        >>> coefficients
+        array([ 2., -1.])
+
+        """
+        return self._term_arrays()
@@ -132,13 +132,17 @@ class PUSOMatrix(PUBOMatrix):
 
     """
 
+    _spin = True
+
     @classmethod
-    def squash_key(cls, key):
-        """squash_key.
+    def _canonical_key(cls, key):
+        """_canonical_key.
 
         Will convert the input key into the standard form for PUSOMatrix /
         QUSOMatrix. It will get rid of pairs of duplicates and sort. This
-        method will check to see if the input key is valid.
+        method will check to see if the input key is valid. See
+        ``help(qubovert.utils.PUBOMatrix.squash_key)``, which calls this
+        method for the keys that it does not have cached.
 
         Parameters
         ----------
@@ -157,12 +161,20 @@ class PUSOMatrix(PUBOMatrix):
         """
         # if f is not None, then it is the squashed key. See QUSOMatrix.
         f = cls._check_key_valid(key)
+        if f is not None:
+            return f
+        # keys with at most two variables that are already in order are
+        # common, and are already squashed.
+        if len(key) < 2 or (
+            len(key) == 2 and hash_function(key[0]) < hash_function(key[1])
+        ):
+            return key
         # here we use hash because some other classes that are subclasses of
         # this class will allow elements of the key to be strings! So we want
         # to still have something consistent to sort by. But for this class,
         # it doesn't make a difference, because hash_function(i) == i when i is
         # an int.
-        return f or tuple(sorted(
+        return tuple(sorted(
             (x for x in set(key) if key.count(x) % 2),
             key=lambda x: hash_function(x)
         ))
@@ -25,6 +25,86 @@ from . import PUBOMatrix, qubo_value, solve_qubo_bruteforce
 __all__ = 'QUBOMatrix', 'matrix_to_qubo', 'qubo_to_matrix'
 
 
+def _quadratic_arrays(D, csr):
+    """_quadratic_arrays.
+
+    Export the coefficients of a QUBO or QUSO as numpy arrays. See
+    ``QUBOMatrix.to_arrays`` and ``QUSOMatrix.to_arrays``.
+
+    Parameters
+    ----------
+    D : QUBOMatrix, QUSOMatrix, or subclass object.
+    csr : bool.
+        Whether to return the quadratic terms in the compressed sparse row
+        format.
+
+    Returns
+    -------
+    res : tuple (offset, linear, row, col, values).
+
+    """
+    offset, term_ptr, variables, coefficients = D._term_arrays()
+    n = int(variables.max()) + 1 if len(variables) else 0
+    starts, lengths = term_ptr[:-1], np.diff(term_ptr)
+
+    linear = np.zeros(n)
+    terms = lengths == 1
+    linear[variables[starts[terms]]] = coefficients[terms]
+
+    terms = lengths == 2
+    row, col = variables[starts[terms]], variables[starts[terms] + 1]
+    # labels that were mapped to integers may be out of order
+    row, col = np.minimum(row, col), np.maximum(row, col)
+    values = coefficients[terms]
+
+    if csr:
+        order = np.lexsort((col, row))
+        col, values = col[order], values[order]
+        counts, row = np.bincount(row, minlength=n), np.zeros(n + 1, np.int64)
+        np.cumsum(counts, out=row[1:])
+
+    return offset, linear, row, col, values
+
+
+def _quadratic_terms(rows, cols, values, linear):
+    """_quadratic_terms.
+
+    Convert the arrays of a QUBO or QUSO to the compressed sparse row style
+    arrays of ``PUBOMatrix.from_arrays``.
+
+    Parameters
+    ----------
+    rows, cols, values : arrays.
+        ``values[t]`` is the coefficient of ``(rows[t], cols[t])``.
+    linear : array or None.
+        ``linear[i]`` is the coefficient of ``(i,)``.
+
+    Returns
+    -------
+    res : tuple (term_ptr, variables, coefficients).
+
+    Raises
+    ------
+    ValueError if ``rows``, ``cols``, and ``values`` have different lengths.
+
+    """
+    rows, cols = np.asarray(rows, np.int64), np.asarray(cols, np.int64)
+    values = np.asarray(values, np.float64)
+    if not len(rows) == len(cols) == len(values):
+        raise ValueError("rows, cols, and values must have the same length")
+    variables = np.stack((rows, cols), axis=1).ravel()
+    term_ptr = np.arange(0, 2 * len(values) + 1, 2)
+    if linear is not None:
+        linear = np.asarray(linear, np.float64)
+        (index,) = linear.nonzero()
+        variables = np.concatenate((variables, index))
+        term_ptr = np.concatenate(
+            (term_ptr, term_ptr[-1] + np.arange(1, len(index) + 1))
+        )
+        values = np.concatenate((values, linear[index]))
+    return term_ptr, variables, values
+
+
 class QUBOMatrix(PUBOMatrix):
     """QUBOMatrix.
 
@@ -237,6 +317,90 @@ class QUBOMatrix(PUBOMatrix):
         """
         return {k * (3 - len(k)): v for k, v in self.items() if k}
 
+    @classmethod
+    def from_arrays(cls, rows, cols, values, linear=None, offset=0,
+                    labels=None):
+        """from_arrays.
+
+        Build the QUBO from numpy arrays in the coordinate format of
+        ``to_arrays``. The keys are canonicalized, ie ``(i, i)`` becomes
+        ``(i,)`` and ``(j, i)`` becomes ``(i, j)``, and the duplicates are
+        merged with vectorized operations, and then the dictionary is filled
+        in one pass, which is much faster than setting each term.
+
+        Parameters
+        ----------
+        rows, cols, values : arrays.
+            ``values[t]`` is the coefficient of ``(rows[t], cols[t])``, where
+            ``rows`` and ``cols`` contain non negative integers.
+        linear : array (optional, defaults to None).
+            ``linear[i]`` is the coefficient of ``(i,)``.
+        offset : number (optional, defaults to 0).
+            The part of the QUBO that does not depend on any variables.
+        labels : list (optional, defaults to None).
+            If ``labels`` is not None, then variable ``i`` is given the label
+            ``labels[i]``. This is mostly useful for ``qubovert.QUBO``, which
+            allows any labels.
+
+        Returns
+        -------
+        Q : the QUBO, an object of type ``cls``.
+
+        Raises
+        ------
+        ValueError if the arrays have inconsistent lengths or if a variable is
+        negative.
+
+        Example
+        -------
+        >>> from qubovert.utils import QUBOMatrix
+        >>> Q = QUBOMatrix.from_arrays([1, 0, 2], [0, 1, 2], [1, 2, -1])
+        >>> Q
+        {(2,): -1.0, (0, 1): 3.0}
+
+        """
+        return cls._from_term_arrays(
+            *_quadratic_terms(rows, cols, values, linear), offset, labels
+        )
+
+    def to_arrays(self, csr=False):
+        """to_arrays.
+
+        Export the coefficients of the QUBO as numpy arrays. The coefficients
+        must be numeric.
+
+        Parameters
+        ----------
+        csr : bool (optional, defaults to False).
+            Whether to return the quadratic terms in the coordinate format or
+            in the compressed sparse row format.
+
+        Returns
+        -------
+        res : tuple (offset, linear, row, col, values).
+            ``offset`` is the value of the QUBO that does not depend on any
+            variables. ``linear`` is a float64 array where ``linear[i]`` is the
+            coefficient of ``(i,)``. If ``csr`` is False, then ``row``,
+            ``col``, and ``values`` are arrays where ``values[t]`` is the
+            coefficient of ``(row[t], col[t])`` and ``row[t] < col[t]``. If
+            ``csr`` is True, then ``row`` is replaced by an index pointer
+            array of length ``len(linear) + 1``, so that the terms of row
+            ``i`` are ``col[row[i]:row[i+1]]`` and
+            ``values[row[i]:row[i+1]]``, sorted by column.
+
+        Example
+        -------
+        >>> from qubovert.utils import QUBOMatrix
+        >>> Q = QUBOMatrix({(0, 1): 2, (1,): -1, (0, 2): 1, (): 3})
+        >>> offset, linear, row, col, values = Q.to_arrays()
+        >>> offset, linear
+        (3, array([ 0., -1.,  0.]))
+        >>> row, col, values
+        (array([0, 0]), array([1, 2]), array([2., 1.]))
+
+        """
+        return _quadratic_arrays(self, csr)
+
 
 def matrix_to_qubo(matrix):
     r"""matrix_to_qubo.
@@ -19,6 +19,7 @@ This file contains the QUSOMatrix object.
 """
 
 from . import PUSOMatrix, quso_value, solve_quso_bruteforce
+from ._qubomatrix import _quadratic_arrays, _quadratic_terms
 
 
 __all__ = 'QUSOMatrix',
@@ -239,3 +240,87 @@ class QUSOMatrix(PUSOMatrix):
 
         """
         return {k: v for k, v in self.items() if len(k) == 2}
+
+    @classmethod
+    def from_arrays(cls, rows, cols, values, linear=None, offset=0,
+                    labels=None):
+        """from_arrays.
+
+        Build the QUSO from numpy arrays in the coordinate format of
+        ``to_arrays``. The keys are canonicalized, ie ``(i, i)`` becomes a
+        constant and ``(j, i)`` becomes ``(i, j)``, and the duplicates are
+        merged with vectorized operations, and then the dictionary is filled
+        in one pass, which is much faster than setting each term.
+
+        Parameters
+        ----------
+        rows, cols, values : arrays.
+            ``values[t]`` is the coupling of ``(rows[t], cols[t])``, where
+            ``rows`` and ``cols`` contain non negative integers.
+        linear : array (optional, defaults to None).
+            ``linear[i]`` is the field on spin ``i``.
+        offset : number (optional, defaults to 0).
+            The part of the QUSO that does not depend on any variables.
+        labels : list (optional, defaults to None).
+            If ``labels`` is not None, then spin ``i`` is given the label
+            ``labels[i]``. This is mostly useful for ``qubovert.QUSO``, which
+            allows any labels.
+
+        Returns
+        -------
+        L : the QUSO, an object of type ``cls``.
+
+        Raises
+        ------
+        ValueError if the arrays have inconsistent lengths or if a variable is
+        negative.
+
+        Example
+        -------
+        >>> from qubovert.utils import QUSOMatrix
+        >>> L = QUSOMatrix.from_arrays([1, 0, 2], [0, 1, 2], [1, 2, -1])
+        >>> L
+        {(0, 1): 3.0, (): -1.0}
+
+        """
+        return cls._from_term_arrays(
+            *_quadratic_terms(rows, cols, values, linear), offset, labels
+        )
+
+    def to_arrays(self, csr=False):
+        """to_arrays.
+
+        Export the coefficients of the QUSO as numpy arrays. The coefficients
+        must be numeric.
+
+        Parameters
+        ----------
+        csr : bool (optional, defaults to False).
+            Whether to return the couplings in the coordinate format or in the
+            compressed sparse row format.
+
+        Returns
+        -------
+        res : tuple (offset, h, row, col, J).
+            ``offset`` is the value of the QUSO that does not depend on any
+            variables. ``h`` is a float64 array where ``h[i]`` is the field
+            on spin ``i``. If ``csr`` is False, then ``row``, ``col``, and
+            ``J`` are arrays where ``J[t]`` is the coupling of
+            ``(row[t], col[t])`` and ``row[t] < col[t]``. If ``csr`` is True,
+            then ``row`` is replaced by an index pointer array of length
+            ``len(h) + 1``, so that the couplings of row ``i`` are
+            ``col[row[i]:row[i+1]]`` and ``J[row[i]:row[i+1]]``, sorted by
+            column.
+
+        Example
+        -------
+        >>> from qubovert.utils import QUSOMatrix
+        >>> L = QUSOMatrix({(0, 1): 2, (1,): -1, (0, 2): 1, (): 3})
+        >>> offset, h, row, col, J = L.to_arrays(csr=True)
+        >>> offset, h
+        (3, array([ 0., -1.,  0.]))
+        >>> row, col, J
+        (array([0, 2, 2, 2]), array([1, 2]), array([2., 1.]))
+
+        """
+        return _quadratic_arrays(self, csr)
@@ -42,9 +42,12 @@ extensions = [
                  './qubovert/sim/src/pcg_basic.c',
                  './qubovert/sim/src/random.c',
                  './qubovert/sim/src/anneal_quso.c',
-                 './qubovert/sim/src/anneal_puso.c'],
+                 './qubovert/sim/src/anneal_puso.c',
+                 './qubovert/sim/src/top_states.c'],
         include_dirs=['./qubovert/sim/src/'],
-        language='c'
+        language='c',
+        # qubovert.sim falls back to its NumPy backend if the build fails
+        optional=True
     )
 ]
 
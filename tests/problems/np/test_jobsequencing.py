@@ -177,3 +177,21 @@ def test_jobsequencing_puso_solve():
     assert problem.is_solution_valid(sol)
     assert solution in solutions
     assert allclose(e, obj_val)
+
+
+def test_jobsequencing_one_hot_groups():
+
+    from qubovert.sim import anneal_qubo
+
+    groups = problem.one_hot_groups
+    assert len(groups) == len(job_lengths)
+    assert sorted(i for g in groups for i in g) == list(
+        range(len(job_lengths) * num_workers)
+    )
+
+    # even with tiny penalties, each job is covered exactly once.
+    res = anneal_qubo(
+        problem.to_qubo(A=.01), num_anneals=10, one_hot_groups=groups, seed=2
+    )
+    for r in res:
+        assert all(sum(r.state[i] for i in g) == 1 for g in groups)
@@ -18,7 +18,7 @@ Contains tests for the functions in the ``qubovert.sim._anneal`` file.
 
 from qubovert.sim import (
     anneal_qubo, anneal_quso, anneal_pubo, anneal_puso,
-    AnnealResults, SCHEDULES
+    AnnealResults, SCHEDULES, BACKENDS
 )
 from qubovert.utils import (
     puso_to_pubo, quso_to_qubo, QUBOVertWarning,
@@ -27,6 +27,7 @@ from qubovert.utils import (
 from qubovert import QUBO, QUSO, PUBO, PUSO, PCBO, PCSO
 from numpy.testing import assert_raises, assert_warns
 import numpy as np
+import warnings
 
 
 def test_anneal_puso():
@@ -428,3 +429,509 @@ def test_anneal_qubo_vs_anneal_pubo():
                             with assert_warns(QUBOVertWarning):
                                 respubo = anneal_pubo(Q, **kwargs)
                             assert respubo == anneal_qubo(Q, **kwargs)
+
+
+def test_anneal_seeded_streams():
+
+    from qubovert.sim._canneal import c_anneal_quso, c_anneal_puso
+
+    # spin chain 0 - 1 - 2 - 3 with fields
+    h = [1., -.5, 0., .25]
+    num_neighbors = [1, 2, 2, 1]
+    neighbors = [1, 0, 2, 1, 3, 2]
+    J = [-1., -1., 2., 2., -1., -1.]
+    Ts = list(np.geomspace(2, .01, 20))
+
+    # each anneal has its own stream, so chunks with the appropriate
+    # offsets reproduce one single run.
+    full = c_anneal_quso(
+        h, num_neighbors, neighbors, J, Ts, 10, 0, [], 3, 0, [], [], 0, 0
+    )
+    chunks = [
+        c_anneal_quso(
+            h, num_neighbors, neighbors, J, Ts, n, 0, [], 3, off, [], [],
+            0, 0
+        )
+        for off, n in ((0, 4), (4, 1), (5, 5))
+    ]
+    assert full[0] == sum((c[0] for c in chunks), [])
+    assert full[1] == sum((c[1] for c in chunks), [])
+
+    terms, couplings, num_couplings = [0, 1, 2, 1, 2, 3], [1., -2.], [3, 3]
+    full = c_anneal_puso(
+        4, num_couplings, terms, couplings, Ts, 10, 0, [], 3, 0, [], [], 0, 0
+    )
+    chunks = [
+        c_anneal_puso(
+            4, num_couplings, terms, couplings, Ts, n, 0, [], 3, off, [], [],
+            0, 0
+        )
+        for off, n in ((0, 7), (7, 3))
+    ]
+    assert full[0] == sum((c[0] for c in chunks), [])
+    assert full[1] == sum((c[1] for c in chunks), [])
+
+    # anneals are independent of how many anneals are run.
+    L = {(i, i+1): (-1) ** i for i in range(20)}
+    res = anneal_quso(L, num_anneals=8, in_order=False, seed=5)
+    assert res[:3] == anneal_quso(L, num_anneals=3, in_order=False, seed=5)
+
+
+def test_anneal_one_hot_groups():
+
+    from qubovert import boolean_var, spin_var
+
+    # one-hot groups with penalties that are far too small to enforce them.
+    x = {(i, j): boolean_var((i, j)) for i in range(4) for j in range(3)}
+    H = PCBO()
+    for i in range(4):
+        H += sum((j + 1) * (-1) ** i * x[(i, j)] for j in range(3))
+        H.add_constraint_eq_zero(
+            sum(x[(i, j)] for j in range(3)) - 1, lam=.01
+        )
+    for i in range(3):
+        H += x[(i, 0)] * x[(i + 1, 2)] * x[(i, 1)] - x[(i, 2)] * x[(i + 1, 0)]
+    groups = H.one_hot_groups
+    assert len(groups) == 4
+
+    for func, model in ((anneal_pubo, H), (anneal_qubo, H.to_qubo())):
+        res = func(model, num_anneals=20, one_hot_groups=(
+            groups if model is H else
+            [tuple(H.mapping[v] for v in g) for g in groups]
+        ), seed=0, in_order=False)
+        assert len(res) == 20
+        for r in res:
+            state = H.convert_solution(r.state) if model is not H else r.state
+            assert H.is_solution_valid(state)
+            # the couplings that are removed do not change the values
+            assert np.isclose(r.value, model.value(r.state))
+        best = min(
+            (v for v in H.solve_bruteforce(True)),
+            key=lambda s: H.value(s)
+        )
+        assert np.isclose(res.best.value, H.value(best))
+
+    # spin version
+    z = [spin_var(i) for i in range(5)]
+    L = PCSO(sum(i * z[i] * z[i + 1] for i in range(4)))
+    L.add_constraint_eq_zero(z[0] + z[1] + z[2] - 1, lam=0)
+    res = anneal_quso(L, num_anneals=10, one_hot_groups=L.one_hot_groups)
+    for r in res:
+        assert [r.state[i] for i in range(3)].count(-1) == 1
+        assert r.value == L.value(r.state)
+    with assert_warns(QUBOVertWarning):
+        res2 = anneal_puso(L, num_anneals=10, one_hot_groups=L.one_hot_groups)
+    for r in res2:
+        assert [r.state[i] for i in range(3)].count(-1) == 1
+
+    # the initial state must satisfy the groups
+    init = {0: 1, 1: -1, 2: 1, 3: 1, 4: -1}
+    res = anneal_quso(
+        L, num_anneals=3, initial_state=init, one_hot_groups=[(0, 1, 2)]
+    )
+    for r in res:
+        assert [r.state[i] for i in range(3)].count(-1) == 1
+    with assert_raises(ValueError):
+        anneal_quso(L, initial_state={i: 1 for i in range(5)},
+                    one_hot_groups=[(0, 1, 2)])
+
+    # variables that are not in the model
+    res = anneal_quso(L, num_anneals=4, one_hot_groups=[(0, 'a')])
+    for r in res:
+        assert [r.state[0], r.state['a']].count(-1) == 1
+
+    # invalid groups
+    with assert_raises(ValueError):
+        anneal_quso(L, one_hot_groups=[(0, 1), (1, 2)])
+    with assert_raises(ValueError):
+        anneal_quso(L, one_hot_groups=[((0, 1), 1), (1, 2)])
+    with assert_raises(ValueError):
+        anneal_quso(L, one_hot_groups=[()])
+
+
+def test_anneal_one_hot_groups_schedule():
+
+    from qubovert import boolean_var
+
+    # the penalties are large, but the anneal never leaves the groups, so the
+    # default schedule must be found from the model without them.
+    C = np.random.RandomState(0).randint(1, 10, (12, 12))
+    x = {(i, j): boolean_var((i, j)) for i in range(12) for j in range(12)}
+    H = PCBO()
+    for i in range(12):
+        H += sum(int(C[i, j]) * x[(i, j)] for j in range(12))
+        H.add_constraint_eq_zero(
+            sum(x[(i, j)] for j in range(12)) - 1, lam=1000
+        )
+    groups = H.one_hot_groups
+    minimum = C.min(axis=1).sum()
+
+    res = anneal_qubo(H, num_anneals=10, one_hot_groups=groups, seed=0)
+    assert all(r.value == minimum for r in res)
+    res = anneal_quso(
+        H.to_quso(), num_anneals=10, seed=0,
+        one_hot_groups=[tuple(H.mapping[v] for v in g) for g in groups]
+    )
+    assert all(r.value == minimum for r in res)
+    H[((0, 0), (1, 1), (2, 2))] += 1
+    res = anneal_pubo(H, num_anneals=10, one_hot_groups=groups, seed=0)
+    assert all(r.value == minimum for r in res)
+
+
+def test_anneal_reorder():
+
+    from qubovert.sim._anneal import _reorder
+
+    # a ring whose labels are scattered
+    N, perm = 40, [int(i) for i in np.random.RandomState(0).permutation(40)]
+    L = QUSOMatrix({(perm[i], perm[(i + 1) % N]): 1 for i in range(N)})
+    L[(perm[0],)] += 1
+    model, reverse_mapping, groups = _reorder(
+        L, N, dict(enumerate(range(N))), [perm[0], perm[1]]
+    )
+    assert max(abs(k[0] - k[1]) for k in L if len(k) == 2) > 2
+    assert max(abs(k[0] - k[1]) for k in model if len(k) == 2) <= 2
+    assert sorted(reverse_mapping) == list(range(N))
+    assert sorted(reverse_mapping.values()) == list(range(N))
+    assert [reverse_mapping[i] for i in groups] == [perm[0], perm[1]]
+    for k, v in model.items():
+        assert L[tuple(reverse_mapping[i] for i in k)] == v
+
+    H = QUSO(L)
+    for anneal, model in (
+        (anneal_quso, L), (anneal_quso, H), (anneal_puso, H),
+        (anneal_qubo, quso_to_qubo(L)), (anneal_pubo, H.to_qubo())
+    ):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            res = anneal(model, num_anneals=5, reorder=True, seed=1)
+        for r in res:
+            assert set(r.state) == set(model.variables)
+            assert np.isclose(r.value, model.value(r.state))
+        assert np.isclose(res.best.value, -N - 1)
+
+    # reordering with one-hot groups and an initial state
+    init = {v: 1 for v in range(N)}
+    init[perm[3]] = -1
+    res = anneal_quso(
+        H, num_anneals=5, initial_state=init, reorder=True,
+        one_hot_groups=[(perm[3], perm[20], perm[30])]
+    )
+    for r in res:
+        assert [r.state[perm[i]] for i in (3, 20, 30)].count(-1) == 1
+        assert r.value == H.value(r.state)
+
+
+def test_anneal_numpy_backend():
+
+    from qubovert import boolean_var
+    from qubovert.sim._anneal import _get_backend
+
+    H = QUSO({(i, i + 1): 1 for i in range(9)})
+    H[(0,)] += 1
+    P = PUBO({(0, 1, 2): -3, (2, 3, 4): 2, (1, 4): 1, (0,): 1, (): 2})
+    P_best = min(P.value(x) for x in P.solve_bruteforce(True))
+
+    for anneal, model, best in (
+        (anneal_quso, H, -10), (anneal_qubo, H.to_qubo(), -10),
+        (anneal_puso, P.to_puso(), P_best), (anneal_pubo, P, P_best)
+    ):
+        for in_order in (True, False):
+            res = anneal(model, num_anneals=20, backend='numpy',
+                         in_order=in_order, seed=0)
+            assert len(res) == 20
+            for r in res:
+                assert set(r.state) == set(model.variables)
+                assert np.isclose(r.value, model.value(r.state))
+            assert np.isclose(res.best.value, best)
+
+            # seeded runs are reproducible
+            res2 = anneal(model, num_anneals=20, backend='numpy',
+                          in_order=in_order, seed=0)
+            assert [r.state for r in res] == [r.state for r in res2]
+
+    # initial states and zero temperature schedules
+    init = {i: 1 for i in range(10)}
+    res = anneal_quso(H, num_anneals=3, backend='numpy', schedule=[0] * 10,
+                      initial_state=init)
+    for r in res:
+        assert r.value <= H.value(init)
+
+    # one-hot groups
+    x = {(i, j): boolean_var((i, j)) for i in range(3) for j in range(3)}
+    B = PCBO()
+    for i in range(3):
+        B += sum((j - 1) * (-1) ** i * x[(i, j)] for j in range(3))
+        B.add_constraint_eq_zero(sum(x[(i, j)] for j in range(3)) - 1, lam=0)
+    B += x[(0, 0)] * x[(1, 2)] * x[(2, 1)] - x[(0, 2)] * x[(1, 0)]
+    res = anneal_pubo(B, num_anneals=20, backend='numpy',
+                      one_hot_groups=B.one_hot_groups, seed=2)
+    for r in res:
+        assert B.is_solution_valid(r.state)
+        assert np.isclose(r.value, B.value(r.state))
+
+    with assert_raises(ValueError):
+        anneal_quso(H, backend='fortran')
+    with assert_raises(ValueError):
+        _get_backend('c', None, anneal_quso)
+    assert _get_backend(None, None, anneal_quso) == anneal_quso
+
+
+def test_anneal_executor():
+
+    import os
+    import pickle
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    H = QUSO({(i, i + 1): 1 for i in range(20)})
+    H[(3,)] += 1
+    P = PUBO({(0, 1, 2): -3, (2, 3, 4): 2, (1, 4): 1, (0,): 1, (): 2})
+
+    with ProcessPoolExecutor(2) as executor:
+        for anneal, model in (
+            (anneal_quso, H), (anneal_qubo, H.to_qubo()),
+            (anneal_puso, P.to_puso()), (anneal_pubo, P)
+        ):
+            expected = anneal(model, num_anneals=7, seed=4)
+            for num_chunks in (None, 1, 3, 20):
+                res = anneal(model, num_anneals=7, seed=4, executor=executor,
+                             num_chunks=num_chunks)
+                assert [r.state for r in res] == [r.state for r in expected]
+                assert [r.value for r in res] == [r.value for r in expected]
+
+        res = anneal_quso(H, num_anneals=6, executor=executor,
+                          backend='numpy', in_order=False)
+        assert len(res) == 6
+        for r in res:
+            assert r.value == H.value(r.state)
+
+    with ThreadPoolExecutor(3) as executor:
+        res = anneal_quso(H, num_anneals=5, executor=executor, num_chunks=5)
+        assert len(res) == 5
+        assert res.best.value == -21
+
+    # the workers do not share anything with this process, such as its
+    # temporary directory, and each one deserializes the model once.
+    from qubovert.sim import _anneal
+
+    class RemoteExecutor(ThreadPoolExecutor):
+
+        digests, models = [], []
+
+        def submit(self, fn, *args):
+            fn, args = pickle.loads(pickle.dumps((fn, args)))
+            for f in os.listdir(tempfile.gettempdir()):
+                os.remove(os.path.join(tempfile.gettempdir(), f))
+            return super().submit(self.run, fn, args)
+
+        def run(self, fn, args):
+            # a fresh worker that has not seen the model
+            _anneal._model = None
+            res = fn(*args)
+            self.digests.append(_anneal._model[0])
+            self.models.append(_anneal._model[1])
+            return res
+
+    big = QUSO({(i, i + 1): 1 for i in range(2000)})
+    with tempfile.TemporaryDirectory() as d:
+        old, tempfile.tempdir = tempfile.tempdir, d
+        try:
+            with RemoteExecutor(1) as executor:
+                res = anneal_quso(big, num_anneals=4, anneal_duration=2,
+                                  executor=executor, num_chunks=4, seed=0)
+        finally:
+            tempfile.tempdir = old
+    assert res == anneal_quso(big, num_anneals=4, anneal_duration=2, seed=0)
+    assert len(RemoteExecutor.digests) == 4
+    assert len(set(RemoteExecutor.digests)) == 1
+    assert len(set(map(id, RemoteExecutor.models))) == 4
+
+    # a worker deserializes the model once for all of its chunks
+    data = pickle.dumps((1, 2), protocol=pickle.HIGHEST_PROTOCOL)
+    _anneal._model = None
+    first = _anneal._load_model('a', data)
+    assert _anneal._load_model('a', data) is first
+    assert _anneal._load_model('b', data) is not first
+    _anneal._model = None
+
+
+def test_anneal_checkpoint():
+
+    import os
+    import pickle
+    import tempfile
+    from concurrent.futures import Executor, Future
+
+    class PreemptedExecutor(Executor):
+        """Run the first ``n`` chunks, and fail the rest."""
+
+        def __init__(self, n):
+            self.n, self.num_anneals = n, 0
+
+        def submit(self, fn, *args):
+            future = Future()
+            if self.n:
+                self.n -= 1
+                self.num_anneals += args[-1]
+                future.set_result(fn(*args))
+            else:
+                future.set_exception(RuntimeError('preempted'))
+            return future
+
+    H = QUSO({(i, i + 1): 1 for i in range(20)})
+    H[(3,)] += 1
+    P = PUBO({(0, 1, 2): -3, (2, 3, 4): 2, (1, 4): 1, (0,): 1, (): 2})
+
+    with tempfile.TemporaryDirectory() as d:
+        for anneal, model in (
+            (anneal_quso, H), (anneal_qubo, H.to_qubo()),
+            (anneal_puso, P.to_puso()), (anneal_pubo, P)
+        ):
+            path = os.path.join(d, anneal.__name__)
+            expected = anneal(model, num_anneals=10, seed=4)
+
+            # interrupt the job, then resume it
+            with assert_raises(RuntimeError):
+                anneal(model, num_anneals=10, seed=4, num_chunks=5,
+                       executor=PreemptedExecutor(2), checkpoint=path)
+            assert os.path.exists(path)
+            executor = PreemptedExecutor(5)
+            res = anneal(model, num_anneals=10, seed=4, num_chunks=4,
+                         executor=executor, checkpoint=path)
+            assert executor.num_anneals < 10
+            assert [r.state for r in res] == [r.state for r in expected]
+            assert [r.value for r in res] == [r.value for r in expected]
+
+            # a completed job is read from the file
+            res = anneal(model, num_anneals=10, checkpoint=path,
+                         executor=PreemptedExecutor(0))
+            assert [r.state for r in res] == [r.state for r in expected]
+
+            with assert_raises(ValueError):
+                anneal(model, num_anneals=10, seed=5, checkpoint=path)
+            with assert_raises(ValueError):
+                anneal(model, num_anneals=9, seed=4, checkpoint=path)
+
+        # without an executor and without a seed
+        path = os.path.join(d, 'local')
+        res = anneal_quso(H, num_anneals=6, num_chunks=3, checkpoint=path)
+        res2 = anneal_quso(H, num_anneals=6, checkpoint=path)
+        assert [r.state for r in res] == [r.state for r in res2]
+        for r in res:
+            assert r.value == H.value(r.state)
+
+        # the chunks are appended, at most checkpoint_interval at a time
+        path = os.path.join(d, 'interval')
+        expected = anneal_quso(H, num_anneals=10, seed=4)
+        executor = PreemptedExecutor(10)
+        res = anneal_quso(H, num_anneals=10, seed=4, num_chunks=1,
+                          checkpoint=path, checkpoint_interval=3,
+                          executor=executor)
+        assert executor.n == 6
+        assert [r.state for r in res] == [r.state for r in expected]
+        with open(path, 'rb') as f:
+            records = []
+            while True:
+                try:
+                    records.append(pickle.load(f))
+                except EOFError:
+                    break
+        assert len(records) == 5
+        assert sorted(r[:2] for r in records[1:]) == [
+            (0, 3), (3, 3), (6, 3), (9, 1)
+        ]
+
+        # a record that was cut off while it was written is run again
+        size = os.path.getsize(path)
+        with open(path, 'r+b') as f:
+            f.truncate(size - 10)
+        executor = PreemptedExecutor(10)
+        res = anneal_quso(H, num_anneals=10, seed=4, checkpoint=path,
+                          checkpoint_interval=3, executor=executor)
+        assert executor.num_anneals in (1, 3)
+        assert [r.state for r in res] == [r.state for r in expected]
+        assert os.path.getsize(path) == size
+
+
+def test_anneal_top_k():
+
+    import os
+    import tempfile
+    from collections import Counter
+    from concurrent.futures import ThreadPoolExecutor
+
+    # more than 64 spins so that the packed states take several words
+    H = QUSO({(i, i + 1): 1 for i in range(69)})
+    H[(3,)] += 1
+    P = PUBO({(0, 1, 2): -3, (2, 3, 4): 2, (1, 4): 1, (0,): 1, (): 2})
+
+    for backend in BACKENDS:
+        for anneal, model in (
+            (anneal_quso, H), (anneal_qubo, H.to_qubo()),
+            (anneal_puso, P.to_puso()), (anneal_pubo, P)
+        ):
+            args = dict(num_anneals=50, anneal_duration=20, seed=2,
+                        backend=backend)
+            res = anneal(model, **args)
+            seen = Counter(tuple(sorted(r.state.items())) for r in res)
+            distinct = sorted(set(r.value for r in res))
+
+            top = anneal(model, top_k=5, **args)
+            assert len(top) == min(5, len(seen))
+            assert [r.value for r in top] == sorted(r.value for r in top)
+            assert top.best.value == res.best.value
+            # the kept values are the lowest values
+            assert top[-1].value <= distinct[min(4, len(distinct) - 1)]
+            for r in top:
+                assert r.count == seen[tuple(sorted(r.state.items()))]
+                assert np.isclose(r.value, model.value(r.state))
+
+            # every distinct state is kept if top_k is large enough
+            top = anneal(model, top_k=100, **args)
+            assert sum(r.count for r in top) == 50
+            assert len(top) == len(seen)
+
+            # merging the top states of chunks gives the same result (the
+            # NumPy backend draws its random numbers per chunk)
+            with ThreadPoolExecutor(2) as executor:
+                chunked = anneal(model, top_k=100, executor=executor,
+                                 num_chunks=4, **args)
+            assert sum(r.count for r in chunked) == 50
+            if backend == 'c':
+                assert sorted((r.value, r.count) for r in chunked) == sorted(
+                    (r.value, r.count) for r in top
+                )
+
+            values = anneal(model, values_only=True, **args)
+            assert isinstance(values, np.ndarray)
+            np.testing.assert_allclose(values, [r.value for r in res])
+            values = anneal(model, values_only=True, top_k=3, **args)
+            np.testing.assert_allclose(
+                values, [r.value for r in anneal(model, top_k=3, **args)]
+            )
+
+    # resuming a top_k job from a checkpoint
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'top')
+        expected = anneal_quso(H, num_anneals=20, seed=1, top_k=4)
+        res = anneal_quso(H, num_anneals=20, seed=1, top_k=4, num_chunks=5,
+                          checkpoint=path)
+        # ties at the cutoff may be broken differently
+        assert [r.value for r in res] == [r.value for r in expected]
+        assert anneal_quso(H, num_anneals=20, top_k=4, checkpoint=path) == res
+        with assert_raises(ValueError):
+            anneal_quso(H, num_anneals=20, seed=1, top_k=3, checkpoint=path)
+
+        path = os.path.join(d, 'values')
+        values = anneal_quso(H, num_anneals=20, seed=1, num_chunks=5,
+                             values_only=True, checkpoint=path)
+        np.testing.assert_allclose(
+            values, [r.value for r in anneal_quso(H, 20, seed=1)]
+        )
+
+    # empty models
+    res = anneal_qubo({(): 3}, num_anneals=4, top_k=2)
+    assert len(res) == 1 and res[0].count == 4 and res[0].value == 3
+    assert anneal_quso({(): 3}, 4, values_only=True).tolist() == [3] * 4
+    assert anneal_puso({}, 0, values_only=True).shape == (0,)
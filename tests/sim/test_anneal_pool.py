@@ -0,0 +1,123 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Contains tests for the AnnealPool object.
+"""
+
+from qubovert.sim import (
+    AnnealPool, anneal_quso, anneal_qubo, anneal_pubo, AnnealResults
+)
+from qubovert import QUSO, PUBO, PCBO, boolean_var
+from numpy.testing import assert_raises
+import numpy as np
+
+
+def test_anneal_pool_spin():
+
+    H = QUSO({(i, i + 1): 1 for i in range(20)})
+    H[(3,)] += 1
+
+    with AnnealPool(H, spin=True, processes=3) as pool:
+        assert pool.processes == 3
+
+        # the same streams as anneal_quso
+        res = pool.anneal(10, seed=3)
+        expected = anneal_quso(H, 10, seed=3)
+        assert [r.state for r in res] == [r.state for r in expected]
+        assert [r.value for r in res] == [r.value for r in expected]
+        assert all(r.spin for r in res)
+        assert res.best.value == -21
+
+        # the pool is reused between calls
+        res = pool.anneal(2, anneal_duration=10, in_order=False)
+        assert len(res) == 2
+        for r in res:
+            assert r.value == H.value(r.state)
+
+        assert pool.anneal(0) == AnnealResults()
+
+        init = {i: 1 for i in range(21)}
+        res = pool.anneal(4, initial_state=init, schedule=[0] * 5)
+        for r in res:
+            assert r.value <= H.value(init)
+
+    with assert_raises(RuntimeError):
+        pool.anneal(1)
+
+
+def test_anneal_pool_boolean():
+
+    P = PUBO({(0, 1, 2): -3, (2, 3, 4): 2, (1, 4): 1, (0,): 1, (): 2})
+    with AnnealPool(P, processes=2) as pool:
+        res = pool.anneal(5, seed=1)
+        expected = anneal_pubo(P, 5, seed=1)
+        assert [r.state for r in res] == [r.state for r in expected]
+        assert all(not r.spin for r in res)
+        for r in res:
+            assert np.isclose(r.value, P.value(r.state))
+
+    Q = P.to_qubo()
+    with AnnealPool(Q, processes=2, backend='numpy') as pool:
+        res = pool.anneal(6, seed=0)
+        assert len(res) == 6
+        for r in res:
+            assert np.isclose(r.value, Q.value(r.state))
+        assert res.best.value == anneal_qubo(Q, 20, seed=0).best.value
+
+    # one-hot groups
+    x = {(i, j): boolean_var((i, j)) for i in range(3) for j in range(3)}
+    H = PCBO()
+    for i in range(3):
+        H += sum((j - 1) * (-1) ** i * x[(i, j)] for j in range(3))
+        H.add_constraint_eq_zero(sum(x[(i, j)] for j in range(3)) - 1, lam=0)
+    with AnnealPool(H, processes=2, one_hot_groups=H.one_hot_groups,
+                    reorder=True) as pool:
+        res = pool.anneal(6, seed=0)
+        for r in res:
+            assert H.is_solution_valid(r.state)
+        with assert_raises(ValueError):
+            pool.anneal(1, initial_state={v: 0 for v in x})
+
+    # the default schedule ignores the penalties of the one-hot groups
+    C = np.random.RandomState(0).randint(1, 10, (12, 12))
+    x = {(i, j): boolean_var((i, j)) for i in range(12) for j in range(12)}
+    H = PCBO()
+    for i in range(12):
+        H += sum(int(C[i, j]) * x[(i, j)] for j in range(12))
+        H.add_constraint_eq_zero(
+            sum(x[(i, j)] for j in range(12)) - 1, lam=1000
+        )
+    with AnnealPool(H, processes=2, one_hot_groups=H.one_hot_groups) as pool:
+        res = pool.anneal(10, seed=0)
+        assert all(r.value == C.min(axis=1).sum() for r in res)
+
+    # empty models
+    with AnnealPool({(): 3}, processes=1) as pool:
+        res = pool.anneal(2)
+        assert [(r.state, r.value) for r in res] == [({}, 3), ({}, 3)]
+
+
+def test_anneal_pool_dead_worker():
+
+    # the task is never done, so the call must not wait for it forever
+    H = QUSO({(i, i + 1): 1 for i in range(20)})
+    pool = AnnealPool(H, spin=True, processes=1)
+    pool._workers[0].kill()
+    pool._workers[0].join()
+    with assert_raises(RuntimeError):
+        pool.anneal(10)
+    assert pool.processes == 0
+    with assert_raises(RuntimeError):
+        pool.anneal(1)
@@ -42,6 +42,15 @@ def test_annealresult():
     assert eval(repr(res)) == res
     str(res)
 
+    res = AnnealResult({1: 1, 2: -1}, 2, True, 5)
+    assert res.count == 5
+    assert res.copy() == res
+    assert res != AnnealResult({1: 1, 2: -1}, 2, True)
+    assert res.to_boolean() == AnnealResult({1: 0, 2: 1}, 2, False, 5)
+    assert res.to_boolean().to_spin() == res
+    assert eval(repr(res)) == res
+    assert 'count: 5' in str(res)
+
 
 def test_annealresult_comparison():
 
@@ -264,3 +273,134 @@ def test_extend_add():
     temp.extend(res0)
     assert temp.best.value == 1
     assert type(temp) == AnnealResults
+
+
+def test_annealresults_unique_counts():
+
+    res = AnnealResults([
+        AnnealResult({0: 1, 1: -1}, -1, True),
+        AnnealResult({0: -1, 1: 1}, -1, True),
+        AnnealResult({0: 1, 1: -1}, -1, True),
+        AnnealResult({0: 1, 1: -1}, -1, True, 3),
+        AnnealResult({0: 0, 1: 1}, 2, False),
+    ])
+    unique = res.unique()
+    assert unique == AnnealResults([
+        AnnealResult({0: 1, 1: -1}, -1, True, 5),
+        AnnealResult({0: -1, 1: 1}, -1, True),
+        AnnealResult({0: 0, 1: 1}, 2, False),
+    ])
+    assert unique.best == unique[0]
+    counts, frequencies = res.counts()
+    assert counts.tolist() == [5, 1, 1]
+    assert frequencies.tolist() == [5 / 7, 1 / 7, 1 / 7]
+
+    # the states are copied
+    unique[0].state[0] = -1
+    assert res[0].state == {0: 1, 1: -1}
+
+    # the order of the labels does not matter, but missing labels do
+    res = AnnealResults([
+        AnnealResult({0: 1, 1: 0}, 0, False),
+        AnnealResult({1: 0, 0: 1}, 0, False),
+        AnnealResult({0: 1}, 0, False),
+        AnnealResult({0: 1, 1: 0, 2: 0}, 0, False),
+    ])
+    assert res.counts()[0].tolist() == [2, 1, 1]
+    assert [r.state for r in res.unique()] == [
+        {0: 1, 1: 0}, {0: 1}, {0: 1, 1: 0, 2: 0}
+    ]
+
+    # many spins, so that the rows take several bytes
+    res = AnnealResults()
+    for i in range(100):
+        res.add_state({j: (-1) ** (i % 3 == j) for j in range(20)}, i % 3, 1)
+    assert res.counts()[0].tolist() == [34, 33, 33]
+    assert [r.value for r in res.unique()] == [0, 1, 2]
+
+    assert AnnealResults().unique() == AnnealResults()
+    assert AnnealResults().counts()[0].tolist() == []
+
+
+def test_annealresults_save_load():
+
+    import os
+    import tempfile
+    import numpy as np
+    from numpy.testing import assert_raises
+    from qubovert.sim import AnnealResultsFile
+
+    res = AnnealResults()
+    for i in range(100):
+        # more than 8 variables so that the rows take several bytes
+        res.add_state({j: (-1) ** (i % 3 == j) for j in range(11)}, -i, True)
+    res.add_state({'a': 0, ('b', 1): 1}, .5, False, 4)
+    res.add_state({('b', 1): 1}, 3, False)
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'res')
+        res.save(path, metadata={'seed': 3, 'schedule': [(1, 2)]})
+        loaded = AnnealResults.load(path)
+        assert type(loaded) is AnnealResults
+        assert loaded == res
+        assert loaded.best == res.best
+
+        f = AnnealResults.load(path, mmap=True)
+        assert isinstance(f, AnnealResultsFile)
+        assert isinstance(f.values, np.memmap)
+        assert len(f) == len(res)
+        assert f.metadata == {'seed': 3, 'schedule': [(1, 2)]}
+        assert f.labels == list(range(11)) + ['a', ('b', 1)]
+        assert f.best == res.best
+        assert f[0] == res[0] and f[-1] == res[-1] and f[100] == res[100]
+        assert f[10:20] == res[10:20]
+        assert f[np.flatnonzero(f.values > 0)] == res[100:]
+        assert list(f) == list(res)
+        assert f.counts.tolist() == [1] * 100 + [4, 1]
+        assert f.state_array(0).tolist() == [-1] + [1] * 10 + [0, 0]
+        with assert_raises(IndexError):
+            f[102]
+        del f
+
+        AnnealResults().save(path)
+        assert AnnealResults.load(path) == AnnealResults()
+        assert AnnealResults.load(path, mmap=True).best is None
+
+        with open(path, 'wb') as f:
+            f.write(b'not results')
+        with assert_raises(ValueError):
+            AnnealResults.load(path)
+
+
+def test_annealresults_merge():
+
+    parts = [
+        AnnealResults(AnnealResult({0: i}, v, False) for v in values)
+        for i, values in enumerate(([3, 1, 2], [], [0, 5], [1, 0]))
+    ]
+    merged = AnnealResults.merge(*parts)
+    assert type(merged) is AnnealResults
+    assert [r.value for r in merged] == [3, 1, 2, 0, 5, 1, 0]
+    assert merged.best is parts[2][0]
+    assert AnnealResults.merge().best is None
+    assert AnnealResults.merge(iter(parts[0])).best is parts[0][1]
+
+    # adding to empty results
+    res = AnnealResults()
+    res += parts[0]
+    assert res.best is parts[0][1]
+    res += []
+    res.extend(parts[1])
+    assert res.best is parts[0][1]
+    assert (AnnealResults() + parts[3]).best is parts[3][1]
+
+    for p in parts:
+        p.sort()
+    for inputs in (parts, [iter(p) for p in parts]):
+        merged = AnnealResults.merge_sorted(*inputs)
+        assert type(merged) is AnnealResults
+        assert [r.value for r in merged] == [0, 0, 1, 1, 2, 3, 5]
+        # ties keep the order of the inputs
+        assert [r.state[0] for r in merged[:4]] == [2, 3, 0, 3]
+        assert merged.best is merged[0]
+    assert AnnealResults.merge_sorted().best is None
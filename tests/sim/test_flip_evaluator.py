@@ -0,0 +1,111 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Contains tests for the FlipEvaluator object.
+"""
+
+from qubovert.sim import FlipEvaluator
+from qubovert import PUBO, PUSO, QUBO, PCBO
+from numpy.testing import assert_raises
+from numpy import allclose
+import random
+
+
+def _check_walk(model, state, spin):
+
+    evaluator = FlipEvaluator(model, state)
+    assert allclose(evaluator.energy, model.value(evaluator.state))
+    random.seed(0)
+    labels = list(evaluator.state)
+    for _ in range(50):
+        v = random.choice(labels)
+        x = evaluator.state
+        value = model.value(x)
+        x[v] = -x[v] if spin else 1 - x[v]
+        assert allclose(evaluator.flip_delta(v), model.value(x) - value)
+        evaluator.flip(v)
+        assert evaluator.state == x
+        assert allclose(evaluator.energy, model.value(x))
+
+        # the local fields are the derivatives
+        for u, field in evaluator.local_fields.items():
+            y = evaluator.state
+            y[u] = 1
+            high = model.value(y)
+            y[u] = -1 if spin else 0
+            low = model.value(y)
+            assert allclose(field, (high - low) / (2 if spin else 1))
+
+
+def test_flip_evaluator_boolean():
+
+    P = PUBO({
+        ('a', 'b', 'c'): 2, ('b',): -1, ('a', 'c'): 1.5, ('c', 'd'): -3,
+        ('a', 'b', 'c', 'd'): 0.5, (): 3
+    })
+    _check_walk(P, None, False)
+    _check_walk(P, {'a': 1, 'c': 1}, False)
+    _check_walk(QUBO({(0, 1): -2, (1, 2): 1, (0,): 1}), None, False)
+
+    H = PCBO({('a', 'b'): -1})
+    H.add_constraint_eq_zero({('a',): 1, ('b',): 1, (): -1}, lam=2)
+    _check_walk(H, None, False)
+
+
+def test_flip_evaluator_spin():
+
+    P = PUSO({
+        ('a', 'b', 'c'): 2, ('b',): -1, ('a', 'c'): 1.5, ('c', 'd'): -3,
+        ('a', 'b', 'c', 'd'): 0.5, (): 3
+    })
+    _check_walk(P, None, True)
+    _check_walk(P, {'a': -1, 'd': -1}, True)
+
+    # plain dicts are boolean unless told otherwise
+    evaluator = FlipEvaluator({(0, 1): 1}, spin=True)
+    assert evaluator.energy == 1
+    assert evaluator.flip_delta(0) == -2
+    assert FlipEvaluator({(0, 1): 1}).energy == 0
+
+
+def test_flip_evaluator_cancelled_terms():
+
+    # 'b' is still a variable of the model after its terms cancel
+    for model, spin in (QUBO(), False), (PUSO(), True):
+        model[('a',)] += 1
+        model[('a', 'b')] += 2
+        model[('a', 'b')] -= 2
+        assert 'b' in model.variables
+        evaluator = FlipEvaluator(model)
+        assert evaluator.local_field('b') == 0
+        assert evaluator.flip_delta('b') == 0
+        evaluator.flip('b')
+        assert evaluator.state == (
+            {'a': 1, 'b': -1} if spin else {'a': 0, 'b': 1}
+        )
+        _check_walk(model, None, spin)
+
+
+def test_flip_evaluator_errors():
+
+    evaluator = FlipEvaluator(QUBO({('a',): 1, (): 2}))
+    assert evaluator.energy == 2
+    assert evaluator.local_field('a') == 1
+    with assert_raises(KeyError):
+        evaluator.flip('b')
+    with assert_raises(KeyError):
+        evaluator.flip_delta('b')
+    with assert_raises(KeyError):
+        evaluator.local_field('b')
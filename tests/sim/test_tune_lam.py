@@ -0,0 +1,118 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Contains tests for the functions in the ``qubovert.sim._tune_lam`` file.
+"""
+
+from qubovert.sim import tune_lam
+from qubovert.utils import QUBOVertWarning
+from qubovert import PCBO, PCSO, boolean_var, spin_var
+from numpy.testing import assert_warns, assert_allclose
+from sympy import Symbol
+
+
+def test_tune_lam_pcbo():
+
+    # the constraint is enforced by the ground state iff a > 1
+    a = Symbol('a')
+    H = PCBO()
+    for i in range(3):
+        H[(i,)] -= 1
+    H.add_constraint_eq_zero(H.copy() + 1, lam=a)
+
+    lam, res = tune_lam(H, {a: 1}, seed=0)
+    assert set(lam) == {a}
+    assert 1 < lam[a] <= 1.1
+    assert len(res) == 100
+    assert sum(H.is_solution_valid(r.state) for r in res) >= 90
+    assert H.is_solution_valid(res.best.state)
+    assert_allclose(res.best.value, H.subs(lam).value(res.best.state))
+
+    # starting above the threshold shrinks the penalty
+    assert 1 < tune_lam(H, {a: 20}, seed=0)[0][a] <= 1.1
+
+
+def test_tune_lam_pcbo_multiple_symbols():
+
+    a, b = Symbol('a'), Symbol('b')
+    x = {i: boolean_var(i) for i in range(6)}
+    H = PCBO(-x[0] * x[1] * x[2] - 3 * x[4] - 3 * x[5])
+    H.add_constraint_eq_zero(x[0] + x[1] + x[2] - 1, lam=a)
+    H.add_constraint_le_zero(x[0] + x[4] + x[5] - 1, lam=b)
+
+    lam, res = tune_lam(H, {a: 1, b: 1}, target=.8, seed=1)
+    assert set(lam) == {a, b}
+    assert sum(H.is_solution_valid(r.state) for r in res) >= 80
+    assert H.is_solution_valid(res.best.state)
+
+
+def test_tune_lam_blame_inequality():
+
+    from qubovert.sim._tune_lam import (
+        _split_penalties, _constraint_symbols, _violated_symbols
+    )
+
+    a, b = Symbol('a'), Symbol('b')
+    x = {i: boolean_var(i) for i in range(6)}
+    H = PCBO(-x[0] * x[1] * x[2])
+    H.add_constraint_eq_zero(x[0] + x[1] + x[2] - 1, lam=a)
+    H.add_constraint_le_zero(x[3] + x[4] + x[5] - 2, lam=b)
+    symbols = [a, b]
+    base, penalties = _split_penalties(H.to_pubo(), symbols)
+    constraints = _constraint_symbols(H, penalties, symbols)
+    assert [(kind, owners) for kind, _, owners in constraints] == [
+        ('eq', {a}), ('le', {b})
+    ]
+
+    # the inequality is satisfied but its slack ancillas are not, so its
+    # penalty is positive
+    solution = {0: 1, 1: 1, 2: 0, 3: 1, 4: 0, 5: 0, '__a0': 1, '__a1': 1}
+    state = {H.mapping[v]: s for v, s in solution.items()}
+    assert penalties[1].value(state) > 0
+    assert _violated_symbols(constraints, solution) == {a}
+
+    solution.update({2: 1, 4: 1, 5: 1})
+    assert _violated_symbols(constraints, solution) == {a, b}
+    solution.update({1: 0, 2: 0, 5: 0})
+    assert not _violated_symbols(constraints, solution)
+
+
+def test_tune_lam_pcso():
+
+    # the constraint is enforced by the ground state iff a > 1/2
+    a = Symbol('a')
+    H = PCSO()
+    for i in range(3):
+        H += spin_var(i)
+    H.add_constraint_eq_zero(H.copy() + 1, lam=a)
+
+    lam, res = tune_lam(H, {a: 1}, seed=0)
+    assert .5 < lam[a] < 1
+    assert sum(H.is_solution_valid(r.state) for r in res) >= 90
+    assert all(v in (1, -1) for v in res.best.state.values())
+
+
+def test_tune_lam_warnings():
+
+    a = Symbol('a')
+    H = PCBO()
+    for i in range(3):
+        H[(i,)] -= 1
+    H.add_constraint_eq_zero(H.copy() + 1, lam=a)
+
+    with assert_warns(QUBOVertWarning):
+        lam, res = tune_lam(H, {a: .01}, max_iter=2, seed=0)
+    assert lam[a] == .02
+    assert len(res) == 100
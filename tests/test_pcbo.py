@@ -1830,3 +1830,114 @@ def test_pcbo_special_constraint_eq():
     H2 = PCBO().add_constraint_eq_zero(x * y - z)
     H3 = PCBO().add_constraint_eq_AND(z, x, y)
     assert H1 == H2 == H3
+
+
+def test_pcbo_linear_constraint_squared():
+
+    P = PUBOMatrix({(i,): i - 3 for i in range(7)})
+    P[()] = 4
+    for lam in (1, 2.5, Symbol('a')):
+        H = PCBO().add_constraint_eq_zero(P, lam=lam,
+                                          suppress_warnings=True)
+        assert H == PCBO(lam * P * P)
+
+    # too big for int64
+    P = PUBOMatrix({(0,): 2 ** 40, (1,): 2 ** 40, (): -2 ** 40})
+    H = PCBO().add_constraint_eq_zero(P)
+    assert H == PCBO(P * P)
+
+    P = PUBOMatrix({(0,): 1, (1,): 2, (2,): -1, (): -1})
+    H = PCBO().add_constraint_le_zero(P, lam=2)
+    assert H.is_solution_valid(H.solve_bruteforce())
+    for sol in H.solve_bruteforce(True):
+        assert P.value(sol) <= 0
+
+
+def test_pcbo_one_hot_groups():
+
+    x = [boolean_var(i) for i in range(4)]
+    H = PCBO(x[0] * x[1])
+    assert H.one_hot_groups == []
+
+    H.add_constraint_eq_zero(x[0] + x[1] + x[2] - 1)
+    H.add_constraint_eq_zero(2 * x[0] + x[3] - 1)  # not one-hot
+    H.add_constraint_eq_zero(x[0] * x[3] - 1)  # not one-hot
+    H.add_constraint_eq_zero(3 - 3 * x[3] - 3 * x[1])
+    H.add_constraint_le_zero(x[0] + x[3] - 1)
+    assert H.one_hot_groups == [(0, 1, 2), (3, 1)]
+    assert H.copy().one_hot_groups == H.one_hot_groups
+
+
+def test_pcbo_to_arrays():
+
+    H = PCBO({('a', 'b', 'c'): 2, ('b',): -1, (): 1})
+    H.add_constraint_eq_zero({('a',): 1, ('c',): -1}, lam=3)
+    offset, term_ptr, variables, coefficients, reverse_mapping = (
+        H.to_arrays()
+    )
+    assert offset == 1
+    assert reverse_mapping == H.reverse_mapping
+    assert {
+        tuple(sorted(variables[term_ptr[t]:term_ptr[t+1]])): coefficients[t]
+        for t in range(len(coefficients))
+    } == {k: v for k, v in H.to_pubo().items() if k}
+
+
+def test_pcbo_from_arrays():
+
+    H = PCBO.from_arrays([0, 3, 4, 6], [0, 1, 2, 1, 0, 0], [2, -1, 3],
+                         offset=1, labels=['a', 'b', 'c'])
+    assert H == PCBO({('a', 'b', 'c'): 2, ('b',): -1, ('a',): 3, (): 1})
+    assert H.mapping == {'a': 0, 'b': 1, 'c': 2}
+    assert H.degree == 3 and H.num_binary_variables == 3
+    assert not H.constraints
+    H.add_constraint_eq_zero({('a',): 1, ('c',): -1}, lam=3)
+    assert H.is_solution_valid({'a': 1, 'b': 0, 'c': 1})
+
+
+def test_pcbo_product_labels():
+
+    # labels are assigned in the order that variables first appear in the
+    # keys of a product, the same as multiplying term by term.
+    P = PCBO({(3,): 1, (1,): 1, (0,): -1, (): -1})
+    Q = PCBO({(2,): 1, (0, 3): 2, (1,): -1})
+    assert list(P * Q) == [
+        (2, 3), (1, 3), (1, 2), (0, 1, 3), (0, 2), (0, 1), (2,), (0, 3)
+    ]
+    assert list((P * Q).mapping) == [3, 2, 0, 1]
+    assert list(P ** 2) == [(1, 3), (0, 3), (0, 1), (0,), (3,), (1,), ()]
+    assert list((P ** 2).mapping) == [3, 1, 0]
+
+    H = PCBO()
+    H += 2 * P ** 2
+    assert list(H.mapping) == [1, 3, 0]
+    assert H.to_qubo() == {
+        (0, 1): 4, (1, 2): -4, (0, 2): -4, (2,): 6, (1,): -2, (0,): -2, (): 2
+    }
+
+    H = PCBO(P * Q)
+    H *= P
+    assert list(H.mapping) == [2, 3, 1, 0]
+
+
+def test_pcbo_constraint_labels():
+
+    # the square of a linear constraint has the values of ``lam * P * P``,
+    # and the labels of new variables are added in the order that they
+    # appear in the constraint.
+    P = {(3,): 1, (1,): 1, (0,): -1, (): -1}
+    H = PCBO().add_constraint_eq_zero(P, lam=2)
+    assert H == 2 * PCBO(P) * PCBO(P)
+    assert list(H.mapping) == [3, 1, 0]
+
+    P = {(): 1, (4,): 2, (2,): -1, (0,): -1, (5,): -1}
+    H = PCBO({(0, 2): 1}).add_constraint_eq_zero(P, lam=2)
+    assert H == {(0, 2): 1} + 2 * PCBO(P) * PCBO(P)
+    assert list(H.mapping) == [0, 2, 4, 5]
+
+    H = PCBO().add_constraint_le_zero(
+        {(2,): 1, (0,): 1, (5,): 1, (): -2}, lam=2
+    )
+    assert list(H.mapping) == [2, 0, 5, '__a0', '__a1']
+    P = PCBO({(2,): 1, (0,): 1, (5,): 1, ('__a0',): 1, ('__a1',): 2})
+    assert H == 2 * (P - 2) * (P - 2)
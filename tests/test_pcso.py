@@ -16,6 +16,7 @@
 Contains tests for the PCSO class.
 """
 
+from itertools import product
 from qubovert import PCSO, spin_var, integer_var
 from qubovert.utils import (
     solve_qubo_bruteforce, solve_quso_bruteforce,
@@ -1099,3 +1100,84 @@ def test_pcso_constraints_warnings():
 
     with assert_warns(QUBOVertWarning):  # always satisfied
         PCSO().add_constraint_ge_zero({(): 1, (0,): .5})
+
+
+def test_pcso_one_hot_groups():
+
+    z = [spin_var(i) for i in range(4)]
+    H = PCSO(z[0] * z[1])
+    assert H.one_hot_groups == []
+
+    # spin version of x0 + x1 + x2 == 1
+    H.add_constraint_eq_zero(z[0] + z[1] + z[2] - 1)
+    H.add_constraint_eq_zero(z[0] + z[3] - 1)  # not one-hot
+    H.add_constraint_eq_zero(-2 * z[3] - 2 * z[1])
+    H.add_constraint_eq_zero(z[0] + z[1] + z[2] + z[3] - 2)
+    assert H.one_hot_groups == [(0, 1, 2), (3, 1), (0, 1, 2, 3)]
+
+
+def test_pcso_linear_constraint_squared():
+
+    H = PUSOMatrix({(i,): i - 3 for i in range(7)})
+    H[()] = 1
+    for lam in (1, 2.5, Symbol('a')):
+        P = PCSO().add_constraint_eq_zero(H, lam=lam)
+        assert P == PCSO(lam * H * H)
+
+    # not satisfiable, so it goes through the PCBO and warns
+    H = PUSOMatrix({(0,): 1, (1,): 1, (): 3})
+    with assert_warns(QUBOVertWarning):
+        PCSO().add_constraint_eq_zero(H)
+
+
+def test_pcso_product_labels():
+
+    # labels are assigned in the order that variables first appear in the
+    # keys of a product, the same as multiplying term by term.
+    P = PCSO({(3,): 1, (1,): 1, (0,): -1, (): -1})
+    Q = PCSO({(2,): 1, (0, 3): 2, (1,): -1})
+    assert list(P * Q) == [
+        (2, 3), (0,), (1, 3), (1, 2), (0, 1, 3), (), (0, 2), (3,), (0, 1),
+        (2,), (0, 3), (1,)
+    ]
+    assert list((P * Q).mapping) == [3, 2, 0, 1]
+    assert list(P ** 2) == [(), (1, 3), (0, 3), (3,), (0, 1), (1,), (0,)]
+    assert list((P ** 2).mapping) == [3, 1, 0]
+
+    H = PCSO()
+    H += 2 * P ** 2
+    assert list(H.mapping) == [1, 3, 0]
+    assert H.to_quso() == {
+        (): 8, (0, 1): 4, (1, 2): -4, (1,): -4, (0, 2): -4, (0,): -4, (2,): 4
+    }
+
+    H = PCSO(P * Q)
+    H *= P
+    assert list(H.mapping) == [2, 3, 1, 0]
+
+
+def test_pcso_constraint_labels():
+
+    # the square of a linear constraint has the values of ``lam * H * H``,
+    # and the labels of new variables are added in the order that they
+    # appear in the constraint.
+    P = {(3,): 1, (1,): 1, (0,): -1}
+    H = PCSO().add_constraint_eq_zero(P, lam=2)
+    assert H == 2 * PCSO(P) * PCSO(P)
+    assert list(H.mapping) == [3, 1, 0]
+
+    P = {(0,): 1, (5,): 1, (): -.5, (4,): .5, (7,): .5}
+    H = PCSO({(4, 7): 1}).add_constraint_eq_zero(P, lam=2)
+    assert H == {(4, 7): 1} + 2 * PCSO(P) * PCSO(P)
+    assert list(H.mapping) == [4, 7, 0, 5]
+
+    P = {(3,): 1, (0,): 1, (2,): 1, (): -1}
+    H = PCSO().add_constraint_lt_zero(P, lam=2)
+    assert list(H.mapping) == [3, 0, 2, '__a0', '__a1']
+    for z in product((1, -1), repeat=3):
+        state = dict(zip((3, 0, 2), z))
+        penalty = min(
+            H.value({**state, '__a0': a0, '__a1': a1})
+            for a0 in (1, -1) for a1 in (1, -1)
+        )
+        assert (penalty == 0) == (PCSO(P).value(state) < 0)
@@ -16,7 +16,8 @@
 Contains tests for the PUBO class.
 """
 
-from qubovert import PUBO
+from itertools import product
+from qubovert import PUBO, PUSO
 from qubovert.utils import (
     solve_qubo_bruteforce, solve_quso_bruteforce,
     solve_pubo_bruteforce, solve_puso_bruteforce,
@@ -445,6 +446,88 @@ def test_pubo_degree_reduction_pairs():
     assert quso2.num_binary_variables - pubo.num_binary_variables == 9
 
 
+def test_pubo_degree_reduction_frequent_pairs():
+
+    # (0, 1) is in every term, so it should be reduced once and then used in
+    # all of them.
+    pubo = PUBO({
+        (0, 1, 2, 3): 1, (0, 1, 2, 4): -2, (0, 1, 3, 4): 3, (0, 1, 5): -1
+    })
+    qubo = pubo.to_qubo()
+    assert qubo.num_binary_variables - pubo.num_binary_variables == 3
+    assert pubo.to_pubo(3).num_binary_variables == 7
+
+    for model in qubo, pubo.to_pubo(3):
+        solution = solve_pubo_bruteforce(model)[1]
+        assert allclose(
+            pubo.value(pubo.convert_solution(solution)),
+            solve_pubo_bruteforce(pubo)[0]
+        )
+    assert allclose(
+        solve_qubo_bruteforce(qubo)[0], solve_pubo_bruteforce(pubo)[0]
+    )
+
+
+def test_pubo_degree_reduction_zero_terms():
+
+    # 0 and 1 are mapped even though their term is zero, so the ancillas
+    # must not reuse their labels.
+    pubo = PUBO({(0, 1): 0, (2, 3, 4, 5): 1})
+    assert pubo.num_binary_variables == 4
+    for model, ancillas in (pubo.to_qubo(), 2), (pubo.to_pubo(3), 1):
+        assert not set(model.variables) & {0, 1}
+        assert len(model.variables) == 4 + ancillas
+        assert min(
+            model.value(dict(enumerate(x)))
+            for x in product((0, 1), repeat=model.max_index + 1)
+        ) == 0
+
+    quso = PUSO({(0, 1): 0, (2, 3, 4, 5): 1}).to_quso()
+    assert not set(quso.variables) & {0, 1}
+    assert len(quso.variables) == 6
+
+
+def test_pubo_degree_reduction_methods():
+
+    pubo = PUBO({
+        ('a', 'b', 'c', 'd', 'e'): -3, ('b', 'c', 'd', 'e', 'f'): 2,
+        ('a', 'c', 'e', 'f'): -1, ('a', 'b'): 1, ('f',): -1, (): 2
+    })
+    e0 = solve_pubo_bruteforce(pubo)[0]
+    for reduction in 'substitution', 'freedman', 'ishikawa':
+        qubo = pubo.to_qubo(reduction=reduction)
+        e, solution = solve_qubo_bruteforce(qubo)
+        assert allclose(e, e0)
+        assert allclose(pubo.value(pubo.convert_solution(solution)), e0)
+        for deg in 2, 3, 4:
+            e = solve_pubo_bruteforce(
+                pubo.to_pubo(deg, reduction=reduction)
+            )[0]
+            assert allclose(e, e0)
+        assert allclose(
+            solve_quso_bruteforce(pubo.to_quso(reduction=reduction))[0], e0
+        )
+
+    # a negative term takes one ancilla, and a positive term of degree d takes
+    # (d - 1) // 2 ancillas.
+    pubo = PUBO({(0, 1, 2, 3, 4, 5): -1})
+    assert pubo.to_qubo().num_binary_variables == 10
+    assert pubo.to_qubo(reduction='freedman').num_binary_variables == 7
+    pubo = PUBO({(0, 1, 2, 3, 4, 5): 1})
+    assert pubo.to_qubo(reduction='freedman').num_binary_variables == 10
+    assert pubo.to_qubo(reduction='ishikawa').num_binary_variables == 8
+
+    # the sign of a symbol is unknown, so it is reduced by substitution
+    pubo = PUBO({(0, 1, 2): Symbol('a')})
+    assert (
+        pubo.to_qubo(reduction='ishikawa') == pubo.to_qubo() ==
+        pubo.to_qubo(reduction='freedman')
+    )
+
+    with assert_raises(ValueError):
+        pubo.to_qubo(reduction='split')
+
+
 def test_pubo_degree_reduction_lam():
 
     pubo = PUBO({
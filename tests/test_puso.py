@@ -446,6 +446,30 @@ def test_puso_degree_reduction_pairs():
     assert qubo2.num_binary_variables - puso.num_binary_variables == 9
 
 
+def test_puso_degree_reduction_methods():
+
+    puso = PUSO({
+        ('a', 'b', 'c', 'd'): -3, ('b', 'c', 'd', 'e'): 2,
+        ('a', 'c', 'e'): -1, ('a', 'b'): 1, ('e',): -1, (): 2
+    })
+    e0 = solve_puso_bruteforce(puso)[0]
+    for reduction in 'substitution', 'freedman', 'ishikawa':
+        quso = puso.to_quso(reduction=reduction)
+        e, solution = solve_quso_bruteforce(quso)
+        assert allclose(e, e0)
+        assert allclose(puso.value(puso.convert_solution(solution)), e0)
+        assert allclose(
+            solve_qubo_bruteforce(puso.to_qubo(reduction=reduction))[0], e0
+        )
+        assert allclose(
+            solve_puso_bruteforce(puso.to_puso(3, reduction=reduction))[0],
+            e0
+        )
+
+    with assert_raises(ValueError):
+        puso.to_quso(reduction='split')
+
+
 def test_puso_degree_reduction_lam():
 
     puso = PUSO({
@@ -402,3 +402,50 @@ def test_to_enumerated():
     dt = d.to_enumerated()
     assert type(dt) == QUBOMatrix
     assert dt == d.to_qubo()
+
+
+def test_qubo_to_arrays():
+
+    Q = QUBO({('b', 'a'): 2, ('c',): -1, ('a', 'c'): 1, (): 3})
+    offset, linear, row, col, values, reverse_mapping = Q.to_arrays()
+    expected = Q.to_qubo().to_arrays()
+    assert offset == expected[0]
+    assert linear.tolist() == expected[1].tolist()
+    assert {(i, j): v for i, j, v in zip(row, col, values)} == {
+        (i, j): v for i, j, v in zip(*expected[2:])
+    }
+    assert reverse_mapping == Q.reverse_mapping
+
+    Q.set_mapping({'c': 0, 'b': 1, 'a': 2})
+    offset, linear, indptr, col, values, _ = Q.to_arrays(csr=True)
+    assert linear.tolist() == [-1, 0, 0]
+    assert indptr.tolist() == [0, 1, 2, 2]
+    assert col.tolist() == [2, 2] and values.tolist() == [1, 2]
+
+
+def test_qubo_from_arrays():
+
+    labels = ['b', 'a', (0, 1), 'd']
+    Q = QUBO.from_arrays([1, 0, 2], [0, 1, 2], [1, 2, -1],
+                         linear=[0, 1, 0, 0], labels=labels)
+    expected = QUBO({('b', 'a'): 3, ((0, 1),): -1, ('a',): 1})
+    assert Q == expected and list(Q) == list(QUBO(Q))
+    assert Q.mapping == {'b': 0, 'a': 1, (0, 1): 2}
+    assert Q.variables == expected.variables
+    assert Q.to_qubo() == {(0, 1): 3, (2,): -1, (1,): 1}
+
+    # round trip
+    offset, linear, row, col, values, reverse_mapping = expected.to_arrays()
+    labels = [reverse_mapping[i] for i in range(len(reverse_mapping))]
+    Q = QUBO.from_arrays(row, col, values, linear, offset, labels)
+    assert Q == expected and Q.mapping == expected.mapping
+
+
+def test_qubo_value_batch():
+
+    Q = QUBO({('b', 'a'): 2, ('c',): -1, ('a', 'c'): 1, (): 3})
+    states = [[int(b) for b in format(i, '03b')] for i in range(8)]
+    assert allclose(
+        Q.value_batch(states),
+        [Q.value(Q.convert_solution(x)) for x in states]
+    )
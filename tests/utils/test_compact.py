@@ -0,0 +1,318 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Contains tests for the CompactPUBOMatrix and CompactPUSOMatrix classes.
+"""
+
+from qubovert.utils import (
+    CompactPUBOMatrix, CompactPUSOMatrix, PUBOMatrix, PUSOMatrix,
+    pubo_to_puso, puso_to_pubo, solve_pubo_bruteforce, solve_puso_bruteforce,
+    solve_qubo_bruteforce, solve_quso_bruteforce
+)
+from qubovert.utils._compact import _hash_key, _hash_terms
+from qubovert.sim import anneal_pubo, anneal_puso, anneal_temperature_range
+from qubovert import PUBO, PUSO
+import numpy as np
+import tracemalloc
+from numpy.testing import assert_raises, assert_allclose
+
+
+def _random_arrays(seed, num_terms=300, num_variables=12):
+
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(0, 5, num_terms)
+    term_ptr = np.concatenate(([0], np.cumsum(lengths)))
+    variables = rng.integers(0, num_variables, term_ptr[-1])
+    return term_ptr, variables, rng.normal(size=num_terms)
+
+
+def _assert_same(compact, model):
+
+    d = dict(compact.items())
+    assert set(d) == {k for k, v in model.items() if v}
+    for k, v in d.items():
+        assert_allclose(v, model[k], atol=1e-10)
+
+
+def test_compact_dict_api():
+
+    P = CompactPUBOMatrix({(0, 1): 1, (1, 2, 0): -2, (): 3})
+    assert P == {(0, 1): 1, (0, 1, 2): -2, (): 3}
+    assert P[(1, 0)] == 1 and P[(2, 1, 0, 0)] == -2 and P[()] == 3
+    assert P[(5,)] == 0 and (5,) not in P and (0, 1) in P
+    assert P.get((7,)) is None and P.get((1, 0)) == 1
+    assert len(P) == P.num_terms == 3
+    assert P.degree == 3 and P.max_index == 2 and P.offset == 3
+
+    P[(1, 0)] += 1
+    P[(2, 7)] = 4
+    P[()] = 0
+    assert P == {(0, 1): 2, (0, 1, 2): -2, (2, 7): 4}
+    assert P.variables == {0, 1, 2, 7} and P.num_binary_variables == 4
+
+    P[(0, 1, 2)] = 0
+    assert P == {(0, 1): 2, (2, 7): 4}
+    assert list(P) == list(P.keys()) == [(0, 1), (2, 7)]
+    assert list(P.values()) == [2, 4]
+    assert P.degree == 3
+    P.refresh()
+    assert P == {(0, 1): 2, (2, 7): 4} and P.degree == 2
+    P[(0, 1, 2)] = 5
+    assert P == {(0, 1): 2, (2, 7): 4, (0, 1, 2): 5}
+    assert repr(P) == repr({(0, 1): 2., (2, 7): 4., (0, 1, 2): 5.})
+
+    with assert_raises(KeyError):
+        P[(-1,)] = 1
+    with assert_raises(KeyError):
+        P[('a',)] = 1
+    with assert_raises(KeyError):
+        P[(1 << 31,)] = 1
+    assert ('a',) not in P
+
+    H = CompactPUSOMatrix({(0, 1): 1, (1, 2, 1): -2, (3, 3): 4})
+    assert H == {(0, 1): 1, (2,): -2, (): 4}
+    assert CompactPUSOMatrix() == {} and CompactPUSOMatrix().max_index is None
+
+
+def test_compact_many_updates():
+
+    # grow the arrays and the hash table many times, and check the lookups
+    # against a dict based model.
+    rng = np.random.default_rng(0)
+    P, D = CompactPUBOMatrix(), PUBOMatrix()
+    for _ in range(3000):
+        k = tuple(rng.integers(0, 30, rng.integers(1, 4)).tolist())
+        v = int(rng.integers(-2, 3))
+        P[k] += v
+        D[k] += v
+    assert P == D
+    assert all(P[k] == v for k, v in D.items())
+    P.refresh()
+    assert P == D and P.nbytes < 64 * len(P)
+
+
+def test_compact_hash():
+
+    term_ptr, variables, _ = _random_arrays(1)
+    lengths = np.diff(term_ptr)
+    nonempty = np.flatnonzero(lengths)
+    keys = [tuple(variables[term_ptr[t]:term_ptr[t+1]].tolist())
+            for t in nonempty]
+    ptr = np.concatenate(([0], np.cumsum(lengths[nonempty])))
+    assert _hash_terms(ptr, np.concatenate([k for k in keys])).tolist() == [
+        _hash_key(k) for k in keys
+    ]
+    assert _hash_key((3, 5, 7)) == _hash_key((7, 3, 5))
+
+
+def test_compact_arrays():
+
+    for spin, cls, matrix in (
+        (False, CompactPUBOMatrix, PUBOMatrix),
+        (True, CompactPUSOMatrix, PUSOMatrix)
+    ):
+        term_ptr, variables, coefficients = _random_arrays(2)
+        P = cls.from_arrays(term_ptr, variables, coefficients, 2)
+        D = matrix.from_arrays(term_ptr, variables, coefficients, 2)
+        _assert_same(P, D)
+
+        offset, term_ptr, variables, coefficients = P.to_arrays()
+        assert variables.dtype == np.int32
+        _assert_same(cls.from_arrays(term_ptr, variables, coefficients,
+                                     offset), D)
+        _assert_same(cls(P), D)
+        _assert_same(P.copy(), D)
+
+        for _ in range(5):
+            x = np.random.choice((-1, 1) if spin else (0, 1), 12)
+            assert_allclose(P.value(x), D.value(dict(enumerate(x))))
+            assert_allclose(P.value(dict(enumerate(x))), P.value(x))
+
+    with assert_raises(ValueError):
+        CompactPUBOMatrix.from_arrays([0, 1], [-1], [1])
+    with assert_raises(ValueError):
+        CompactPUBOMatrix.from_arrays([0, 1], [1 << 31], [1])
+
+
+def test_compact_arithmetic():
+
+    term_ptr, variables, coefficients = _random_arrays(3)
+    P = CompactPUBOMatrix.from_arrays(term_ptr, variables, coefficients)
+    D = PUBOMatrix.from_arrays(term_ptr, variables, coefficients)
+    small = {(0, 1): 1, (2,): -3, (): 1}
+
+    _assert_same(P + small, D + small)
+    _assert_same(small + P, D + small)
+    _assert_same(P - small, D - small)
+    _assert_same(small - P, small - D)
+    _assert_same(P + P, D + D)
+    _assert_same(P - P, {})
+    _assert_same(P + dict(D.items()), 2 * D)
+    _assert_same(P + 1, D + 1)
+    _assert_same(2 * P, 2 * D)
+    _assert_same(P * 3, D * 3)
+    _assert_same(P / 4, D / 4)
+    _assert_same(-P, -D)
+    _assert_same(P * 0, {})
+
+    temp = P.copy()
+    temp += small
+    temp -= D
+    _assert_same(temp, small)
+    temp *= 2
+    temp /= 4
+    _assert_same(temp, {k: v / 2 for k, v in small.items()})
+    _assert_same(P, D)
+
+    with assert_raises(TypeError):
+        P * small
+    with assert_raises(TypeError):
+        P * P
+
+
+def test_compact_conversions():
+
+    term_ptr, variables, coefficients = _random_arrays(4, 100, 8)
+    P = CompactPUBOMatrix.from_arrays(term_ptr, variables, coefficients)
+    D = PUBOMatrix.from_arrays(term_ptr, variables, coefficients)
+    H = CompactPUSOMatrix.from_arrays(term_ptr, variables, coefficients)
+    L = PUSOMatrix.from_arrays(term_ptr, variables, coefficients)
+
+    assert type(P.to_compact_puso()) == CompactPUSOMatrix
+    assert type(H.to_compact_pubo()) == CompactPUBOMatrix
+    _assert_same(P.to_compact_puso(), pubo_to_puso(D))
+    _assert_same(H.to_compact_pubo(), puso_to_pubo(L))
+    assert type(P.to_pubo()) == PUBOMatrix and type(P.to_puso()) == PUSOMatrix
+    _assert_same(P.to_pubo(), D)
+    _assert_same(P.to_puso(), pubo_to_puso(D))
+    _assert_same(H.to_puso(), L)
+    _assert_same(H.to_pubo(), puso_to_pubo(L))
+    _assert_same(H.to_compact_puso(), L)
+
+    # the variables are 0 to n-1, so to_qubo does not relabel them.
+    assert set(P.variables) == set(range(8))
+    assert P.to_qubo() == PUBO(D).to_qubo()
+    # the spin terms are converted to boolean terms with numpy, so the
+    # coefficients are summed in a different order than in ``PUSO``.
+    L, expected = H.to_quso(), PUSO(L).to_quso()
+    assert set(L) == set(expected)
+    assert_allclose([L[k] for k in expected], list(expected.values()))
+
+
+def test_compact_reduce_degree():
+
+    # the variables are not 0 to n-1, so they are relabeled in order, the
+    # same as in the PUBO built from the arrays.
+    term_ptr, variables, coefficients = _random_arrays(6, 200, 10)
+    variables = 3 * variables + 5
+    P = CompactPUBOMatrix.from_arrays(term_ptr, variables, coefficients)
+    D = PUBO._from_term_arrays(term_ptr, variables, coefficients, 0, None)
+    for reduction in ('substitution', 'freedman', 'ishikawa'):
+        for pairs in (None, {(8, 14), (5, 17), (4, 100)}):
+            assert (
+                P.to_qubo(pairs=pairs, reduction=reduction) ==
+                D.to_qubo(pairs=pairs, reduction=reduction)
+            )
+            Q = P.to_quso(pairs=pairs, reduction=reduction)
+            expected = D.to_quso(pairs=pairs, reduction=reduction)
+            assert set(Q) == set(expected)
+            assert_allclose([Q[k] for k in expected], list(expected.values()))
+
+    # the spin terms are converted to boolean terms in a different order
+    # than in ``PUSO``, so the pairs that are reduced may differ when they
+    # are tied, but the minimum is the same.
+    term_ptr, variables, coefficients = _random_arrays(7, 30, 6)
+    H = CompactPUSOMatrix.from_arrays(term_ptr, 2 * variables, coefficients)
+    expected = solve_puso_bruteforce(H.to_puso())[0]
+    for reduction in ('substitution', 'freedman', 'ishikawa'):
+        assert_allclose(
+            solve_qubo_bruteforce(H.to_qubo(reduction=reduction))[0],
+            expected
+        )
+        assert_allclose(
+            solve_quso_bruteforce(H.to_quso(reduction=reduction))[0],
+            expected
+        )
+
+    H = CompactPUSOMatrix({(5, 9): 1, (9,): -2, (3,): .5, (): 1, (3, 12): 2})
+    assert H.to_quso() == {
+        (0,): .5, (2,): -2, (0, 3): 2, (1, 2): 1, (): 1
+    }
+
+    with assert_raises(ValueError):
+        P.to_qubo(reduction='split')
+
+
+def test_compact_reduce_degree_memory():
+
+    # the terms are reduced from the arrays, so the PUBO of the model is
+    # never built, and the QUBO is never held twice. Compare the memory that
+    # is used on top of the QUBO that is returned.
+    rng = np.random.default_rng(7)
+    num_terms = 20000
+    lengths = rng.choice([2, 3, 4], num_terms, p=[.9, .05, .05])
+    term_ptr = np.zeros(num_terms + 1, dtype=np.int64)
+    np.cumsum(lengths, out=term_ptr[1:])
+    P = CompactPUBOMatrix.from_arrays(
+        term_ptr, 3 * rng.integers(0, 800, term_ptr[-1]) + 1,
+        rng.normal(size=num_terms)
+    )
+    assert P.degree == 4
+    P.to_qubo()
+
+    tracemalloc.start()
+    Q = P.to_qubo()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    compact_overhead = peak - size
+    del Q
+
+    tracemalloc.start()
+    Q = PUBO._from_term_arrays(*P._live_arrays(), 0, None).to_qubo()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    dict_overhead = peak - size
+
+    assert compact_overhead < .6 * dict_overhead
+
+
+def test_compact_anneal():
+
+    term_ptr, variables, coefficients = _random_arrays(5, 100, 8)
+    P = CompactPUBOMatrix.from_arrays(term_ptr, variables, coefficients)
+    H = P.to_compact_puso()
+    D = P.to_pubo()
+
+    assert_allclose(anneal_temperature_range(P), anneal_temperature_range(D))
+    assert_allclose(
+        anneal_temperature_range(H, spin=True),
+        anneal_temperature_range(P.to_puso(), spin=True)
+    )
+
+    for backend in ('c', 'numpy'):
+        res = anneal_pubo(P, num_anneals=5, seed=0, backend=backend)
+        for r in res:
+            assert set(r.state.values()) <= {0, 1}
+            assert_allclose(r.value, P.value(r.state))
+        assert_allclose(res.best.value, solve_pubo_bruteforce(D)[0])
+
+        res = anneal_puso(H, num_anneals=5, seed=0, backend=backend,
+                          reorder=True)
+        for r in res:
+            assert set(r.state.values()) <= {-1, 1}
+            assert_allclose(r.value, H.value(r.state))
+
+    res = anneal_puso(CompactPUSOMatrix({(): 2}), num_anneals=2)
+    assert [r.value for r in res] == [2, 2]
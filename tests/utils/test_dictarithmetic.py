@@ -16,7 +16,10 @@
 Contains tests for the DictArithmetic class.
 """
 
-from qubovert.utils import DictArithmetic
+from qubovert.utils import (
+    DictArithmetic, PUBOMatrix, PUSOMatrix, QUBOMatrix, QUSOMatrix
+)
+from qubovert import PUBO, PUSO, PCBO, PCSO, QUBO
 from sympy import Symbol
 from numpy.testing import assert_raises
 
@@ -274,3 +277,124 @@ def test_symbols():
 
     # rounding when symbols are involved.
     round(d)
+
+
+def test_product_and_power():
+
+    def slow_product(d, g):
+        # multiply term by term through __setitem__
+        res = d.__class__()
+        for k, v in d.items():
+            for ko, vo in g.items():
+                res[k + (ko if isinstance(ko, tuple) else (ko,))] += v * vo
+        return res
+
+    a = Symbol('a')
+    for t in (DictArithmetic, PUBOMatrix, PUSOMatrix, PUBO, PUSO, PCBO):
+        labels = (0, 1, 2) if t in (PUBOMatrix, PUSOMatrix) else ('x', 1, 'z')
+        x, y, z = labels
+        d = t({(x,): 1, (x, y): -2, (y, z): a, (): 3})
+        g = {(y,): 1.5, (z, x): 1, (x, x): -1, (): 2}
+        assert d * g == slow_product(d, g)
+        assert d * d == slow_product(d, d)
+        assert d ** 2 == d * d
+        assert (d ** 5).subs(a, 2) == (d * d * d * d * d).subs(a, 2)
+        assert t == DictArithmetic or (d * g).num_binary_variables == 3
+
+    # products of keys that are invalid on their own can be valid
+    L = QUSOMatrix({(2,): 1})
+    assert L * {(0, 1, 2): 1} == {(0, 1): 1}
+    Q = QUBOMatrix({(0, 1): 1})
+    with assert_raises(KeyError):
+        Q * {(2,): 1}
+
+    Q = QUBO({('a',): 1, ('b',): 1})
+    Q *= Q
+    assert Q == QUBO({('a',): 1, ('b',): 1, ('a', 'b'): 2})
+    assert Q.mapping == {'a': 0, 'b': 1}
+    assert Q.degree == 2
+
+
+def test_bulk():
+
+    d = DictArithmetic({(0, 1): 1})
+    with d.bulk() as staged:
+        staged[(0, 1)] -= 1
+        staged[(1, 0)] += 2
+        staged += 3
+    assert d == {(1, 0): 2, (): 3}
+
+    for cls in (PUBOMatrix, PUSOMatrix, QUBOMatrix, QUSOMatrix):
+        eager, bulk = cls({(0,): 1}), cls({(0,): 1})
+        keys = [(1, 0), (0, 1), (2,), (0,), (2, 1), (1, 2), ()]
+        for i, k in enumerate(keys):
+            eager[k] += i - 3
+        with bulk.bulk() as staged:
+            for i, k in enumerate(keys):
+                staged[k] += i - 3
+        assert eager == bulk
+        assert eager.degree == bulk.degree
+        assert eager.variables == bulk.variables
+        assert eager.num_binary_variables == bulk.num_binary_variables
+
+    for cls in (PUBO, PUSO, PCBO):
+        eager, bulk = cls({('c',): 1}), cls({('c',): 1})
+        keys = [('b', 'a', 'b'), ('d', 'a'), ('e',), ('a', 'd'), ('c', 'd')]
+        for i, k in enumerate(keys):
+            eager[k] -= i + 1
+        with bulk.bulk() as staged:
+            for i, k in enumerate(keys):
+                staged[k] -= i + 1
+        assert eager == bulk
+        assert eager.mapping == bulk.mapping
+        assert eager.reverse_mapping == bulk.reverse_mapping
+
+    # an invalid key adds nothing
+    Q = QUBO({('a',): 1})
+    with assert_raises(KeyError):
+        with Q.bulk() as staged:
+            staged[('b',)] += 1
+            staged[('a', 'b', 'c')] += 1
+    assert Q == {('a',): 1}
+    assert Q.mapping == {'a': 0}
+
+    # an exception inside the context adds nothing
+    P = PUBO()
+    with assert_raises(ZeroDivisionError):
+        with P.bulk() as staged:
+            staged[('a',)] += 1
+            staged[('b',)] += 1 / 0
+    assert P == {} and P.mapping == {}
+
+
+def test_copy():
+
+    for cls in (DictArithmetic, PUBOMatrix, PUSOMatrix, QUBOMatrix,
+                QUSOMatrix, PUBO, PUSO, PCBO, PCSO, QUBO):
+        d = cls({(0, 1): 1, (1,): -2, (): 3})
+        d[(0, 2)] += 1
+        d[(0, 2)] -= 1
+        d.name = 'd'
+        c = d.copy()
+        assert type(c) is cls
+        assert c == d == cls(d)
+        assert c.name is None
+        for attr in ('degree', 'variables', 'num_binary_variables',
+                     'mapping', 'reverse_mapping', 'constraints',
+                     'num_ancillas'):
+            if hasattr(d, attr):
+                assert getattr(c, attr) == getattr(cls(d), attr)
+        c[(1, 3)] += 1
+        assert (1, 3) not in d
+
+    H = PCBO({('a',): 1}).add_constraint_eq_zero({('a',): 1, ('b',): -1})
+    H.add_constraint_lt_zero({('a',): 1, ('b',): 1, (): -2})
+    G = H.copy()
+    assert G.constraints == H.constraints
+    assert G.num_ancillas == H.num_ancillas
+    G.add_constraint_ne_zero({('c',): 1})
+    assert 'ne' not in H.constraints
+    assert G.num_ancillas == H.num_ancillas
+    H.add_constraint_eq_zero({('c',): 1, ('d',): -1})
+    assert len(G.constraints['eq']) == 1
+    assert len(H.constraints['eq']) == 2
@@ -0,0 +1,102 @@
+#   Copyright 2020 Joseph T. Iosue
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+Contains tests for the LazyExpression class.
+"""
+
+from qubovert.utils import LazyExpression, DictArithmetic, QUBOMatrix
+from qubovert import PCBO, PCSO, QUBO, boolean_var, spin_var
+from sympy import Symbol
+from numpy.testing import assert_raises
+
+
+def test_lazy_sum():
+
+    x = [boolean_var(i) for i in range(10)]
+    y = [LazyExpression(v) for v in x]
+    eager = sum(i * x[i] for i in range(10)) - 3 * x[2] + 1
+    lazy = sum(i * y[i] for i in range(10)) - 3 * y[2] + 1
+    P = lazy.expand()
+    assert type(P) is PCBO
+    assert P == eager
+    assert P.mapping == eager.mapping
+
+    a = Symbol('a')
+    lazy = a * y[0] - y[1] / 2 + {(0, 1): 2} - 4 - y[3]
+    assert lazy.expand() == a * x[0] - x[1] / 2 + {(0, 1): 2} - 4 - x[3]
+    assert (5 - y[0]).expand() == 5 - x[0]
+    assert ({(1,): 2} + y[0]).expand() == x[0] + {(1,): 2}
+    assert ({(1,): 2} - y[0]).expand() == {(1,): 2} - x[0]
+    assert (+y[0]).expand() == x[0]
+    assert (-y[0]).expand() == -x[0]
+
+    # long chains do not recurse
+    lazy = sum(y[i % 10] for i in range(10000))
+    assert lazy.expand() == PCBO({(i,): 1000 for i in range(10)})
+
+
+def test_lazy_product():
+
+    z = [spin_var(i) for i in range(4)]
+    w = [LazyExpression(v) for v in z]
+    eager = ((z[0] + z[1]) * (z[1] - z[2]) * 2 + z[3]) ** 3
+    lazy = ((w[0] + w[1]) * (w[1] - w[2]) * 2 + w[3]) ** 3
+    H = lazy.expand()
+    assert type(H) is PCSO
+    assert H == eager
+    assert H.mapping == eager.mapping
+    assert ((w[0] + w[1]) * (w[0] - w[1])).expand() == {}
+    assert (w[0] * {(1,): 2}).expand() == z[0] * {(1,): 2}
+    assert ({(1,): 2} * w[0]).expand() == z[0] * {(1,): 2}
+
+    with assert_raises(ValueError):
+        w[0] ** 0
+    with assert_raises(ValueError):
+        w[0] ** 1.5
+
+
+def test_lazy_types():
+
+    Q = QUBOMatrix({(0, 1): 1})
+    lazy = {(0,): 1} + LazyExpression(Q) + {(1,): 2}
+    assert type(lazy.expand()) == QUBOMatrix
+    assert lazy.expand() == Q + {(0,): 1, (1,): 2}
+
+    lazy = LazyExpression({(0, 1): 1}) + LazyExpression(QUBO({(1,): 1}))
+    assert type(lazy.expand()) == QUBO
+    assert lazy.expand() == {(0, 1): 1, (1,): 1}
+
+    lazy = LazyExpression({(0, 1): 1}) * 2
+    assert type(lazy.expand()) == DictArithmetic
+    assert lazy.expand() == {(0, 1): 2}
+
+
+def test_lazy_methods():
+
+    x = [boolean_var(i) for i in range(3)]
+    y = [LazyExpression(v) for v in x]
+    eager = (x[0] + x[1] - 2 * x[2]) ** 2
+    lazy = (y[0] + y[1] - 2 * y[2]) ** 2
+
+    assert lazy.value({0: 1, 1: 1, 2: 1}) == eager.value({0: 1, 1: 1, 2: 1})
+    assert lazy.to_qubo() == eager.to_qubo()
+    assert lazy.to_quso() == eager.to_quso()
+    assert lazy.to_pubo() == eager.to_pubo()
+    assert lazy.to_puso() == eager.to_puso()
+
+    # expand returns a copy of the expansion
+    P = lazy.expand()
+    P[(0,)] += 1
+    assert lazy.expand() == eager
@@ -16,7 +16,8 @@
 Contains tests for the PUBOMatrix class.
 """
 
-from qubovert.utils import PUBOMatrix
+from qubovert.utils import PUBOMatrix, PUSOMatrix, QUBOMatrix
+from qubovert import PUBO
 from sympy import Symbol
 from numpy import allclose
 from numpy.testing import assert_raises
@@ -307,3 +308,97 @@ def test_pubomatrix_solve_bruteforce():
          {0: 1, 1: 1, 3: 0, 4: 0, 5: 0}]
     )
     assert all(allclose(P.value(s), 1) for s in sols)
+
+
+def test_pubomatrix_to_arrays():
+
+    P = PUBOMatrix({(0, 1, 2): 2, (1,): -1, (0, 3): 1, (): 3})
+    offset, term_ptr, variables, coefficients = P.to_arrays()
+    assert offset == 3
+    assert {
+        tuple(variables[term_ptr[t]:term_ptr[t+1]]): coefficients[t]
+        for t in range(len(coefficients))
+    } == {k: v for k, v in P.items() if k}
+
+    offset, term_ptr, variables, coefficients = PUBOMatrix().to_arrays()
+    assert offset == 0 and term_ptr.tolist() == [0]
+    assert not len(variables) and not len(coefficients)
+
+
+def test_pubomatrix_from_arrays():
+
+    P = PUBOMatrix.from_arrays(
+        [0, 3, 5, 7, 7, 9], [2, 0, 1, 1, 1, 1, 0, 3, 3], [2, -1, 1, 4, 0],
+        offset=-1
+    )
+    assert P == {(0, 1, 2): 2, (1,): -1, (0, 1): 1, (): 3}
+    assert P.degree == 3 and P.num_binary_variables == 3
+
+    expected = PUBOMatrix({(0, 3, 1): 2, (1, 2): -1, (4,): 1, (): 3})
+    offset, term_ptr, variables, coefficients = expected.to_arrays()
+    P = PUBOMatrix.from_arrays(term_ptr, variables, coefficients, offset)
+    assert P == expected
+    assert P.variables == expected.variables
+
+    assert PUBOMatrix.from_arrays([0], [], []) == {}
+
+    with assert_raises(ValueError):
+        PUBOMatrix.from_arrays([0, 2], [0, -1], [1])
+    with assert_raises(ValueError):
+        PUBOMatrix.from_arrays([0, 2], [0, 1], [1, 2])
+    with assert_raises(ValueError):
+        PUBOMatrix.from_arrays([0, 2], [0, 1], [1], labels=[0])
+
+
+def test_pubomatrix_value_batch():
+
+    P = PUBOMatrix({(0, 1, 2): 2, (1,): -1, (0, 3): 1.5, (): 3})
+    states = [[int(b) for b in format(i, '04b')] for i in range(16)]
+    assert allclose(P.value_batch(states), [P.value(x) for x in states])
+    assert allclose(PUBOMatrix({(): 2}).value_batch([[], []]), [2, 2])
+
+    with assert_raises(ValueError):
+        P.value_batch(states[0])
+    with assert_raises(ValueError):
+        P.value_batch([x[:3] for x in states])
+
+
+def test_squash_key_cache():
+
+    for _ in range(2):
+        assert PUBOMatrix.squash_key((2, 0, 2, 1)) == (0, 1, 2)
+        assert PUBOMatrix.squash_key((0, 1)) == (0, 1)
+        assert PUBOMatrix.squash_key((1, 0)) == (0, 1)
+        assert PUBOMatrix.squash_key((1, 1)) == (1,)
+        assert PUSOMatrix.squash_key((2, 0, 2, 1)) == (0, 1)
+        assert PUSOMatrix.squash_key((1, 1)) == ()
+        with assert_raises(KeyError):
+            QUBOMatrix.squash_key((2, 0, 2, 1))
+        with assert_raises(KeyError):
+            PUBOMatrix.squash_key((0, 'a'))
+        with assert_raises(KeyError):
+            PUBOMatrix.squash_key([0, 1])
+        assert PUBO.squash_key((0, 'a')) in ((0, 'a'), ('a', 0))
+
+    # each class has its own cache
+    assert PUBOMatrix._squash_cache is not QUBOMatrix._squash_cache
+    assert PUBOMatrix._squash_cache is not PUBO._squash_cache
+    assert (0, 'a') not in PUBOMatrix._squash_cache
+
+    # keys that are equal to a valid key that is in the cache are still
+    # checked
+    for key in ((1, 2), (2, 1)):
+        assert PUBOMatrix.squash_key(key) == (1, 2)
+        with assert_raises(KeyError):
+            PUBOMatrix.squash_key((float(key[0]), key[1]))
+        P = PUBOMatrix()
+        P[key] += 1
+        with assert_raises(KeyError):
+            P[(float(key[0]), key[1])] += 1
+        assert P == {(1, 2): 1}
+    assert QUBOMatrix.squash_key((0, 1)) == (0, 1)
+    with assert_raises(KeyError):
+        QUBOMatrix.squash_key((0., 1))
+    Q = QUBOMatrix({(0, 1): 1})
+    with assert_raises(KeyError):
+        Q[(0., 1)] = 2
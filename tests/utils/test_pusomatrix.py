@@ -309,3 +309,24 @@ def test_pusomatrix_solve_bruteforce():
          {0: -1, 1: -1, 3: 1, 4: 1, 5: 1}]
     )
     assert all(allclose(H.value(s), -3) for s in sols)
+
+
+def test_pusomatrix_from_arrays():
+
+    P = PUSOMatrix.from_arrays(
+        [0, 3, 5, 8], [2, 0, 1, 1, 1, 0, 1, 0], [2, -1, 1], offset=-1
+    )
+    assert P == {(0, 1, 2): 2, (1,): 1, (): -2}
+    assert P.degree == 3 and P.num_binary_variables == 3
+
+    expected = PUSOMatrix({(0, 3, 1): 2, (1, 2): -1, (4,): 1, (): 3})
+    offset, term_ptr, variables, coefficients = expected.to_arrays()
+    P = PUSOMatrix.from_arrays(term_ptr, variables, coefficients, offset)
+    assert P == expected
+
+
+def test_pusomatrix_value_batch():
+
+    P = PUSOMatrix({(0, 1, 2): 2, (1,): -1, (0, 3): 1.5, (): 3})
+    states = [[1 - 2 * int(b) for b in format(i, '04b')] for i in range(16)]
+    assert allclose(P.value_batch(states), [P.value(z) for z in states])
@@ -304,3 +304,40 @@ def test_qubomatrix_solve_bruteforce():
     sols = Q.solve_bruteforce(True)
     assert sols == [{0: 0, 1: 0}, {0: 0, 1: 1}, {0: 1, 1: 1}]
     assert all(allclose(Q.value(s), 1) for s in sols)
+
+
+def test_qubomatrix_to_arrays():
+
+    Q = QUBOMatrix({(0, 1): 2, (2,): -1, (1, 3): 1, (0, 3): -2, (): 3})
+    offset, linear, row, col, values = Q.to_arrays()
+    assert offset == 3
+    assert linear.tolist() == [0, 0, -1, 0]
+    assert all(i < j for i, j in zip(row, col))
+    assert {(i, j): v for i, j, v in zip(row, col, values)} == {
+        k: v for k, v in Q.items() if len(k) == 2
+    }
+
+    offset, linear, indptr, col, values = Q.to_arrays(csr=True)
+    assert indptr.tolist() == [0, 2, 3, 3, 3]
+    assert col.tolist() == [1, 3, 3]
+    assert values.tolist() == [2, -2, 1]
+
+    offset, linear, indptr, col, values = QUBOMatrix().to_arrays(True)
+    assert offset == 0
+    assert indptr.tolist() == [0]
+    assert not len(linear) and not len(col) and not len(values)
+
+
+def test_qubomatrix_from_arrays():
+
+    Q = QUBOMatrix.from_arrays([1, 0, 2, 3], [0, 1, 2, 1], [1, 2, -1, 0],
+                               linear=[1, 0, 1], offset=2)
+    assert Q == {(0, 1): 3, (0,): 1, (): 2}
+    assert Q.degree == 2 and Q.num_binary_variables == 2
+
+    expected = QUBOMatrix({(0, 3): 2, (1, 2): -1, (4,): 1, (): 3})
+    offset, linear, row, col, values = expected.to_arrays()
+    assert QUBOMatrix.from_arrays(row, col, values, linear, offset) == expected
+
+    with assert_raises(ValueError):
+        QUBOMatrix.from_arrays([0, 1], [1], [1])
@@ -305,3 +305,28 @@ def test_qusomatrix_solve_bruteforce():
     sols = L.solve_bruteforce(True)
     assert sols == [{0: 1, 1: 1}, {0: -1, 1: 1}, {0: -1, 1: -1}]
     assert all(allclose(L.value(s), 1) for s in sols)
+
+
+def test_qusomatrix_to_arrays():
+
+    L = QUSOMatrix({(0, 1): 2, (2,): -1, (1, 3): 1, (): 3})
+    offset, h, row, col, J = L.to_arrays()
+    assert offset == 3
+    assert h.tolist() == [0, 0, -1, 0]
+    assert row.tolist() == [0, 1] and col.tolist() == [1, 3]
+    assert J.tolist() == [2, 1]
+
+    offset, h, indptr, col, J = L.to_arrays(csr=True)
+    assert indptr.tolist() == [0, 1, 2, 2, 2]
+    assert col.tolist() == [1, 3]
+
+
+def test_qusomatrix_from_arrays():
+
+    L = QUSOMatrix.from_arrays([1, 0, 2], [0, 1, 2], [1, 2, -1],
+                               linear=[1, 0, 0], offset=2)
+    assert L == {(0, 1): 3, (0,): 1, (): 1}
+
+    expected = QUSOMatrix({(0, 3): 2, (1, 2): -1, (4,): 1, (): 3})
+    offset, h, row, col, J = expected.to_arrays()
+    assert QUSOMatrix.from_arrays(row, col, J, h, offset) == expected